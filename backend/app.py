@@ -1,13 +1,20 @@
+import asyncio
 import logging
-from fastapi import FastAPI
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from controllers.tickets_controller import router as tickets_router
-from controllers.rag_controller import router as rag_router
+from utils.log import configure_logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging before the controllers are imported, so their import-time output is captured too
+# (level, format and DEBUG sampling come from LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+from controllers.tickets_controller import router as tickets_router
+from controllers.rag_controller import router as rag_router
+from controllers.ingest_controller import router as ingest_router
+
 app = FastAPI(title="Atlan Customer Support Backend")
 
 # Add CORS middleware
@@ -22,14 +29,45 @@ app.add_middleware(
 # Include routes
 app.include_router(tickets_router, prefix="/api/tickets", tags=["Tickets"])
 app.include_router(rag_router, prefix="/api/rag", tags=["RAG"])
+app.include_router(ingest_router, prefix="/api/ingest", tags=["Ingestion"])
+
+def configure_executor():
+    """
+    Size the thread pool that blocking SDK calls run in (asyncio.to_thread).
+    The default of cpu_count + 4 threads would otherwise cap concurrent
+    OpenAI/Pinecone calls below the generation scheduler's limit and queue
+    them first come first served, regardless of priority.
+    """
+    from config.settings import BLOCKING_IO_THREADS
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=BLOCKING_IO_THREADS, thread_name_prefix="blocking-io")
+    )
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Atlan Customer Support Backend starting up...")
+    configure_executor()
     logger.info("✅ CORS middleware configured")
     logger.info("✅ Routes included")
+    from services.pinecone_client import pinecone_factory
+    pinecone_factory.start_health_checks()
+    from services.vector_outbox import vector_outbox
+    vector_outbox.start()
+    from config.settings import INGEST_ENABLED
+    if INGEST_ENABLED:
+        from services.ingestion_gateway import ingestion_gateway
+        ingestion_gateway.start()
     logger.info("🎉 Application ready!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    from services.pinecone_client import pinecone_factory
+    pinecone_factory.stop_health_checks()
+    from services.ingestion_gateway import ingestion_gateway
+    await ingestion_gateway.stop()
+    from services.vector_outbox import vector_outbox
+    await vector_outbox.stop()
+
 @app.get("/")
 def root():
     logger.info("📡 Root endpoint accessed")
@@ -40,6 +78,13 @@ def health_check():
     logger.info("🏥 Health check endpoint accessed")
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: per-stage latency histograms, token usage, cache hits and external error counts"""
+    from utils.metrics import render_metrics
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.post("/api/init")
 async def initialize_data():
     """Initialize the system by classifying sample tickets"""
@@ -49,10 +94,30 @@ async def initialize_data():
 
 # Add missing endpoints that frontend expects
 @app.get("/tickets")
-async def get_tickets_endpoint():
+async def get_tickets_endpoint(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    topic: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    priority: Optional[str] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    sort_by: str = "created_at",
+    order: str = "desc"
+):
     """Get tickets endpoint for frontend"""
     from controllers.tickets_controller import get_tickets
-    return await get_tickets()
+    return await get_tickets(
+        limit=limit,
+        cursor=cursor,
+        topic=topic,
+        sentiment=sentiment,
+        priority=priority,
+        created_after=created_after,
+        created_before=created_before,
+        sort_by=sort_by,
+        order=order
+    )
 
 @app.post("/query")
 async def submit_query(data: dict):
@@ -0,0 +1,64 @@
+"""
+Fixtures for the pytest-benchmark micro-benchmarks.
+
+Run from the backend directory:
+    python -m pytest benchmarks --benchmark-only
+Compare against the committed baseline:
+    python -m pytest benchmarks --benchmark-only --benchmark-storage=benchmarks/baselines --benchmark-compare=0001 --benchmark-compare-fail=mean:15%
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# pytest-benchmark is a dev-only dependency; without it there is nothing to run here
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    collect_ignore_glob = ["test_*.py"]
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Representative support queries with the topic the classifier would assign
+RESOLVER_QUERIES = [
+    ("API/SDK", "How do I install the Python SDK and authenticate with an API key?"),
+    ("API/SDK", "Is there a Java SDK example for creating glossary terms?"),
+    ("Connector", "What permissions does the Snowflake connector need?"),
+    ("Connector", "Databricks crawler fails with a timeout"),
+    ("How-to", "How to set up lineage for dbt models"),
+    ("SSO", "Configure SAML SSO with Okta"),
+    ("Glossary", "Bulk import glossary terms from CSV"),
+    ("Best practices", "Best practices for organizing Tableau dashboards in Atlan")
+]
+
+@pytest.fixture(scope="session")
+def crawled_docs():
+    """The 600-page crawled documentation snapshot"""
+    with open(BACKEND_DIR / "atlan_docs_data_extended.json") as f:
+        return json.load(f)
+
+@pytest.fixture(scope="session")
+def docs_page_html():
+    """A developer.atlan.com-style page (navigation, article, code blocks) assembled from the crawled content"""
+    return (FIXTURES_DIR / "python_sdk_page.html").read_text()
+
+@pytest.fixture(scope="session")
+def resolver_queries():
+    return RESOLVER_QUERIES
+
+@pytest.fixture(scope="session")
+def rag_crawler_class():
+    """ImprovedAtlanRAGCrawler, imported with Pinecone/OpenAI faked out since the module connects on import"""
+    from benchmarks.fakes import FakeBackends, installed
+
+    os.environ.setdefault("PINECONE_DOCS_INDEX", "atlan-docs")
+    os.environ.setdefault("PINECONE_USE_GRPC", "false")
+    with installed(FakeBackends(scale=0)):
+        from services.improved_atlan_rag_crawler import ImprovedAtlanRAGCrawler
+    return ImprovedAtlanRAGCrawler
@@ -0,0 +1,68 @@
+"""
+Query corpus for the benchmark harness: the sample tickets plus seeded
+synthetic variants, so runs of any size are reproducible.
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+SAMPLE_TICKETS_PATH = Path(__file__).parent.parent / "data" / "sample_tickets.json"
+
+PREFIXES = ["", "Hi team, ", "Quick question: ", "Urgent: ", "Hello, ", "Following up - "]
+SUFFIXES = ["", " Thanks!", " This is blocking our release.", " Any docs would help.", " We are on the enterprise plan."]
+TECHNOLOGIES = ["Snowflake", "Databricks", "BigQuery", "Redshift", "Tableau", "Power BI", "dbt", "Python SDK", "Java SDK"]
+
+# Short chat-style questions, closer to what /query receives than full tickets
+SYNTHETIC_QUESTIONS = [
+    "How do I connect {tech} to Atlan?",
+    "What permissions does the {tech} connector need?",
+    "How do I set up SSO with Okta?",
+    "How do I authenticate with the {tech}?",
+    "Why is lineage missing for my {tech} tables?",
+    "How do I create glossary terms in bulk?",
+    "How do I tag PII columns automatically?",
+    "What are best practices for organizing {tech} assets?",
+    "Can I trigger a webhook when an asset changes?",
+    "What's a good recipe for pasta?"
+]
+
+def load_sample_tickets() -> List[Dict]:
+    with SAMPLE_TICKETS_PATH.open() as f:
+        return json.load(f)
+
+def build_tickets(count: int, seed: int = 0) -> List[Dict]:
+    """Return `count` tickets: the samples first, then reworded variants with unique ids"""
+    rng = random.Random(seed)
+    samples = load_sample_tickets()
+    tickets = []
+    for i in range(count):
+        base = samples[i % len(samples)]
+        if i < len(samples):
+            tickets.append(dict(base))
+            continue
+        tickets.append({
+            "id": f"{base['id']}-V{i}",
+            "subject": base.get("subject", ""),
+            "body": f"{rng.choice(PREFIXES)}{base['body']}{rng.choice(SUFFIXES)}",
+            "channel": rng.choice(["Email", "Web Chat", "WhatsApp", "Voice"])
+        })
+    return tickets
+
+def build_queries(count: int, seed: int = 0) -> List[str]:
+    """Return `count` queries mixing ticket subjects, ticket bodies and synthetic questions"""
+    rng = random.Random(seed)
+    samples = load_sample_tickets()
+    queries = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            ticket = rng.choice(samples)
+            queries.append(f"{rng.choice(PREFIXES)}{ticket.get('subject') or ticket['body']}")
+        elif kind == 1:
+            ticket = rng.choice(samples)
+            queries.append(f"{ticket['body']}{rng.choice(SUFFIXES)}")
+        else:
+            queries.append(rng.choice(SYNTHETIC_QUESTIONS).format(tech=rng.choice(TECHNOLOGIES)))
+    return queries
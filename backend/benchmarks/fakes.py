@@ -0,0 +1,339 @@
+"""
+Deterministic stand-ins for the OpenAI and Pinecone SDKs used by the
+benchmark harness.
+
+The fakes mimic the call shapes the services use (openai.ChatCompletion /
+openai.Embedding and pinecone.Pinecone().Index()) and block for a latency
+drawn from a seeded log-normal distribution, the same way the real
+synchronous SDK calls block. Responses are derived from the prompt text, so a
+given corpus and seed always produce the same run.
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+import numpy as np
+
+# Median and p99 latency (ms) per backend call, roughly matching production
+DEFAULT_LATENCIES = {
+    "chat": (900.0, 3000.0),
+    "embed": (150.0, 500.0),
+    "vector_query": (40.0, 150.0),
+    "vector_upsert": (30.0, 120.0)
+}
+
+# Topic keywords the fake classifier uses; the first match wins
+FAKE_TOPIC_KEYWORDS = [
+    ("SSO", ["sso", "saml", "okta", "login", "azure ad"]),
+    ("API/SDK", ["api", "sdk", "python", "java", "endpoint", "webhook"]),
+    ("Connector", ["snowflake", "connector", "redshift", "bigquery", "databricks", "crawler"]),
+    ("Lineage", ["lineage", "upstream", "downstream"]),
+    ("Glossary", ["glossary", "term"]),
+    ("Sensitive data", ["pii", "sensitive", "gdpr", "mask"]),
+    ("Best practices", ["best practice", "recommend", "strategy"]),
+    ("How-to", ["how do i", "how to", "steps", "setup", "set up", "configure"]),
+    ("Product", ["atlan", "ui", "feature", "dashboard"])
+]
+
+# Native output size per embedding model, as the API reports it
+MODEL_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072
+}
+
+class LatencyModel:
+    """Seeded log-normal latency, parameterised by its median and p99 in milliseconds"""
+
+    def __init__(self, median_ms: float, p99_ms: float, seed: int = 0, scale: float = 1.0):
+        self.median_ms = median_ms
+        # p99 of a log-normal sits 2.326 standard deviations above the median in log space
+        self.sigma = math.log(max(p99_ms, median_ms) / median_ms) / 2.326 if median_ms > 0 else 0.0
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_seconds(self) -> float:
+        if self.scale <= 0 or self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            value = self._random.lognormvariate(math.log(self.median_ms), self.sigma)
+        return value * self.scale / 1000
+
+    def wait(self):
+        delay = self.sample_seconds()
+        if delay:
+            time.sleep(delay)
+
+def _stable_hash(text: str) -> int:
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+def fake_embedding(text: str, dimension: int) -> List[float]:
+    """Hashed bag-of-words vector: texts sharing words get similar embeddings"""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for token in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        vector[_stable_hash(token) % dimension] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector.tolist()
+
+def fake_classification(text: str) -> Dict:
+    lowered = text.lower()
+    topic = next((name for name, keywords in FAKE_TOPIC_KEYWORDS if any(keyword in lowered for keyword in keywords)), "General")
+    if any(word in lowered for word in ["urgent", "asap", "blocked", "critical"]):
+        sentiment, priority = "Urgent", "P0"
+    elif any(word in lowered for word in ["not working", "fail", "error", "frustrat"]):
+        sentiment, priority = "Frustrated", "P1"
+    else:
+        sentiment, priority = "Neutral", "P2"
+    return {
+        "topic": topic,
+        "sentiment": sentiment,
+        "priority": priority,
+        "confidence": 0.9,
+        "topic_reasoning": f"Mentions {topic} terms",
+        "sentiment_reasoning": f"Wording reads as {sentiment}",
+        "priority_reasoning": f"Impact suggests {priority}"
+    }
+
+def _chat_usage(prompt: str, completion: str) -> Dict:
+    # ~4 characters per token is close enough for benchmark accounting
+    prompt_tokens = max(1, len(prompt) // 4)
+    completion_tokens = max(1, len(completion) // 4)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+class _Message(dict):
+    """dict with attribute access, so both response["choices"][0]["message"] and response.choices[0].message work"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+class FakeChatCompletion:
+    """
+    Chat completions. With a capacity, at most that many calls are served at
+    once and the rest wait, like a provider at its concurrency limit.
+    """
+
+    def __init__(self, latency: LatencyModel, capacity: int = 0):
+        self.latency = latency
+        self.calls = 0
+        self._capacity = threading.BoundedSemaphore(capacity) if capacity > 0 else None
+
+    def create(self, model: str = "", messages: Optional[List[Dict]] = None, **kwargs):
+        self.calls += 1
+        if self._capacity is not None:
+            with self._capacity:
+                self.latency.wait()
+        else:
+            self.latency.wait()
+        prompt = "\n".join(message.get("content", "") for message in messages or [])
+        content = self._respond(prompt)
+        tools = kwargs.get("tools")
+        if tools:
+            # Forced function call: the output comes back as the call's arguments
+            name = tools[0]["function"]["name"]
+            if name == "record_classifications":
+                content = json.dumps({"classifications": json.loads(content)})
+            message = _Message(role="assistant", content=None, tool_calls=[
+                _Message(id=f"call_{self.calls}", type="function", function=_Message(name=name, arguments=content))
+            ])
+            return _Message(
+                choices=[_Message(message=message, finish_reason="stop")],
+                usage=_chat_usage(prompt, content),
+                model=model
+            )
+        return _Message(
+            choices=[_Message(message=_Message(role="assistant", content=content), finish_reason="stop")],
+            usage=_chat_usage(prompt, content),
+            model=model
+        )
+
+    @staticmethod
+    def _respond(prompt: str) -> str:
+        if "TICKETS (JSON array):" in prompt:
+            payload = prompt.split("TICKETS (JSON array):", 1)[1]
+            tickets, _ = json.JSONDecoder().raw_decode(payload[payload.index("["):])
+            return json.dumps([
+                {"id": ticket["id"], **fake_classification(ticket.get("subject", "") + " " + ticket.get("body", ""))}
+                for ticket in tickets
+            ])
+        if "TICKET CONTENT:" in prompt:
+            # Only the ticket itself; the guidelines before it mention every keyword
+            ticket = prompt.split("TICKET CONTENT:", 1)[1]
+            return json.dumps(fake_classification(ticket))
+        if "follow-up questions" in prompt:
+            return "How do I verify this is working?\nWhat permissions does this need?\nWhere can I find more examples?"
+        return "## Answer\n\nBased on the documentation, follow these steps:\n\n1. Open the settings page.\n2. Configure the integration.\n3. Verify the connection."
+
+class FakeEmbedding:
+    def __init__(self, latency: LatencyModel, dimension: int):
+        self.latency = latency
+        self.dimension = dimension
+        self.calls = 0
+
+    def create(self, input="", model: str = "", dimensions: Optional[int] = None, **kwargs):
+        self.calls += 1
+        self.latency.wait()
+        texts = input if isinstance(input, list) else [input]
+        # Like the API: the model's native size unless shortened with `dimensions`
+        dimension = dimensions or MODEL_DIMENSIONS.get(model, self.dimension)
+        return _Message(
+            data=[_Message(embedding=fake_embedding(text, dimension), index=i) for i, text in enumerate(texts)],
+            usage={"prompt_tokens": sum(len(text) // 4 for text in texts), "total_tokens": sum(len(text) // 4 for text in texts)},
+            model=model
+        )
+
+class FakeMatch(_Message):
+    """Query match supporting both match["metadata"] and match.metadata access"""
+
+class FakeIndex:
+    """In-memory brute-force cosine index"""
+
+    def __init__(self, name: str, query_latency: LatencyModel, upsert_latency: LatencyModel):
+        self.name = name
+        self.query_latency = query_latency
+        self.upsert_latency = upsert_latency
+        self._ids: List[str] = []
+        self._vectors: List[List[float]] = []
+        self._metadata: List[Dict] = []
+        self._positions: Dict[str, int] = {}
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, **kwargs):
+        self.upsert_latency.wait()
+        with self._lock:
+            for item in vectors:
+                vector_id, values, metadata = item if isinstance(item, tuple) else (item["id"], item["values"], item.get("metadata", {}))
+                if vector_id in self._positions:
+                    position = self._positions[vector_id]
+                    self._vectors[position], self._metadata[position] = values, metadata
+                else:
+                    self._positions[vector_id] = len(self._ids)
+                    self._ids.append(vector_id)
+                    self._vectors.append(values)
+                    self._metadata.append(metadata)
+            self._matrix = None
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector=None, top_k: int = 5, include_metadata: bool = True, include_values: bool = False, filter=None, **kwargs):
+        self.query_latency.wait()
+        with self._lock:
+            if not self._ids:
+                return {"matches": []}
+            if self._matrix is None:
+                self._matrix = np.asarray(self._vectors, dtype=np.float32)
+            scores = self._matrix @ np.asarray(vector, dtype=np.float32)
+            if filter:
+                # Equality filters only ({"field": value} or {"field": {"$eq": value}})
+                wanted = {field: condition["$eq"] if isinstance(condition, dict) else condition for field, condition in filter.items()}
+                excluded = [i for i, metadata in enumerate(self._metadata) if any(metadata.get(field) != value for field, value in wanted.items())]
+                scores[excluded] = -np.inf
+                top_k = min(top_k, len(self._ids) - len(excluded))
+            top = np.argsort(-scores)[:top_k]
+            return {"matches": [
+                FakeMatch(
+                    id=self._ids[i],
+                    score=float(scores[i]),
+                    metadata=self._metadata[i] if include_metadata else {},
+                    values=self._vectors[i] if include_values else []
+                )
+                for i in top
+            ]}
+
+    def fetch(self, ids: List[str], **kwargs):
+        self.query_latency.wait()
+        with self._lock:
+            return {"vectors": {
+                vector_id: {"id": vector_id, "values": self._vectors[self._positions[vector_id]], "metadata": self._metadata[self._positions[vector_id]]}
+                for vector_id in ids if vector_id in self._positions
+            }}
+
+    def describe_index_stats(self, **kwargs):
+        return {"total_vector_count": len(self._ids), "dimension": len(self._vectors[0]) if self._vectors else 0}
+
+class _IndexList(list):
+    def names(self):
+        return [index["name"] for index in self]
+
+class FakePinecone:
+    """Stands in for pinecone.Pinecone; every client shares the same indexes"""
+
+    indexes: Dict[str, FakeIndex] = {}
+    query_latency: LatencyModel = LatencyModel(0, 0)
+    upsert_latency: LatencyModel = LatencyModel(0, 0)
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        self.api_key = api_key
+
+    def list_indexes(self):
+        return _IndexList({"name": name} for name in self.indexes)
+
+    def create_index(self, name: str, **kwargs):
+        self.Index(name)
+
+    def describe_index(self, name: str):
+        return _Message(name=name, dimension=self.indexes[name].describe_index_stats()["dimension"])
+
+    def Index(self, name: str, **kwargs) -> FakeIndex:
+        if name not in self.indexes:
+            self.indexes[name] = FakeIndex(name, self.query_latency, self.upsert_latency)
+        return self.indexes[name]
+
+class FakeBackends:
+    """Holds the configured fakes so the harness can seed indexes and read call counts"""
+
+    def __init__(self, latencies: Optional[Dict] = None, seed: int = 0, scale: float = 1.0, dimension: int = 1536, chat_capacity: int = 0):
+        latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        models = {
+            name: LatencyModel(median, p99, seed=seed + offset, scale=scale)
+            for offset, (name, (median, p99)) in enumerate(sorted(latencies.items()))
+        }
+        self.dimension = dimension
+        self.chat = FakeChatCompletion(models["chat"], chat_capacity)
+        self.embedding = FakeEmbedding(models["embed"], dimension)
+        FakePinecone.indexes = {}
+        FakePinecone.query_latency = models["vector_query"]
+        FakePinecone.upsert_latency = models["vector_upsert"]
+
+    def seed_index(self, name: str, documents: List[Dict]):
+        """Load documents ({"url", "title", "content"}) into an index without simulated latency"""
+        index = FakePinecone().Index(name)
+        with index._lock:
+            for i, document in enumerate(documents):
+                index._positions[f"doc-{i}"] = len(index._ids)
+                index._ids.append(f"doc-{i}")
+                index._vectors.append(fake_embedding(document.get("title", "") + " " + document.get("content", ""), self.dimension))
+                index._metadata.append({
+                    "content": document.get("content", "")[:2000],
+                    "url": document.get("url", ""),
+                    "title": document.get("title", ""),
+                    "source": document.get("title", "")
+                })
+            index._matrix = None
+
+    def call_counts(self) -> Dict[str, int]:
+        return {"chat": self.chat.calls, "embed": self.embedding.calls}
+
+@contextmanager
+def installed(backends: FakeBackends):
+    """
+    Patch the SDK entry points. Must wrap the first import of the app, since
+    services create their Pinecone clients at import time.
+    """
+    with patch("openai.ChatCompletion", new=backends.chat, create=True), \
+         patch("openai.Embedding", new=backends.embedding, create=True), \
+         patch("pinecone.Pinecone", new=FakePinecone):
+        yield backends
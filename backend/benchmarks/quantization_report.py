@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Memory and recall report for the local vector store's quantization modes.
+
+By default vectors are synthetic (clustered Gaussian); pass --store to
+report on an existing local store instead. Its float32 file is reopened
+under each quantization, so the numbers reflect the real embeddings.
+
+Examples (from the backend directory):
+    python -m benchmarks.quantization_report --vectors 100000 --dimension 3072
+    python -m benchmarks.quantization_report --store vector_store/atlan-tickets --dimension 3072
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services.local_vector_store import QUANTIZATIONS, LocalVectorStore
+
+def synthetic_vectors(count: int, dimension: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 500), dimension))
+    return (centers[rng.integers(0, len(centers), count)] + rng.normal(size=(count, dimension))).astype(np.float32)
+
+def report(store: LocalVectorStore, queries: np.ndarray, top_k: int) -> dict:
+    start = time.perf_counter()
+    for query in queries:
+        store.query(vector=query, top_k=top_k, include_metadata=False)
+    query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return {**store.memory_report(), **store.recall_report(queries, top_k), "query_ms": round(query_ms, 3)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory and recall of int8 / binary vector quantization")
+    parser.add_argument("--vectors", type=int, default=20000, help="synthetic vectors to index")
+    parser.add_argument("--dimension", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore-multiplier", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store", help="path of an existing local store (without extension) to report on")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed + 1)
+    workdir = Path(tempfile.mkdtemp(prefix="quantization-report-"))
+    try:
+        if args.store:
+            base = Path(args.store)
+            for suffix in (".f32", ".db"):
+                shutil.copy(f"{base}{suffix}", workdir / f"store{suffix}")
+            source = LocalVectorStore(str(workdir / "store"), args.dimension, quantization="none")
+            count = source.describe_index_stats()["total_vector_count"]
+            if not count:
+                raise SystemExit(f"No vectors in {args.store}")
+            # Perturbed copies of stored vectors stand in for queries about the same topics
+            sample = np.asarray(source._vectors[rng.choice(count, size=min(args.queries, count), replace=False)])
+        else:
+            vectors = synthetic_vectors(args.vectors, args.dimension, args.seed)
+            source = LocalVectorStore(str(workdir / "store"), args.dimension, quantization="none")
+            for start in range(0, len(vectors), 1000):
+                source.upsert([(f"v{i}", vectors[i], {}) for i in range(start, min(start + 1000, len(vectors)))])
+            sample = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+        source.flush()
+        queries = sample + 0.3 * rng.normal(size=sample.shape).astype(np.float32) * np.abs(sample).mean()
+
+        results = [report(source, queries, args.top_k)]
+        for quantization in QUANTIZATIONS[1:]:
+            store = LocalVectorStore(str(workdir / "store"), args.dimension, quantization=quantization, rescore_multiplier=args.rescore_multiplier)
+            results.append(report(store, queries, args.top_k))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results[0]['vectors']} vectors x {args.dimension} dims, top_k={args.top_k}, rescore x{args.rescore_multiplier}")
+    print(f"{'quantization':<13} {'RAM MB':>9} {'bytes/vec':>10} {'smaller':>8} {'recall':>7} {'no rescore':>11} {'query ms':>9}")
+    for result in results:
+        print(
+            f"{result['quantization']:<13} {result['ram_bytes'] / 1e6:>9.1f} {result['bytes_per_vector']:>10.0f} "
+            f"{result['compression']:>7.1f}x {result['recall_at_k']:>7.3f} {result['recall_at_k_without_rescoring']:>11.3f} {result['query_ms']:>9.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the query pipeline, ticket classification and URL resolvers.
+
+OpenAI and Pinecone are replaced with deterministic fakes (benchmarks/fakes.py)
+whose latency follows a configurable log-normal distribution, so runs need no
+network or API keys and are repeatable for a given seed.
+
+Examples (from the backend directory):
+    python -m benchmarks.run_benchmark --scenario query --requests 200 --concurrency 16
+    python -m benchmarks.run_benchmark --scenario classify --requests 20 --batch-size 10
+    python -m benchmarks.run_benchmark --scenario resolve --requests 2000 --latency-scale 0
+    python -m benchmarks.run_benchmark --scenario query --baseline benchmarks/results/query-baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.corpus import build_queries, build_tickets
+from benchmarks.fakes import DEFAULT_LATENCIES, FakeBackends, fake_classification, installed
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def summarize(values_ms: List[float]) -> Dict:
+    return {
+        "count": len(values_ms),
+        "mean": round(sum(values_ms) / len(values_ms), 3) if values_ms else 0.0,
+        "p50": round(percentile(values_ms, 50), 3),
+        "p95": round(percentile(values_ms, 95), 3),
+        "p99": round(percentile(values_ms, 99), 3),
+        "max": round(max(values_ms), 3) if values_ms else 0.0
+    }
+
+def parse_latency(values: List[str]) -> Dict:
+    """Parse --latency name=median_ms:p99_ms overrides"""
+    latencies = {}
+    for value in values or []:
+        name, _, spec = value.partition("=")
+        median, _, p99 = spec.partition(":")
+        if name not in DEFAULT_LATENCIES:
+            raise SystemExit(f"Unknown latency target '{name}' (expected one of {', '.join(DEFAULT_LATENCIES)})")
+        latencies[name] = (float(median), float(p99 or median))
+    return latencies
+
+async def run_concurrently(payloads: List, concurrency: int, send) -> List[Dict]:
+    """
+    Send every payload with at most `concurrency` in flight; returns one record per payload.
+    `send` returns whether the request succeeded, or a dict with "ok" and extra fields to record.
+    """
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    records = []
+
+    async def worker():
+        while not queue.empty():
+            payload = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                outcome = await send(payload)
+            except Exception:
+                outcome = False
+            fields = outcome if isinstance(outcome, dict) else {"ok": outcome}
+            records.append({"latency_ms": (time.perf_counter() - start) * 1000, **fields})
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return records
+
+async def run_http_scenario(app, scenario: str, args) -> Dict:
+    import httpx
+
+    if scenario == "query":
+        payloads = [{"query": query} for query in build_queries(args.warmup + args.requests, args.seed)]
+
+        async def send(client, payload):
+            response = await client.post("/query", json=payload)
+            if response.status_code != 200:
+                return False
+            # Scheduling priority, as the generation scheduler sees it
+            classification = response.json().get("classification", {})
+            return {"ok": True, "priority": request_priority(classification.get("priority"), classification.get("sentiment"))}
+    else:
+        tickets = build_tickets((args.warmup + args.requests) * args.batch_size, args.seed)
+        payloads = [tickets[i:i + args.batch_size] for i in range(0, len(tickets), args.batch_size)]
+
+        async def send(client, payload):
+            response = await client.post("/api/tickets/import", json=payload)
+            return response.status_code == 200 and "error" not in response.json()
+
+    from app import configure_executor
+    from utils.scheduler import request_priority
+
+    from services.vector_outbox import vector_outbox
+
+    # The ASGI transport does not run the app's startup hooks
+    configure_executor()
+    vector_outbox.start()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://benchmark", timeout=None) as client:
+            if args.warmup:
+                await run_concurrently(payloads[:args.warmup], args.concurrency, lambda payload: send(client, payload))
+            start = time.perf_counter()
+            records = await run_concurrently(payloads[args.warmup:], args.concurrency, lambda payload: send(client, payload))
+            duration = time.perf_counter() - start
+    finally:
+        # Upserts still pending are drained after the measured window
+        await vector_outbox.stop()
+    return {"records": records, "duration": duration}
+
+def run_resolve_scenario(args) -> Dict:
+    """URL resolution is synchronous and CPU-bound, so it is timed in-process"""
+    from services.crawled_data_url_resolver import url_resolver
+
+    queries = build_queries(args.warmup + args.requests, args.seed)
+    topics = [fake_classification(query)["topic"] for query in queries]
+    for query, topic in zip(queries[:args.warmup], topics[:args.warmup]):
+        url_resolver.resolve_urls_with_topic(topic, query)
+
+    records = []
+    start = time.perf_counter()
+    for query, topic in zip(queries[args.warmup:], topics[args.warmup:]):
+        request_start = time.perf_counter()
+        url_resolver.resolve_urls_with_topic(topic, query)
+        records.append({"latency_ms": (time.perf_counter() - request_start) * 1000, "ok": True})
+    return {"records": records, "duration": time.perf_counter() - start}
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def run(args) -> Dict:
+    os.chdir(BACKEND_DIR)
+    # Keep stores in memory and quiet per-request logging unless asked otherwise
+    for name, value in {
+        "OPENAI_API_KEY": "benchmark",
+        "PINECONE_API_KEY": "benchmark",
+        "PINECONE_DOCS_INDEX": "atlan-docs",
+        "PINECONE_TICKETS_INDEX": "atlan-tickets",
+        "PINECONE_USE_GRPC": "false",
+        "CLASSIFICATION_CACHE_PATH": ":memory:",
+        "TICKET_STORE_PATH": ":memory:",
+        "VECTOR_OUTBOX_PATH": ":memory:",
+        "INGEST_QUEUE_PATH": ":memory:",
+        "LOG_LEVEL": "WARNING"
+    }.items():
+        os.environ.setdefault(name, value)
+
+    backends = FakeBackends(
+        latencies=parse_latency(args.latency),
+        seed=args.seed,
+        scale=args.latency_scale,
+        dimension=args.dimension,
+        chat_capacity=args.chat_capacity
+    )
+    with open(BACKEND_DIR / "atlan_docs_data_extended.json") as f:
+        backends.seed_index(os.environ["PINECONE_DOCS_INDEX"], json.load(f))
+
+    with installed(backends):
+        from app import app
+        from utils.metrics import add_stage_observer, remove_stage_observer
+
+        stage_samples = defaultdict(list)
+        observer = lambda stage, seconds: stage_samples[stage].append(seconds * 1000)
+        add_stage_observer(observer)
+        try:
+            if args.scenario == "resolve":
+                outcome = run_resolve_scenario(args)
+            else:
+                outcome = asyncio.run(run_http_scenario(app, args.scenario, args))
+        finally:
+            remove_stage_observer(observer)
+
+    records = outcome["records"]
+    duration = outcome["duration"]
+    latencies = [record["latency_ms"] for record in records if record["ok"]]
+    result = {
+        "scenario": args.scenario,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size if args.scenario == "classify" else None,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "latency_scale": args.latency_scale,
+            "latencies_ms": {**DEFAULT_LATENCIES, **parse_latency(args.latency)},
+            "dimension": args.dimension,
+            "chat_capacity": args.chat_capacity
+        },
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(records) / duration, 3) if duration else 0.0,
+        "errors": sum(1 for record in records if not record["ok"]),
+        "latency_ms": summarize(latencies),
+        # Stage samples include warmup requests; compare them between runs of the same configuration
+        "stages_ms": {stage: summarize(samples) for stage, samples in sorted(stage_samples.items())},
+        "backend_calls": backends.call_counts()
+    }
+    by_priority = defaultdict(list)
+    for record in records:
+        if record["ok"] and "priority" in record:
+            by_priority[record["priority"]].append(record["latency_ms"])
+    if by_priority:
+        result["latency_by_priority_ms"] = {priority: summarize(samples) for priority, samples in sorted(by_priority.items())}
+    if args.scenario == "classify":
+        result["tickets_per_s"] = round(len(records) * args.batch_size / duration, 3) if duration else 0.0
+    return result
+
+def compare(result: Dict, baseline: Dict, max_regression_pct: float) -> bool:
+    """Print a comparison against a baseline run; returns False if p95 or throughput regressed too far"""
+    print(f"\nComparison with baseline ({baseline.get('git_commit')}, {baseline.get('timestamp')}):")
+    ok = True
+    rows = [("throughput_rps", baseline["throughput_rps"], result["throughput_rps"], True)]
+    rows += [(f"latency {key}", baseline["latency_ms"][key], result["latency_ms"][key], False) for key in ("p50", "p95", "p99")]
+    for name, before, after, higher_is_better in rows:
+        change = ((after - before) / before * 100) if before else 0.0
+        regression = -change if higher_is_better else change
+        flag = ""
+        if regression > max_regression_pct and (name == "throughput_rps" or name.endswith("p95")):
+            flag = "  <-- regression"
+            ok = False
+        print(f"  {name:<16} {before:>12.2f} -> {after:>12.2f}  ({change:+.1f}%){flag}")
+    return ok
+
+def print_report(result: Dict):
+    print(f"Scenario: {result['scenario']}  requests: {result['config']['requests']}  concurrency: {result['config']['concurrency']}")
+    print(f"Throughput: {result['throughput_rps']:.2f} req/s  errors: {result['errors']}  duration: {result['duration_s']:.2f}s")
+    if "tickets_per_s" in result:
+        print(f"Tickets: {result['tickets_per_s']:.2f}/s")
+    latency = result["latency_ms"]
+    print(f"Latency ms: p50={latency['p50']:.1f} p95={latency['p95']:.1f} p99={latency['p99']:.1f} max={latency['max']:.1f}")
+    for priority, stats in result.get("latency_by_priority_ms", {}).items():
+        print(f"  {priority:<4} n={stats['count']:<6} p50={stats['p50']:.1f} p95={stats['p95']:.1f} p99={stats['p99']:.1f}")
+    if result["stages_ms"]:
+        print("Stages (ms):")
+        for stage, stats in result["stages_ms"].items():
+            print(f"  {stage:<14} n={stats['count']:<6} mean={stats['mean']:<10.2f} p50={stats['p50']:<10.2f} p95={stats['p95']:<10.2f} p99={stats['p99']:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark with fake OpenAI/Pinecone backends")
+    parser.add_argument("--scenario", choices=["query", "classify", "resolve"], default="query")
+    parser.add_argument("--requests", type=int, default=100, help="measured requests (batches for classify)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=10, help="tickets per import request (classify)")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", action="append", metavar="NAME=MEDIAN_MS:P99_MS",
+                        help=f"override fake latency for one of: {', '.join(DEFAULT_LATENCIES)}")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply all fake latencies (0 disables them)")
+    parser.add_argument("--dimension", type=int, default=1536, help="fake embedding dimension for models of unknown size")
+    parser.add_argument("--chat-capacity", type=int, default=0, help="concurrent chat calls the fake OpenAI serves (0 = unlimited)")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/<scenario>-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed p95/throughput regression in percent")
+    args = parser.parse_args(argv)
+    # run() changes into the backend directory, so resolve user paths first
+    output = Path(args.output).resolve() if args.output else RESULTS_DIR / f"{args.scenario}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    baseline = Path(args.baseline).resolve() if args.baseline else None
+
+    result = run(args)
+    print_report(result)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"\nSaved results to {output}")
+
+    if baseline:
+        with open(baseline) as f:
+            if not compare(result, json.load(f), args.max_regression):
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmarks for the CPU-bound code that runs on every request
+(URL resolution) or every crawled page (extraction, cleaning, chunking).
+"""
+
+import re
+
+from services.crawled_data_url_resolver import CrawledDataURLResolver
+from services.improved_atlan_docs_crawler import ImprovedAtlanDocsCrawler
+from services.intelligent_url_resolver import IntelligentURLResolver
+from benchmarks.conftest import BACKEND_DIR
+
+def test_crawled_resolver_resolve_urls_with_topic(benchmark, resolver_queries):
+    resolver = CrawledDataURLResolver(str(BACKEND_DIR / "atlan_docs_data_extended.json"))
+
+    def resolve_all():
+        return [resolver.resolve_urls_with_topic(topic, query) for topic, query in resolver_queries]
+
+    results = benchmark(resolve_all)
+    assert all(results)
+
+def test_crawled_resolver_unseen_words(benchmark, resolver_queries):
+    # Per-query cost when none of the query's words are in the word cache yet
+    resolver = CrawledDataURLResolver(str(BACKEND_DIR / "atlan_docs_data_extended.json"))
+
+    def resolve_all():
+        resolver._word_matches.cache_clear()
+        return [resolver.resolve_urls_with_topic(topic, query) for topic, query in resolver_queries]
+
+    results = benchmark(resolve_all)
+    assert all(results)
+
+def test_intelligent_resolver_resolve_urls(benchmark, resolver_queries):
+    resolver = IntelligentURLResolver()
+
+    def resolve_all():
+        return [resolver.resolve_urls(query) for _, query in resolver_queries]
+
+    results = benchmark(resolve_all)
+    assert len(results) == len(resolver_queries)
+
+def test_extract_page_data_improved(benchmark, docs_page_html):
+    crawler = ImprovedAtlanDocsCrawler()
+
+    page = benchmark(crawler.extract_page_data_improved, "https://developer.atlan.com/sdks/python/", docs_page_html)
+    assert page["title"] == "Python SDK - Developer"
+    assert "Code Example:" in page["content"]
+
+def test_clean_content_crawled_pages(benchmark, crawled_docs):
+    crawler = ImprovedAtlanDocsCrawler()
+    contents = [doc["content"] for doc in crawled_docs]
+
+    cleaned = benchmark(lambda: [crawler.clean_content(content) for content in contents])
+    assert len(cleaned) == len(contents)
+
+def test_clean_content_large_page(benchmark, docs_page_html):
+    crawler = ImprovedAtlanDocsCrawler()
+    # Raw page text before cleaning, as extract_page_data_improved produces it
+    raw_text = re.sub(r"<[^>]+>", "\n", docs_page_html)
+
+    cleaned = benchmark(crawler.clean_content, raw_text)
+    assert "\n\n\n" not in cleaned
+
+def test_create_chunks_crawled_pages(benchmark, rag_crawler_class, crawled_docs):
+    # create_chunks uses no instance state, so skip the Pinecone setup in __init__
+    crawler = rag_crawler_class.__new__(rag_crawler_class)
+    contents = [doc["content"] for doc in crawled_docs]
+
+    chunks = benchmark(lambda: [crawler.create_chunks(content, max_chunk_size=500) for content in contents])
+    assert sum(len(page_chunks) for page_chunks in chunks) >= len(contents)
+
+def test_create_chunks_large_page(benchmark, rag_crawler_class, docs_page_html):
+    crawler = rag_crawler_class.__new__(rag_crawler_class)
+    text = ImprovedAtlanDocsCrawler().extract_page_data_improved("https://developer.atlan.com/sdks/python/", docs_page_html)["content"]
+
+    chunks = benchmark(crawler.create_chunks, text)
+    assert len(chunks) > 1
@@ -9,4 +9,95 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Pinecone API
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_TICKETS_INDEX = os.getenv("PINECONE_TICKETS_INDEX") 
-PINECONE_DOCS_INDEX = os.getenv("PINECONE_DOCS_INDEX")   
\ No newline at end of file
+PINECONE_DOCS_INDEX = os.getenv("PINECONE_DOCS_INDEX")   
+PINECONE_USE_GRPC = os.getenv("PINECONE_USE_GRPC", "auto").lower()  # "auto", "true" or "false"
+PINECONE_POOL_THREADS = int(os.getenv("PINECONE_POOL_THREADS", "4"))
+PINECONE_HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("PINECONE_HEALTH_CHECK_INTERVAL_SECONDS", "30"))
+PINECONE_MAX_BACKOFF_SECONDS = float(os.getenv("PINECONE_MAX_BACKOFF_SECONDS", "30"))
+
+# Embeddings, per index. text-embedding-3-* dimensions may be set below the model's
+# native size to truncate vectors (changing them requires re-indexing)
+TICKETS_EMBEDDING_MODEL = os.getenv("TICKETS_EMBEDDING_MODEL", "text-embedding-3-large")
+TICKETS_EMBEDDING_DIMENSION = int(os.getenv("TICKETS_EMBEDDING_DIMENSION", "3072"))
+DOCS_EMBEDDING_MODEL = os.getenv("DOCS_EMBEDDING_MODEL", "text-embedding-ada-002")
+DOCS_EMBEDDING_DIMENSION = int(os.getenv("DOCS_EMBEDDING_DIMENSION", "1536"))
+
+# Vector store: "pinecone", or "local" for the self-hosted quantized store
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone").lower()
+LOCAL_VECTOR_STORE_DIR = os.getenv("LOCAL_VECTOR_STORE_DIR", "vector_store")
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "int8").lower()  # "none", "int8" or "binary"
+VECTOR_RESCORE_MULTIPLIER = int(os.getenv("VECTOR_RESCORE_MULTIPLIER", "4"))  # candidates rescored per result
+
+# Resilience: rate limits (0 = unlimited; set to the account's limits), retries and circuit breakers
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0"))
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "0"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+PINECONE_REQUESTS_PER_MINUTE = float(os.getenv("PINECONE_REQUESTS_PER_MINUTE", "0"))
+PINECONE_MAX_RETRIES = int(os.getenv("PINECONE_MAX_RETRIES", "2"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # consecutive failures before failing fast
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Per-request time budget of RAG queries; stages degrade to cheaper strategies as it runs out
+QUERY_DEADLINE_SECONDS = float(os.getenv("QUERY_DEADLINE_SECONDS", "7.5"))  # chat channels give up at ~8s
+GENERATION_TOKENS_PER_SECOND = float(os.getenv("GENERATION_TOKENS_PER_SECOND", "80"))  # used to cap max_tokens to the time left
+
+# Priority scheduling of generation: concurrent OpenAI generations (0 = unscheduled) and P2 queue limit
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "8"))
+LOW_PRIORITY_MAX_QUEUED = int(os.getenv("LOW_PRIORITY_MAX_QUEUED", "16"))
+BLOCKING_IO_THREADS = int(os.getenv("BLOCKING_IO_THREADS", "32"))  # threads for blocking OpenAI/Pinecone SDK calls
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+# Deployment: worker processes (set by serve.py) and where caches and session state
+# live. "memory" is per process; "sqlite" and "redis" are shared by all workers
+WEB_WORKERS = max(1, int(os.getenv("WEB_WORKERS", "1")))
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()  # "memory", "sqlite" or "redis"
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "state.db")
+STATE_MEMORY_MAX_ENTRIES = int(os.getenv("STATE_MEMORY_MAX_ENTRIES", "10000"))  # per namespace
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Conversation sessions: turns kept verbatim (older ones are summarized), idle expiry,
+# sessions kept in any state backend and the size cap of one session
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "6"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", "32768"))
+
+# Classification
+CLASSIFICATION_BATCH_SIZE = int(os.getenv("CLASSIFICATION_BATCH_SIZE", "5"))
+CLASSIFICATION_CACHE_PATH = os.getenv("CLASSIFICATION_CACHE_PATH", "classification_cache.db")
+CLASSIFICATION_CACHE_TTL_SECONDS = int(os.getenv("CLASSIFICATION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Ingestion deduplication: tickets this similar to a recent ticket reuse its
+# classification and join its incident cluster
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.95"))
+DEDUP_WINDOW_HOURS = float(os.getenv("DEDUP_WINDOW_HOURS", "72"))
+
+# Ingestion gateway: durable per-channel queues in INGEST_QUEUE_PATH. Batch channels (Email, Voice)
+# are classified in bulk once INGEST_BATCH_SIZE messages wait or the oldest has waited
+# INGEST_BATCH_MAX_WAIT_SECONDS; chat channels are answered as they arrive
+INGEST_ENABLED = os.getenv("INGEST_ENABLED", "true").lower() == "true"
+INGEST_QUEUE_PATH = os.getenv("INGEST_QUEUE_PATH", "ingest_queue.db")
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "25"))
+INGEST_BATCH_MAX_WAIT_SECONDS = float(os.getenv("INGEST_BATCH_MAX_WAIT_SECONDS", "30"))
+INGEST_CHAT_CONCURRENCY = int(os.getenv("INGEST_CHAT_CONCURRENCY", "8"))  # chat messages answered at once, per channel
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "0.5"))
+
+# Vector outbox: classified tickets are logged to VECTOR_OUTBOX_PATH and upserted to the
+# vector store in batches by a background flusher, with retries across outages
+VECTOR_OUTBOX_PATH = os.getenv("VECTOR_OUTBOX_PATH", "vector_outbox.db")
+VECTOR_OUTBOX_BATCH_SIZE = int(os.getenv("VECTOR_OUTBOX_BATCH_SIZE", "100"))
+VECTOR_OUTBOX_FLUSH_SECONDS = float(os.getenv("VECTOR_OUTBOX_FLUSH_SECONDS", "1.0"))
+VECTOR_OUTBOX_MAX_ATTEMPTS = int(os.getenv("VECTOR_OUTBOX_MAX_ATTEMPTS", "20"))
+
+# Ticket store
+TICKET_STORE_PATH = os.getenv("TICKET_STORE_PATH", "tickets.db")
+
+# Observability
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # fraction of DEBUG records kept
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "customer-support-copilot")
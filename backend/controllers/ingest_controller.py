@@ -0,0 +1,79 @@
+import logging
+from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException
+from controllers.rag_controller import QueryRequest, answer_query
+from controllers.tickets_controller import classify_and_store_tickets
+from services.ingestion_gateway import ChannelAdapter, ingestion_gateway
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+async def classify_batch(adapter: ChannelAdapter, messages: List[Dict]):
+    """Batch channels: classify through the batch classifier and store as tickets"""
+    await classify_and_store_tickets([
+        {"id": message["id"], "subject": message["subject"], "body": message["body"], "channel": adapter.name}
+        for message in messages
+    ])
+
+async def answer_message(adapter: ChannelAdapter, message: Dict) -> Optional[Dict]:
+    """
+    Interactive channels: answer through the RAG pipeline, within the message's
+    session. Raises when the pipeline fails, or answers only because search or
+    generation failed, so the gateway retries the message and eventually
+    dead-letters it instead of replying with an apology.
+    """
+    response = await answer_query(QueryRequest(query=message["body"], channel=adapter.name, session_id=message["session_id"]))
+    failures = [f"{item['stage']}: {item['detail']}" for item in response.degraded if item["action"] == "error"]
+    if failures:
+        raise RuntimeError(f"Answer degraded by errors ({'; '.join(failures)})")
+    return {
+        "answer": response.answer,
+        "citations": response.citations,
+        "response_type": response.response_type,
+        "classification": response.classification
+    }
+
+ingestion_gateway.set_handlers(batch=classify_batch, message=answer_message)
+
+@router.get("/channels")
+async def get_channels():
+    """Per-channel queue state: processing mode, messages waiting, age of the oldest and dead letters"""
+    return {"channels": ingestion_gateway.stats()}
+
+@router.post("/{channel}", status_code=202)
+async def ingest_message(channel: str, payload: Dict):
+    """
+    Accept a channel's inbound webhook payload. The message is queued durably
+    and processed by the channel's worker: chat channels are answered within
+    seconds, email and voice are classified in batches.
+    """
+    try:
+        message = ingestion_gateway.submit(channel, payload)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown channel: {channel}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    adapter = ingestion_gateway.adapter(channel)
+    return {
+        "message_id": message["id"],
+        "queue_id": message["queue_id"],
+        "channel": adapter.name,
+        "mode": adapter.mode,
+        "session_id": message["session_id"]
+    }
+
+@router.get("/{channel}/dead-letters")
+async def get_dead_letters(channel: str, limit: int = 50):
+    """Messages that failed every attempt, with their last error"""
+    if channel.lower() not in ingestion_gateway.adapters:
+        raise HTTPException(status_code=404, detail=f"Unknown channel: {channel}")
+    dead = ingestion_gateway.queue.dead_letters(channel.lower(), limit)
+    return {"messages": dead, "count": len(dead)}
+
+@router.post("/{channel}/dead-letters/requeue")
+async def requeue_dead_letters(channel: str):
+    """Retry a channel's dead-lettered messages"""
+    if channel.lower() not in ingestion_gateway.adapters:
+        raise HTTPException(status_code=404, detail=f"Unknown channel: {channel}")
+    return {"requeued": ingestion_gateway.queue.requeue_dead(channel.lower())}
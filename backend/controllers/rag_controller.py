@@ -1,19 +1,34 @@
+import asyncio
+import logging
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import Optional
 from services.vector_db_service import retrieve_from_vector_db, retrieve_with_sources
 from services.embedding_service import generate_response
-from services.classification_service import classify_ticket
+from services.classification_service import classify_ticket, keyword_classification
 from services.atlan_rag_service import atlan_rag_service
+from services.prompt_registry import PromptTemplate, prompt_registry
 from services.crawled_data_url_resolver import url_resolver
+from services.session_store import is_followup, previous_sources, reusable_sources, session_store, standalone_query
+from config.settings import QUERY_DEADLINE_SECONDS
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.scheduler import SchedulerFull, generation_scheduler, request_priority
+from utils.keyword_matcher import KeywordMatcher
+from utils.metrics import external_call, observe_stage, record_cache, record_tokens, trace_stage
+from utils.resilience import openai_policy
+from utils.singleflight import SingleFlight, normalize_text
 import time
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 class QueryRequest(BaseModel):
     query: str
     channel: str = "Web Chat"
-    session_id: str = "default"
+    session_id: str = "default"  # send a stable id per conversation so follow-ups are answered in context
     include_followup: bool = True
+    deadline_ms: Optional[int] = None  # overrides QUERY_DEADLINE_SECONDS for this request
 
 class QueryResponse(BaseModel):
     answer: str
@@ -25,33 +40,40 @@ class QueryResponse(BaseModel):
     followup_suggestions: list = []
     session_id: str
     response_type: str  # "rag_response" or "routing_message"
+    degraded: list = []  # stages that took a cheaper path to meet the deadline, or after an error
+    rewritten_query: Optional[str] = None  # the follow-up as retrieved and answered, when it was rewritten
+
+# Atlan or data-platform terms that mark a query as Atlan-related
+ATLAN_INDICATORS = KeywordMatcher([
+    "atlan", "data catalog", "data lineage", "data governance", "metadata",
+    "api", "apis", "sdk", "sdks", "integration*", "connector*", "sso", "authentication",
+    "snowflake", "databricks", "powerbi", "tableau", "looker", "dbt",
+    "airflow", "kafka", "mongodb", "postgres", "mysql", "bigquery",
+    "redshift", "athena", "s3", "azure", "gcp", "google cloud"
+])
+
+# Topics the classifier reasoning mentions when a query is clearly not about Atlan
+NON_ATLAN_INDICATORS = KeywordMatcher([
+    "cooking", "recipe*", "food", "curry", "pasta", "weather", "sports",
+    "movie*", "music", "game*", "travel*", "shopping", "personal", "health",
+    "finance", "news", "politics", "religion", "dating", "family"
+])
 
 def is_atlan_related_query(query: str, classification: dict) -> bool:
     """
     Intelligently determine if a query is related to Atlan using AI classification
     and semantic understanding rather than keyword matching.
     """
-    query_lower = query.lower()
-    
     # Get classification reasoning to understand the AI's analysis
-    topic_reasoning = classification.get("topic_reasoning", "").lower()
+    topic_reasoning = classification.get("topic_reasoning", "")
     topic = classification.get("topic", "").lower()
     
-    # Check if the AI classifier explicitly identified Atlan-related context
-    atlan_indicators = [
-        "atlan", "data catalog", "data lineage", "data governance", "metadata",
-        "api", "sdk", "integration", "connector", "sso", "authentication",
-        "snowflake", "databricks", "powerbi", "tableau", "looker", "dbt",
-        "airflow", "kafka", "mongodb", "postgres", "mysql", "bigquery",
-        "redshift", "athena", "s3", "azure", "gcp", "google cloud"
-    ]
-    
     # If the query explicitly mentions Atlan or data-related terms, it's related
-    if any(indicator in query_lower for indicator in atlan_indicators):
+    if ATLAN_INDICATORS.matches(query):
         return True
     
     # Check if the AI's reasoning suggests Atlan-related context
-    if any(indicator in topic_reasoning for indicator in atlan_indicators):
+    if ATLAN_INDICATORS.matches(topic_reasoning):
         return True
     
     # Check if the topic classification suggests technical/data context
@@ -63,22 +85,37 @@ def is_atlan_related_query(query: str, classification: dict) -> bool:
     # any Atlan-specific context, it's likely unrelated
     if topic == "general":
         # Check if the reasoning explicitly mentions non-Atlan topics
-        non_atlan_indicators = [
-            "cooking", "recipe", "food", "curry", "pasta", "weather", "sports",
-            "movie", "music", "game", "travel", "shopping", "personal", "health",
-            "finance", "news", "politics", "religion", "dating", "family"
-        ]
-        
-        if any(indicator in topic_reasoning for indicator in non_atlan_indicators):
+        if NON_ATLAN_INDICATORS.matches(topic_reasoning):
             return False
         
-        # If it's general and doesn't contain Atlan keywords, it's unrelated
-        if not any(indicator in query_lower for indicator in atlan_indicators):
-            return False
+        # If it's general and doesn't contain Atlan keywords (checked above), it's unrelated
+        return False
     
     # Default to related if we can't determine otherwise
     return True
 
+# Static instructions first so every call shares a cacheable prefix; the query and answer come last
+FOLLOWUPS_PROMPT = prompt_registry.register(PromptTemplate(
+    name="followups",
+    system="Based on the user query and the provided answer in the user message, generate 3 relevant follow-up questions that a user might naturally ask next.",
+    instructions="""The follow-up questions should:
+1. Be specific to the user's query and context
+2. Show natural progression from their original question
+3. Be actionable and helpful
+4. Cover different aspects of the topic they're asking about
+5. Be phrased as natural follow-up questions
+
+Examples of good follow-up questions:
+- For webhook queries: "How do I test if my webhook is working correctly?"
+- For SDK queries: "What are the common error codes I should handle?"
+- For authentication queries: "How do I rotate my API keys securely?"
+- For setup queries: "What are the system requirements for this?"
+
+Respond with exactly 3 follow-up questions, one per line, without numbering or bullets.
+Each question should be a complete, natural question that flows from the original query.""",
+    request='User Query: "{query}"\nTopic: {topic}\nAnswer: "{answer}..." (truncated for context)'
+))
+
 def generate_contextual_followup_questions(topic: str, query: str, answer: str) -> list:
     """Generate contextual follow-up questions using AI based on the user's query and answer"""
     try:
@@ -88,37 +125,17 @@ def generate_contextual_followup_questions(topic: str, query: str, answer: str)
         # Set the API key for older versions
         openai.api_key = OPENAI_API_KEY
         
-        # Create a prompt for AI to generate contextual follow-up questions
-        followup_prompt = f"""
-        Based on this user query and the provided answer, generate 3 relevant follow-up questions that a user might naturally ask next.
-        
-        User Query: "{query}"
-        Topic: {topic}
-        Answer: "{answer[:200]}..." (truncated for context)
-        
-        The follow-up questions should:
-        1. Be specific to the user's query and context
-        2. Show natural progression from their original question
-        3. Be actionable and helpful
-        4. Cover different aspects of the topic they're asking about
-        5. Be phrased as natural follow-up questions
-        
-        Examples of good follow-up questions:
-        - For webhook queries: "How do I test if my webhook is working correctly?"
-        - For SDK queries: "What are the common error codes I should handle?"
-        - For authentication queries: "How do I rotate my API keys securely?"
-        - For setup queries: "What are the system requirements for this?"
-        
-        Respond with exactly 3 follow-up questions, one per line, without numbering or bullets.
-        Each question should be a complete, natural question that flows from the original query.
-        """
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": followup_prompt}],
-            max_tokens=200,
-            temperature=0.7
-        )
+        with external_call("openai", "followups"):
+            # Already off the event loop; the policy waits and retries in this thread
+            response = openai_policy.call(
+                openai.ChatCompletion.create,
+                model=FOLLOWUPS_PROMPT.model,
+                messages=FOLLOWUPS_PROMPT.messages(query=query, topic=topic, answer=answer[:200]),
+                max_tokens=200,
+                temperature=0.7
+            )
+        record_tokens("followups", response)
+        prompt_registry.record_usage(FOLLOWUPS_PROMPT, response)
         
         # Parse AI response - fix the string splitting
         ai_questions = response.choices[0].message.content.strip().split('\n')
@@ -127,55 +144,135 @@ def generate_contextual_followup_questions(topic: str, query: str, answer: str)
         # Format as required by the API
         followup_suggestions = [{"question": q} for q in ai_questions[:3]]
         
-        print(f"DEBUG: AI-generated follow-up questions: {followup_suggestions}")
+        logger.debug("AI-generated follow-up questions: %s", followup_suggestions)
         return followup_suggestions
         
     except Exception as e:
-        print(f"DEBUG: AI follow-up generation failed: {e}, using fallback")
-        # Fallback to topic-based questions
-        if topic == "API/SDK":
-            return [
-                {"question": "Can you show me a code example for this?"},
-                {"question": "What are the common error codes I should handle?"},
-                {"question": "How do I handle authentication properly?"}
-            ]
-        elif topic == "SSO":
-            return [
-                {"question": "How do I configure this step by step?"},
-                {"question": "What identity providers are supported?"},
-                {"question": "How do I troubleshoot if it doesn't work?"}
-            ]
-        elif topic == "How-to":
-            return [
-                {"question": "Can you provide more detailed steps?"},
-                {"question": "What are the prerequisites I need?"},
-                {"question": "What if I encounter errors during setup?"}
-            ]
-        else:
-            return [
-                {"question": "Can you provide more details about this?"},
-                {"question": "What are the next steps I should take?"},
-                {"question": "How can I get additional help?"}
-            ]
+        logger.warning("AI follow-up generation failed: %s, using fallback", e)
+        return topic_followup_questions(topic)
+
+def topic_followup_questions(topic: str) -> list:
+    """Canned follow-up questions for a topic, used when they cannot be generated"""
+    if topic == "API/SDK":
+        return [
+            {"question": "Can you show me a code example for this?"},
+            {"question": "What are the common error codes I should handle?"},
+            {"question": "How do I handle authentication properly?"}
+        ]
+    elif topic == "SSO":
+        return [
+            {"question": "How do I configure this step by step?"},
+            {"question": "What identity providers are supported?"},
+            {"question": "How do I troubleshoot if it doesn't work?"}
+        ]
+    elif topic == "How-to":
+        return [
+            {"question": "Can you provide more detailed steps?"},
+            {"question": "What are the prerequisites I need?"},
+            {"question": "What if I encounter errors during setup?"}
+        ]
+    else:
+        return [
+            {"question": "Can you provide more details about this?"},
+            {"question": "What are the next steps I should take?"},
+            {"question": "How can I get additional help?"}
+        ]
+
+# Concurrent identical questions with the same answer share one follow-up generation
+_followups_flight = SingleFlight("followups")
+
+async def _scheduled_followups(topic: str, query: str, answer: str, priority: str) -> list:
+    """Generate follow-ups in a generation slot, so they queue behind more urgent answers"""
+    async with generation_scheduler.slot(priority):
+        # The SDK call blocks; run it off the event loop
+        return await asyncio.to_thread(generate_contextual_followup_questions, topic, query, answer)
+
+# Time held back for answering when classification runs long; past it, keywords classify the query
+CLASSIFY_RESERVE_SECONDS = 3.0
+# Least time worth starting retrieval and generation with; below it the query is routed instead
+MIN_RAG_SECONDS = 2.0
+# Least time worth generating follow-up questions with; below it canned ones are used
+MIN_FOLLOWUPS_SECONDS = 1.0
 
 # Define RAG topics
 rag_topics = ['How-to', 'Product', 'Best practices', 'API/SDK', 'SSO']
+
+def routing_answer(topic: str) -> str:
+    return f"Thank you for your {topic.lower()} inquiry. I'll route this to the appropriate team for assistance. Our specialists will review your request and provide detailed guidance."
+
 @router.post("/query")
 async def query_rag(request: QueryRequest):
-    """Handle RAG queries with intelligent URL selection"""
-    start_time = time.time()
+    """
+    Handle RAG queries with intelligent URL selection.
     
+    The whole request runs against a deadline (QUERY_DEADLINE_SECONDS, or
+    deadline_ms). As it runs out, stages fall back to cheaper strategies:
+    keyword classification, fewer retrieved passages, a shorter or extractive
+    answer, canned follow-ups, and finally routing the query. Every such
+    fallback is listed in the response's "degraded" field.
+
+    Within a session, a follow-up ("Can you show me a code example for
+    this?") is rewritten into a standalone query for retrieval, and when it
+    stays on the previous turn's topic it is answered from that turn's
+    passages without a new search. The query is classified as sent, so the
+    classification cache stays shared across sessions; a follow-up with no
+    topic of its own keeps the previous turn's.
+    """
     try:
+        return await answer_query(request)
+    except Exception as e:
+        logger.exception("Error in query_rag: %s", e)
+        return QueryResponse(
+            answer="I apologize, but I encountered an error processing your request. Please try again or contact support if the issue persists.",
+            citations=[],
+            classification={"topic": "General", "sentiment": "Neutral", "priority": "P3", "confidence": 0.0},
+            classification_reasons={
+                "topic_reasoning": "Error occurred during processing",
+                "sentiment_reasoning": "Unable to determine sentiment due to error",
+                "priority_reasoning": "Error requires immediate attention"
+            },
+            followup_suggestions=[
+                {"question": "How can I contact support?"},
+                {"question": "What should I do if this error continues?"},
+                {"question": "Is there an alternative way to get help?"}
+            ],
+            response_type="rag_response",
+            processing_time=0,
+            session_id=request.session_id
+        )
+
+async def answer_query(request: QueryRequest) -> QueryResponse:
+    """The pipeline behind /query, raising on failure for callers that retry instead of apologizing"""
+    start_time = time.time()
+    budget = request.deadline_ms / 1000 if request.deadline_ms else QUERY_DEADLINE_SECONDS
+    session = session_store.get(request.session_id)
+    query = standalone_query(request.query, session)
+    
+    with deadline_scope(budget) as deadline:
         # Step 1: Classify the query (pass empty subject for consistency with tickets controller)
-        classification = await classify_ticket(request.query, '')
-        print(f"DEBUG: Classification result: {classification}")
-        
+        with trace_stage("classify"):
+            try:
+                classification = await deadline.run(classify_ticket(request.query, ''), reserve=CLASSIFY_RESERVE_SECONDS)
+            except DeadlineExceeded:
+                deadline.degrade("classify", "keywords", "classification timed out; classified by keywords")
+                classification = keyword_classification(request.query, '', "deadline")
+        cache_hit = classification.pop("cache_hit", False)
+        if query != request.query and classification["topic"] == "General" and session.get("topic"):
+            classification = {**classification, "topic": session["topic"]}
+        logger.debug("Classification result: %s", classification)
+    
         # Step 2: Check if query is Atlan-related
-        if not is_atlan_related_query(request.query, classification):
-            print("DEBUG: Query not Atlan-related, providing rejection message")
+        if not is_atlan_related_query(query, classification):
+            logger.debug("Query not Atlan-related, providing rejection message")
             return QueryResponse(
                 answer="I'm sorry, but I can only help with Atlan-related questions. Please ask me about Atlan's features, setup, troubleshooting, or any other Atlan-specific topics.",
                 citations=[],
+                classification=classification,
+                classification_reasons={
+                    "topic_reasoning": classification.get("topic_reasoning", ""),
+                    "sentiment_reasoning": classification.get("sentiment_reasoning", ""),
+                    "priority_reasoning": classification.get("priority_reasoning", "")
+                },
                 followup_suggestions=[
                     {"question": "What Atlan features can you help me with?"},
                     {"question": "How do I get started with Atlan?"},
@@ -183,44 +280,78 @@ async def query_rag(request: QueryRequest):
                 ],
                 response_type="rag_response",
                 processing_time=0,
-                session_id=request.session_id
+                cache_hit=cache_hit,
+                session_id=request.session_id,
+                degraded=deadline.degradations
             )
+    
+        # Urgent and P0 queries get generation capacity first
+        priority = request_priority(classification.get("priority"), classification.get("sentiment"))
         
         # Step 3: Determine if we should use RAG
         use_rag = classification["topic"] in rag_topics
-        print(f"DEBUG: Use RAG: {use_rag}")
-        
+        logger.debug("Use RAG: %s", use_rag)
+    
+        if use_rag and deadline.remaining() < MIN_RAG_SECONDS:
+            deadline.degrade("retrieve", "routed", "not enough time to retrieve and generate; query routed")
+            use_rag = False
+    
+        citations = []
         if use_rag:
             # Step 4: Use proper RAG with crawled content from Pinecone
-            print("DEBUG: Using proper RAG with crawled content from Pinecone")
-            rag_result = await atlan_rag_service.generate_rag_response(request.query, top_k=5)
-            
+            logger.debug("Using RAG with crawled content from Pinecone")
+            sources = reusable_sources(request.query, classification["topic"], session)
+            # Other follow-ups search again, keeping the previous passages as extra context
+            earlier = previous_sources(request.query, classification["topic"], session) if sources is None else None
+            if is_followup(request.query, session):
+                record_cache("session_sources", sources is not None)
+            try:
+                rag_result = await atlan_rag_service.generate_rag_response(query, top_k=5, priority=priority, sources=sources, previous_sources=earlier)
+            except DeadlineExceeded:
+                deadline.degrade("retrieve", "routed", "retrieval timed out; query routed")
+                use_rag = False
+    
+        if use_rag:
             answer = rag_result["answer"]
             citations = rag_result["citations"]
             sources = rag_result.get("sources", [])
             context_used = rag_result.get("context_used", 0)
-            
-            print(f"DEBUG: RAG result - Context chunks used: {context_used}, Citations: {len(citations)}")
+        
+            logger.debug("RAG result - context chunks used: %s, citations: %d", context_used, len(citations))
             response_type = "rag_response"
         else:
             # Step 5: Generate routing message for other topics (Connector, Lineage, Glossary, Sensitive data, General)
-            answer = f"Thank you for your {classification['topic'].lower()} inquiry. I'll route this to the appropriate team for assistance. Our specialists will review your request and provide detailed guidance."
+            answer = routing_answer(classification["topic"])
             response_type = "routing_message"
-            citations = []
-        
+            sources = []
+    
         # Step 6: Generate follow-up suggestions ONLY for RAG responses
         followup_suggestions = []
         if use_rag:
             # Only generate follow-ups for RAG responses (direct answers)
-            followup_suggestions = generate_contextual_followup_questions(
-                classification["topic"], 
-                request.query, 
-                answer
-            )
+            with trace_stage("followups"):
+                if deadline.remaining() < MIN_FOLLOWUPS_SECONDS:
+                    deadline.degrade("followups", "canned", "not enough time to generate follow-ups")
+                    followup_suggestions = topic_followup_questions(classification["topic"])
+                elif priority == "P2" and generation_scheduler.saturated():
+                    # Leave the capacity to answers, urgent ones first
+                    deadline.degrade("followups", "canned", "generation capacity saturated")
+                    followup_suggestions = topic_followup_questions(classification["topic"])
+                else:
+                    try:
+                        followup_suggestions = await deadline.run(_followups_flight.do(
+                            (classification["topic"], normalize_text(query), hash(answer), priority),
+                            lambda: _scheduled_followups(classification["topic"], query, answer, priority)
+                        ))
+                    except (DeadlineExceeded, SchedulerFull):
+                        deadline.degrade("followups", "canned", "follow-up generation timed out")
+                        followup_suggestions = topic_followup_questions(classification["topic"])
         # For routed queries (non-RAG), no follow-ups - the routed team will handle them
-        
+    
         processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-        
+        observe_stage("query", processing_time / 1000)
+        session_store.record_turn(request.session_id, request.query, query, classification["topic"], answer, sources)
+    
         return QueryResponse(
             answer=answer,
             citations=citations,
@@ -233,26 +364,32 @@ async def query_rag(request: QueryRequest):
             followup_suggestions=followup_suggestions,
             response_type=response_type,
             processing_time=processing_time,
-            session_id=request.session_id
-        )
-        
-    except Exception as e:
-        print(f"Error in query_rag: {e}")
-        return QueryResponse(
-            answer="I apologize, but I encountered an error processing your request. Please try again or contact support if the issue persists.",
-            citations=[],
-            classification={"topic": "General", "sentiment": "Neutral", "priority": "P3", "confidence": 0.0},
-            classification_reasons={
-                "topic_reasoning": "Error occurred during processing",
-                "sentiment_reasoning": "Unable to determine sentiment due to error",
-                "priority_reasoning": "Error requires immediate attention"
-            },
-            followup_suggestions=[
-                {"question": "How can I contact support?"},
-                {"question": "What should I do if this error continues?"},
-                {"question": "Is there an alternative way to get help?"}
-            ],
-            response_type="rag_response",
-            processing_time=0,
-            session_id=request.session_id
+            cache_hit=cache_hit,
+            session_id=request.session_id,
+            degraded=deadline.degradations,
+            rewritten_query=query if query != request.query else None
         )
+
+@router.get("/queues")
+async def get_queues():
+    """Generation scheduler state: slots in use and requests waiting per priority"""
+    return {"generate": generation_scheduler.snapshot()}
+
+@router.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """Conversation history kept for a session: recent turns and a summary of older ones"""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "summary": session["summary"], "turns": session["turns"], "topic": session["topic"]}
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Forget a session's history"""
+    session_store.clear(session_id)
+    return {"session_id": session_id, "deleted": True}
+
+@router.get("/prompts")
+async def get_prompts():
+    """Registered prompt templates with their versions and the estimated size of their cacheable prefix"""
+    return {"prompts": prompt_registry.describe()}
@@ -1,8 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
 from services.embedding_service import generate_embedding
-from services.vector_db_service import upsert_to_vector_db, tickets_index
-from services.classification_service import classify_ticket
+from services.vector_db_service import fetch_vector, query_similar
+from services.classification_service import classify_tickets_batch
+from services.ticket_dedup import ticket_deduplicator
+from services.ticket_store import ticket_store
+from services.vector_outbox import vector_outbox
+from utils.metrics import trace_stage
+import asyncio
 import json
+import logging
+import time
 from pathlib import Path
 
 # Load tickets from the JSON file
@@ -10,41 +19,103 @@ tickets_file = Path(__file__).parent.parent / "data" / "sample_tickets.json"
 with tickets_file.open() as f:
     tickets = json.load(f)
 
+logger = logging.getLogger(__name__)
+
+MAX_SIMILAR_TICKETS = 20
+# Tickets of one import embedded at once
+IMPORT_EMBED_CONCURRENCY = 8
+
 router = APIRouter()
 
+class TicketImport(BaseModel):
+    id: str
+    subject: str = ""
+    body: str
+    channel: str = "Email"
+
+async def classify_and_store_tickets(ticket_list: list) -> int:
+    """
+    Embed tickets, classify the ones that are not near-duplicates of a recent
+    ticket in batches, and store them all with their embeddings. Duplicates
+    reuse the classification of the ticket they duplicate and join its
+    incident cluster.
+
+    Vectors go to the outbox and are upserted in the background, so a slow
+    or unavailable vector store does not hold up the import.
+    """
+    # Embed first: the embedding drives both duplicate detection and storage
+    semaphore = asyncio.Semaphore(IMPORT_EMBED_CONCURRENCY)
+
+    async def embed(ticket: dict):
+        async with semaphore:
+            embed_start = time.time()
+            # Use 'body' field from the sample tickets, or 'content' if it exists
+            embedding = await generate_embedding(ticket.get("body", ticket.get("content", "")))
+            return embedding, time.time() - embed_start
+
+    embeddings = await asyncio.gather(*(embed(ticket) for ticket in ticket_list))
+    dedup_start = time.time()
+    duplicates = await ticket_deduplicator.find_duplicates(
+        [(ticket, embedding) for ticket, (embedding, _) in zip(ticket_list, embeddings)]
+    )
+    # The lookups run together, so their cost is shared evenly like classification's
+    dedup_time = (time.time() - dedup_start) / max(len(ticket_list), 1)
+    embedded = [
+        (ticket, embedding, duplicate, embed_time + dedup_time)
+        for ticket, (embedding, embed_time), duplicate in zip(ticket_list, embeddings, duplicates)
+    ]
+    originals = [(ticket, embedding) for ticket, embedding, duplicate, _ in embedded if duplicate is None]
+    
+    to_classify = [ticket for ticket, _ in originals]
+    classifications = {}
+    start_time = time.time()
+    if to_classify:
+        with trace_stage("classify", tickets=len(to_classify)):
+            classifications = await classify_tickets_batch(to_classify)
+    # Batched classification cost is shared evenly across the tickets in the batch
+    classification_time = (time.time() - start_time) / max(len(to_classify), 1)
+    if len(to_classify) < len(ticket_list):
+        logger.info("Reused classifications for %d near-duplicate tickets", len(ticket_list) - len(to_classify))
+    
+    classified_count = 0
+    for ticket, embedding, duplicate, embed_time in embedded:
+        ticket_start = time.time()
+        if duplicate is None:
+            classification = classifications[str(ticket["id"])]
+            reuse = {"cache_hit": classification.get("cache_hit", False)}
+            elapsed = embed_time + classification_time
+        else:
+            root, similarity = duplicate
+            # A root from this import was just classified; an earlier one carries its stored classification
+            classification = classifications.get(str(root["id"]), root)
+            reuse = {"cache_hit": True, "duplicate_of": str(root["id"]), "similarity": round(similarity, 4)}
+            elapsed = embed_time
+        
+        # Flatten classification for Pinecone metadata (no nested objects allowed)
+        ticket_with_classification = {
+            **ticket,
+            "topic": classification["topic"],
+            "sentiment": classification["sentiment"],
+            "priority": classification["priority"],
+            "confidence": classification["confidence"],
+            "topic_reasoning": classification["topic_reasoning"],
+            "sentiment_reasoning": classification["sentiment_reasoning"],
+            "priority_reasoning": classification["priority_reasoning"],
+            "processing_time": round(elapsed + time.time() - ticket_start, 3),
+            **reuse
+        }
+        
+        # Queue for the vector database (similarity search) and store for listing
+        vector_outbox.add("tickets", ticket["id"], embedding, ticket_with_classification)
+        ticket_store.upsert_ticket(ticket_with_classification)
+        classified_count += 1
+    
+    return classified_count
+
 @router.post("/classify")
 async def classify_tickets():
     try:
-        classified_count = 0
-        for ticket in tickets:
-            # Use 'body' field from the sample tickets, or 'content' if it exists
-            content = ticket.get("body", ticket.get("content", ""))
-            subject = ticket.get("subject", "")
-            
-            # Generate embedding
-            embedding = await generate_embedding(content)
-            
-            # Classify the ticket
-            classification = await classify_ticket(content, subject)
-            
-            # Flatten classification for Pinecone metadata (no nested objects allowed)
-            ticket_with_classification = {
-                **ticket,
-                "topic": classification["topic"],
-                "sentiment": classification["sentiment"],
-                "priority": classification["priority"],
-                "confidence": classification["confidence"],
-                "topic_reasoning": classification["topic_reasoning"],
-                "sentiment_reasoning": classification["sentiment_reasoning"],
-                "priority_reasoning": classification["priority_reasoning"],
-                "processing_time": 1.5,
-                "cache_hit": False
-            }
-            
-            # Store in vector database
-            await upsert_to_vector_db("tickets", ticket["id"], embedding, ticket_with_classification)
-            classified_count += 1
-            
+        classified_count = await classify_and_store_tickets(tickets)
         return {
             "message": f"Successfully classified and stored {classified_count} tickets",
             "count": classified_count
@@ -52,40 +123,137 @@ async def classify_tickets():
     except Exception as e:
         return {"error": str(e)}
 
+@router.post("/import")
+async def import_tickets(ticket_imports: List[TicketImport]):
+    """Bulk import tickets, classifying them through the batch classifier"""
+    try:
+        classified_count = await classify_and_store_tickets([ticket.dict() for ticket in ticket_imports])
+        return {
+            "message": f"Successfully imported and classified {classified_count} tickets",
+            "count": classified_count
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
 @router.get("/")
-async def get_tickets():
-    """Retrieve all tickets from the vector database"""
+async def get_tickets(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    topic: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    priority: Optional[str] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    sort_by: str = "created_at",
+    order: str = "desc"
+):
+    """
+    List classified tickets one page at a time.
+    Pass the returned next_cursor back as cursor to fetch the following page.
+    """
     try:
-        # Query all tickets from the vector database
-        results = tickets_index.query(
-            vector=[0] * 3072,  # Dummy vector for getting all results
-            top_k=100,  # Get up to 100 tickets
-            include_metadata=True
+        ticket_list, next_cursor = ticket_store.list_tickets(
+            limit=limit,
+            cursor=cursor,
+            topic=topic,
+            sentiment=sentiment,
+            priority=priority,
+            created_after=created_after,
+            created_before=created_before,
+            sort_by=sort_by,
+            order=order
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"tickets": ticket_list, "count": len(ticket_list), "next_cursor": next_cursor}
+
+@router.get("/count")
+async def count_tickets(
+    topic: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    priority: Optional[str] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None
+):
+    """Count tickets matching the same filters as the listing endpoint"""
+    count = ticket_store.count_tickets(
+        topic=topic,
+        sentiment=sentiment,
+        priority=priority,
+        created_after=created_after,
+        created_before=created_before
+    )
+    return {"count": count}
+
+@router.get("/stats")
+async def get_ticket_stats(
+    topic: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    priority: Optional[str] = None
+):
+    """
+    Dashboard aggregates, maintained incrementally as tickets are stored.
+    Cost does not depend on the number of tickets.
+    """
+    return ticket_store.get_stats(topic=topic, sentiment=sentiment, priority=priority)
+
+@router.get("/incidents")
+async def get_incidents(priority: Optional[str] = None, min_size: int = 2, limit: int = 50):
+    """Incident clusters of near-duplicate tickets, most urgent (P0) first"""
+    incidents = ticket_store.get_incidents(priority=priority, min_size=min_size, limit=limit)
+    return {"incidents": incidents, "count": len(incidents)}
+
+@router.get("/similar")
+async def get_similar_tickets(
+    ticket_id: Optional[str] = None,
+    query: Optional[str] = None,
+    top_k: int = 5,
+    topic: Optional[str] = None
+):
+    """
+    Past tickets most similar to a known ticket or to free text, with their
+    classification. A known ticket's stored embedding is reused, so only a
+    text query costs an embedding call; nothing is generated. A stored
+    ticket whose vector is still in the outbox is embedded from its text.
+    The topic filter is applied by the vector store, so up to `top_k`
+    tickets of that topic are returned however rare the topic is.
+    """
+    if not ticket_id and not query:
+        raise HTTPException(status_code=400, detail="Pass ticket_id or query")
+    top_k = max(1, min(top_k, MAX_SIMILAR_TICKETS))
+    
+    with trace_stage("similar_tickets"):
+        if ticket_id:
+            embedding = await fetch_vector("tickets", ticket_id)
+            if embedding is None:
+                ticket = ticket_store.get_ticket(ticket_id)
+                if ticket is None:
+                    raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} is not indexed")
+                # Classified, but its vector has not been upserted yet
+                embedding = await generate_embedding(ticket.get("body", ticket.get("content", "")))
+        else:
+            embedding = await generate_embedding(query)
         
-        # Extract ticket data from results and reconstruct classification object
-        ticket_list = []
-        for match in results["matches"]:
-            ticket_data = match["metadata"]
-            ticket_data["id"] = match["id"]
-            
-            # Reconstruct classification object from flattened fields
-            if "topic" in ticket_data:
-                ticket_data["classification"] = {
-                    "topic": ticket_data["topic"],
-                    "sentiment": ticket_data["sentiment"],
-                    "priority": ticket_data["priority"],
-                    "confidence": ticket_data["confidence"],
-                    "topic_reasoning": ticket_data["topic_reasoning"],
-                    "sentiment_reasoning": ticket_data["sentiment_reasoning"],
-                    "priority_reasoning": ticket_data["priority_reasoning"]
-                }
-            
-            ticket_list.append(ticket_data)
-        
-        return {"tickets": ticket_list, "count": len(ticket_list)}
-    except Exception as e:
-        return {"error": str(e), "tickets": [], "count": 0}
+        # One extra candidate covers the ticket matching itself
+        matches = await query_similar("tickets", embedding, top_k=top_k + 1, filter={"topic": {"$eq": topic}} if topic else None)
+        matches = [match for match in matches if match["id"] != ticket_id]
+        stored = ticket_store.get_tickets([match["id"] for match in matches])
+    
+    similar = []
+    for match in matches:
+        ticket = stored.get(match["id"])
+        if ticket is None or (topic and ticket.get("topic") != topic):
+            continue
+        similar.append({"ticket": ticket, "similarity": round(float(match["score"]), 4)})
+        if len(similar) == top_k:
+            break
+    return {"tickets": similar, "count": len(similar)}
+
+@router.get("/outbox")
+async def get_outbox():
+    """Vectors waiting to be upserted to the vector store, per index"""
+    return {"indexes": vector_outbox.stats()}
 
 @router.get("/sample")
 async def get_sample_tickets():
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Fill the ticket store from the tickets index.
+
+Tickets classified before the ticket store existed are only in the tickets
+index (as vector metadata), so the dashboard, which lists from the ticket
+store, does not show them. Run once after upgrading; tickets already in the
+store are left as they are, so running it again is harmless.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ticket_store import ticket_store
+from services.vector_db_service import iter_vector_metadata
+
+def main():
+    seen = added = 0
+    for page in iter_vector_metadata("tickets"):
+        seen += len(page)
+        added += ticket_store.backfill({**metadata, "id": vector_id} for vector_id, metadata in page)
+    print(f"Backfilled {added} of {seen} indexed tickets into {ticket_store.db_path}")
+
+if __name__ == "__main__":
+    main()
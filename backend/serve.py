@@ -0,0 +1,133 @@
+"""
+Run the API in several worker processes forked from one preloaded parent.
+
+    python serve.py --workers 4 --port 8000
+
+`uvicorn --workers N` starts each worker from scratch, so every worker parses
+its own copy of the docs corpus and the sample tickets. Here the parent imports
+the app once, freezes the resulting heap out of the garbage collector's reach
+and forks the workers, which share those pages copy-on-write. Caches and
+session state go to the shared STATE_BACKEND (SQLite by default when there is
+more than one worker), and metrics from all workers are aggregated on /metrics.
+"""
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from dotenv import load_dotenv
+
+logger = logging.getLogger("serve")
+
+def preload():
+    """
+    Import the app, loading the read-only corpora, then freeze every object
+    allocated so far. Frozen objects are skipped by the collector, so its
+    passes in the workers do not write to (and un-share) the parent's pages.
+    """
+    from app import app
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded app; %d objects frozen for copy-on-write sharing", gc.get_freeze_count())
+    return app
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket opened once in the parent and accepted on by every worker"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(app, sock: socket.socket, host: str, port: int):
+    import uvicorn
+    # log_config=None keeps the logging configured by the app
+    config = uvicorn.Config(app, host=host, port=port, log_config=None)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def serve(app, sock: socket.socket, host: str, port: int, workers: int):
+    """Fork `workers` processes, restart any that die and stop them all on SIGINT/SIGTERM"""
+    from prometheus_client import multiprocess
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            status = 0
+            try:
+                run_worker(app, sock, host, port)
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                status = 1
+            finally:
+                # os._exit skips atexit, so write out the worker's queued log records first
+                from utils.log import stop_logging
+                stop_logging()
+                os._exit(status)
+        children.add(pid)
+        logger.info("Started worker %d", pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            multiprocess.mark_process_dead(pid)
+        if not stopping:
+            logger.warning("Worker %d exited with status %d; restarting", pid, os.waitstatus_to_exitcode(status))
+            time.sleep(1)
+            spawn()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API in preloaded, forked worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", "1")))
+    args = parser.parse_args()
+
+    # Settings are read at import, so the deployment mode must be in the environment first
+    load_dotenv()
+    os.environ["WEB_WORKERS"] = str(max(1, args.workers))
+    metrics_dir = None
+    if args.workers > 1:
+        os.environ.setdefault("STATE_BACKEND", "sqlite")
+        if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            metrics_dir = tempfile.mkdtemp(prefix="copilot-metrics-")
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    app = preload()
+    sock = bind_socket(args.host, args.port)
+    try:
+        if args.workers > 1:
+            serve(app, sock, args.host, args.port, args.workers)
+        else:
+            run_worker(app, sock, args.host, args.port)
+    finally:
+        sock.close()
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import hashlib
+from typing import Optional
+from utils.singleflight import normalize_text
+from utils.state_backend import MemoryStateBackend, StateBackend
+
+class AnswerCache:
+    """
+    Cache of generated RAG answers keyed by the answer prompt version, the
+    normalized question and a hash of the retrieved context, so an answer is
+    only reused for the same question over the same documentation, and never
+    after the prompt changes.
+
+    Low-priority queries are answered from here when generation capacity is
+    saturated, instead of waiting behind urgent traffic. Entries live in the
+    given state backend, shared by all workers, or in a per-process LRU of
+    `max_entries` when none is given.
+    """
+
+    NAMESPACE = "answers"
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, backend: Optional[StateBackend] = None, version: str = ""):
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend or MemoryStateBackend(max_entries)
+        self.version = version
+
+    def make_key(self, query: str, context: str) -> str:
+        raw = f"{self.version}\x00{normalize_text(query)}\x00{hashlib.sha256(context.encode('utf-8')).hexdigest()}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, context: str) -> Optional[str]:
+        return self.backend.get(self.NAMESPACE, self.make_key(query, context))
+
+    def set(self, query: str, context: str, answer: str):
+        self.backend.set(self.NAMESPACE, self.make_key(query, context), answer, self.ttl_seconds)
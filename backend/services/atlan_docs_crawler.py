@@ -1,4 +1,4 @@
-
+import logging
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
@@ -6,6 +6,31 @@ import time
 import json
 from typing import List, Dict, Set
 import re
+from utils.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# URL path keywords, checked in priority order
+URL_CATEGORY_MATCHER = KeywordMatcher({
+    "sdk": ["sdk*", "api*", "developer*"],
+    "integrations": ["connector*", "integration*"],
+    "governance": ["governance", "polic*", "glossary"],
+    "how-to": ["how-to*", "setup", "configure*"]
+})
+
+# Compiled once and run over the full page text in a single pass
+TECHNOLOGY_MATCHER = KeywordMatcher({
+    "python": ["python", "py"],
+    "java": ["java"],
+    "javascript": ["javascript", "js", "node", "typescript"],
+    "go": ["go", "golang"],
+    "snowflake": ["snowflake"],
+    "databricks": ["databricks"],
+    "powerbi": ["powerbi", "power bi"],
+    "tableau": ["tableau"],
+    "mysql": ["mysql"],
+    "postgresql": ["postgresql", "postgres"]
+})
 
 class AtlanDocsCrawler:
     def __init__(self):
@@ -19,7 +44,7 @@ class AtlanDocsCrawler:
     
     def crawl_documentation(self, max_pages: int = 100) -> List[Dict]:
         """Crawl Atlan documentation and extract URLs with metadata"""
-        print(f"🚀 Starting crawl of {self.base_url}")
+        logger.info("Starting crawl of %s", self.base_url)
         
         # Start with main documentation pages
         seed_urls = [
@@ -42,7 +67,7 @@ class AtlanDocsCrawler:
                 continue
                 
             try:
-                print(f"📄 Crawling: {url}")
+                logger.info("Crawling: %s", url)
                 response = self.session.get(url, timeout=10)
                 response.raise_for_status()
                 
@@ -64,10 +89,10 @@ class AtlanDocsCrawler:
                 time.sleep(0.5)  # Be respectful
                 
             except Exception as e:
-                print(f"❌ Error crawling {url}: {e}")
+                logger.error("Error crawling %s: %s", url, e)
                 continue
         
-        print(f"✅ Crawled {len(self.visited_urls)} pages")
+        logger.info("Crawled %d pages", len(self.visited_urls))
         return self.url_data
     
     def extract_page_data(self, url: str, html: str) -> Dict:
@@ -119,49 +144,17 @@ class AtlanDocsCrawler:
     
     def categorize_url(self, url: str, title: str, content: str) -> str:
         """Categorize URL based on path and content"""
-        url_lower = url.lower()
-        title_lower = title.lower()
-        content_lower = content.lower()
-        
-        if "sdk" in url_lower or "api" in url_lower or "developer" in url_lower:
-            return "sdk"
-        elif "connector" in url_lower or "integration" in url_lower:
-            return "integrations"
-        elif "governance" in url_lower or "policy" in url_lower or "glossary" in url_lower:
-            return "governance"
-        elif "how-to" in url_lower or "setup" in url_lower or "configure" in url_lower:
-            return "how-to"
-        else:
-            return "general"
+        return URL_CATEGORY_MATCHER.first(url) or "general"
     
     def extract_technology(self, url: str, title: str, content: str) -> str:
         """Extract technology from URL and content"""
-        text = f"{url} {title} {content}".lower()
-        
-        technologies = {
-            "python": ["python", "py"],
-            "java": ["java"],
-            "javascript": ["javascript", "js", "node", "typescript"],
-            "go": ["go", "golang"],
-            "snowflake": ["snowflake"],
-            "databricks": ["databricks"],
-            "powerbi": ["powerbi", "power bi"],
-            "tableau": ["tableau"],
-            "mysql": ["mysql"],
-            "postgresql": ["postgresql", "postgres"]
-        }
-        
-        for tech, patterns in technologies.items():
-            if any(pattern in text for pattern in patterns):
-                return tech
-        
-        return "general"
+        return TECHNOLOGY_MATCHER.first(f"{url} {title} {content}") or "general"
     
     def save_to_file(self, filename: str = "atlan_docs_data.json"):
         """Save crawled data to file"""
         with open(filename, "w") as f:
             json.dump(self.url_data, f, indent=2)
-        print(f"💾 Saved {len(self.url_data)} URLs to {filename}")
+        logger.info("Saved %d URLs to %s", len(self.url_data), filename)
 
 # Usage example
 if __name__ == "__main__":
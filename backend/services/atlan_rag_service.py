@@ -1,53 +1,153 @@
+import asyncio
+import hashlib
+import logging
+import re
 import openai
-from typing import List, Dict
+from typing import Dict, List, Optional
+from services.answer_cache import AnswerCache
 from services.atlan_rag_crawler import atlan_rag_crawler
-from config.settings import OPENAI_API_KEY
+from services.prompt_registry import PromptTemplate, prompt_registry
+from config.settings import OPENAI_API_KEY, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS
+from utils.metrics import external_call, record_tokens, trace_stage
+from utils.deadline import DeadlineExceeded, current_deadline, degrade
+from utils.resilience import estimate_tokens, openai_policy
+from utils.scheduler import SchedulerFull, generation_scheduler
+from utils.singleflight import SingleFlight, normalize_text
+from utils.state_backend import state_backend
+
+logger = logging.getLogger(__name__)
+
+# Completion budget of a full answer, and the least worth generating when time is short
+ANSWER_MAX_TOKENS = 1000
+MIN_ANSWER_TOKENS = 150
+
+# Below this much time left, retrieve fewer passages so the prompt (and generation) is shorter
+NARROW_RETRIEVAL_SECONDS = 4.0
+NARROW_TOP_K = 3
+
+# Time held back for generation while retrieving
+GENERATION_RESERVE_SECONDS = 1.5
+
+# Passages quoted, and characters kept from each, when answering without the model
+EXTRACTIVE_PASSAGES = 3
+EXTRACTIVE_PASSAGE_CHARS = 500
+
+def _terms(text: str) -> set:
+    return {term for term in re.findall(r"[a-z0-9]+", text.lower()) if len(term) > 2}
+
+def extractive_answer(query: str, context: str) -> str:
+    """
+    Answer from the retrieved documentation itself: the passages sharing the
+    most terms with the query, quoted in retrieval order. Used when
+    generation is unavailable, so the user still gets the relevant excerpts.
+    """
+    query_terms = _terms(query)
+    passages = [passage.strip() for passage in context.split("\n\n") if passage.strip()]
+    ranked = sorted(range(len(passages)), key=lambda i: (-len(query_terms & _terms(passages[i])), i))
+    chosen = sorted(ranked[:EXTRACTIVE_PASSAGES])
+    if not chosen:
+        return "Sorry, I couldn't generate an answer right now. Please try again shortly or contact support for assistance."
+    excerpts = []
+    for i in chosen:
+        passage = passages[i]
+        if len(passage) > EXTRACTIVE_PASSAGE_CHARS:
+            passage = passage[:EXTRACTIVE_PASSAGE_CHARS].rsplit(" ", 1)[0] + "..."
+        excerpts.append(f"> {passage}")
+    return (
+        "Sorry, I couldn't generate a full answer right now, but these excerpts from the Atlan documentation look relevant:\n\n"
+        + "\n\n".join(excerpts)
+    )
 
 openai.api_key = OPENAI_API_KEY
 
+# Static instructions first so every answer shares a cacheable prefix; the
+# retrieved context and the question come last
+RAG_ANSWER_PROMPT = prompt_registry.register(PromptTemplate(
+    name="rag_answer",
+    system="You are an expert Atlan customer support assistant. Based ONLY on the context from Atlan documentation given in the user message, provide a comprehensive answer to the user's question.",
+    instructions="""IMPORTANT:
+- Use ONLY the information provided in the context
+- Do not use any external knowledge or training data
+- If the context doesn't contain enough information, say so clearly
+- Be specific and actionable in your response
+- Include relevant code examples if available in the context
+
+Please provide a helpful and accurate response based on the context.""",
+    request="Context from Atlan Documentation:\n{context}\n\nUser Query: {query}"
+))
+
 class AtlanRAGService:
     def __init__(self):
         self.crawler = atlan_rag_crawler
+        # Concurrent identical questions share one retrieval and one generation
+        self._search_flight = SingleFlight("retrieve")
+        self._generate_flight = SingleFlight("generate")
+        self.answer_cache = AnswerCache(
+            ANSWER_CACHE_SIZE,
+            ANSWER_CACHE_TTL_SECONDS,
+            backend=state_backend if state_backend.shared else None,
+            version=RAG_ANSWER_PROMPT.version
+        )
     
-    async def generate_rag_response(self, query: str, top_k: int = 5) -> Dict:
-        """Generate RAG response using crawled content from Pinecone"""
-        try:
-            # Step 1: Ensure crawler is connected to Pinecone
-            if not self.crawler.index:
-                print("🔄 Connecting crawler to Pinecone...")
-                self.crawler.setup_pinecone_index()
-            
-            # Step 2: Search for relevant content in Pinecone
-            print(f"🔍 Searching Pinecone for: {query}")
-            search_results = self.crawler.search_content(query, top_k)
-            
-            if not search_results:
-                return {
-                    "answer": "I couldn't find relevant information in the Atlan documentation for your query. Please try rephrasing your question or contact support for assistance.",
-                    "citations": [],
-                    "sources": []
-                }
-            
-            # Step 2: Extract content and sources (deduplicate URLs)
+    async def generate_rag_response(
+        self,
+        query: str,
+        top_k: int = 5,
+        priority: str = "P2",
+        sources: Optional[List[Dict]] = None,
+        previous_sources: Optional[List[Dict]] = None
+    ) -> Dict:
+        """
+        Generate RAG response using crawled content from Pinecone.
+
+        Under a request deadline, fewer passages are retrieved and the answer is
+        shortened (or replaced by documentation excerpts) as time runs out.
+        Raises DeadlineExceeded if retrieval cannot finish in time. `priority`
+        (see utils.scheduler.request_priority) orders generation under load.
+        Passing `sources` from an earlier response (e.g. the previous turn of
+        a conversation) answers from those passages without searching;
+        `previous_sources` are searched for as usual, and added after the
+        passages found, those not found again, up to `top_k` of them.
+        Search errors propagate: callers decide whether to apologize or retry.
+        """
+        deadline = current_deadline()
+        passages = sources or await self._search(query, top_k, deadline)
+        if not sources and previous_sources:
+            found = {(passage["url"], passage["content"]) for passage in passages}
+            passages = passages + [
+                passage for passage in previous_sources if (passage["url"], passage["content"]) not in found
+            ][:top_k]
+        
+        if not passages:
+            return {
+                "answer": "I couldn't find relevant information in the Atlan documentation for your query. Please try rephrasing your question or contact support for assistance.",
+                "citations": [],
+                "sources": []
+            }
+        
+        # Step 2: Extract content and sources (deduplicate URLs)
+        with trace_stage("context_build", results=len(passages)):
             context_parts = []
             citations = []
             sources = []
             seen_urls = set()  # Track unique URLs
+        
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            logger.debug("Processing %d search results for deduplication", len(passages))
+        
+            for i, passage in enumerate(passages):
+                content = passage["content"]
+                url = passage["url"]
+                title = passage["title"]
+                score = passage["relevance_score"]
             
-            print(f"�� Processing {len(search_results)} search results for deduplication...")
+                if debug_enabled:
+                    logger.debug("Result %d: url=%s title=%.50s score=%.3f", i + 1, url, title, score)
             
-            for i, result in enumerate(search_results):
-                content = result.metadata.get("content", "")
-                url = result.metadata.get("url", "")
-                title = result.metadata.get("title", "")
-                score = result.score
-                
-                print(f"   Result {i+1}: URL='{url}', Title='{title[:50]}...', Score={score:.3f}")
-                
                 if content and url:
                     # Always add content for context (even if URL is duplicate)
                     context_parts.append(content)
-                    
+                
                     # Only add citation if URL is unique
                     if url not in seen_urls:
                         citations.append({
@@ -55,10 +155,11 @@ class AtlanRAGService:
                             "url": url
                         })
                         seen_urls.add(url)
-                        print(f"     ✅ Added unique citation: {url}")
-                    else:
-                        print(f"     ⚠️  Skipped duplicate URL: {url}")
-                    
+                        if debug_enabled:
+                            logger.debug("Added unique citation: %s", url)
+                    elif debug_enabled:
+                        logger.debug("Skipped duplicate URL: %s", url)
+                
                     # Always add to sources for debugging
                     sources.append({
                         "content": content,
@@ -66,61 +167,113 @@ class AtlanRAGService:
                         "title": title,
                         "relevance_score": score
                     })
-            
-            print(f"📊 Final deduplication results: {len(citations)} unique citations from {len(search_results)} results")
-            
+        
+            logger.debug("Deduplication kept %d unique citations from %d results", len(citations), len(passages))
+        
             # Step 3: Combine context
             context = "\n\n".join(context_parts)
-            
-            # Step 4: Generate response using only the retrieved content
-            answer = await self.generate_response_from_context(query, context)
-            
-            return {
-                "answer": answer,
-                "citations": citations,
-                "sources": sources,
-                "context_used": len(context_parts)
-            }
-            
-        except Exception as e:
-            print(f"❌ Error in RAG service: {e}")
-            return {
-                "answer": "I encountered an error while processing your request. Please try again or contact support.",
-                "citations": [],
-                "sources": []
+        
+        # Step 4: Generate response using only the retrieved content
+        answer = await self._generate_within_deadline(query, context, priority)
+        
+        return {
+            "answer": answer,
+            "citations": citations,
+            "sources": sources,
+            "context_used": len(context_parts)
+        }
+    
+    async def _search(self, query: str, top_k: int, deadline) -> List[Dict]:
+        """Search Pinecone, retrieving fewer passages when time is short"""
+        if deadline and top_k > NARROW_TOP_K and deadline.remaining() < NARROW_RETRIEVAL_SECONDS:
+            top_k = NARROW_TOP_K
+            deadline.degrade("retrieve", "narrowed", f"top_k reduced to {NARROW_TOP_K}")
+        
+        # Step 1: Search for relevant content in Pinecone (the shared client connects on first use)
+        logger.debug("Searching Pinecone for: %s", query)
+        search = self._search_flight.do(
+            (normalize_text(query), top_k),
+            # Embedding and the vector query block; run them off the event loop
+            lambda: asyncio.to_thread(self.crawler.search_content, query, top_k)
+        )
+        search_results = await (deadline.run(search, reserve=GENERATION_RESERVE_SECONDS) if deadline else search)
+        return [
+            {
+                "content": result.metadata.get("content", ""),
+                "url": result.metadata.get("url", ""),
+                "title": result.metadata.get("title", ""),
+                "relevance_score": result.score
             }
+            for result in search_results or []
+        ]
     
-    async def generate_response_from_context(self, query: str, context: str) -> str:
-        """Generate response using only the provided context"""
-        prompt = f"""You are an expert Atlan customer support assistant. Based ONLY on the following context from Atlan documentation, provide a comprehensive answer to the user's question.
-
-IMPORTANT: 
-- Use ONLY the information provided in the context below
-- Do not use any external knowledge or training data
-- If the context doesn't contain enough information, say so clearly
-- Be specific and actionable in your response
-- Include relevant code examples if available in the context
-
-User Query: {query}
-
-Context from Atlan Documentation:
-{context}
-
-Please provide a helpful and accurate response based on the context above."""
+    async def _generate_within_deadline(self, query: str, context: str, priority: str = "P2") -> str:
+        """
+        Generate the answer with as many tokens as the deadline allows; with too
+        little time left, answer with documentation excerpts instead.
 
+        Generation waits for a slot in the priority scheduler. While it is
+        saturated, P2 questions are answered from the answer cache when
+        possible, and with excerpts when the P2 queue is full. Identical
+        questions of the same priority over the same context share one
+        generation.
+        """
+        deadline = current_deadline()
+        max_tokens = deadline.max_tokens(ANSWER_MAX_TOKENS) if deadline else ANSWER_MAX_TOKENS
+        if max_tokens < MIN_ANSWER_TOKENS:
+            degrade("generate", "extractive", "not enough time to generate; answered with documentation excerpts")
+            return extractive_answer(query, context)
+        if priority == "P2" and generation_scheduler.saturated():
+            cached = self.answer_cache.get(query, context)
+            if cached is not None:
+                degrade("generate", "cached", "generation capacity saturated; answered from the answer cache")
+                return cached
+        if max_tokens < ANSWER_MAX_TOKENS:
+            degrade("generate", "shortened", f"max_tokens capped to {max_tokens}")
+        
+        context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+        generation = self._generate_flight.do(
+            (normalize_text(query), context_hash, max_tokens, priority),
+            lambda: self._generate_scheduled(query, context, max_tokens, priority)
+        )
+        try:
+            return await (deadline.run(generation) if deadline else generation)
+        except SchedulerFull:
+            degrade("generate", "shed", "low-priority queue full; answered with documentation excerpts")
+            return extractive_answer(query, context)
+        except DeadlineExceeded:
+            degrade("generate", "extractive", "generation timed out; answered with documentation excerpts")
+            return extractive_answer(query, context)
+    
+    async def _generate_scheduled(self, query: str, context: str, max_tokens: int, priority: str) -> str:
+        async with generation_scheduler.slot(priority):
+            return await self.generate_response_from_context(query, context, max_tokens)
+    
+    async def generate_response_from_context(self, query: str, context: str, max_tokens: int = ANSWER_MAX_TOKENS) -> str:
+        """Generate response using only the provided context"""
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.3
-            )
+            with trace_stage("generate"), external_call("openai", "generate"):
+                messages = RAG_ANSWER_PROMPT.messages(context=context, query=query)
+                response = await openai_policy.acall(
+                    openai.ChatCompletion.create,
+                    tokens=estimate_tokens(messages, max_tokens=max_tokens),
+                    model=RAG_ANSWER_PROMPT.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.3
+                )
+            record_tokens("generate", response)
+            prompt_registry.record_usage(RAG_ANSWER_PROMPT, response)
             
-            return response.choices[0].message.content.strip()
+            answer = response.choices[0].message.content.strip()
+            if max_tokens == ANSWER_MAX_TOKENS:
+                self.answer_cache.set(query, context, answer)
+            return answer
             
         except Exception as e:
-            print(f"❌ Error generating response: {e}")
-            return "I apologize, but I encountered an error while generating a response. Please try again or contact support for assistance."
+            logger.error("Error generating response: %s", e)
+            degrade("generate", "error", f"generation failed; answered with documentation excerpts: {e}")
+            return extractive_answer(query, context)
 
 # Global instance
 atlan_rag_service = AtlanRAGService()
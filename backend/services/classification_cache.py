@@ -0,0 +1,119 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from utils.singleflight import normalize_text
+from utils.state_backend import connect_sqlite
+
+class ClassificationCache:
+    """
+    Persistent classification cache keyed by a hash of the normalized ticket
+    subject + body and the classification prompt version.
+
+    Entries live in SQLite so they survive restarts, with a small in-memory LRU
+    in front so repeated lookups never touch disk. Changing the prompt or the
+    taxonomy changes the version, which changes every key; rows written under an
+    older version are purged on startup.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int, version: str, max_memory_entries: int = 10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.version = version
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._open()
+        self.purge_stale()
+
+    def _open(self):
+        self._conn = connect_sqlite(self.db_path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS classification_cache (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                classification TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def reopen(self):
+        """Open a fresh connection, e.g. in a worker forked from a preloaded parent"""
+        self._lock = threading.Lock()
+        self._open()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text so trivially different copies of a message share a key"""
+        return normalize_text(text)
+
+    def make_key(self, content: str, subject: str = "") -> str:
+        raw = f"{self.version}\x00{self.normalize(subject)}\x00{self.normalize(content)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, content: str, subject: str = "") -> Optional[Dict]:
+        """Return a cached classification, or None on a miss or expired entry"""
+        key = self.make_key(content, subject)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                classification, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    return dict(classification)
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT classification, created_at FROM classification_cache WHERE key = ? AND version = ?",
+                (key, self.version)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM classification_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            classification = json.loads(row[0])
+            self._remember(key, classification, row[1])
+            return dict(classification)
+
+    def set(self, content: str, subject: str, classification: Dict):
+        """Store a classification for the given ticket content"""
+        key = self.make_key(content, subject)
+        created_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classification_cache (key, version, classification, created_at) VALUES (?, ?, ?, ?)",
+                (key, self.version, json.dumps(classification), created_at)
+            )
+            self._conn.commit()
+            self._remember(key, dict(classification), created_at)
+
+    def invalidate(self) -> int:
+        """Drop every cached classification, returning the number of rows removed"""
+        with self._lock:
+            self._memory.clear()
+            removed = self._conn.execute("DELETE FROM classification_cache").rowcount
+            self._conn.commit()
+            return removed
+
+    def purge_stale(self) -> int:
+        """Remove rows from other prompt versions and rows past their TTL"""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM classification_cache WHERE version != ? OR created_at < ?",
+                (self.version, time.time() - self.ttl_seconds)
+            ).rowcount
+            self._conn.commit()
+            return removed
+
+    def _remember(self, key: str, classification: Dict, created_at: float):
+        self._memory[key] = (classification, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
@@ -1,26 +1,37 @@
+import logging
+import os
 import openai
 import json
-from config.settings import OPENAI_API_KEY
+import hashlib
+from typing import Dict, List, Optional, Tuple
+from config.settings import (
+    OPENAI_API_KEY,
+    CLASSIFICATION_BATCH_SIZE,
+    CLASSIFICATION_CACHE_PATH,
+    CLASSIFICATION_CACHE_TTL_SECONDS
+)
+from services.classification_cache import ClassificationCache
+from services.prompt_registry import PromptTemplate, prompt_registry
+from utils.keyword_matcher import KeywordMatcher
+from utils.metrics import external_call, record_cache, record_classification_output, record_tokens
+from utils.resilience import CircuitOpenError, estimate_tokens, openai_policy
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 openai.api_key = OPENAI_API_KEY
 
-async def classify_ticket(ticket_content: str, ticket_subject: str = ""):
-    """
-    Classify a ticket using OpenAI to determine topic, sentiment, and priority
-    """
-    
-    # Combine subject and body for analysis
-    full_content = f"Subject: {ticket_subject}\n\nBody: {ticket_content}"
-    
-    # Define the classification prompt with the exact topic categories
-    classification_prompt = f"""
-    Analyze the following customer support ticket and classify it according to these criteria:
+TOPICS = ["How-to", "Product", "Connector", "Lineage", "API/SDK", "SSO", "Glossary", "Best practices", "Sensitive data", "General"]
+SENTIMENTS = ["Positive", "Neutral", "Frustrated", "Urgent"]
+PRIORITIES = ["P0", "P1", "P2"]
 
-    TICKET CONTENT:
-    {full_content}
+# Number of extra batch requests made for items that came back missing or malformed
+CLASSIFICATION_BATCH_RETRIES = 1
 
-    Please classify this ticket and respond with a JSON object containing:
+SYSTEM_PROMPT = "You are an expert customer support ticket classifier. Be sensitive to emotional cues and business impact. Always respond with valid JSON only."
 
+# Classification criteria shared by the single-ticket and batch prompts
+CLASSIFICATION_GUIDELINES = """
     1. topic: One of these EXACT categories (choose the most appropriate):
        - "How-to" (Getting started, tutorials, step-by-step instructions, setup guides, "how do I", "how can I", "how to")
        - "Product" (Product features, capabilities, what Atlan can do, feature questions, product overview)
@@ -65,52 +76,395 @@ async def classify_ticket(ticket_content: str, ticket_subject: str = ""):
     5. topic_reasoning: Specific explanation for why this topic was chosen
     6. sentiment_reasoning: Specific explanation for why this sentiment was chosen (mention specific words/phrases)
     7. priority_reasoning: Specific explanation for why this priority was chosen (consider business impact)
+"""
+
+CLASSIFICATION_MODEL = "gpt-3.5-turbo"
+
+# The model returns classifications as function-call arguments constrained by
+# these schemas, instead of free text that has to be parsed
+CLASSIFICATION_FIELDS = {
+    "topic": {"type": "string", "enum": TOPICS},
+    "sentiment": {"type": "string", "enum": SENTIMENTS},
+    "priority": {"type": "string", "enum": PRIORITIES},
+    "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+    "topic_reasoning": {"type": "string"},
+    "sentiment_reasoning": {"type": "string"},
+    "priority_reasoning": {"type": "string"}
+}
+CLASSIFY_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "record_classification",
+        "description": "Record the classification of one customer support ticket",
+        "parameters": {
+            "type": "object",
+            "properties": CLASSIFICATION_FIELDS,
+            "required": list(CLASSIFICATION_FIELDS),
+            "additionalProperties": False
+        }
+    }
+}
+CLASSIFY_BATCH_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "record_classifications",
+        "description": "Record the classification of every ticket in the batch",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "classifications": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"id": {"type": "string"}, **CLASSIFICATION_FIELDS},
+                        "required": ["id", *CLASSIFICATION_FIELDS],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["classifications"],
+            "additionalProperties": False
+        }
+    }
+}
+
+def _tool_choice(tool: Dict) -> Dict:
+    return {"type": "function", "function": {"name": tool["function"]["name"]}}
+
+# Both prompts open with the same system message and guidelines, so single and
+# batch classification calls share one cacheable prefix; the tickets come last
+CLASSIFY_PROMPT = prompt_registry.register(PromptTemplate(
+    name="classify",
+    system=SYSTEM_PROMPT,
+    instructions=f"""Classification criteria:
+{CLASSIFICATION_GUIDELINES}
+    The user message holds one customer support ticket. Classify it by calling record_classification with all of the fields listed above.""",
+    request="TICKET CONTENT:\nSubject: {subject}\n\nBody: {body}",
+    model=CLASSIFICATION_MODEL,
+    depends_on=(CLASSIFY_TOOL,)
+))
+CLASSIFY_BATCH_PROMPT = prompt_registry.register(PromptTemplate(
+    name="classify_batch",
+    system=SYSTEM_PROMPT,
+    instructions=f"""Classification criteria:
+{CLASSIFICATION_GUIDELINES}
+    The user message holds a JSON array of customer support tickets. Classify every one of them by calling record_classifications with exactly one entry per ticket.
+    Each entry must include an "id" field equal to the ticket's id plus all of the fields listed above.""",
+    request="TICKETS (JSON array):\n{tickets}",
+    model=CLASSIFICATION_MODEL,
+    depends_on=(CLASSIFY_BATCH_TOOL,)
+))
+# Second, minimal attempt when the first output did not validate: no guidelines,
+# just the ticket, the rejected output and what was wrong with it
+CLASSIFY_REPAIR_PROMPT = prompt_registry.register(PromptTemplate(
+    name="classify_repair",
+    system=SYSTEM_PROMPT,
+    instructions=f"""Your previous classification of the ticket in the user message was invalid. Call record_classification again, keeping your previous judgement where it was valid.
+topic must be one of {json.dumps(TOPICS)}; sentiment one of {json.dumps(SENTIMENTS)}; priority one of {json.dumps(PRIORITIES)}; confidence a number between 0 and 1.""",
+    request="TICKET CONTENT:\nSubject: {subject}\n\nBody: {body}\n\nPREVIOUS OUTPUT:\n{previous}\n\nPROBLEM: {problem}",
+    model=CLASSIFICATION_MODEL,
+    depends_on=(CLASSIFY_TOOL,)
+))
+
+# Any change to a prompt, the output schema (and so the taxonomy) or the model
+# yields a new version, which invalidates every cached classification made under the old one
+CLASSIFICATION_PROMPT_VERSION = hashlib.sha256(
+    f"{CLASSIFY_PROMPT.version}\x00{CLASSIFY_BATCH_PROMPT.version}\x00{CLASSIFY_REPAIR_PROMPT.version}".encode("utf-8")
+).hexdigest()[:16]
+
+_classify_flight = SingleFlight("classify")
+
+# Lexical stand-in for the model while OpenAI is failing or its circuit is open;
+# vocabularies follow CLASSIFICATION_GUIDELINES, in the same priority order
+FALLBACK_TOPIC_MATCHER = KeywordMatcher({
+    "API/SDK": ["sdk", "api", "code", "developer", "authentication", "endpoint*"],
+    "Connector": ["connect to", "integrate with", "data source*", "connector*", "snowflake", "databricks", "powerbi", "power bi", "tableau"],
+    "Lineage": ["lineage", "data flow", "dependenc*", "impact"],
+    "SSO": ["login", "sso", "saml", "oauth", "okta", "identity"],
+    "Glossary": ["glossary", "term*", "definition*", "metadata"],
+    "Best practices": ["best practice*", "optimi*", "recommend*", "guideline*"],
+    "Sensitive data": ["privacy", "security", "compliance", "sensitive", "pii", "gdpr"],
+    "Product": ["feature*", "capabilit*"],
+    "How-to": ["how do i", "how can i", "how to", "get started", "getting started", "set up", "setup", "configure"]
+})
+FALLBACK_SENTIMENT_MATCHER = KeywordMatcher({
+    "Urgent": ["urgent", "asap", "blocking", "blocked", "critical", "emergency", "immediately", "production down"],
+    "Frustrated": ["failing", "fails", "failed", "not working", "error*", "problem*", "issue*", "difficult", "frustrat*", "broken"],
+    "Positive": ["thank*", "great", "love", "appreciate*", "awesome", "happy"]
+})
+FALLBACK_CONFIDENCE = 0.3
+
+classification_cache = ClassificationCache(
+    CLASSIFICATION_CACHE_PATH,
+    CLASSIFICATION_CACHE_TTL_SECONDS,
+    CLASSIFICATION_PROMPT_VERSION
+)
+# SQLite connections must not be shared across fork
+os.register_at_fork(after_in_child=classification_cache.reopen)
 
-    Respond with ONLY a valid JSON object, no other text.
+def _strip_code_fences(text: str) -> str:
+    """Remove markdown code fences the model sometimes wraps JSON in"""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    elif text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+def _build_classification(classification: Dict) -> Dict:
+    """Fill in defaults for any fields missing from a parsed classification"""
+    return {
+        "topic": classification.get("topic", "General"),
+        "sentiment": classification.get("sentiment", "Neutral"),
+        "priority": classification.get("priority", "P2"),
+        "confidence": float(classification.get("confidence", 0.8)),
+        "topic_reasoning": classification.get("topic_reasoning", "Auto-classified based on content analysis"),
+        "sentiment_reasoning": classification.get("sentiment_reasoning", "Auto-classified based on tone analysis"),
+        "priority_reasoning": classification.get("priority_reasoning", "Auto-classified based on urgency indicators")
+    }
+
+def keyword_classification(ticket_content: str, ticket_subject: str, reason: str) -> Dict:
+    """
+    Low-confidence classification from keywords alone, used when the model
+    cannot be reached or its output stays invalid after the repair call. It
+    is never cached, so the ticket is classified properly on a later call.
+    """
+    text = f"{ticket_subject}\n{ticket_content}"
+    topic = FALLBACK_TOPIC_MATCHER.first(text) or "General"
+    sentiment = FALLBACK_SENTIMENT_MATCHER.first(text) or "Neutral"
+    priority = {"Urgent": "P0", "Frustrated": "P1"}.get(sentiment, "P2")
+    return {
+        "topic": topic,
+        "sentiment": sentiment,
+        "priority": priority,
+        "confidence": FALLBACK_CONFIDENCE,
+        "topic_reasoning": f"Keyword fallback ({reason})",
+        "sentiment_reasoning": f"Keyword fallback ({reason})",
+        "priority_reasoning": f"Keyword fallback ({reason})"
+    }
+
+def _response_arguments(response) -> str:
+    """The classification text of a response: the function-call arguments, or the message content if the model answered in text"""
+    message = response["choices"][0]["message"]
+    tool_calls = message.get("tool_calls") or []
+    if tool_calls:
+        return tool_calls[0]["function"]["arguments"]
+    function_call = message.get("function_call")
+    if function_call:
+        return function_call["arguments"]
+    return message.get("content") or ""
+
+def validate_classification(item) -> Tuple[Optional[Dict], str]:
+    """
+    Check a parsed classification against the taxonomy. Returns the
+    normalized classification and "", or None and what is wrong with it.
+    Missing reasoning is filled in; enum fields and confidence must be valid.
+    """
+    if not isinstance(item, dict):
+        return None, "output is not a JSON object"
+    problems = [
+        f"{field} must be one of {allowed}, got {item.get(field)!r}"
+        for field, allowed in (("topic", TOPICS), ("sentiment", SENTIMENTS), ("priority", PRIORITIES))
+        if item.get(field) not in allowed
+    ]
+    try:
+        confidence = float(item.get("confidence", 0.8))
+        if not 0.0 <= confidence <= 1.0:
+            problems.append(f"confidence must be between 0 and 1, got {confidence}")
+    except (TypeError, ValueError):
+        problems.append(f"confidence must be a number, got {item.get('confidence')!r}")
+    if problems:
+        return None, "; ".join(problems)
+    return _build_classification(item), ""
+
+def _parse_classification(text: str) -> Tuple[Optional[Dict], str]:
+    try:
+        item = json.loads(_strip_code_fences(text))
+    except (TypeError, ValueError) as e:
+        return None, f"output is not valid JSON ({e})"
+    return validate_classification(item)
+
+async def classify_ticket(ticket_content: str, ticket_subject: str = ""):
+    """
+    Classify a ticket using OpenAI to determine topic, sentiment, and priority.
+    
+    Results are served from the classification cache when the same normalized
+    content was classified before; "cache_hit" in the result reports which.
     """
+    
+    cached = classification_cache.get(ticket_content, ticket_subject)
+    record_cache("classification", cached is not None)
+    if cached is not None:
+        return {**cached, "cache_hit": True}
+    
+    # Identical tickets arriving together share one model call
+    return await _classify_flight.do(
+        classification_cache.make_key(ticket_content, ticket_subject),
+        lambda: _classify_uncached(ticket_content, ticket_subject)
+    )
+
+async def _request_classification(stage: str, prompt: PromptTemplate, tool: Dict, max_tokens: int, temperature: float = 0.3, **values):
+    """One constrained classification call: the model must answer through `tool`"""
+    messages = prompt.messages(**values)
+    with external_call("openai", stage):
+        # Rate limited and retried; runs off the event loop so concurrent requests overlap
+        response = await openai_policy.acall(
+            openai.ChatCompletion.create,
+            tokens=estimate_tokens(messages, max_tokens=max_tokens),
+            model=prompt.model,
+            messages=messages,
+            tools=[tool],
+            tool_choice=_tool_choice(tool),
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+    record_tokens(stage, response)
+    prompt_registry.record_usage(prompt, response)
+    return response
+
+async def _classify_uncached(ticket_content: str, ticket_subject: str) -> Dict:
+    try:
+        response = await _request_classification("classify", CLASSIFY_PROMPT, CLASSIFY_TOOL, 400, subject=ticket_subject, body=ticket_content)
+    except Exception as e:
+        # OpenAI is unavailable (after retries) or its circuit is open
+        if not isinstance(e, CircuitOpenError):
+            logger.warning("Classification request failed: %s", e)
+        return {**keyword_classification(ticket_content, ticket_subject, type(e).__name__), "cache_hit": False}
+
+    try:
+        text = _response_arguments(response)
+    except (AttributeError, IndexError, KeyError, TypeError) as e:
+        text = ""
+        logger.warning("Classification response had no output: %s", e)
+    classification, problem = _parse_classification(text)
+    if classification is not None:
+        record_classification_output("classify", "valid")
+    else:
+        logger.warning("Invalid classification output (%s); asking the model to repair it", problem)
+        classification = await _repair_classification(ticket_content, ticket_subject, text, problem)
+    if classification is None:
+        # Never cached, so the ticket is classified properly next time
+        return {**keyword_classification(ticket_content, ticket_subject, "invalid model output"), "cache_hit": False}
+
+    classification_cache.set(ticket_content, ticket_subject, classification)
+    return {**classification, "cache_hit": False}
 
+async def _repair_classification(ticket_content: str, ticket_subject: str, previous: str, problem: str) -> Optional[Dict]:
+    """Retry once with a minimal prompt showing the rejected output and what was wrong with it"""
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert customer support ticket classifier. Be sensitive to emotional cues and business impact. Always respond with valid JSON only."},
-                {"role": "user", "content": classification_prompt}
-            ],
-            max_tokens=400,
-            temperature=0.3
+        response = await _request_classification(
+            "classify_repair", CLASSIFY_REPAIR_PROMPT, CLASSIFY_TOOL, 400, temperature=0.0,
+            subject=ticket_subject, body=ticket_content, previous=previous[:2000] or "(empty)", problem=problem
         )
-        
-        # Parse the JSON response
-        classification_text = response["choices"][0]["message"]["content"].strip()
-        
-        # Clean up the response (remove any markdown formatting)
-        if classification_text.startswith("```json"):
-            classification_text = classification_text[7:]
-        if classification_text.endswith("```"):
-            classification_text = classification_text[:-3]
-        
-        classification = json.loads(classification_text)
-        
-        # Validate and set defaults if needed
-        return {
-            "topic": classification.get("topic", "General"),
-            "sentiment": classification.get("sentiment", "Neutral"),
-            "priority": classification.get("priority", "P2"),
-            "confidence": float(classification.get("confidence", 0.8)),
-            "topic_reasoning": classification.get("topic_reasoning", "Auto-classified based on content analysis"),
-            "sentiment_reasoning": classification.get("sentiment_reasoning", "Auto-classified based on tone analysis"),
-            "priority_reasoning": classification.get("priority_reasoning", "Auto-classified based on urgency indicators")
-        }
-        
+        classification, problem = _parse_classification(_response_arguments(response))
     except Exception as e:
-        print(f"Classification error: {e}")
-        # Return default classification if AI fails
-        return {
-            "topic": "General",
-            "sentiment": "Neutral", 
-            "priority": "P2",
-            "confidence": 0.5,
-            "topic_reasoning": f"Classification failed: {str(e)}",
-            "sentiment_reasoning": f"Classification failed: {str(e)}",
-            "priority_reasoning": f"Classification failed: {str(e)}"
+        classification, problem = None, str(e)
+    if classification is None:
+        logger.warning("Classification repair failed: %s", problem)
+        record_classification_output("classify", "failed")
+        return None
+    record_classification_output("classify", "repaired")
+    return classification
+
+def _ticket_body(ticket: Dict) -> str:
+    """Use 'body' from the sample tickets, or 'content' if it exists"""
+    return ticket.get("body", ticket.get("content", ""))
+
+def _parse_batch_response(text: str, expected_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Parse a batch classification response into {ticket_id: classification}.
+    Items that are missing, unknown or fail validation are left out so the
+    caller can retry just those tickets.
+    """
+    try:
+        parsed = json.loads(_strip_code_fences(text))
+    except (TypeError, ValueError):
+        return {}
+    
+    # Accept a bare array, {"classifications": [...]} or an object keyed by ticket id
+    if isinstance(parsed, dict):
+        if isinstance(parsed.get("classifications"), list):
+            parsed = parsed["classifications"]
+        else:
+            parsed = [{**item, "id": ticket_id} for ticket_id, item in parsed.items() if isinstance(item, dict)]
+    if not isinstance(parsed, list):
+        return {}
+    
+    results = {}
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        ticket_id = str(item.get("id", ""))
+        if ticket_id not in expected_ids or ticket_id in results:
+            continue
+        classification, _ = validate_classification(item)
+        if classification:
+            results[ticket_id] = classification
+    return results
+
+async def _classify_batch_request(batch: List[Dict]) -> Dict[str, Dict]:
+    """Send one batch classification request and return the items that parsed"""
+    ticket_payload = [
+        {
+            "id": str(ticket["id"]),
+            "subject": ticket.get("subject", ""),
+            "body": _ticket_body(ticket)
         }
+        for ticket in batch
+    ]
+    
+    try:
+        response = await _request_classification(
+            "classify_batch", CLASSIFY_BATCH_PROMPT, CLASSIFY_BATCH_TOOL, 350 * len(batch),
+            tickets=json.dumps(ticket_payload, ensure_ascii=False)
+        )
+        return _parse_batch_response(
+            _response_arguments(response),
+            [item["id"] for item in ticket_payload]
+        )
+    except Exception as e:
+        logger.warning("Batch classification error: %s", e)
+        return {}
+
+async def classify_tickets_batch(tickets: List[Dict], batch_size: int = CLASSIFICATION_BATCH_SIZE) -> Dict[str, Dict]:
+    """
+    Classify many tickets with one LLM request per batch.
+    
+    Returns {ticket_id: classification}. Cached tickets are answered without a
+    request. Tickets whose results are missing or invalid are re-sent (only
+    those tickets) and, if they still fail, classified individually with
+    classify_ticket.
+    """
+    results: Dict[str, Dict] = {}
+    by_id = {str(ticket["id"]): ticket for ticket in tickets}
+    pending = []
+    for ticket_id, ticket in by_id.items():
+        cached = classification_cache.get(_ticket_body(ticket), ticket.get("subject", ""))
+        record_cache("classification", cached is not None)
+        if cached is not None:
+            results[ticket_id] = {**cached, "cache_hit": True}
+        else:
+            pending.append(ticket_id)
+    
+    for _ in range(1 + CLASSIFICATION_BATCH_RETRIES):
+        if not pending:
+            break
+        for start in range(0, len(pending), batch_size):
+            batch = [by_id[ticket_id] for ticket_id in pending[start:start + batch_size]]
+            classified = await _classify_batch_request(batch)
+            record_classification_output("classify_batch", "valid", len(classified))
+            for ticket_id, classification in classified.items():
+                ticket = by_id[ticket_id]
+                classification_cache.set(_ticket_body(ticket), ticket.get("subject", ""), classification)
+                results[ticket_id] = {**classification, "cache_hit": False}
+        pending = [ticket_id for ticket_id in pending if ticket_id not in results]
+    
+    # Last resort for items the batch path could not classify
+    record_classification_output("classify_batch", "failed", len(pending))
+    for ticket_id in pending:
+        ticket = by_id[ticket_id]
+        results[ticket_id] = await classify_ticket(_ticket_body(ticket), ticket.get("subject", ""))
+    
+    return results
@@ -1,6 +1,13 @@
+import logging
 import json
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
+import numpy as np
+from utils.keyword_matcher import KeywordMatcher
+from utils.metrics import trace_stage
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class URLResult:
@@ -9,20 +16,137 @@ class URLResult:
     relevance_score: float
     is_valid: bool
 
+# Checked in priority order; the first technology mentioned in a query wins
+TECH_MATCHER = KeywordMatcher({
+    'python': ['python', 'py'],
+    'java': ['java', 'jdk', 'jvm'],
+    'javascript': ['javascript', 'js', 'node', 'nodejs', 'typescript', 'ts'],
+    'go': ['go', 'golang'],
+    'scala': ['scala'],
+    'kotlin': ['kotlin', 'kt'],
+    'csharp': ['c#', 'csharp', 'dotnet', '.net'],
+    'php': ['php'],
+    'ruby': ['ruby', 'rb'],
+    'rust': ['rust', 'rs'],
+    'snowflake': ['snowflake'],
+    'databricks': ['databricks'],
+    'powerbi': ['powerbi', 'power bi'],
+    'tableau': ['tableau'],
+    'looker': ['looker'],
+    'dbt': ['dbt', 'data build tool'],
+    'airflow': ['airflow'],
+    'kafka': ['kafka'],
+    'mongodb': ['mongodb', 'mongo'],
+    'postgres': ['postgres', 'postgresql'],
+    'mysql': ['mysql'],
+    'bigquery': ['bigquery'],
+    'redshift': ['redshift'],
+    'athena': ['athena'],
+    's3': ['s3', 'aws s3'],
+    'azure': ['azure'],
+    'gcp': ['gcp', 'google cloud', 'google cloud platform']
+})
+
+# Classified topic -> the documentation categories it boosts, and by how much
+TOPIC_BOOSTS = {
+    'connector': ({'integrations'}, 0.8),
+    'integrations': ({'integrations'}, 0.8),
+    'api/sdk': ({'sdk'}, 0.8),
+    'governance': ({'governance'}, 0.8),
+    'glossary': ({'governance'}, 0.8),
+    'how-to': ({'how-to', 'integrations', 'sdk'}, 0.7)
+}
+# Only these intents score against URLs; any other intent adds nothing
+SCORED_INTENTS = ('setup', 'authentication')
+# Query words whose per-document matches are kept between queries
+WORD_CACHE_SIZE = 8192
+
 class CrawledDataURLResolver:
+    """
+    Picks documentation URLs for a classified query from the crawled corpus.
+
+    A document's score is a static part, which depends only on the query's
+    (topic, technology, intent) and the document, plus a part for each query
+    word found in the document's URL, title or content. The static parts of
+    every combination are precomputed into one score array per combination
+    when the corpus is loaded, and the documents each word matches are cached
+    per word, so a query only adds its words' matches to a precomputed array
+    instead of re-scanning the corpus. Scores are accumulated in the same
+    order as a full scan, so rankings are identical.
+    """
+
     def __init__(self, data_file: str = "atlan_docs_data_extended.json"):
         self.data_file = data_file
         self.crawled_data = self._load_crawled_data()
         self.intent_keywords = {
-            'setup': ['setup', 'install', 'configure', 'connect', 'integrate', 'getting started'],
-            'authentication': ['auth', 'authenticate', 'login', 'api key', 'token', 'sso'],
+            'setup': ['setup', 'install*', 'configur*', 'connect*', 'integrat*', 'getting started'],
+            'authentication': ['auth*', 'login', 'api key', 'token*', 'sso'],
             'lineage': ['lineage', 'data flow', 'provenance'],
-            'permissions': ['permissions', 'access control', 'rbac', 'roles'],
-            'governance': ['governance', 'policy', 'compliance', 'security', 'pii'],
-            'troubleshoot': ['error', 'fail', 'issue', 'debug', 'troubleshoot'],
-            'example': ['example', 'how to', 'guide', 'tutorial'],
+            'permissions': ['permission*', 'access control', 'rbac', 'role*'],
+            'governance': ['governance', 'polic*', 'compliance', 'security', 'pii'],
+            'troubleshoot': ['error*', 'fail*', 'issue*', 'debug*', 'troubleshoot*'],
+            'example': ['example*', 'how to', 'guide*', 'tutorial*'],
             'general': []
         }
+        self._intent_matcher = KeywordMatcher(self.intent_keywords)
+        self._build_score_tables()
+    
+    def _build_score_tables(self):
+        """Precompute the static score of every document for every (topic, technology, intent) combination"""
+        docs = self.crawled_data
+        self._urls = [item['url'].lower() for item in docs]
+        self._titles = [item['title'].lower() for item in docs]
+        self._contents = [item['content'].lower() for item in docs]
+        self._word_matches = lru_cache(maxsize=WORD_CACHE_SIZE)(self._scan_word)
+        
+        self._topic_scores = {None: np.zeros(len(docs))}
+        for categories, boost in TOPIC_BOOSTS.values():
+            self._topic_scores[frozenset(categories)] = np.array([boost if item['category'] in categories else 0.0 for item in docs])
+        self._intent_scores = {
+            None: np.zeros(len(docs)),
+            'setup': np.array([0.9 if 'setup' in url else 0.8 if 'how-tos' in url else 0.0 for url in self._urls]),
+            'authentication': np.array([0.8 if 'auth' in url else 0.0 for url in self._urls])
+        }
+        self._score_tables: Dict[Tuple, np.ndarray] = {}
+        for technology in [None] + TECH_MATCHER.labels:
+            self._add_score_tables(technology)
+        logger.debug("Built %d URL score tables over %d documents", len(self._score_tables), len(docs))
+    
+    def _add_score_tables(self, technology: Optional[str]):
+        """Score tables of one technology, for every topic and intent"""
+        if technology:
+            # The document's own technology, else mentions in its URL, title or content
+            tech_scores = np.array([
+                0.9 if item['technology'] == technology
+                else 0.8 if technology in url
+                else 0.7 if technology in title
+                else 0.5 if technology in content
+                else 0.0
+                for item, url, title, content in zip(self.crawled_data, self._urls, self._titles, self._contents)
+            ])
+        else:
+            tech_scores = np.zeros(len(self.crawled_data))
+        for topic, topic_scores in self._topic_scores.items():
+            for intent, intent_scores in self._intent_scores.items():
+                # Added in the order a per-document scan adds them, so every score is bit-for-bit the same
+                self._score_tables[(topic, technology, intent)] = (np.zeros(len(self.crawled_data)) + topic_scores) + tech_scores + intent_scores
+    
+    @staticmethod
+    def _score_key(topic: str, intent: str, technology: Optional[str]) -> Tuple:
+        boost = TOPIC_BOOSTS.get(topic.lower())
+        return (
+            frozenset(boost[0]) if boost else None,
+            technology,
+            intent if intent in SCORED_INTENTS else None
+        )
+    
+    def _scan_word(self, word: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Which documents contain `word` in their URL, title and content"""
+        return (
+            np.array([word in url for url in self._urls], dtype=bool),
+            np.array([word in title for title in self._titles], dtype=bool),
+            np.array([word in content for content in self._contents], dtype=bool)
+        )
     
     def _load_crawled_data(self) -> List[Dict]:
         """Load the crawled documentation data"""
@@ -30,139 +154,80 @@ class CrawledDataURLResolver:
             with open(self.data_file, 'r') as f:
                 return json.load(f)
         except FileNotFoundError:
-            print(f"Warning: {self.data_file} not found. Using fallback URLs.")
+            logger.warning("%s not found. Using fallback URLs.", self.data_file)
             return []
     
     def resolve_urls_with_topic(self, classified_topic: str, query: str) -> List[URLResult]:
         """Resolves URLs using crawled data and classified topic"""
-        print(f"DEBUG: CrawledDataURLResolver - topic='{classified_topic}', query='{query}'")
+        logger.debug("Resolving URLs - topic=%r, query=%r", classified_topic, query)
         
-        # Extract intent from query
-        intent = self._extract_intent(query)
-        technology = self._extract_technology(query)
-        
-        # Find matching URLs from crawled data
-        candidates = self._find_matching_urls(classified_topic, intent, technology, query)
-        
-        # Rank and return top results with deduplication
-        ranked_urls = self._rank_and_deduplicate_urls(candidates, intent, technology)
+        with trace_stage("url_resolve", topic=classified_topic):
+            # Extract intent from query
+            intent = self._extract_intent(query)
+            technology = self._extract_technology(query)
+            
+            # Find matching URLs from crawled data; only the top 3 distinct URLs are returned
+            candidates = self._find_matching_urls(classified_topic, intent, technology, query, limit=3)
+            
+            # Rank and return top results with deduplication
+            ranked_urls = self._rank_and_deduplicate_urls(candidates, intent, technology)
         return ranked_urls[:3]
     
     def _extract_intent(self, query: str) -> str:
         """Extract intent from query"""
-        query_lower = query.lower()
-        for intent, keywords in self.intent_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                return intent
-        return 'general'
+        return self._intent_matcher.first(query) or 'general'
     
     def _extract_technology(self, query: str) -> Optional[str]:
         """Extract technology from query with enhanced patterns"""
-        query_lower = query.lower()
-        tech_patterns = {
-            'python': ['python', 'py'],
-            'java': ['java', 'jdk', 'jvm'],
-            'javascript': ['javascript', 'js', 'node', 'nodejs', 'typescript', 'ts'],
-            'go': ['go', 'golang'],
-            'scala': ['scala'],
-            'kotlin': ['kotlin', 'kt'],
-            'csharp': ['c#', 'csharp', 'dotnet', '.net'],
-            'php': ['php'],
-            'ruby': ['ruby', 'rb'],
-            'rust': ['rust', 'rs'],
-            'snowflake': ['snowflake'],
-            'databricks': ['databricks'],
-            'powerbi': ['powerbi', 'power bi'],
-            'tableau': ['tableau'],
-            'looker': ['looker'],
-            'dbt': ['dbt', 'data build tool'],
-            'airflow': ['airflow'],
-            'kafka': ['kafka'],
-            'mongodb': ['mongodb', 'mongo'],
-            'postgres': ['postgres', 'postgresql'],
-            'mysql': ['mysql'],
-            'bigquery': ['bigquery'],
-            'redshift': ['redshift'],
-            'athena': ['athena'],
-            's3': ['s3', 'aws s3'],
-            'azure': ['azure'],
-            'gcp': ['gcp', 'google cloud', 'google cloud platform']
-        }
+        technologies = TECH_MATCHER.find_all(query)
         
-        # Check for exact matches first (higher priority)
-        for tech, patterns in tech_patterns.items():
-            for pattern in patterns:
-                if pattern in query_lower:
-                    # Additional check to avoid false positives
-                    if tech == 'java' and any(other_tech in query_lower for other_tech in ['javascript', 'scala', 'kotlin']):
-                        continue  # Skip java if more specific tech is mentioned
-                    return tech
-        return None
+        # Skip java if a more specific JVM/JS technology is mentioned alongside it
+        if 'java' in technologies and any(other_tech in technologies for other_tech in ['javascript', 'scala', 'kotlin']):
+            technologies.remove('java')
+        return technologies[0] if technologies else None
     
-    def _find_matching_urls(self, topic: str, intent: str, technology: Optional[str], query: str) -> List[URLResult]:
-        """Find URLs from crawled data that match the query"""
-        candidates = []
-        query_lower = query.lower()
+    def _find_matching_urls(self, topic: str, intent: str, technology: Optional[str], query: str, limit: Optional[int] = None) -> List[URLResult]:
+        """
+        Find URLs from crawled data that match the query, best first. With a
+        limit, stops after that many distinct URLs.
+        """
+        logger.debug("Finding URLs - topic=%s, intent=%s, technology=%s", topic, intent, technology)
+        if not self.crawled_data:
+            return []
         
-        print(f"DEBUG: Finding URLs - topic={topic}, intent={intent}, technology={technology}")
+        key = self._score_key(topic, intent, technology)
+        if key not in self._score_tables:
+            # A technology TECH_MATCHER does not know
+            self._add_score_tables(technology)
+        scores = self._score_tables[key].copy()
         
-        for item in self.crawled_data:
-            url = item['url']
-            title = item['title']
-            content = item['content']
-            category = item['category']
-            tech = item['technology']
-            
-            # Calculate relevance score
-            score = 0.0
-            
-            # Topic matching
-            if topic.lower() in ['connector', 'integrations'] and category == 'integrations':
-                score += 0.8
-            elif topic.lower() in ['api/sdk'] and category == 'sdk':
-                score += 0.8
-            elif topic.lower() in ['governance', 'glossary'] and category == 'governance':
-                score += 0.8
-            elif topic.lower() in ['how-to'] and category in ['how-to', 'integrations', 'sdk']:
-                score += 0.7
-            
-            # Technology matching (most important for SDK questions)
-            if technology and tech == technology:
-                score += 0.9
-            elif technology and technology in url.lower():
-                score += 0.8
-            elif technology and technology in title.lower():
-                score += 0.7
-            elif technology and technology in content.lower():
-                score += 0.5
-            
-            # Intent matching
-            if intent == 'setup' and 'setup' in url.lower():
-                score += 0.9
-            elif intent == 'setup' and 'how-tos' in url.lower():
-                score += 0.8
-            elif intent == 'authentication' and 'auth' in url.lower():
-                score += 0.8
-            
-            # Query keyword matching
-            query_words = query_lower.split()
-            for word in query_words:
-                if word in url.lower():
-                    score += 0.3
-                if word in title.lower():
-                    score += 0.2
-                if word in content.lower():
-                    score += 0.1
-            
-            # Only include URLs with reasonable relevance
-            if score > 0.3:
-                candidates.append(URLResult(
-                    doc=title or f"{tech.title()} Documentation",
-                    url=url,
-                    relevance_score=score,
-                    is_valid=True
-                ))
-                print(f"DEBUG: Added candidate - {tech} - {url} - score={score:.2f}")
+        # Query keyword matching: +0.3 per word in the URL, +0.2 in the title, +0.1 in the content
+        for word in query.lower().split():
+            in_url, in_title, in_content = self._word_matches(word)
+            np.add(scores, 0.3, out=scores, where=in_url)
+            np.add(scores, 0.2, out=scores, where=in_title)
+            np.add(scores, 0.1, out=scores, where=in_content)
+        
+        # Only include URLs with reasonable relevance, best first (ties in corpus order)
+        matching = np.flatnonzero(scores > 0.3)
+        ranked = sorted(zip(scores[matching].tolist(), matching.tolist()), key=lambda pair: pair[0], reverse=True)
+        
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        candidates = []
+        seen_urls = set()
+        for score, position in ranked:
+            item = self.crawled_data[position]
+            candidates.append(URLResult(
+                doc=item['title'] or f"{item['technology'].title()} Documentation",
+                url=item['url'],
+                relevance_score=score,
+                is_valid=True
+            ))
+            if debug_enabled:
+                logger.debug("Added candidate - %s - %s - score=%.2f", item['technology'], item['url'], score)
+            seen_urls.add(item['url'])
+            if limit is not None and len(seen_urls) >= limit:
+                break
         
         return candidates
     
@@ -0,0 +1,109 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from config.settings import (
+    PINECONE_TICKETS_INDEX,
+    PINECONE_DOCS_INDEX,
+    TICKETS_EMBEDDING_MODEL,
+    TICKETS_EMBEDDING_DIMENSION,
+    DOCS_EMBEDDING_MODEL,
+    DOCS_EMBEDDING_DIMENSION
+)
+
+logger = logging.getLogger(__name__)
+
+# Output size of each model before any truncation
+NATIVE_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072
+}
+
+class EmbeddingDimensionError(ValueError):
+    """Raised when a vector does not match the embedding spec of the index it is written to or queried against"""
+
+@dataclass
+class EmbeddingSpec:
+    index_name: str
+    model: str
+    dimension: int
+    normalize: bool = True
+
+    @property
+    def native_dimension(self) -> int:
+        return NATIVE_DIMENSIONS.get(self.model, self.dimension)
+
+    @property
+    def truncated(self) -> bool:
+        return self.dimension < self.native_dimension
+
+class EmbeddingRegistry:
+    """
+    Records which embedding model, dimension and normalization each vector
+    index was built with, so every write and query embeds with the index's
+    own model and vectors of the wrong size are rejected before they reach
+    Pinecone.
+
+    text-embedding-3-* models are trained so that a prefix of the vector is
+    itself a usable embedding (Matryoshka representation). Registering one of
+    them with a smaller dimension requests the shortened vector from the API
+    and truncates and re-normalizes anything longer, which shrinks the index
+    and speeds up search at a small cost in recall.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, EmbeddingSpec] = {}
+
+    def register(self, key: str, index_name: str, model: str, dimension: Optional[int] = None, normalize: bool = True) -> EmbeddingSpec:
+        native = NATIVE_DIMENSIONS.get(model)
+        dimension = dimension or native
+        if dimension is None:
+            raise ValueError(f"Unknown embedding model '{model}'; pass its dimension explicitly")
+        if native is not None:
+            if dimension > native:
+                raise ValueError(f"{model} produces {native}-dim vectors; cannot register {dimension}")
+            if dimension < native and not model.startswith("text-embedding-3-"):
+                raise ValueError(f"{model} does not support dimension truncation")
+        spec = EmbeddingSpec(index_name=index_name, model=model, dimension=dimension, normalize=normalize)
+        self._specs[key] = spec
+        return spec
+
+    def spec(self, key: str) -> EmbeddingSpec:
+        try:
+            return self._specs[key]
+        except KeyError:
+            raise KeyError(f"No embedding spec registered for '{key}'")
+
+    def request_params(self, key: str) -> Dict:
+        """Keyword arguments for openai.Embedding.create"""
+        spec = self.spec(key)
+        params = {"model": spec.model}
+        if spec.truncated:
+            params["dimensions"] = spec.dimension
+        return params
+
+    def prepare(self, key: str, vector: List[float]) -> List[float]:
+        """Truncate and normalize a model output to the index's spec, then validate it"""
+        spec = self.spec(key)
+        if len(vector) > spec.dimension and spec.truncated:
+            vector = vector[:spec.dimension]
+            if spec.normalize:
+                array = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(array)
+                if norm:
+                    vector = (array / norm).tolist()
+        self.validate(key, vector)
+        return vector
+
+    def validate(self, key: str, vector: List[float]):
+        spec = self.spec(key)
+        if len(vector) != spec.dimension:
+            raise EmbeddingDimensionError(
+                f"Index '{spec.index_name}' expects {spec.dimension}-dim {spec.model} vectors, got {len(vector)} dims"
+            )
+
+# Global instance
+embedding_registry = EmbeddingRegistry()
+embedding_registry.register("tickets", PINECONE_TICKETS_INDEX, TICKETS_EMBEDDING_MODEL, TICKETS_EMBEDDING_DIMENSION)
+embedding_registry.register("docs", PINECONE_DOCS_INDEX, DOCS_EMBEDDING_MODEL, DOCS_EMBEDDING_DIMENSION)
@@ -1,22 +1,21 @@
 import openai
 from config.settings import OPENAI_API_KEY
+from services.embedding_registry import embedding_registry
+from services.prompt_registry import PromptTemplate, prompt_registry
+from utils.metrics import external_call, record_tokens, trace_stage
+from utils.resilience import estimate_tokens, openai_policy
+from utils.singleflight import SingleFlight, normalize_text
 
 openai.api_key = OPENAI_API_KEY
 
-async def generate_embedding(text: str):
-    response = openai.Embedding.create(
-        input=text,
-        model="text-embedding-3-large"
-    )
-    return response["data"][0]["embedding"]
+_embed_flight = SingleFlight("embed")
 
-async def generate_response(query: str, context: str):
-    # Create a more detailed prompt that asks for comprehensive answers with proper formatting
-    prompt = f"""You are an expert Atlan customer support assistant. Based on the following context and user query, provide a comprehensive, helpful answer with proper formatting.
-
-Context: {context}
-
-User Query: {query}
+# Formatting instructions first so every answer shares a cacheable prefix; the
+# context and the question come last
+ANSWER_PROMPT = prompt_registry.register(PromptTemplate(
+    name="answer",
+    system="You are a helpful Atlan customer support assistant. Provide detailed, actionable answers based on the given context. Use proper markdown formatting with code blocks, lists, and clear structure. Do not just provide URLs - give comprehensive responses with actual information.",
+    instructions="""Based on the context and user query in the user message, provide a comprehensive, helpful answer with proper formatting.
 
 Please provide a detailed response that:
 1. Directly answers the user's question with specific steps or explanations
@@ -34,17 +33,41 @@ Format your response with:
 - Numbered or bulleted lists for steps
 - Code blocks with proper syntax highlighting
 - Bold text for important points
-- Clear section breaks
-
-Answer:"""
-
-    response = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a helpful Atlan customer support assistant. Provide detailed, actionable answers based on the given context. Use proper markdown formatting with code blocks, lists, and clear structure. Do not just provide URLs - give comprehensive responses with actual information."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=800,
-        temperature=0.3
-    )
+- Clear section breaks""",
+    request="Context: {context}\n\nUser Query: {query}\n\nAnswer:"
+))
+
+async def generate_embedding(text: str, index_name: str = "tickets"):
+    """
+    Embed text with the model registered for the index it will be written to
+    or queried against. Concurrent requests for the same normalized text share
+    one API call.
+    """
+    return await _embed_flight.do((index_name, normalize_text(text)), lambda: _embed(text, index_name))
+
+async def _embed(text: str, index_name: str):
+    with trace_stage("embed"), external_call("openai", "embed"):
+        # Rate limited and retried; runs off the event loop so concurrent requests overlap
+        response = await openai_policy.acall(
+            openai.Embedding.create,
+            tokens=estimate_tokens(text=text),
+            input=text,
+            **embedding_registry.request_params(index_name)
+        )
+    record_tokens("embed", response)
+    return embedding_registry.prepare(index_name, response["data"][0]["embedding"])
+
+async def generate_response(query: str, context: str):
+    with trace_stage("generate"), external_call("openai", "generate"):
+        messages = ANSWER_PROMPT.messages(context=context, query=query)
+        response = await openai_policy.acall(
+            openai.ChatCompletion.create,
+            tokens=estimate_tokens(messages, max_tokens=800),
+            model=ANSWER_PROMPT.model,
+            messages=messages,
+            max_tokens=800,
+            temperature=0.3
+        )
+    record_tokens("generate", response)
+    prompt_registry.record_usage(ANSWER_PROMPT, response)
     return response["choices"][0]["message"]["content"].strip()
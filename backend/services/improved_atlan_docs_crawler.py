@@ -1,3 +1,4 @@
+import logging
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
@@ -5,6 +6,38 @@ import time
 import json
 from typing import List, Dict, Set
 import re
+from utils.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# URL path keywords, checked in priority order
+URL_CATEGORY_MATCHER = KeywordMatcher({
+    "sdk": ["sdk*", "api*", "developer*"],
+    "integrations": ["connector*", "integration*"],
+    "governance": ["governance", "polic*", "glossary"],
+    "how-to": ["how-to*", "setup", "configure*"]
+})
+
+# Compiled once and run over the full page text in a single pass
+TECHNOLOGY_MATCHER = KeywordMatcher({
+    "python": ["python", "py"],
+    "java": ["java"],
+    "javascript": ["javascript", "js", "node", "typescript"],
+    "go": ["go", "golang"],
+    "kotlin": ["kotlin"],
+    "scala": ["scala"],
+    "snowflake": ["snowflake"],
+    "databricks": ["databricks"],
+    "powerbi": ["powerbi", "power bi"],
+    "tableau": ["tableau"],
+    "mysql": ["mysql"],
+    "postgres": ["postgres", "postgresql"],
+    "mongodb": ["mongodb", "mongo"],
+    "kafka": ["kafka"],
+    "airflow": ["airflow"],
+    "dbt": ["dbt"],
+    "fivetran": ["fivetran"]
+})
 
 class ImprovedAtlanDocsCrawler:
     def __init__(self):
@@ -18,7 +51,7 @@ class ImprovedAtlanDocsCrawler:
     
     def crawl_documentation(self, max_pages: int = 100) -> List[Dict]:
         """Crawl Atlan documentation and extract URLs with metadata"""
-        print(f"🚀 Starting crawl of {self.base_url}")
+        logger.info("Starting crawl of %s", self.base_url)
         
         # Start with main documentation pages
         seed_urls = [
@@ -46,7 +79,7 @@ class ImprovedAtlanDocsCrawler:
                 continue
                 
             try:
-                print(f"📄 Crawling: {url}")
+                logger.info("Crawling: %s", url)
                 response = self.session.get(url, timeout=10)
                 response.raise_for_status()
                 
@@ -68,10 +101,10 @@ class ImprovedAtlanDocsCrawler:
                 time.sleep(0.5)  # Be respectful
                 
             except Exception as e:
-                print(f"❌ Error crawling {url}: {e}")
+                logger.error("Error crawling %s: %s", url, e)
                 continue
         
-        print(f"✅ Crawled {len(self.visited_urls)} pages")
+        logger.info("Crawled %d pages", len(self.visited_urls))
         return self.url_data
     
     def extract_page_data_improved(self, url: str, html: str) -> Dict:
@@ -180,56 +213,17 @@ class ImprovedAtlanDocsCrawler:
     
     def categorize_url(self, url: str, title: str, content: str) -> str:
         """Categorize URL based on path and content"""
-        url_lower = url.lower()
-        title_lower = title.lower()
-        content_lower = content.lower()
-        
-        if "sdk" in url_lower or "api" in url_lower or "developer" in url_lower:
-            return "sdk"
-        elif "connector" in url_lower or "integration" in url_lower:
-            return "integrations"
-        elif "governance" in url_lower or "policy" in url_lower or "glossary" in url_lower:
-            return "governance"
-        elif "how-to" in url_lower or "setup" in url_lower or "configure" in url_lower:
-            return "how-to"
-        else:
-            return "general"
+        return URL_CATEGORY_MATCHER.first(url) or "general"
     
     def extract_technology(self, url: str, title: str, content: str) -> str:
         """Extract technology from URL and content"""
-        text = f"{url} {title} {content}".lower()
-        
-        technologies = {
-            "python": ["python", "py"],
-            "java": ["java"],
-            "javascript": ["javascript", "js", "node", "typescript"],
-            "go": ["go", "golang"],
-            "kotlin": ["kotlin"],
-            "scala": ["scala"],
-            "snowflake": ["snowflake"],
-            "databricks": ["databricks"],
-            "powerbi": ["powerbi", "power bi"],
-            "tableau": ["tableau"],
-            "mysql": ["mysql"],
-            "postgres": ["postgres", "postgresql"],
-            "mongodb": ["mongodb", "mongo"],
-            "kafka": ["kafka"],
-            "airflow": ["airflow"],
-            "dbt": ["dbt"],
-            "fivetran": ["fivetran"]
-        }
-        
-        for tech, keywords in technologies.items():
-            if any(keyword in text for keyword in keywords):
-                return tech
-        
-        return "general"
+        return TECHNOLOGY_MATCHER.first(f"{url} {title} {content}") or "general"
     
     def save_to_file(self, filename: str = "improved_atlan_docs_data.json"):
         """Save crawled data to file"""
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(self.url_data, f, indent=2, ensure_ascii=False)
-        print(f"💾 Saved {len(self.url_data)} pages to {filename}")
+        logger.info("Saved %d pages to %s", len(self.url_data), filename)
 
 # Usage example
 if __name__ == "__main__":
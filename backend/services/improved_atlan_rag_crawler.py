@@ -1,54 +1,57 @@
-from pinecone import Pinecone
+import logging
 import openai
 import requests
 from bs4 import BeautifulSoup
-from config.settings import OPENAI_API_KEY, PINECONE_API_KEY, PINECONE_DOCS_INDEX
+from config.settings import OPENAI_API_KEY, PINECONE_DOCS_INDEX, VECTOR_STORE_BACKEND
+from services.embedding_registry import embedding_registry
+from services.pinecone_client import pinecone_factory
+from services.vector_db_service import open_index
+from utils.resilience import estimate_tokens, openai_policy
 import time
 import json
 import re
 
+logger = logging.getLogger(__name__)
+
 # Set OpenAI API key
 openai.api_key = OPENAI_API_KEY
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
 class ImprovedAtlanRAGCrawler:
     def __init__(self):
-        self.index = None
-        self.setup_pinecone_index()
+        # Resolved lazily through the shared client; nothing is probed at import or per request
+        self.index = open_index("docs")
     
     def setup_pinecone_index(self):
-        """Setup Pinecone index for storing crawled content"""
+        """Create the docs index if needed. Called by ingestion jobs before storing content."""
+        if VECTOR_STORE_BACKEND == "local":
+            # The local store creates its files on first use
+            self.index = open_index("docs")
+            return
         try:
-            # Check if index exists
-            if PINECONE_DOCS_INDEX not in pc.list_indexes().names():
-                # Create index if it doesn't exist
-                pc.create_index(
-                    name=PINECONE_DOCS_INDEX,
-                    dimension=1536,  # OpenAI embedding dimension
-                    metric="cosine"
-                )
-                print(f"Created Pinecone index: {PINECONE_DOCS_INDEX}")
-            
-            # Connect to index
-            self.index = pc.Index(PINECONE_DOCS_INDEX)
-            print(f"Connected to Pinecone index: {PINECONE_DOCS_INDEX}")
+            pinecone_factory.ensure_index(
+                PINECONE_DOCS_INDEX,
+                dimension=embedding_registry.spec("docs").dimension,
+                metric="cosine"
+            )
+            self.index = open_index("docs")
+            logger.info("Connected to Pinecone index: %s", PINECONE_DOCS_INDEX)
             
         except Exception as e:
-            print(f"Error setting up Pinecone index: {e}")
+            logger.error("Error setting up Pinecone index: %s", e)
             self.index = None
     
     def generate_embedding(self, text: str) -> list:
         """Generate embedding for text using OpenAI"""
         try:
-            response = openai.Embedding.create(
+            response = openai_policy.call(
+                openai.Embedding.create,
+                tokens=estimate_tokens(text=text),
                 input=text,
-                model="text-embedding-ada-002"
+                **embedding_registry.request_params("docs")
             )
-            return response['data'][0]['embedding']
+            return embedding_registry.prepare("docs", response['data'][0]['embedding'])
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            logger.error("Error generating embedding: %s", e)
             return []
     
     def create_chunks(self, content: str, max_chunk_size: int = 2000) -> list:
@@ -77,8 +80,9 @@ class ImprovedAtlanRAGCrawler:
     
     def crawl_atlan_docs(self, base_url: str = "https://developer.atlan.com"):
         """Crawl Atlan documentation and store in Pinecone"""
+        self.setup_pinecone_index()
         if not self.index:
-            print("Pinecone index not available")
+            logger.warning("Pinecone index not available")
             return
         
         # URLs to crawl
@@ -99,11 +103,11 @@ class ImprovedAtlanRAGCrawler:
         
         for url in urls_to_crawl:
             try:
-                print(f"Crawling: {url}")
+                logger.info("Crawling: %s", url)
                 self.crawl_and_store_page(url)
                 time.sleep(1)  # Be respectful to the server
             except Exception as e:
-                print(f"Error crawling {url}: {e}")
+                logger.error("Error crawling %s: %s", url, e)
     
     def crawl_and_store_page(self, url: str):
         """Crawl a single page and store its content in Pinecone"""
@@ -162,10 +166,10 @@ class ImprovedAtlanRAGCrawler:
                                 }
                             )])
                             
-                            print(f"Stored chunk {i} from {url}")
+                            logger.debug("Stored chunk %d from %s", i, url)
                 
         except Exception as e:
-            print(f"Error crawling page {url}: {e}")
+            logger.error("Error crawling page %s: %s", url, e)
     
     def search_content(self, query: str, top_k: int = 5) -> list:
         """Search for relevant content in Pinecone"""
@@ -189,7 +193,7 @@ class ImprovedAtlanRAGCrawler:
             return results['matches']
             
         except Exception as e:
-            print(f"Error searching content: {e}")
+            logger.error("Error searching content: %s", e)
             return []
 
 # Initialize crawler
@@ -0,0 +1,111 @@
+import sqlite3
+from typing import Dict, List, Optional
+
+# Sort rank of each priority, P0 first; shared with the ticket store
+PRIORITY_RANK = {"P0": 0, "P1": 1, "P2": 2}
+
+class IncidentClusters:
+    """
+    Groups near-duplicate tickets (reports of the same outage or bug) into
+    incident clusters, stored alongside the tickets.
+
+    A cluster is opened the first time a ticket is found to duplicate
+    another and takes the highest priority of its members, so a burst of
+    P0 reports surfaces as one P0 incident. Links are written inside the
+    ticket store's transaction.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS incident_clusters (
+                id TEXT PRIMARY KEY,
+                root_ticket_id TEXT NOT NULL,
+                topic TEXT,
+                priority TEXT,
+                priority_rank INTEGER NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS incident_members (
+                ticket_id TEXT PRIMARY KEY,
+                cluster_id TEXT NOT NULL,
+                similarity REAL NOT NULL,
+                joined_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_incident_clusters_priority ON incident_clusters (priority_rank, last_seen);
+            CREATE INDEX IF NOT EXISTS idx_incident_members_cluster ON incident_members (cluster_id);
+            """
+        )
+
+    def cluster_of(self, ticket_id: str) -> Optional[str]:
+        row = self._conn.execute("SELECT cluster_id FROM incident_members WHERE ticket_id = ?", (ticket_id,)).fetchone()
+        return row[0] if row else None
+
+    def link(self, root: Dict, member: Dict, similarity: float, now: str) -> str:
+        """Add `member` to the cluster of `root`, opening one if root is not clustered yet; returns the cluster id"""
+        cluster_id = self.cluster_of(str(root["id"]))
+        if cluster_id is None:
+            cluster_id = f"INC-{root['id']}"
+            self._conn.execute(
+                """INSERT OR IGNORE INTO incident_clusters
+                   (id, root_ticket_id, topic, priority, priority_rank, size, first_seen, last_seen)
+                   VALUES (?, ?, ?, ?, ?, 0, ?, ?)""",
+                (cluster_id, str(root["id"]), root.get("topic"), root.get("priority"), self._rank(root), root.get("created_at") or now, now)
+            )
+            self._add_member(cluster_id, root, 1.0, now)
+        if self.cluster_of(str(member["id"])) != cluster_id:
+            self._add_member(cluster_id, member, similarity, now)
+        return cluster_id
+
+    def _add_member(self, cluster_id: str, ticket: Dict, similarity: float, now: str):
+        previous = self.cluster_of(str(ticket["id"]))
+        if previous is not None:
+            self._conn.execute("UPDATE incident_clusters SET size = size - 1 WHERE id = ?", (previous,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO incident_members (ticket_id, cluster_id, similarity, joined_at) VALUES (?, ?, ?, ?)",
+            (str(ticket["id"]), cluster_id, similarity, now)
+        )
+        rank = self._rank(ticket)
+        # The cluster's priority is that of its most urgent member
+        self._conn.execute(
+            """UPDATE incident_clusters SET
+                   size = size + 1,
+                   last_seen = ?,
+                   priority = CASE WHEN ? < priority_rank THEN ? ELSE priority END,
+                   priority_rank = MIN(priority_rank, ?)
+               WHERE id = ?""",
+            (now, rank, ticket.get("priority"), rank, cluster_id)
+        )
+
+    def list(self, priority: Optional[str] = None, min_size: int = 2, limit: int = 50) -> List[Dict]:
+        """Clusters ordered most urgent first, then most recently active"""
+        sql = "SELECT id, root_ticket_id, topic, priority, size, first_seen, last_seen FROM incident_clusters WHERE size >= ?"
+        params: list = [min_size]
+        if priority:
+            sql += " AND priority_rank = ?"
+            params.append(PRIORITY_RANK.get(priority, len(PRIORITY_RANK)))
+        sql += " ORDER BY priority_rank ASC, last_seen DESC LIMIT ?"
+        params.append(limit)
+        clusters = []
+        for cluster_id, root_ticket_id, topic, cluster_priority, size, first_seen, last_seen in self._conn.execute(sql, params).fetchall():
+            members = self._conn.execute(
+                "SELECT ticket_id FROM incident_members WHERE cluster_id = ? ORDER BY joined_at, ticket_id", (cluster_id,)
+            ).fetchall()
+            clusters.append({
+                "id": cluster_id,
+                "root_ticket_id": root_ticket_id,
+                "topic": topic,
+                "priority": cluster_priority,
+                "size": size,
+                "first_seen": first_seen,
+                "last_seen": last_seen,
+                "ticket_ids": [row[0] for row in members]
+            })
+        return clusters
+
+    @staticmethod
+    def _rank(ticket: Dict) -> int:
+        return PRIORITY_RANK.get(ticket.get("priority"), len(PRIORITY_RANK))
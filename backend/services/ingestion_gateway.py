@@ -0,0 +1,355 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+from config.settings import (
+    INGEST_QUEUE_PATH,
+    INGEST_BATCH_SIZE,
+    INGEST_BATCH_MAX_WAIT_SECONDS,
+    INGEST_CHAT_CONCURRENCY,
+    INGEST_MAX_ATTEMPTS,
+    INGEST_POLL_SECONDS
+)
+from utils.durable_queue import DurableQueue
+from utils.metrics import INGEST_LAG, INGEST_MESSAGES, INGEST_OLDEST_AGE, INGEST_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+# How a channel's messages are processed
+INTERACTIVE = "interactive"  # answered one by one as they arrive (chat)
+BATCH = "batch"  # classified and stored in bulk (email backlogs)
+
+# A claimed message reappears if its worker has not finished it by then
+LEASE_SECONDS = {INTERACTIVE: 60, BATCH: 600}
+MAX_RETRY_DELAY_SECONDS = 60
+
+def _first(payload: Dict, *keys: str) -> str:
+    """The first non-empty value among `keys`, with dotted keys reaching into nested objects"""
+    for key in keys:
+        value = payload
+        for part in key.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value:
+            return str(value)
+    return ""
+
+class ChannelAdapter:
+    """
+    Connects one channel to the gateway: `parse` turns the channel's inbound
+    webhook payload into a message ({"id", "subject", "body", "session_id",
+    "reply_to"}), and `send` delivers a reply to an interactive message.
+
+    The adapters here are local stubs: they parse each channel's usual
+    payload shape, and their `send` keeps the last replies in `sent` instead
+    of calling the channel's API. A deployment subclasses them to deliver
+    replies for real.
+    """
+
+    key = ""  # URL and queue name
+    name = ""  # channel as stored on tickets
+    mode = INTERACTIVE
+
+    def __init__(self, max_sent: int = 100):
+        self.sent = deque(maxlen=max_sent)
+
+    def parse(self, payload: Dict) -> Dict:
+        """Normalize an inbound payload; raises ValueError if it holds no message"""
+        message = self._parse(payload)
+        if not message["body"].strip():
+            raise ValueError(f"{self.name} payload has no message text")
+        message["id"] = message["id"] or f"{self.key}-{uuid.uuid4().hex[:12]}"
+        message["session_id"] = message["session_id"] or message["id"]
+        return message
+
+    def _parse(self, payload: Dict) -> Dict:
+        raise NotImplementedError
+
+    async def send(self, message: Dict, reply: Dict):
+        logger.debug("%s reply to %s: %s", self.name, message.get("reply_to"), reply.get("answer", "")[:80])
+        self.sent.append({"message_id": message["id"], "reply_to": message.get("reply_to"), **reply})
+
+class EmailAdapter(ChannelAdapter):
+    """Inbound email webhooks (message_id, from, subject, text or body, thread_id)"""
+
+    key = "email"
+    name = "Email"
+    mode = BATCH
+
+    def _parse(self, payload: Dict) -> Dict:
+        return {
+            "id": _first(payload, "message_id", "id"),
+            "subject": _first(payload, "subject"),
+            "body": _first(payload, "text", "body", "html"),
+            "session_id": _first(payload, "thread_id", "in_reply_to", "from"),
+            "reply_to": _first(payload, "reply_to", "from")
+        }
+
+class VoiceAdapter(ChannelAdapter):
+    """Transcribed calls and voicemails (call_id, caller, transcript)"""
+
+    key = "voice"
+    name = "Voice"
+    mode = BATCH
+
+    def _parse(self, payload: Dict) -> Dict:
+        return {
+            "id": _first(payload, "call_id", "id"),
+            "subject": _first(payload, "subject") or "Voice call",
+            "body": _first(payload, "transcript", "text"),
+            "session_id": _first(payload, "call_id", "caller"),
+            "reply_to": _first(payload, "caller")
+        }
+
+class WhatsAppAdapter(ChannelAdapter):
+    """WhatsApp messages, Twilio (MessageSid, From, Body) or generic (id, from, text)"""
+
+    key = "whatsapp"
+    name = "WhatsApp"
+
+    def _parse(self, payload: Dict) -> Dict:
+        sender = _first(payload, "From", "from")
+        return {
+            "id": _first(payload, "MessageSid", "id"),
+            "subject": "",
+            "body": _first(payload, "Body", "text", "text.body"),
+            "session_id": sender,
+            "reply_to": sender
+        }
+
+class SlackAdapter(ChannelAdapter):
+    """Slack Events API message events; a thread is one session"""
+
+    key = "slack"
+    name = "Slack"
+
+    def _parse(self, payload: Dict) -> Dict:
+        event = payload.get("event", payload)
+        channel = _first(event, "channel")
+        thread = _first(event, "thread_ts", "ts")
+        return {
+            "id": _first(payload, "event_id") or (f"slack-{channel}-{_first(event, 'ts')}" if _first(event, "ts") else ""),
+            "subject": "",
+            "body": _first(event, "text"),
+            "session_id": f"slack-{channel}-{thread}" if channel else "",
+            "reply_to": f"{channel}:{thread}" if channel else _first(event, "user")
+        }
+
+class TeamsAdapter(ChannelAdapter):
+    """Microsoft Teams Bot Framework message activities; a conversation is one session"""
+
+    key = "teams"
+    name = "Microsoft Teams"
+
+    def _parse(self, payload: Dict) -> Dict:
+        conversation = _first(payload, "conversation.id")
+        return {
+            "id": _first(payload, "id"),
+            "subject": "",
+            "body": _first(payload, "text"),
+            "session_id": f"teams-{conversation}" if conversation else "",
+            "reply_to": conversation or _first(payload, "from.id")
+        }
+
+BatchHandler = Callable[[ChannelAdapter, List[Dict]], Awaitable[None]]
+MessageHandler = Callable[[ChannelAdapter, Dict], Awaitable[Optional[Dict]]]
+
+class IngestionGateway:
+    """
+    Receives messages from every channel into a durable queue per channel,
+    and drains each queue with a worker suited to the channel.
+
+    Interactive channels (chat) answer up to `chat_concurrency` messages at
+    once, each as soon as it arrives, and reply through the adapter. Batch
+    channels (email, voice) wait until `batch_size` messages are queued or
+    the oldest has waited `batch_max_wait_seconds`, then hand the whole
+    batch to the batch handler, which classifies it in bulk.
+
+    Messages are committed to the queue before `submit` returns and removed
+    only after they are processed, so a crash or a failing handler loses
+    nothing: failed messages are retried with backoff and dead-lettered
+    after the queue's max attempts.
+    """
+
+    def __init__(
+        self,
+        queue: DurableQueue,
+        batch_size: int = 25,
+        batch_max_wait_seconds: float = 30,
+        chat_concurrency: int = 8,
+        poll_seconds: float = 0.5
+    ):
+        self.queue = queue
+        self.batch_size = batch_size
+        self.batch_max_wait_seconds = batch_max_wait_seconds
+        self.chat_concurrency = chat_concurrency
+        self.poll_seconds = poll_seconds
+        self.adapters: Dict[str, ChannelAdapter] = {}
+        self._batch_handler: Optional[BatchHandler] = None
+        self._message_handler: Optional[MessageHandler] = None
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, adapter: ChannelAdapter) -> ChannelAdapter:
+        self.adapters[adapter.key] = adapter
+        return adapter
+
+    def set_handlers(self, batch: BatchHandler, message: MessageHandler):
+        """Set how batch channel batches and interactive messages are processed"""
+        self._batch_handler = batch
+        self._message_handler = message
+
+    def adapter(self, channel: str) -> ChannelAdapter:
+        """The adapter for a channel key; raises KeyError for an unknown channel"""
+        return self.adapters[channel.lower()]
+
+    def submit(self, channel: str, payload: Dict) -> Dict:
+        """Parse and durably enqueue an inbound payload; returns the queued message"""
+        adapter = self.adapter(channel)
+        message = adapter.parse(payload)
+        message["queue_id"] = self.queue.put(adapter.key, message)
+        INGEST_MESSAGES.labels(channel=adapter.key, result="received").inc()
+        wakeup = self._wakeups.get(adapter.key)
+        if wakeup is not None:
+            wakeup.set()
+        return message
+
+    def stats(self) -> Dict[str, Dict]:
+        return {key: self._channel_stats(adapter) for key, adapter in self.adapters.items()}
+
+    def _channel_stats(self, adapter: ChannelAdapter) -> Dict:
+        stats = self.queue.stats(adapter.key)
+        INGEST_QUEUE_DEPTH.labels(channel=adapter.key).set(stats["depth"])
+        INGEST_OLDEST_AGE.labels(channel=adapter.key).set(stats["oldest_age_seconds"])
+        return {"name": adapter.name, "mode": adapter.mode, **stats}
+
+    async def process_once(self, channel: str, flush: bool = False) -> int:
+        """
+        Process what is due on one channel; returns how many messages were
+        handled. A batch channel waits for a full batch (or the oldest
+        message's max wait) unless `flush` is set.
+        """
+        adapter = self.adapter(channel)
+        if adapter.mode == BATCH:
+            stats = self._channel_stats(adapter)
+            if not stats["depth"]:
+                return 0
+            if not flush and stats["depth"] < self.batch_size and stats["oldest_age_seconds"] < self.batch_max_wait_seconds:
+                return 0
+            claimed = self.queue.claim(adapter.key, self.batch_size, LEASE_SECONDS[BATCH])
+            if claimed:
+                await self._process_batch(adapter, claimed)
+        else:
+            claimed = self.queue.claim(adapter.key, self.chat_concurrency, LEASE_SECONDS[INTERACTIVE])
+            if claimed:
+                await asyncio.gather(*(self._process_message(adapter, item) for item in claimed))
+        if claimed:
+            self._channel_stats(adapter)
+        return len(claimed)
+
+    async def _process_batch(self, adapter: ChannelAdapter, claimed: List[Dict]):
+        try:
+            await self._batch_handler(adapter, [item["payload"] for item in claimed])
+        except Exception as e:
+            logger.warning("%s batch of %d failed: %s", adapter.name, len(claimed), e)
+            self._retry(adapter, claimed, e)
+            return
+        self._done(adapter, claimed)
+
+    async def _process_message(self, adapter: ChannelAdapter, item: Dict):
+        try:
+            reply = await self._message_handler(adapter, item["payload"])
+            if reply is not None:
+                await adapter.send(item["payload"], reply)
+        except Exception as e:
+            logger.warning("%s message %s failed: %s", adapter.name, item["payload"]["id"], e)
+            self._retry(adapter, [item], e)
+            return
+        self._done(adapter, [item])
+
+    def _done(self, adapter: ChannelAdapter, claimed: List[Dict]):
+        self.queue.ack([item["id"] for item in claimed])
+        now = time.time()
+        for item in claimed:
+            INGEST_LAG.labels(channel=adapter.key).observe(now - item["enqueued_at"])
+        INGEST_MESSAGES.labels(channel=adapter.key, result="processed").inc(len(claimed))
+
+    def _retry(self, adapter: ChannelAdapter, claimed: List[Dict], error: Exception):
+        delay = min(2 ** max(item["attempts"] for item in claimed), MAX_RETRY_DELAY_SECONDS)
+        dead = self.queue.retry([item["id"] for item in claimed], f"{type(error).__name__}: {error}", delay)
+        INGEST_MESSAGES.labels(channel=adapter.key, result="retried").inc(len(claimed) - dead)
+        if dead:
+            INGEST_MESSAGES.labels(channel=adapter.key, result="dead").inc(dead)
+
+    def start(self):
+        """Start one worker per channel on the running event loop"""
+        if self._tasks:
+            return
+        for key in self.adapters:
+            self._wakeups[key] = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._run(key), name=f"ingest-{key}"))
+        logger.info("Ingestion gateway started for %s", ", ".join(self.adapters))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeups = {}
+
+    async def _run(self, channel: str):
+        adapter = self.adapter(channel)
+        wakeup = self._wakeups[channel]
+        inflight = set()
+        try:
+            while True:
+                try:
+                    if adapter.mode == BATCH:
+                        processed = await self.process_once(channel)
+                    else:
+                        processed = self._dispatch(adapter, inflight, wakeup)
+                except Exception as e:
+                    logger.exception("Ingestion worker for %s failed: %s", channel, e)
+                    processed = 0
+                if processed:
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+        finally:
+            # Unfinished messages reappear when their lease runs out
+            for task in inflight:
+                task.cancel()
+
+    def _dispatch(self, adapter: ChannelAdapter, inflight: set, wakeup: asyncio.Event) -> int:
+        """Claim as many chat messages as there are free slots and answer each in its own task"""
+        free = self.chat_concurrency - len(inflight)
+        if free <= 0:
+            return 0
+        claimed = self.queue.claim(adapter.key, free, LEASE_SECONDS[INTERACTIVE])
+        for item in claimed:
+            task = asyncio.create_task(self._process_message(adapter, item))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+            # A freed slot can take the next message straight away
+            task.add_done_callback(lambda _: wakeup.set())
+        if claimed:
+            self._channel_stats(adapter)
+        return len(claimed)
+
+# Global instance
+ingestion_gateway = IngestionGateway(
+    DurableQueue(INGEST_QUEUE_PATH, INGEST_MAX_ATTEMPTS),
+    INGEST_BATCH_SIZE,
+    INGEST_BATCH_MAX_WAIT_SECONDS,
+    INGEST_CHAT_CONCURRENCY,
+    INGEST_POLL_SECONDS
+)
+for _adapter in (EmailAdapter(), VoiceAdapter(), WhatsAppAdapter(), SlackAdapter(), TeamsAdapter()):
+    ingestion_gateway.register(_adapter)
+# SQLite connections must not be shared across fork
+os.register_at_fork(after_in_child=ingestion_gateway.queue.reopen)
@@ -3,6 +3,22 @@ import json
 import re
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
+from utils.keyword_matcher import KeywordMatcher
+
+TECH_MATCHER = KeywordMatcher({
+    'python': ['python', 'py'],
+    'java': ['java'],
+    'javascript': ['javascript', 'js', 'node', 'typescript'],
+    'go': ['go', 'golang'],
+    'snowflake': ['snowflake'],
+    'databricks': ['databricks'],
+    'powerbi': ['powerbi', 'power bi'],
+    'tableau': ['tableau']
+})
+URGENCY_MATCHER = KeywordMatcher(['urgent', 'critical', 'emergency', 'asap', 'immediately'])
+GOVERNANCE_MATCHER = KeywordMatcher(['governance', 'workspace*', 'team*', 'permission*', 'best practice*', 'rollout', 'business unit*'])
+AUTH_MATCHER = KeywordMatcher(['authentication', 'auth', 'api key', 'oauth'])
+CONNECTOR_MATCHER = KeywordMatcher(['lineage', 'connector*', 'capture*'])
 
 @dataclass
 class URLResult:
@@ -55,12 +71,13 @@ class IntelligentURLResolver:
         
         # Intent keywords mapping
         self.intent_keywords = {
-            'setup': ['setup', 'install', 'configure', 'getting started', 'begin'],
-            'authentication': ['auth', 'login', 'token', 'api key', 'credentials'],
-            'troubleshooting': ['error', 'issue', 'problem', 'fix', 'debug'],
-            'configuration': ['config', 'settings', 'options', 'customize'],
-            'reference': ['api', 'reference', 'documentation', 'guide']
+            'setup': ['setup', 'install*', 'configure', 'getting started', 'begin*'],
+            'authentication': ['auth*', 'login', 'token*', 'api key', 'credential*'],
+            'troubleshooting': ['error*', 'issue*', 'problem*', 'fix*', 'debug*'],
+            'configuration': ['config*', 'setting*', 'option*', 'customiz*'],
+            'reference': ['api', 'apis', 'reference', 'documentation', 'guide*']
         }
+        self._intent_matcher = KeywordMatcher(self.intent_keywords)
 
     def analyze_intent(self, query: str) -> Dict[str, any]:
         """Analyze user intent using AI-powered context extraction"""
@@ -88,40 +105,22 @@ class IntelligentURLResolver:
 
     def _extract_technology(self, query: str) -> Optional[str]:
         """Extract technology/platform from query"""
-        tech_patterns = {
-            'python': ['python', 'py'],
-            'java': ['java'],
-            'javascript': ['javascript', 'js', 'node', 'typescript'],
-            'go': ['go', 'golang'],
-            'snowflake': ['snowflake'],
-            'databricks': ['databricks'],
-            'powerbi': ['powerbi', 'power bi'],
-            'tableau': ['tableau']
-        }
-        
-        for tech, patterns in tech_patterns.items():
-            if any(pattern in query for pattern in patterns):
-                return tech
-        return None
+        return TECH_MATCHER.first(query)
 
     def _extract_action(self, query: str) -> str:
         """Extract user action/intent from query"""
-        for action, keywords in self.intent_keywords.items():
-            if any(keyword in query for keyword in keywords):
-                return action
-        return 'general'
+        return self._intent_matcher.first(query) or 'general'
 
     def _extract_urgency(self, query: str) -> str:
         """Extract urgency level from query"""
-        urgent_keywords = ['urgent', 'critical', 'emergency', 'asap', 'immediately']
-        if any(keyword in query for keyword in urgent_keywords):
+        if URGENCY_MATCHER.matches(query):
             return 'high'
         return 'medium'
 
     def _determine_category(self, query: str, technology: str) -> str:
         """Determine primary category based on query and technology"""
         # Check for governance keywords first
-        if any(keyword in query for keyword in ['governance', 'workspace', 'team', 'permission', 'best practice', 'rollout', 'business unit']):
+        if GOVERNANCE_MATCHER.matches(query):
             return 'governance'
         elif technology in ['python', 'java', 'javascript', 'go']:
             return 'sdk'
@@ -209,7 +208,7 @@ class IntelligentURLResolver:
         # Handle specific API/SDK cases without technology
         elif category == 'sdk' and not technology:
             # General API/SDK questions
-            if any(keyword in intent['original_query'].lower() for keyword in ['authentication', 'auth', 'api key', 'oauth']):
+            if AUTH_MATCHER.matches(intent['original_query']):
                 candidates.append(URLResult(
                     doc='API Authentication Guide',
                     url='https://developer.atlan.com',
@@ -227,7 +226,7 @@ class IntelligentURLResolver:
         # Handle specific connector cases without technology
         elif category == 'integrations' and not technology:
             # General connector/integration questions
-            if any(keyword in intent['original_query'].lower() for keyword in ['lineage', 'connector', 'capture']):
+            if CONNECTOR_MATCHER.matches(intent['original_query']):
                 candidates.append(URLResult(
                     doc='Connectors & Lineage Guide',
                     url='https://docs.atlan.com/product/integrations',
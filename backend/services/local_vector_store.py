@@ -0,0 +1,319 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATIONS = ("none", "int8", "binary")
+
+# Rows scored per step when scanning quantized codes, so the float32 working set stays small
+SCAN_CHUNK_ROWS = 16384
+
+# Set-bit count of every byte value, for Hamming distances over packed sign bits
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+def quantize_int8(vectors: np.ndarray):
+    """Symmetric per-vector scalar quantization: returns int8 codes and the scale to undo it"""
+    scales = np.abs(vectors).max(axis=-1, keepdims=True) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, scales.squeeze(-1).astype(np.float32)
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed eight to a byte"""
+    return np.packbits(vectors > 0, axis=-1)
+
+class LocalVectorStore:
+    """
+    Self-hosted vector index with the subset of the Pinecone index API the
+    services use (upsert, query, fetch, describe_index_stats).
+
+    Full-precision float32 vectors live in a memory-mapped file on disk, ids
+    and metadata in SQLite, and only the quantized codes are held in RAM:
+    int8 codes (4x smaller than float32) or packed sign bits (32x smaller).
+    A query scans the codes for top_k * rescore_multiplier candidates with
+    int8 dot products or Hamming distance, then rescores those candidates
+    exactly against the float32 rows read from the mmap.
+
+    Vectors are L2-normalized on write, so scores are cosine similarities.
+    Pass path=None for a purely in-memory store.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        dimension: int,
+        quantization: str = "int8",
+        rescore_multiplier: int = 4,
+        normalize: bool = True
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}' (expected one of {', '.join(QUANTIZATIONS)})")
+        self.path = path
+        self.dimension = dimension
+        self.quantization = quantization
+        self.rescore_multiplier = max(1, rescore_multiplier)
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self._count = 0
+        self._capacity = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(f"{path}.db" if path else ":memory:", check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS vectors (id TEXT PRIMARY KEY, row INTEGER NOT NULL, metadata TEXT)")
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        """Reopen an existing store: map the float32 file and rebuild the quantized codes from it"""
+        rows = self._conn.execute("SELECT id, row FROM vectors ORDER BY row").fetchall()
+        if not rows:
+            return
+        self._ids = [vector_id for vector_id, _ in rows]
+        self._rows = {vector_id: row for vector_id, row in rows}
+        self._count = len(rows)
+        self._grow(self._count)
+        for start in range(0, self._count, SCAN_CHUNK_ROWS):
+            stop = min(start + SCAN_CHUNK_ROWS, self._count)
+            self._store_codes(start, np.asarray(self._vectors[start:stop]))
+        logger.info("Loaded %d vectors from %s (%s)", self._count, self.path, self.quantization)
+
+    def _grow(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2, 1024)
+        if self.path:
+            if self._vectors is not None:
+                self._vectors.flush()
+            vectors_path = f"{self.path}.f32"
+            with open(vectors_path, "ab") as f:
+                f.truncate(capacity * self.dimension * 4)
+            self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        else:
+            vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            if self._vectors is not None:
+                vectors[:self._capacity] = self._vectors
+            self._vectors = vectors
+
+        if self.quantization != "none":
+            width = self.dimension if self.quantization == "int8" else (self.dimension + 7) // 8
+            codes = np.zeros((capacity, width), dtype=np.int8 if self.quantization == "int8" else np.uint8)
+            scales = np.zeros(capacity, dtype=np.float32)
+            if self._codes is not None:
+                codes[:self._capacity] = self._codes
+                scales[:self._capacity] = self._scales
+            self._codes, self._scales = codes, scales
+        self._capacity = capacity
+
+    def _store_codes(self, start: int, vectors: np.ndarray):
+        stop = start + len(vectors)
+        if self.quantization == "int8":
+            self._codes[start:stop], self._scales[start:stop] = quantize_int8(vectors)
+        elif self.quantization == "binary":
+            self._codes[start:stop] = quantize_binary(vectors)
+
+    def _prepare(self, vectors) -> np.ndarray:
+        array = np.asarray(vectors, dtype=np.float32)
+        if array.ndim == 1:
+            array = array[np.newaxis, :]
+        if array.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension {array.shape[1]} does not match store dimension {self.dimension}")
+        if self.normalize:
+            norms = np.linalg.norm(array, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            array = array / norms
+        return array
+
+    def upsert(self, vectors, **kwargs) -> Dict:
+        """Insert or replace vectors given as (id, values, metadata) tuples or {"id", "values", "metadata"} dicts"""
+        items = [item if isinstance(item, tuple) else (item["id"], item["values"], item.get("metadata", {})) for item in vectors]
+        if not items:
+            return {"upserted_count": 0}
+        array = self._prepare([values for _, values, _ in items])
+        with self._lock:
+            rows = []
+            for vector_id, _, _ in items:
+                vector_id = str(vector_id)
+                row = self._rows.get(vector_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[vector_id] = row
+                    self._ids.append(vector_id)
+                rows.append(row)
+            self._grow(len(self._ids))
+            for row, vector in zip(rows, array):
+                self._vectors[row] = vector
+                self._store_codes(row, vector[np.newaxis, :])
+            self._count = len(self._ids)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (id, row, metadata) VALUES (?, ?, ?)",
+                [(str(vector_id), row, json.dumps(metadata or {})) for (vector_id, _, metadata), row in zip(items, rows)]
+            )
+            self._conn.commit()
+        return {"upserted_count": len(items)}
+
+    def _candidate_scores(self, query: np.ndarray, count: int) -> np.ndarray:
+        """Approximate scores (higher is better) for the first `count` rows from the quantized codes"""
+        scores = np.empty(count, dtype=np.float32)
+        if self.quantization == "int8":
+            query_codes, query_scale = quantize_int8(query)
+            query_codes = query_codes.astype(np.float32)
+        elif self.quantization == "binary":
+            query_bits = quantize_binary(query)
+        for start in range(0, count, SCAN_CHUNK_ROWS):
+            stop = min(start + SCAN_CHUNK_ROWS, count)
+            if self.quantization == "int8":
+                scores[start:stop] = (self._codes[start:stop].astype(np.float32) @ query_codes) * self._scales[start:stop] * query_scale
+            elif self.quantization == "binary":
+                distances = POPCOUNT[np.bitwise_xor(self._codes[start:stop], query_bits)].sum(axis=1)
+                scores[start:stop] = -distances.astype(np.float32)
+            else:
+                scores[start:stop] = self._vectors[start:stop] @ query
+        return scores
+
+    def _search(self, query: np.ndarray, top_k: int, rescore: bool = True, allowed: Optional[np.ndarray] = None) -> List:
+        with self._lock:
+            count = self._count
+            if not count or top_k <= 0:
+                return []
+            scores = self._candidate_scores(query, count)
+            if allowed is not None:
+                allowed = allowed[allowed < count]
+                if not len(allowed):
+                    return []
+                # Rows outside the filter can never be candidates
+                excluded = np.ones(count, dtype=bool)
+                excluded[allowed] = False
+                scores[excluded] = -np.inf
+                top_k = min(top_k, len(allowed))
+                count = len(allowed)
+            if self.quantization == "none" or not rescore:
+                top = np.argsort(-scores)[:top_k]
+                return [(int(row), float(scores[row])) for row in top]
+
+            candidates = min(count, top_k * self.rescore_multiplier)
+            rows = np.argpartition(-scores, candidates - 1)[:candidates]
+            rows.sort()  # sequential reads from the mmap
+            exact = np.asarray(self._vectors[rows]) @ query
+            order = np.argsort(-exact)[:top_k]
+            return [(int(rows[i]), float(exact[i])) for i in order]
+
+    def query(
+        self,
+        vector=None,
+        top_k: int = 5,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        filter: Optional[Dict] = None,
+        **kwargs
+    ) -> Dict:
+        query = self._prepare(vector)[0]
+        allowed = self._filter_rows(filter) if filter else None
+        results = self._search(query, top_k, allowed=allowed)
+        metadata = self._metadata([self._ids[row] for row, _ in results]) if include_metadata else {}
+        return {"matches": [
+            {
+                "id": self._ids[row],
+                "score": score,
+                "metadata": metadata.get(self._ids[row], {}),
+                "values": self._vectors[row].tolist() if include_values else []
+            }
+            for row, score in results
+        ]}
+
+    def _filter_rows(self, filter: Dict) -> np.ndarray:
+        """Rows whose metadata equals every value of a Pinecone-style filter ({"field": value} or {"field": {"$eq": value}})"""
+        conditions, values = [], []
+        for field, condition in filter.items():
+            if isinstance(condition, dict):
+                if set(condition) != {"$eq"}:
+                    raise ValueError(f"Unsupported filter on {field}: only $eq is supported")
+                condition = condition["$eq"]
+            conditions.append("json_extract(metadata, ?) = ?")
+            values.extend([f"$.{field}", condition])
+        with self._lock:
+            rows = self._conn.execute(f"SELECT row FROM vectors WHERE {' AND '.join(conditions)}", values).fetchall()
+        return np.array([row for row, in rows], dtype=np.int64)
+
+    def _metadata(self, ids: List[str]) -> Dict[str, Dict]:
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, metadata FROM vectors WHERE id IN ({placeholders})", ids).fetchall()
+        return {vector_id: json.loads(metadata) if metadata else {} for vector_id, metadata in rows}
+
+    def fetch(self, ids: List[str], **kwargs) -> Dict:
+        metadata = self._metadata([str(vector_id) for vector_id in ids])
+        return {"vectors": {
+            vector_id: {"id": vector_id, "values": self._vectors[self._rows[vector_id]].tolist(), "metadata": metadata.get(vector_id, {})}
+            for vector_id in map(str, ids) if vector_id in self._rows
+        }}
+
+    def list(self, limit: int = 100, **kwargs) -> Iterator[List[str]]:
+        """Every stored id, `limit` at a time, like a Pinecone serverless index's list"""
+        with self._lock:
+            ids = list(self._ids)
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def describe_index_stats(self, **kwargs) -> Dict:
+        return {"total_vector_count": self._count, "dimension": self.dimension}
+
+    def flush(self):
+        with self._lock:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+
+    def memory_report(self) -> Dict:
+        """RAM held by the quantized codes versus keeping every vector in RAM as float32"""
+        float32_bytes = self._count * self.dimension * 4
+        if self.quantization == "none":
+            ram_bytes = float32_bytes
+        else:
+            ram_bytes = self._count * (self._codes.shape[1] * self._codes.itemsize + self._scales.itemsize)
+        return {
+            "vectors": self._count,
+            "dimension": self.dimension,
+            "quantization": self.quantization,
+            "ram_bytes": ram_bytes,
+            "float32_bytes": float32_bytes,
+            "bytes_per_vector": round(ram_bytes / self._count, 1) if self._count else 0.0,
+            "compression": round(float32_bytes / ram_bytes, 2) if ram_bytes else 0.0,
+            "disk_bytes": float32_bytes if self.path else 0
+        }
+
+    def recall_report(self, queries, top_k: int = 10) -> Dict:
+        """
+        recall@k of the quantized search, with and without float32 rescoring,
+        against exact brute-force search over the full-precision vectors
+        """
+        queries = self._prepare(queries)
+        with_rescore, without_rescore = [], []
+        for query in queries:
+            with self._lock:
+                count = self._count
+                exact = np.asarray(self._vectors[:count]) @ query
+            truth = set(np.argsort(-exact)[:top_k].tolist())
+            if not truth:
+                continue
+            with_rescore.append(len(truth & {row for row, _ in self._search(query, top_k)}) / len(truth))
+            without_rescore.append(len(truth & {row for row, _ in self._search(query, top_k, rescore=False)}) / len(truth))
+        return {
+            "queries": len(with_rescore),
+            "top_k": top_k,
+            "quantization": self.quantization,
+            "rescore_multiplier": self.rescore_multiplier,
+            "recall_at_k": round(float(np.mean(with_rescore)), 4) if with_rescore else 0.0,
+            "recall_at_k_without_rescoring": round(float(np.mean(without_rescore)), 4) if without_rescore else 0.0
+        }
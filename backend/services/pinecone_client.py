@@ -0,0 +1,213 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+import urllib3
+from config.settings import (
+    PINECONE_API_KEY,
+    PINECONE_USE_GRPC,
+    PINECONE_POOL_THREADS,
+    PINECONE_HEALTH_CHECK_INTERVAL_SECONDS,
+    PINECONE_MAX_BACKOFF_SECONDS
+)
+from utils.resilience import ResiliencePolicy, pinecone_policy
+
+logger = logging.getLogger(__name__)
+
+class PineconeUnavailableError(RuntimeError):
+    """Raised while the client is backing off after connection failures"""
+
+def _is_connection_error(error: Exception) -> bool:
+    """Errors that mean the connection is bad, as opposed to a rejected request"""
+    if isinstance(error, (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError)):
+        return True
+    # gRPC transport errors and Pinecone 5xx responses, matched by name so neither package is required here
+    return type(error).__name__ in {"RpcError", "_InactiveRpcError", "ServiceException"}
+
+class PineconeClientFactory:
+    """
+    One shared, thread-safe Pinecone client for the whole process.
+
+    The client and index handles are created lazily on first use and then
+    reused, so requests share the client's keep-alive connection pool instead
+    of each module opening its own. The gRPC transport is used when
+    pinecone-client[grpc] is installed (and PINECONE_USE_GRPC allows it).
+
+    Nothing here probes Pinecone on the request path: connection failures
+    reported by callers drop the cached handles, and reconnecting waits out an
+    exponential backoff. An optional background thread health-checks the open
+    indexes so a broken connection is noticed before a request hits it.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        use_grpc: str = "auto",
+        pool_threads: int = 4,
+        health_check_interval: float = 30.0,
+        max_backoff: float = 30.0,
+        policy: Optional[ResiliencePolicy] = None
+    ):
+        self.api_key = api_key
+        self.use_grpc = use_grpc
+        self.pool_threads = pool_threads
+        self.health_check_interval = health_check_interval
+        self.max_backoff = max_backoff
+        # Rate limit, retry and circuit breaker applied to calls made through lazy_index()
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._client = None
+        self._indexes: Dict[str, object] = {}
+        self._failures = 0
+        self._retry_at = 0.0
+        self._stop_health_checks = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def _connect(self):
+        if self.use_grpc != "false":
+            try:
+                from pinecone.grpc import PineconeGRPC
+                logger.info("Connecting to Pinecone over gRPC")
+                return PineconeGRPC(api_key=self.api_key)
+            except ImportError:
+                if self.use_grpc == "true":
+                    logger.warning("PINECONE_USE_GRPC is set but pinecone-client[grpc] is not installed; using HTTP")
+        # Looked up at call time so the client class can be swapped (tests, benchmarks)
+        import pinecone
+        logger.info("Connecting to Pinecone over HTTP")
+        return pinecone.Pinecone(api_key=self.api_key, pool_threads=self.pool_threads)
+
+    def client(self):
+        """Return the shared client, connecting if needed"""
+        with self._lock:
+            return self._client_locked()
+
+    def _client_locked(self):
+        if self._client is None:
+            if time.monotonic() < self._retry_at:
+                raise PineconeUnavailableError(
+                    f"Pinecone unavailable; retrying in {self._retry_at - time.monotonic():.1f}s"
+                )
+            self._client = self._connect()
+        return self._client
+
+    def index(self, name: str):
+        """Return the shared handle for an index, connecting if needed. Does not call the index."""
+        with self._lock:
+            handle = self._indexes.get(name)
+            if handle is None:
+                handle = self._client_locked().Index(name)
+                self._indexes[name] = handle
+            return handle
+
+    def lazy_index(self, name: str) -> "LazyIndex":
+        """A handle that resolves the real index on each call, so it survives reconnects"""
+        return LazyIndex(self, name)
+
+    def ensure_index(self, name: str, dimension: int, metric: str = "cosine"):
+        """
+        Create the index if it does not exist, or check that the existing one
+        has the expected dimension. For ingestion jobs, not the request path.
+        """
+        client = self.client()
+        if name not in client.list_indexes().names():
+            client.create_index(name=name, dimension=dimension, metric=metric)
+            logger.info("Created Pinecone index: %s", name)
+        else:
+            existing = client.describe_index(name).dimension
+            if existing != dimension:
+                raise ValueError(f"Pinecone index '{name}' has dimension {existing}, expected {dimension}")
+        return self.index(name)
+
+    def report_success(self):
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+                self._retry_at = 0.0
+
+    def report_failure(self, error: Exception):
+        """Drop the client after a connection failure and schedule the next reconnect with backoff"""
+        if not _is_connection_error(error):
+            return
+        with self._lock:
+            self._failures += 1
+            backoff = min(self.max_backoff, 0.5 * 2 ** (self._failures - 1))
+            # Full jitter, so workers that failed together do not reconnect together
+            self._retry_at = time.monotonic() + random.uniform(0, backoff)
+            self._client = None
+            self._indexes = {}
+        logger.warning("Pinecone connection failure #%d (%s); reconnecting after backoff", self._failures, error)
+
+    def health_check(self) -> bool:
+        """Ping every open index once; reports failures so the next call reconnects"""
+        with self._lock:
+            handles = list(self._indexes.items())
+        try:
+            for _, handle in handles:
+                handle.describe_index_stats()
+        except Exception as e:
+            self.report_failure(e)
+            return False
+        self.report_success()
+        return True
+
+    def start_health_checks(self):
+        """Health-check open indexes in a background thread every health_check_interval seconds"""
+        if self._health_thread is not None or self.health_check_interval <= 0:
+            return
+        self._stop_health_checks.clear()
+
+        def run():
+            while not self._stop_health_checks.wait(self.health_check_interval):
+                self.health_check()
+
+        self._health_thread = threading.Thread(target=run, name="pinecone-health-check", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        self._stop_health_checks.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=1)
+            self._health_thread = None
+
+class LazyIndex:
+    """
+    Stand-in for a Pinecone index handle. Each method call fetches the shared
+    handle from the factory, and connection failures are reported back so the
+    factory can reconnect.
+    """
+
+    def __init__(self, factory: PineconeClientFactory, name: str):
+        self._factory = factory
+        self.name = name
+
+    def __getattr__(self, attribute: str):
+        def attempt(*args, **kwargs):
+            handle = self._factory.index(self.name)
+            try:
+                result = getattr(handle, attribute)(*args, **kwargs)
+            except Exception as e:
+                self._factory.report_failure(e)
+                raise
+            self._factory.report_success()
+            return result
+
+        def call(*args, **kwargs):
+            if self._factory.policy is None:
+                return attempt(*args, **kwargs)
+            return self._factory.policy.call(attempt, *args, **kwargs)
+        return call
+
+    def __repr__(self):
+        return f"LazyIndex({self.name!r})"
+
+# Global instance
+pinecone_factory = PineconeClientFactory(
+    PINECONE_API_KEY,
+    use_grpc=PINECONE_USE_GRPC,
+    pool_threads=PINECONE_POOL_THREADS,
+    health_check_interval=PINECONE_HEALTH_CHECK_INTERVAL_SECONDS,
+    max_backoff=PINECONE_MAX_BACKOFF_SECONDS,
+    policy=pinecone_policy
+)
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from utils.metrics import PROMPT_PREFIX_TOKENS, PROMPT_TOKENS
+from utils.resilience import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    A chat prompt split into a static prefix and the variable request.
+
+    `system` and `instructions` never change between calls and are sent first,
+    as the system message, so every call of the template shares the same
+    leading tokens and can be served from the provider's prompt prefix cache.
+    `request` is a str.format template holding everything per-call (ticket
+    text, retrieved context, the user's question) and is sent last, as the
+    user message.
+
+    The version is a hash of the whole template plus `model` and anything in
+    `depends_on` (e.g. the taxonomy), so caches keyed on it are invalidated
+    by any prompt change.
+    """
+
+    name: str
+    system: str
+    request: str
+    instructions: str = ""
+    model: str = "gpt-3.5-turbo"
+    depends_on: tuple = field(default_factory=tuple)
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.system}\n\n{self.instructions}".strip() if self.instructions else self.system
+
+    @property
+    def version(self) -> str:
+        raw = json.dumps([self.name, self.model, self.system, self.instructions, self.request, list(self.depends_on)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def prefix_tokens(self) -> int:
+        return estimate_tokens(text=self.prefix)
+
+    def messages(self, **values) -> List[Dict]:
+        """Chat messages for one call: the static prefix, then the filled-in request"""
+        return [
+            {"role": "system", "content": self.prefix},
+            {"role": "user", "content": self.request.format(**values)}
+        ]
+
+class PromptRegistry:
+    """
+    Every prompt the service sends, by name, with its version and the size
+    of its cacheable prefix. Templates register at import; the registry
+    reports prompt token usage per template, including how much of it the
+    provider served from its prefix cache.
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        existing = self._templates.get(template.name)
+        if existing is not None and existing.version != template.version:
+            raise ValueError(f"Prompt template {template.name!r} is already registered with a different version")
+        self._templates[template.name] = template
+        PROMPT_PREFIX_TOKENS.labels(template=template.name).set(template.prefix_tokens)
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def describe(self) -> List[Dict]:
+        return [
+            {"name": template.name, "version": template.version, "model": template.model, "prefix_tokens": template.prefix_tokens}
+            for template in self._templates.values()
+        ]
+
+    @staticmethod
+    def record_usage(template: PromptTemplate, response) -> Optional[int]:
+        """Count a response's prompt tokens, and the cached part of them, against its template"""
+        try:
+            usage = response["usage"]
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            details = usage.get("prompt_tokens_details") or {}
+            cached_tokens = details.get("cached_tokens", 0) if isinstance(details, dict) else getattr(details, "cached_tokens", 0)
+        except (AttributeError, KeyError, TypeError):
+            return None
+        if not isinstance(prompt_tokens, int):
+            return None
+        PROMPT_TOKENS.labels(template=template.name, kind="prompt").inc(prompt_tokens)
+        if isinstance(cached_tokens, int) and cached_tokens:
+            PROMPT_TOKENS.labels(template=template.name, kind="cached").inc(cached_tokens)
+        return prompt_tokens
+
+# Global instance
+prompt_registry = PromptRegistry()
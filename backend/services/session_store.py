@@ -0,0 +1,176 @@
+import json
+import logging
+import re
+import time
+from typing import Dict, List, Optional
+from config.settings import (
+    SESSION_MAX_TURNS,
+    SESSION_TTL_SECONDS,
+    SESSION_MAX_SESSIONS,
+    SESSION_MAX_BYTES
+)
+from utils.keyword_matcher import KeywordMatcher
+from utils.state_backend import MemoryStateBackend, StateBackend, state_backend
+
+logger = logging.getLogger(__name__)
+
+# Session id clients send when they have no session; never remembered, since everyone shares it
+ANONYMOUS_SESSION = "default"
+
+# A query that continues the previous turn starts with it ("what about Java?", "and for Okta?")
+CONTINUATION_PATTERN = re.compile(r"^\W*(?:(?:what|how)\s+about|and)\b", re.IGNORECASE)
+# A query that starts by pointing at the previous answer ("it fails on Java", "does that work with Okta?")
+LEADING_REFERENCE_PATTERN = re.compile(
+    r"^\W*(?:(?:does|do|is|are|can|will|would|should|could)\s+)?(?:it|that|this|these|those)\b", re.IGNORECASE
+)
+# Phrases that can only mean the previous answer wherever they appear ("a code example for this");
+# together with a leading reference, only such follow-ups are answered from the previous passages
+ANAPHORA_MATCHER = KeywordMatcher([
+    "for this", "for that", "about this", "about that", "of this", "of that", "with this", "with that",
+    "this one", "that one", "the above", "the same", "previous answer", "you mentioned", "use it", "set it up"
+])
+
+ANSWER_PREVIEW_CHARS = 300
+SUMMARY_MAX_CHARS = 800
+
+class SessionStore:
+    """
+    Bounded conversation memory per session_id, so follow-up questions can be
+    answered in context.
+
+    A session keeps its last `max_turns` turns verbatim (answers truncated);
+    older turns are folded into a one-line-per-turn summary of bounded length.
+    The passages retrieved for the latest answer are kept too, so a follow-up
+    on the same topic that refers back to it can reuse them instead of
+    searching again. Sessions expire `ttl_seconds` after their last turn; the
+    least recently written are evicted past `max_sessions`, in every backend,
+    and a session larger than `max_bytes` drops its passages first, then its
+    oldest turns, so a store holds at most max_sessions * max_bytes.
+
+    Sessions live in the given state backend, shared by all workers, or in a
+    per-process LRU when none is given.
+    """
+
+    NAMESPACE = "sessions"
+
+    def __init__(
+        self,
+        max_turns: int = 6,
+        ttl_seconds: float = 1800,
+        max_sessions: int = 10000,
+        max_bytes: int = 32768,
+        backend: Optional[StateBackend] = None
+    ):
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.backend = backend or MemoryStateBackend(max_sessions)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """The session's history, or None for a new or anonymous session"""
+        if not session_id or session_id == ANONYMOUS_SESSION:
+            return None
+        return self.backend.get(self.NAMESPACE, session_id)
+
+    def record_turn(
+        self,
+        session_id: str,
+        query: str,
+        standalone_query: str,
+        topic: str,
+        answer: str,
+        sources: Optional[List[Dict]] = None
+    ) -> Optional[Dict]:
+        """Append a turn, bounding the history, and return the updated session"""
+        if not session_id or session_id == ANONYMOUS_SESSION:
+            return None
+        session = self.get(session_id) or {"summary": "", "turns": [], "topic": None, "sources": []}
+        # A chain of follow-ups keeps referring to the question that started it
+        followed = session["turns"][-1]["root_query"] if standalone_query != query and session["turns"] else query
+        session["turns"].append({
+            "query": query,
+            "standalone_query": standalone_query,
+            "root_query": followed,
+            "topic": topic,
+            "answer": answer[:ANSWER_PREVIEW_CHARS],
+            "at": time.time()
+        })
+        session["topic"] = topic
+        session["sources"] = sources or []
+        while len(session["turns"]) > self.max_turns:
+            self._fold_oldest_turn(session)
+        if self._size(session) > self.max_bytes:
+            session["sources"] = []
+        while self._size(session) > self.max_bytes and len(session["turns"]) > 1:
+            self._fold_oldest_turn(session)
+
+        evicted = self.backend.set_bounded(self.NAMESPACE, session_id, session, self.ttl_seconds, self.max_sessions)
+        if evicted:
+            logger.debug("Evicted %d session(s) past max_sessions=%d", evicted, self.max_sessions)
+        return session
+
+    def clear(self, session_id: str):
+        self.backend.delete(self.NAMESPACE, session_id)
+
+    @staticmethod
+    def _fold_oldest_turn(session: Dict):
+        turn = session["turns"].pop(0)
+        line = f"- ({turn['topic']}) {turn['standalone_query']}"
+        summary = f"{session['summary']}\n{line}".strip()
+        # Keep the most recent part of the summary
+        while len(summary) > SUMMARY_MAX_CHARS and "\n" in summary:
+            summary = summary.split("\n", 1)[1]
+        session["summary"] = summary[-SUMMARY_MAX_CHARS:]
+
+    @staticmethod
+    def _size(session: Dict) -> int:
+        return len(json.dumps(session))
+
+def is_followup(query: str, session: Optional[Dict]) -> bool:
+    """True if the query refers back to the session's previous turn"""
+    if not session or not session.get("turns"):
+        return False
+    return bool(CONTINUATION_PATTERN.match(query)) or is_anaphoric(query)
+
+def standalone_query(query: str, session: Optional[Dict]) -> str:
+    """
+    Rewrite a follow-up into a query that can be retrieved and answered on its
+    own by attaching the question it follows up on, e.g. "Can you show me a
+    code example for this?" after "How do I authenticate with the Python SDK?"
+    becomes "Can you show me a code example for this? (follow-up to: How do I
+    authenticate with the Python SDK?)". Other queries are returned unchanged.
+    """
+    if not is_followup(query, session):
+        return query
+    return f"{query.strip()} (follow-up to: {session['turns'][-1]['root_query']})"
+
+def is_anaphoric(query: str) -> bool:
+    """True if the query can only be understood as referring to the previous answer"""
+    return bool(LEADING_REFERENCE_PATTERN.match(query)) or ANAPHORA_MATCHER.matches(query)
+
+def previous_sources(query: str, topic: str, session: Optional[Dict]) -> Optional[List[Dict]]:
+    """The previous turn's passages when the query follows up on it within the same topic"""
+    if is_followup(query, session) and session.get("topic") == topic and session.get("sources"):
+        return session["sources"]
+    return None
+
+def reusable_sources(query: str, topic: str, session: Optional[Dict]) -> Optional[List[Dict]]:
+    """
+    The previous turn's passages when they can answer the query on their own,
+    i.e. it refers back to the previous answer within the same topic. Other
+    follow-ups, e.g. "and the rate limits?" on the same topic, search again and
+    only add the previous passages to what they find (see previous_sources).
+    """
+    if is_anaphoric(query):
+        return previous_sources(query, topic, session)
+    return None
+
+# Global instance
+session_store = SessionStore(
+    SESSION_MAX_TURNS,
+    SESSION_TTL_SECONDS,
+    SESSION_MAX_SESSIONS,
+    SESSION_MAX_BYTES,
+    backend=state_backend if state_backend.shared else None
+)
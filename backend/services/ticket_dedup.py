@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config.settings import DEDUP_ENABLED, DEDUP_SIMILARITY_THRESHOLD, DEDUP_WINDOW_HOURS
+from services.ticket_store import ticket_store
+from services.vector_db_service import query_similar
+from services.vector_outbox import vector_outbox
+from utils.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# Neighbours checked per ticket; the closest may be the ticket itself or too old
+DEDUP_CANDIDATES = 3
+# Index lookups of one import in flight at once
+DEDUP_LOOKUP_CONCURRENCY = 8
+# Most recent outbox vectors compared against, i.e. tickets stored but not yet searchable
+DEDUP_PENDING_VECTORS = 1000
+
+class TicketDeduplicator:
+    """
+    Finds near-duplicates of incoming tickets before they are classified.
+
+    Each ticket's embedding is compared with tickets earlier in the same
+    import, with tickets whose vectors are still in the outbox (stored, but
+    not searchable in the index yet) and with recent tickets in the tickets
+    index. A match above the similarity threshold
+    within the time window means the ticket reports the same issue: it
+    reuses that ticket's classification instead of another LLM call and
+    joins its incident cluster.
+    """
+
+    def __init__(self, enabled: bool = True, threshold: float = 0.95, window_hours: float = 72.0):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.window = timedelta(hours=window_hours)
+
+    async def find_duplicate(self, ticket_id: str, embedding: list, batch: List[Tuple[Dict, list]]) -> Optional[Tuple[Dict, float]]:
+        """
+        Return (root ticket, similarity) for the best match, or None.
+        `batch` holds (ticket, embedding) pairs seen earlier in this import;
+        the root is always an original, never another duplicate.
+        """
+        if not self.enabled:
+            return None
+        match = (
+            self._find_in_batch(embedding, batch)
+            or self._find_in_pending(ticket_id, embedding, self._pending_vectors())
+            or await self._find_in_index(ticket_id, embedding)
+        )
+        record_cache("dedup", match is not None)
+        return match
+
+    async def find_duplicates(self, tickets: List[Tuple[Dict, list]]) -> List[Optional[Tuple[Dict, float]]]:
+        """
+        find_duplicate for every (ticket, embedding) of an import, in order,
+        each compared with the originals before it. The index lookups run
+        concurrently; only the comparisons within the import are sequential.
+        """
+        if not self.enabled:
+            return [None] * len(tickets)
+        pending = self._pending_vectors()
+        semaphore = asyncio.Semaphore(DEDUP_LOOKUP_CONCURRENCY)
+
+        async def lookup(ticket: Dict, embedding: list):
+            async with semaphore:
+                return await self._find_in_index(str(ticket["id"]), embedding)
+
+        index_matches = await asyncio.gather(*(lookup(ticket, embedding) for ticket, embedding in tickets))
+        originals = []
+        matches = []
+        for (ticket, embedding), index_match in zip(tickets, index_matches):
+            match = (
+                self._find_in_batch(embedding, originals)
+                or self._find_in_pending(str(ticket["id"]), embedding, pending)
+                or index_match
+            )
+            record_cache("dedup", match is not None)
+            if match is None:
+                originals.append((ticket, embedding))
+            matches.append(match)
+        return matches
+
+    def _find_in_batch(self, embedding: list, batch: List[Tuple[Dict, list]]) -> Optional[Tuple[Dict, float]]:
+        if not batch:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        matrix = np.asarray([other for _, other in batch], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(vector) or 1.0)
+        norms[norms == 0] = 1.0
+        similarities = (matrix @ vector) / norms
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return batch[best][0], float(similarities[best])
+
+    @staticmethod
+    def _pending_vectors() -> List[Dict]:
+        try:
+            return vector_outbox.pending_vectors("tickets", DEDUP_PENDING_VECTORS)
+        except Exception as e:
+            logger.warning("Could not read pending ticket vectors: %s", e)
+            return []
+
+    def _find_in_pending(self, ticket_id: str, embedding: list, pending: List[Dict]) -> Optional[Tuple[Dict, float]]:
+        """Tickets from earlier imports whose vectors the outbox has not upserted yet"""
+        pending = [vector for vector in pending if vector["id"] != str(ticket_id)]
+        if not pending:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        matrix = np.asarray([other["values"] for other in pending], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(vector) or 1.0)
+        norms[norms == 0] = 1.0
+        similarities = (matrix @ vector) / norms
+        matches = [{"id": other["id"], "score": float(score)} for other, score in zip(pending, similarities)]
+        return self._recent_root(ticket_id, sorted(matches, key=lambda match: match["score"], reverse=True))
+
+    async def _find_in_index(self, ticket_id: str, embedding: list) -> Optional[Tuple[Dict, float]]:
+        try:
+            matches = await query_similar("tickets", embedding, top_k=DEDUP_CANDIDATES, stage="dedup")
+        except Exception as e:
+            # Deduplication is an optimization; fall back to classifying the ticket
+            logger.warning("Duplicate lookup failed for ticket %s: %s", ticket_id, e)
+            return None
+        return self._recent_root(ticket_id, matches)
+
+    def _recent_root(self, ticket_id: str, matches: List[Dict]) -> Optional[Tuple[Dict, float]]:
+        """The stored original of the best match above the threshold within the window"""
+        cutoff = (datetime.now(timezone.utc) - self.window).isoformat()
+        for match in matches:
+            if match["id"] == str(ticket_id) or match["score"] < self.threshold:
+                continue
+            previous = ticket_store.get_ticket(match["id"])
+            if not previous or "topic" not in previous or previous.get("created_at", "") < cutoff:
+                continue
+            if previous.get("duplicate_of"):
+                root = ticket_store.get_ticket(str(previous["duplicate_of"]))
+                previous = root if root and "topic" in root else previous
+            return previous, float(match["score"])
+        return None
+
+# Global instance
+ticket_deduplicator = TicketDeduplicator(DEDUP_ENABLED, DEDUP_SIMILARITY_THRESHOLD, DEDUP_WINDOW_HOURS)
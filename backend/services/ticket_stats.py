@@ -0,0 +1,150 @@
+import math
+import sqlite3
+from typing import Dict, Optional
+
+CONFIDENCE_BUCKETS = 10
+
+# Processing-time histogram: geometric buckets from 10ms growing by 25% each,
+# which keeps percentile estimates within one bucket width (~25%)
+PROCESSING_TIME_BASE_SECONDS = 0.01
+PROCESSING_TIME_GROWTH = 1.25
+PROCESSING_TIME_BUCKETS = 48
+
+class TicketAggregates:
+    """
+    Incrementally maintained dashboard aggregates for the ticket store.
+
+    Each ticket write adjusts a handful of counters (counts and sums per
+    topic x sentiment x priority x channel, a confidence histogram and a
+    processing-time histogram) inside the caller's transaction, so reading
+    the stats never scans tickets.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS ticket_counts (
+                topic TEXT NOT NULL,
+                sentiment TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                confidence_sum REAL NOT NULL DEFAULT 0,
+                processing_time_sum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (topic, sentiment, priority, channel)
+            );
+            CREATE TABLE IF NOT EXISTS ticket_histograms (
+                name TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (name, bucket)
+            );
+            """
+        )
+
+    def apply(self, old: Optional[Dict], new: Dict):
+        """Move a ticket's contribution from its previous version (if any) to the new one"""
+        if old is not None:
+            self._add(old, -1)
+        self._add(new, 1)
+
+    def _add(self, ticket: Dict, sign: int):
+        confidence = float(ticket.get("confidence") or 0.0)
+        processing_time = float(ticket.get("processing_time") or 0.0)
+        self._conn.execute(
+            """INSERT INTO ticket_counts (topic, sentiment, priority, channel, count, confidence_sum, processing_time_sum)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (topic, sentiment, priority, channel) DO UPDATE SET
+                   count = count + excluded.count,
+                   confidence_sum = confidence_sum + excluded.confidence_sum,
+                   processing_time_sum = processing_time_sum + excluded.processing_time_sum""",
+            (
+                ticket.get("topic") or "Unknown",
+                ticket.get("sentiment") or "Unknown",
+                ticket.get("priority") or "Unknown",
+                ticket.get("channel") or "Unknown",
+                sign,
+                sign * confidence,
+                sign * processing_time
+            )
+        )
+        self._bump("confidence", confidence_bucket(confidence), sign)
+        self._bump("processing_time", processing_time_bucket(processing_time), sign)
+
+    def _bump(self, name: str, bucket: int, sign: int):
+        self._conn.execute(
+            """INSERT INTO ticket_histograms (name, bucket, count) VALUES (?, ?, ?)
+               ON CONFLICT (name, bucket) DO UPDATE SET count = count + excluded.count""",
+            (name, bucket, sign)
+        )
+
+    def snapshot(self, topic: Optional[str] = None, sentiment: Optional[str] = None, priority: Optional[str] = None) -> Dict:
+        """
+        Return the current aggregates. Counts and averages honour the filters;
+        the histograms and percentiles always cover every ticket.
+        """
+        rows = self._conn.execute(
+            "SELECT topic, sentiment, priority, channel, count, confidence_sum, processing_time_sum FROM ticket_counts WHERE count > 0"
+        ).fetchall()
+        rows = [
+            row for row in rows
+            if (not topic or row[0] == topic) and (not sentiment or row[1] == sentiment) and (not priority or row[2] == priority)
+        ]
+
+        total = sum(row[4] for row in rows)
+        breakdowns = {"by_topic": {}, "by_sentiment": {}, "by_priority": {}, "by_channel": {}}
+        for row in rows:
+            for index, key in enumerate(breakdowns):
+                breakdowns[key][row[index]] = breakdowns[key].get(row[index], 0) + row[4]
+
+        histograms = {"confidence": {}, "processing_time": {}}
+        for name, bucket, count in self._conn.execute("SELECT name, bucket, count FROM ticket_histograms WHERE count > 0"):
+            histograms.setdefault(name, {})[bucket] = count
+
+        return {
+            "total": total,
+            **breakdowns,
+            "breakdown": [
+                {"topic": row[0], "sentiment": row[1], "priority": row[2], "channel": row[3], "count": row[4]}
+                for row in rows
+            ],
+            "average_confidence": sum(row[5] for row in rows) / total if total else 0.0,
+            "average_processing_time": sum(row[6] for row in rows) / total if total else 0.0,
+            "confidence_histogram": [
+                {
+                    "range": f"{bucket / CONFIDENCE_BUCKETS:.1f}-{(bucket + 1) / CONFIDENCE_BUCKETS:.1f}",
+                    "count": histograms["confidence"].get(bucket, 0)
+                }
+                for bucket in range(CONFIDENCE_BUCKETS)
+            ],
+            "processing_time_percentiles": {
+                f"p{percentile}": histogram_percentile(histograms["processing_time"], percentile)
+                for percentile in (50, 95, 99)
+            }
+        }
+
+def confidence_bucket(confidence: float) -> int:
+    return min(max(int(confidence * CONFIDENCE_BUCKETS), 0), CONFIDENCE_BUCKETS - 1)
+
+def processing_time_bucket(seconds: float) -> int:
+    if seconds <= PROCESSING_TIME_BASE_SECONDS:
+        return 0
+    bucket = math.ceil(math.log(seconds / PROCESSING_TIME_BASE_SECONDS, PROCESSING_TIME_GROWTH))
+    return min(bucket, PROCESSING_TIME_BUCKETS - 1)
+
+def processing_time_bucket_upper_bound(bucket: int) -> float:
+    return PROCESSING_TIME_BASE_SECONDS * PROCESSING_TIME_GROWTH ** bucket
+
+def histogram_percentile(buckets: Dict[int, int], percentile: float) -> float:
+    """Estimate a processing-time percentile (seconds) as the upper bound of the bucket it falls in"""
+    total = sum(buckets.values())
+    if not total:
+        return 0.0
+    rank = percentile / 100 * total
+    seen = 0
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen >= rank:
+            return round(processing_time_bucket_upper_bound(bucket), 4)
+    return round(processing_time_bucket_upper_bound(max(buckets)), 4)
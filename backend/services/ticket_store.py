@@ -0,0 +1,267 @@
+import base64
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from config.settings import TICKET_STORE_PATH
+from services.incident_clusters import PRIORITY_RANK, IncidentClusters
+from services.ticket_stats import TicketAggregates
+from utils.state_backend import connect_sqlite
+
+# API sort field -> indexed column
+SORT_COLUMNS = {
+    "created_at": "created_at",
+    "priority": "priority_rank",
+    "confidence": "confidence",
+    "id": "id"
+}
+
+MAX_PAGE_SIZE = 200
+
+class TicketStore:
+    """
+    SQLite-backed store of classified tickets for listing and filtering.
+
+    Pinecone keeps the ticket embeddings for similarity search; this store is
+    what the dashboard lists from. Filter and sort columns are indexed and
+    pagination is keyset-based, so fetching a page costs the same no matter
+    how many tickets exist.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self._conn = connect_sqlite(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tickets (
+                id TEXT PRIMARY KEY,
+                topic TEXT,
+                sentiment TEXT,
+                priority TEXT,
+                priority_rank INTEGER,
+                confidence REAL,
+                channel TEXT,
+                created_at TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets (created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_tickets_topic ON tickets (topic, created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_tickets_sentiment ON tickets (sentiment, created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_tickets_priority ON tickets (priority_rank, created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_tickets_confidence ON tickets (confidence, id);
+            """
+        )
+        self.aggregates = TicketAggregates(self._conn)
+        self.clusters = IncidentClusters(self._conn)
+        self._conn.commit()
+
+    def reopen(self):
+        """Open a fresh connection, e.g. in a worker forked from a preloaded parent"""
+        self._lock = threading.Lock()
+        self._open()
+
+    def upsert_ticket(self, ticket: Dict) -> Dict:
+        """
+        Insert or update a classified ticket (flattened classification fields,
+        as stored in Pinecone metadata). The original created_at is kept when a
+        ticket is re-classified.
+
+        A ticket with `duplicate_of` set is linked into the incident cluster
+        of that ticket, and both carry the cluster_id.
+        """
+        ticket_id = str(ticket["id"])
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+            previous = json.loads(row[0]) if row else None
+            now = datetime.now(timezone.utc).isoformat()
+            created_at = previous["created_at"] if previous else ticket.get("created_at") or now
+            stored = {**ticket, "id": ticket_id, "created_at": created_at, "channel": ticket.get("channel") or "Unknown"}
+
+            root_id = str(stored["duplicate_of"]) if stored.get("duplicate_of") else None
+            root_row = self._conn.execute("SELECT data FROM tickets WHERE id = ?", (root_id,)).fetchone() if root_id else None
+            if root_row:
+                root = json.loads(root_row[0])
+                stored["cluster_id"] = self.clusters.link(root, stored, float(stored.get("similarity") or 1.0), now)
+                if root.get("cluster_id") != stored["cluster_id"]:
+                    root["cluster_id"] = stored["cluster_id"]
+                    self._conn.execute("UPDATE tickets SET data = ? WHERE id = ?", (json.dumps(root), root_id))
+
+            self._conn.execute(
+                """INSERT OR REPLACE INTO tickets
+                   (id, topic, sentiment, priority, priority_rank, confidence, channel, created_at, data)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    ticket_id,
+                    stored.get("topic"),
+                    stored.get("sentiment"),
+                    stored.get("priority"),
+                    PRIORITY_RANK.get(stored.get("priority"), len(PRIORITY_RANK)),
+                    float(stored.get("confidence", 0.0)),
+                    stored["channel"],
+                    created_at,
+                    json.dumps(stored)
+                )
+            )
+            self.aggregates.apply(previous, stored)
+            self._conn.commit()
+        return stored
+
+    def backfill(self, tickets: Iterable[Dict]) -> int:
+        """
+        Add tickets classified before this store existed, e.g. from the
+        tickets index metadata. Tickets already stored are left as they are.
+        Returns how many were added.
+        """
+        added = 0
+        for ticket in tickets:
+            if self.get_ticket(str(ticket["id"])) is None:
+                self.upsert_ticket(ticket)
+                added += 1
+        return added
+
+    def get_ticket(self, ticket_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+        return self._to_ticket(row[0]) if row else None
+
+    def get_tickets(self, ticket_ids: List[str]) -> Dict[str, Dict]:
+        """Tickets by id in one query; unknown ids are left out"""
+        if not ticket_ids:
+            return {}
+        placeholders = ",".join("?" * len(ticket_ids))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, data FROM tickets WHERE id IN ({placeholders})", list(ticket_ids)).fetchall()
+        return {ticket_id: self._to_ticket(data) for ticket_id, data in rows}
+
+    def list_tickets(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        topic: Optional[str] = None,
+        sentiment: Optional[str] = None,
+        priority: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        sort_by: str = "created_at",
+        order: str = "desc"
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Return one page of tickets and the cursor for the next page (None on
+        the last page). Dates are ISO 8601 strings.
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort field: {sort_by}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unsupported sort order: {order}")
+        column = SORT_COLUMNS[sort_by]
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        where, params = self._filters(topic, sentiment, priority, created_after, created_before)
+        if cursor:
+            last_value, last_id = self._decode_cursor(cursor)
+            comparison = "<" if order == "desc" else ">"
+            if column == "id":
+                where.append(f"id {comparison} ?")
+                params.append(last_id)
+            else:
+                where.append(f"({column} {comparison} ? OR ({column} = ? AND id {comparison} ?))")
+                params.extend([last_value, last_value, last_id])
+
+        sql = f"SELECT {column}, id, data FROM tickets"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        direction = order.upper()
+        sql += f" ORDER BY {column} {direction}" + ("" if column == "id" else f", id {direction}") + " LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1][0], rows[-1][1])
+        return [self._to_ticket(row[2]) for row in rows], next_cursor
+
+    def count_tickets(
+        self,
+        topic: Optional[str] = None,
+        sentiment: Optional[str] = None,
+        priority: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None
+    ) -> int:
+        where, params = self._filters(topic, sentiment, priority, created_after, created_before)
+        sql = "SELECT COUNT(*) FROM tickets"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def get_stats(self, topic: Optional[str] = None, sentiment: Optional[str] = None, priority: Optional[str] = None) -> Dict:
+        """Return the precomputed dashboard aggregates (see TicketAggregates)"""
+        with self._lock:
+            return self.aggregates.snapshot(topic=topic, sentiment=sentiment, priority=priority)
+
+    def get_incidents(self, priority: Optional[str] = None, min_size: int = 2, limit: int = 50) -> List[Dict]:
+        """Incident clusters of near-duplicate tickets, most urgent first"""
+        with self._lock:
+            return self.clusters.list(priority=priority, min_size=min_size, limit=max(1, min(limit, MAX_PAGE_SIZE)))
+
+    @staticmethod
+    def _filters(topic, sentiment, priority, created_after, created_before) -> Tuple[List[str], List]:
+        where, params = [], []
+        if topic:
+            where.append("topic = ?")
+            params.append(topic)
+        if sentiment:
+            where.append("sentiment = ?")
+            params.append(sentiment)
+        if priority:
+            where.append("priority_rank = ?")
+            params.append(PRIORITY_RANK.get(priority, len(PRIORITY_RANK)))
+        if created_after:
+            where.append("created_at >= ?")
+            params.append(created_after)
+        if created_before:
+            where.append("created_at < ?")
+            params.append(created_before)
+        return where, params
+
+    @staticmethod
+    def _encode_cursor(value, ticket_id: str) -> str:
+        return base64.urlsafe_b64encode(json.dumps([value, ticket_id]).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple:
+        try:
+            value, ticket_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return value, ticket_id
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _to_ticket(data: str) -> Dict:
+        """Rebuild the API shape, with the classification object reconstructed from flattened fields"""
+        ticket = json.loads(data)
+        if "topic" in ticket:
+            ticket["classification"] = {
+                "topic": ticket["topic"],
+                "sentiment": ticket.get("sentiment"),
+                "priority": ticket.get("priority"),
+                "confidence": ticket.get("confidence"),
+                "topic_reasoning": ticket.get("topic_reasoning", ""),
+                "sentiment_reasoning": ticket.get("sentiment_reasoning", ""),
+                "priority_reasoning": ticket.get("priority_reasoning", "")
+            }
+        return ticket
+
+# Global instance
+ticket_store = TicketStore(TICKET_STORE_PATH)
+# SQLite connections must not be shared across fork
+os.register_at_fork(after_in_child=ticket_store.reopen)
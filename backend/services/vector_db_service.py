@@ -1,22 +1,115 @@
-from pinecone import Pinecone
-from config.settings import PINECONE_API_KEY, PINECONE_TICKETS_INDEX, PINECONE_DOCS_INDEX
+import asyncio
+import logging
+import os
+from typing import Iterator, List, Optional, Tuple
+from config.settings import (
+    VECTOR_STORE_BACKEND,
+    LOCAL_VECTOR_STORE_DIR,
+    VECTOR_QUANTIZATION,
+    VECTOR_RESCORE_MULTIPLIER
+)
+from services.embedding_registry import embedding_registry
 from services.embedding_service import generate_embedding
+from services.local_vector_store import LocalVectorStore
+from services.pinecone_client import pinecone_factory
+from utils.metrics import external_call, trace_stage
 
-# Initialize Pinecone client
-pc = Pinecone(api_key=PINECONE_API_KEY)
+logger = logging.getLogger(__name__)
 
-# Initialize indexes
-tickets_index = pc.Index(PINECONE_TICKETS_INDEX)
-docs_index = pc.Index(PINECONE_DOCS_INDEX)
+# Shared Pinecone client; connects on first use rather than at import
+pc = pinecone_factory
+
+_local_stores = {}
+
+def open_index(key: str):
+    """
+    Index handle for "tickets" or "docs": the shared Pinecone index, or the
+    local quantized store when VECTOR_STORE_BACKEND=local
+    """
+    spec = embedding_registry.spec(key)
+    if VECTOR_STORE_BACKEND != "local":
+        # Resolves through the shared client on each call
+        return pinecone_factory.lazy_index(spec.index_name)
+    if key not in _local_stores:
+        _local_stores[key] = LocalVectorStore(
+            os.path.join(LOCAL_VECTOR_STORE_DIR, spec.index_name or key),
+            spec.dimension,
+            quantization=VECTOR_QUANTIZATION,
+            rescore_multiplier=VECTOR_RESCORE_MULTIPLIER,
+            normalize=spec.normalize
+        )
+    return _local_stores[key]
+
+tickets_index = open_index("tickets")
+docs_index = open_index("docs")
 
 async def upsert_to_vector_db(index_name: str, id: str, embedding: list, metadata: dict):
     index = tickets_index if index_name == "tickets" else docs_index
-    index.upsert([(id, embedding, metadata)])
+    embedding_registry.validate("tickets" if index_name == "tickets" else "docs", embedding)
+    with external_call("pinecone", "upsert"):
+        index.upsert([(id, embedding, metadata)])
+
+async def upsert_vectors(index_name: str, vectors: List[Tuple[str, list, dict]]):
+    """Upsert a batch of (id, embedding, metadata) in one call, off the event loop"""
+    index = tickets_index if index_name == "tickets" else docs_index
+    for _, embedding, _ in vectors:
+        embedding_registry.validate("tickets" if index_name == "tickets" else "docs", embedding)
+    with external_call("pinecone", "upsert"):
+        await asyncio.to_thread(index.upsert, vectors)
+
+async def query_similar(index_name: str, embedding: list, top_k: int = 5, stage: str = "vector_query", filter: Optional[dict] = None) -> list:
+    """
+    Nearest neighbours of an existing embedding, without metadata, optionally
+    among vectors matching a metadata filter. Runs off the event loop, since
+    the index call (and its retry backoff) blocks.
+    """
+    index = tickets_index if index_name == "tickets" else docs_index
+    embedding_registry.validate("tickets" if index_name == "tickets" else "docs", embedding)
+    options = {"filter": filter} if filter else {}
+    with trace_stage(stage), external_call("pinecone", stage):
+        results = await asyncio.to_thread(index.query, vector=embedding, top_k=top_k, include_metadata=False, **options)
+    return results["matches"]
+
+async def fetch_vector(index_name: str, id: str) -> Optional[list]:
+    """Stored embedding of a vector id, or None if the index does not have it; off the event loop"""
+    index = tickets_index if index_name == "tickets" else docs_index
+    with external_call("pinecone", "fetch"):
+        results = await asyncio.to_thread(index.fetch, ids=[id])
+    vector = results["vectors"].get(id)
+    return list(vector["values"]) if vector else None
+
+# Most matches a Pinecone query can return; the ceiling of the fallback listing below
+MAX_QUERY_TOP_K = 10000
+
+def iter_vector_metadata(index_name: str, batch_size: int = 100) -> Iterator[List[Tuple[str, dict]]]:
+    """
+    Every vector's (id, metadata) in an index, a page at a time, for one-off
+    jobs such as backfills, not the request path. Ids are listed with
+    `index.list` (serverless indexes and the local store). Pod-based indexes
+    cannot list ids, so there a single query returns at most MAX_QUERY_TOP_K.
+    """
+    key = "tickets" if index_name == "tickets" else "docs"
+    index = tickets_index if index_name == "tickets" else docs_index
+    try:
+        for ids in index.list(limit=batch_size):
+            if ids:
+                vectors = index.fetch(ids=list(ids))["vectors"]
+                yield [(vector_id, dict(vectors[vector_id].get("metadata") or {})) for vector_id in ids if vector_id in vectors]
+        return
+    except Exception as e:
+        logger.warning("Cannot list ids of the %s index (%s); listing through a query of at most %d", index_name, e, MAX_QUERY_TOP_K)
+    results = index.query(vector=[0.0] * embedding_registry.spec(key).dimension, top_k=MAX_QUERY_TOP_K, include_metadata=True)
+    matches = results["matches"]
+    if len(matches) == MAX_QUERY_TOP_K:
+        logger.warning("The %s index returned %d vectors, its query maximum; some may be missing", index_name, MAX_QUERY_TOP_K)
+    for start in range(0, len(matches), batch_size):
+        yield [(match["id"], dict(match["metadata"] or {})) for match in matches[start:start + batch_size]]
 
 async def retrieve_from_vector_db(index_name: str, query: str, top_k: int = 5):
     index = tickets_index if index_name == "tickets" else docs_index
-    embedding = await generate_embedding(query)
-    results = index.query(vector=embedding, top_k=top_k, include_metadata=True)
+    embedding = await generate_embedding(query, "tickets" if index_name == "tickets" else "docs")
+    with trace_stage("vector_query"), external_call("pinecone", "vector_query"):
+        results = index.query(vector=embedding, top_k=top_k, include_metadata=True)
     
     # Build context with source information
     context_parts = []
@@ -35,8 +128,9 @@ async def retrieve_from_vector_db(index_name: str, query: str, top_k: int = 5):
 async def retrieve_with_sources(index_name: str, query: str, top_k: int = 5):
     """Retrieve context and return both content and source information"""
     index = tickets_index if index_name == "tickets" else docs_index
-    embedding = await generate_embedding(query)
-    results = index.query(vector=embedding, top_k=top_k, include_metadata=True)
+    embedding = await generate_embedding(query, "tickets" if index_name == "tickets" else "docs")
+    with trace_stage("vector_query"), external_call("pinecone", "vector_query"):
+        results = index.query(vector=embedding, top_k=top_k, include_metadata=True)
     
     sources = []
     context_parts = []
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from config.settings import (
+    VECTOR_OUTBOX_PATH,
+    VECTOR_OUTBOX_BATCH_SIZE,
+    VECTOR_OUTBOX_FLUSH_SECONDS,
+    VECTOR_OUTBOX_MAX_ATTEMPTS
+)
+from services.embedding_registry import embedding_registry
+from services.vector_db_service import upsert_vectors
+from utils.durable_queue import DurableQueue
+from utils.metrics import VECTOR_OUTBOX_LAG, VECTOR_OUTBOX_PENDING, VECTOR_OUTBOX_VECTORS
+
+logger = logging.getLogger(__name__)
+
+INDEXES = ("tickets", "docs")
+
+# A batch claimed by a flusher that died is upserted again after this long
+LEASE_SECONDS = 120
+# Backoff between attempts at a failing batch; with the default 20 attempts
+# the outbox rides out a vector store outage of over an hour
+MAX_RETRY_DELAY_SECONDS = 300
+
+class VectorOutbox:
+    """
+    Durable log of pending vector upserts, flushed to the vector store in
+    batches by a background task.
+
+    `add` only appends to a local SQLite log, so ingestion does not wait for
+    the vector store and its latency does not depend on it. The flusher
+    upserts up to `batch_size` vectors per call. A failed batch stays in the
+    log and is retried with backoff (dead-lettered after the queue's max
+    attempts), so embeddings and classifications already paid for are never
+    lost or recomputed when the vector store is slow or down.
+
+    A vector becomes searchable once flushed, normally within
+    `flush_interval_seconds`. Every worker runs a flusher, but only one at a
+    time flushes an index (a lock in the log's file): versions of a vector
+    are then upserted in the order they were added, never an older one
+    after a newer one by another worker.
+    """
+
+    def __init__(self, queue: DurableQueue, batch_size: int = 100, flush_interval_seconds: float = 1.0):
+        self.queue = queue
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, index_name: str, id: str, embedding: list, metadata: dict) -> int:
+        """Log an upsert; the vector is validated now so a bad one fails its caller, not the flusher"""
+        embedding_registry.validate(index_name, embedding)
+        queue_id = self.queue.put(index_name, {"id": str(id), "values": embedding, "metadata": metadata})
+        VECTOR_OUTBOX_VECTORS.labels(index=index_name, result="queued").inc()
+        # An older version still waiting, e.g. on a retry delay, must not be upserted after this one
+        superseded = self.queue.supersede(index_name, "id", str(id), queue_id)
+        if superseded:
+            VECTOR_OUTBOX_VECTORS.labels(index=index_name, result="superseded").inc(superseded)
+        if self._wakeup is not None and self.pending(index_name) >= self.batch_size:
+            self._wakeup.set()
+        return queue_id
+
+    def pending(self, index_name: str) -> int:
+        depth = self.queue.stats(index_name)["depth"]
+        VECTOR_OUTBOX_PENDING.labels(index=index_name).set(depth)
+        return depth
+
+    def pending_vectors(self, index_name: str, limit: int = 1000) -> List[Dict]:
+        """Vectors logged but not upserted yet, newest first; not searchable in the index until flushed"""
+        return [item["payload"] for item in self.queue.peek(index_name, limit)]
+
+    def stats(self) -> Dict[str, Dict]:
+        return {index_name: self.queue.stats(index_name) for index_name in INDEXES}
+
+    async def flush(self, index_name: Optional[str] = None) -> int:
+        """Upsert every ready vector, one batch at a time; returns how many were upserted"""
+        upserted = 0
+        owner = f"{os.getpid()}:{id(self)}"
+        for name in ([index_name] if index_name else INDEXES):
+            lock = f"flush:{name}"
+            try:
+                # Renewed per batch; while another worker holds it, that worker flushes this index
+                while self.queue.acquire(lock, owner, LEASE_SECONDS):
+                    claimed = self.queue.claim(name, self.batch_size, LEASE_SECONDS)
+                    if not claimed:
+                        break
+                    if not await self._upsert(name, claimed):
+                        break
+                    upserted += len(claimed)
+            finally:
+                self.queue.release(lock, owner)
+            self.pending(name)
+        return upserted
+
+    async def _upsert(self, index_name: str, claimed: List[Dict]) -> bool:
+        # A ticket re-classified while its first upsert was pending is written once, with its
+        # latest version; claims are ordered by readiness, so the newest is the highest message id
+        latest = {}
+        for item in sorted(claimed, key=lambda item: item["id"]):
+            latest[item["payload"]["id"]] = item["payload"]
+        vectors = [(vector["id"], vector["values"], vector["metadata"]) for vector in latest.values()]
+        try:
+            await upsert_vectors(index_name, vectors)
+        except Exception as e:
+            delay = min(2 ** max(item["attempts"] for item in claimed), MAX_RETRY_DELAY_SECONDS)
+            logger.warning("Upsert of %d vectors to %s failed, retrying in %ds: %s", len(vectors), index_name, delay, e)
+            dead = self.queue.retry([item["id"] for item in claimed], f"{type(e).__name__}: {e}", delay)
+            VECTOR_OUTBOX_VECTORS.labels(index=index_name, result="retried").inc(len(claimed) - dead)
+            if dead:
+                VECTOR_OUTBOX_VECTORS.labels(index=index_name, result="dead").inc(dead)
+            return False
+        self.queue.ack([item["id"] for item in claimed])
+        now = time.time()
+        for item in claimed:
+            VECTOR_OUTBOX_LAG.labels(index=index_name).observe(now - item["enqueued_at"])
+        VECTOR_OUTBOX_VECTORS.labels(index=index_name, result="upserted").inc(len(claimed))
+        return True
+
+    def start(self):
+        """Start the background flusher on the running event loop"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="vector-outbox")
+
+    async def stop(self, flush: bool = True):
+        """Stop the flusher, by default after a last attempt to upsert what is pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._wakeup = None
+        if flush:
+            try:
+                await self.flush()
+            except Exception as e:
+                # Still in the log; flushed on the next start
+                logger.warning("Final outbox flush failed: %s", e)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception("Vector outbox flush failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+# Global instance
+vector_outbox = VectorOutbox(
+    DurableQueue(VECTOR_OUTBOX_PATH, VECTOR_OUTBOX_MAX_ATTEMPTS),
+    VECTOR_OUTBOX_BATCH_SIZE,
+    VECTOR_OUTBOX_FLUSH_SECONDS
+)
+# SQLite connections must not be shared across fork
+os.register_at_fork(after_in_child=vector_outbox.queue.reopen)
@@ -0,0 +1,7 @@
+import os
+
+# Keep test runs from writing cache files into the working directory
+os.environ.setdefault("CLASSIFICATION_CACHE_PATH", ":memory:")
+os.environ.setdefault("TICKET_STORE_PATH", ":memory:")
+os.environ.setdefault("INGEST_QUEUE_PATH", ":memory:")
+os.environ.setdefault("VECTOR_OUTBOX_PATH", ":memory:")
@@ -0,0 +1,73 @@
+import json
+import subprocess
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_queries, build_tickets
+from benchmarks.fakes import FakeChatCompletion, LatencyModel, fake_embedding
+from benchmarks.run_benchmark import percentile, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestBenchmarkHarness:
+    
+    def test_corpus_is_deterministic(self):
+        """Test that the same seed produces the same corpus, with unique ticket ids"""
+        assert build_queries(50, seed=3) == build_queries(50, seed=3)
+        tickets = build_tickets(100, seed=3)
+        assert len({ticket["id"] for ticket in tickets}) == 100
+    
+    def test_latency_model(self):
+        """Test seeded latency is reproducible and can be disabled"""
+        first = [LatencyModel(100, 400, seed=1).sample_seconds() for _ in range(3)]
+        second = [LatencyModel(100, 400, seed=1).sample_seconds() for _ in range(3)]
+        
+        assert first == second
+        assert LatencyModel(100, 400, scale=0).sample_seconds() == 0.0
+    
+    def test_fake_batch_classification(self):
+        """Test the fake chat model answers batch classification prompts for every ticket id"""
+        chat = FakeChatCompletion(LatencyModel(0, 0))
+        prompt = 'TICKETS (JSON array):\n    [{"id": "T-1", "subject": "", "body": "SSO login fails"}, {"id": "T-2", "subject": "", "body": "lineage missing"}]\n\n    Respond'
+        
+        response = chat.create(messages=[{"role": "user", "content": prompt}])
+        items = json.loads(response["choices"][0]["message"]["content"])
+        
+        assert [item["id"] for item in items] == ["T-1", "T-2"]
+        assert items[0]["topic"] == "SSO"
+        assert response["usage"]["prompt_tokens"] > 0
+    
+    def test_fake_embedding_similarity(self):
+        """Test that texts sharing words embed closer than unrelated texts"""
+        base = fake_embedding("snowflake connector permissions", 64)
+        similar = fake_embedding("snowflake connector setup", 64)
+        unrelated = fake_embedding("glossary terms bulk upload", 64)
+        
+        dot = lambda a, b: sum(x * y for x, y in zip(a, b))
+        assert dot(base, similar) > dot(base, unrelated)
+    
+    def test_percentiles(self):
+        """Test nearest-rank percentiles and summaries"""
+        values = list(range(1, 101))
+        
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert summarize([])["p95"] == 0.0
+    
+    def test_resolve_scenario_smoke(self, tmp_path):
+        """Test a tiny end-to-end run writes a result file"""
+        output = tmp_path / "resolve.json"
+        
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.run_benchmark", "--scenario", "resolve",
+             "--requests", "5", "--warmup", "0", "--latency-scale", "0", "--output", str(output)],
+            cwd=BACKEND_DIR, check=True, capture_output=True, timeout=120
+        )
+        
+        result = json.loads(output.read_text())
+        assert result["errors"] == 0
+        assert result["latency_ms"]["count"] == 5
+        assert "url_resolve" in result["stages_ms"]
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.classification_cache import ClassificationCache
+
+CLASSIFICATION = {
+    "topic": "Connector",
+    "sentiment": "Frustrated",
+    "priority": "P1",
+    "confidence": 0.9,
+    "topic_reasoning": "Snowflake connector",
+    "sentiment_reasoning": "Connection keeps failing",
+    "priority_reasoning": "Team is blocked"
+}
+
+class TestClassificationCache:
+    
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / "cache.db")
+    
+    def test_hit_after_set(self, db_path):
+        """Test that a stored classification is returned for the same content"""
+        cache = ClassificationCache(db_path, ttl_seconds=60, version="v1")
+        assert cache.get("Snowflake keeps failing", "Help") is None
+        
+        cache.set("Snowflake keeps failing", "Help", CLASSIFICATION)
+        
+        assert cache.get("Snowflake keeps failing", "Help") == CLASSIFICATION
+    
+    def test_key_ignores_case_and_whitespace(self, db_path):
+        """Test that duplicate messages with different formatting share an entry"""
+        cache = ClassificationCache(db_path, ttl_seconds=60, version="v1")
+        cache.set("Snowflake keeps failing", "Help", CLASSIFICATION)
+        
+        assert cache.get("  snowflake   KEEPS\nfailing ", "help") == CLASSIFICATION
+        assert cache.get("Snowflake keeps failing", "Other subject") is None
+    
+    def test_persists_across_instances(self, db_path):
+        """Test that entries survive a restart"""
+        ClassificationCache(db_path, ttl_seconds=60, version="v1").set("body", "subject", CLASSIFICATION)
+        
+        assert ClassificationCache(db_path, ttl_seconds=60, version="v1").get("body", "subject") == CLASSIFICATION
+    
+    def test_version_change_invalidates(self, db_path):
+        """Test that a new prompt/taxonomy version does not see old entries"""
+        ClassificationCache(db_path, ttl_seconds=60, version="v1").set("body", "subject", CLASSIFICATION)
+        
+        cache = ClassificationCache(db_path, ttl_seconds=60, version="v2")
+        
+        assert cache.get("body", "subject") is None
+        assert ClassificationCache(db_path, ttl_seconds=60, version="v1").get("body", "subject") is None
+    
+    def test_ttl_expiry(self, db_path):
+        """Test that expired entries are treated as misses"""
+        cache = ClassificationCache(db_path, ttl_seconds=60, version="v1")
+        with patch('services.classification_cache.time.time', return_value=1000.0):
+            cache.set("body", "subject", CLASSIFICATION)
+        
+        with patch('services.classification_cache.time.time', return_value=1030.0):
+            assert cache.get("body", "subject") == CLASSIFICATION
+        with patch('services.classification_cache.time.time', return_value=1100.0):
+            assert cache.get("body", "subject") is None
+    
+    def test_returned_dict_is_a_copy(self, db_path):
+        """Test that callers cannot mutate the cached entry"""
+        cache = ClassificationCache(db_path, ttl_seconds=60, version="v1")
+        cache.set("body", "subject", CLASSIFICATION)
+        
+        cache.get("body", "subject")["topic"] = "General"
+        
+        assert cache.get("body", "subject")["topic"] == "Connector"
@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+import json
 from unittest.mock import patch, MagicMock
 import sys
 import os
@@ -14,7 +15,7 @@ with patch('pinecone.init'), \
      patch('services.vector_db_service.tickets_index'), \
      patch('services.vector_db_service.docs_index'):
     
-    from services.classification_service import classify_ticket
+    from services.classification_service import classify_ticket, classify_tickets_batch, classification_cache
 
 class TestClassificationService:
     
@@ -148,3 +149,83 @@ class TestClassificationService:
             assert result["topic"] == "General"
             assert result["confidence"] == 0.1
             assert "empty" in result["topic_reasoning"].lower()
+
+class TestBatchClassification:
+    
+    def _item(self, ticket_id, topic="Connector", sentiment="Frustrated", priority="P1"):
+        return {
+            "id": ticket_id,
+            "topic": topic,
+            "sentiment": sentiment,
+            "priority": priority,
+            "confidence": 0.9,
+            "topic_reasoning": "Mentions Snowflake connector",
+            "sentiment_reasoning": "Connection keeps failing",
+            "priority_reasoning": "Team is blocked"
+        }
+    
+    def _response(self, payload):
+        return {"choices": [{"message": {"content": payload}}]}
+    
+    def test_parse_batch_response_keyed_by_id(self):
+        """Test that batch responses are mapped back to ticket ids"""
+        from services.classification_service import _parse_batch_response
+        
+        text = "```json\n" + json.dumps([self._item("T-1"), self._item("T-2", topic="SSO")]) + "\n```"
+        results = _parse_batch_response(text, ["T-1", "T-2"])
+        
+        assert set(results.keys()) == {"T-1", "T-2"}
+        assert results["T-2"]["topic"] == "SSO"
+        assert "id" not in results["T-1"]
+    
+    def test_parse_batch_response_drops_invalid_items(self):
+        """Test that unknown ids and invalid enum values are left out"""
+        from services.classification_service import _parse_batch_response
+        
+        text = json.dumps([
+            self._item("T-1"),
+            self._item("T-2", topic="Cooking"),
+            self._item("T-9")
+        ])
+        results = _parse_batch_response(text, ["T-1", "T-2"])
+        
+        assert set(results.keys()) == {"T-1"}
+        assert _parse_batch_response("not json", ["T-1"]) == {}
+    
+    @pytest.mark.asyncio
+    async def test_classify_tickets_batch_retries_only_failed_items(self):
+        """Test that only the tickets that failed to parse are re-sent"""
+        tickets = [{"id": f"T-{i}", "subject": "Subject", "body": f"Body {i}"} for i in range(3)]
+        classification_cache.invalidate()
+        
+        with patch('services.classification_service.openai.ChatCompletion', new=MagicMock()) as mock_chat:
+            mock_chat.create.side_effect = [
+                self._response(json.dumps([self._item("T-0"), self._item("T-1", priority="P9")])),
+                self._response(json.dumps([self._item("T-2")])),
+                self._response(json.dumps([self._item("T-1")]))
+            ]
+            
+            results = await classify_tickets_batch(tickets, batch_size=2)
+        
+        assert set(results.keys()) == {"T-0", "T-1", "T-2"}
+        assert mock_chat.create.call_count == 3
+        retry_prompt = mock_chat.create.call_args_list[2].kwargs["messages"][1]["content"]
+        assert '"T-1"' in retry_prompt
+        assert '"T-0"' not in retry_prompt
+    
+    @pytest.mark.asyncio
+    async def test_classify_tickets_batch_serves_cached_tickets(self):
+        """Test that already classified content is not sent to the model again"""
+        tickets = [{"id": "T-1", "subject": "Subject", "body": "Cached body"}]
+        classification_cache.invalidate()
+        
+        with patch('services.classification_service.openai.ChatCompletion', new=MagicMock()) as mock_chat:
+            mock_chat.create.return_value = self._response(json.dumps([self._item("T-1")]))
+            
+            first = await classify_tickets_batch(tickets)
+            second = await classify_tickets_batch([{"id": "T-2", "subject": "subject", "body": "  cached BODY "}])
+        
+        assert mock_chat.create.call_count == 1
+        assert first["T-1"]["cache_hit"] is False
+        assert second["T-2"]["cache_hit"] is True
+        assert second["T-2"]["topic"] == "Connector"
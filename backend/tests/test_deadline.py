@@ -0,0 +1,155 @@
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app import app
+from utils.deadline import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+from utils.resilience import ResiliencePolicy
+
+client = TestClient(app)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+class TestDeadline:
+
+    def test_remaining_and_expiry(self):
+        """Test the budget counts down and never goes negative"""
+        clock = FakeClock()
+        deadline = Deadline(5.0, clock=clock)
+
+        clock.now += 2.0
+        assert deadline.remaining() == pytest.approx(3.0)
+        clock.now += 10.0
+        assert deadline.remaining() == 0.0
+        assert deadline.expired()
+
+    def test_max_tokens_shrinks_with_budget(self):
+        """Test the completion length is capped to what fits in the time left"""
+        clock = FakeClock()
+        deadline = Deadline(60.0, clock=clock)
+        assert deadline.max_tokens(1000) == 1000
+
+        clock.now += 57.0
+        capped = deadline.max_tokens(1000)
+        assert 0 < capped < 1000
+        assert deadline.max_tokens(1000, reserve=3.0) == 0
+
+    def test_degradations_are_recorded(self):
+        """Test each degradation is kept with the stage, action and time left"""
+        deadline = Deadline(5.0)
+        deadline.degrade("followups", "canned", "not enough time")
+
+        assert deadline.degradations[0]["stage"] == "followups"
+        assert deadline.degradations[0]["action"] == "canned"
+        assert 0 < deadline.degradations[0]["remaining_ms"] <= 5000
+
+    @pytest.mark.asyncio
+    async def test_run_times_out(self):
+        """Test a stage running past the budget raises DeadlineExceeded"""
+        deadline = Deadline(0.05)
+        with pytest.raises(DeadlineExceeded):
+            await deadline.run(asyncio.sleep(1))
+
+    @pytest.mark.asyncio
+    async def test_run_respects_reserve(self):
+        """Test time reserved for later stages is not given to this one"""
+        deadline = Deadline(1.0)
+        with pytest.raises(DeadlineExceeded):
+            await deadline.run(asyncio.sleep(0.5), reserve=0.9)
+        assert await deadline.run(asyncio.sleep(0, result="done")) == "done"
+
+    def test_scope_sets_current_deadline(self):
+        """Test the deadline is current only inside its scope"""
+        assert current_deadline() is None
+        with deadline_scope(3.0) as deadline:
+            assert current_deadline() is deadline
+        assert current_deadline() is None
+
+    @pytest.mark.asyncio
+    async def test_deadline_follows_into_threads(self):
+        """Test stages run in worker threads see the request's deadline"""
+        with deadline_scope(3.0) as deadline:
+            assert await asyncio.to_thread(current_deadline) is deadline
+
+    def test_policy_stops_retrying_at_deadline(self):
+        """Test a retry that would outlast the request is not attempted"""
+        sleeps = []
+        policy = ResiliencePolicy("test_deadline", max_retries=5, sleep=sleeps.append)
+        error = TimeoutError()
+        error.headers = {"retry-after": "10"}
+        function = MagicMock(side_effect=error)
+
+        with deadline_scope(2.0), pytest.raises(TimeoutError):
+            policy.call(function)
+        assert function.call_count == 1
+        assert sleeps == []
+
+class TestDeadlineDegradation:
+
+    @pytest.mark.asyncio
+    async def test_generation_shortened_when_time_is_short(self):
+        """Test the answer's max_tokens is capped to the remaining budget and reported"""
+        from services.atlan_rag_service import ANSWER_MAX_TOKENS, atlan_rag_service
+
+        with patch.object(atlan_rag_service, "generate_response_from_context", new=AsyncMock(return_value="answer")) as mock_generate:
+            with deadline_scope(4.0) as deadline:
+                answer = await atlan_rag_service._generate_within_deadline("How do I set up SSO?", "SSO context")
+
+        assert answer == "answer"
+        max_tokens = mock_generate.await_args.args[2]
+        assert max_tokens < ANSWER_MAX_TOKENS
+        assert deadline.degradations[0]["stage"] == "generate"
+        assert deadline.degradations[0]["action"] == "shortened"
+
+    @pytest.mark.asyncio
+    async def test_generation_skipped_without_time(self):
+        """Test documentation excerpts are returned when there is no time to generate"""
+        from services.atlan_rag_service import atlan_rag_service
+
+        with patch.object(atlan_rag_service, "generate_response_from_context", new=AsyncMock()) as mock_generate:
+            with deadline_scope(0.5) as deadline:
+                answer = await atlan_rag_service._generate_within_deadline("How do I set up SSO?", "Configure SSO in admin settings.")
+
+        mock_generate.assert_not_called()
+        assert "> Configure SSO in admin settings." in answer
+        assert deadline.degradations[0]["action"] == "extractive"
+
+    def test_slow_classification_routes_query(self):
+        """Test a query whose classification eats the budget is classified by keywords and routed"""
+        async def slow_classification(query, subject):
+            await asyncio.sleep(1)
+
+        with patch("controllers.rag_controller.classify_ticket", new=slow_classification), \
+             patch("controllers.rag_controller.atlan_rag_service.generate_rag_response", new=AsyncMock()) as mock_rag:
+            response = client.post("/api/rag/query", json={"query": "How do I configure SAML SSO?", "deadline_ms": 150})
+
+        data = response.json()
+        assert data["response_type"] == "routing_message"
+        assert data["classification"]["topic"] == "SSO"
+        assert [(item["stage"], item["action"]) for item in data["degraded"]] == [("classify", "keywords"), ("retrieve", "routed")]
+        mock_rag.assert_not_called()
+
+    def test_fast_query_is_not_degraded(self):
+        """Test a query that fits its budget reports no degradation"""
+        classification = {"topic": "SSO", "sentiment": "Neutral", "priority": "P2", "confidence": 0.9, "topic_reasoning": "SSO setup"}
+        rag_result = {"answer": "Configure SAML in the admin settings.", "citations": [], "sources": []}
+        with patch("controllers.rag_controller.classify_ticket", new=AsyncMock(return_value=classification)), \
+             patch("controllers.rag_controller.atlan_rag_service.generate_rag_response", new=AsyncMock(return_value=rag_result)), \
+             patch("controllers.rag_controller.generate_contextual_followup_questions", return_value=[{"question": "Which IdPs are supported?"}]):
+            response = client.post("/api/rag/query", json={"query": "How do I configure SAML SSO?"})
+
+        data = response.json()
+        assert data["response_type"] == "rag_response"
+        assert data["answer"] == "Configure SAML in the admin settings."
+        assert data["degraded"] == []
@@ -0,0 +1,60 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_registry import EmbeddingRegistry, EmbeddingDimensionError
+
+@pytest.fixture
+def registry():
+    registry = EmbeddingRegistry()
+    registry.register("docs", "atlan-docs", "text-embedding-ada-002")
+    registry.register("tickets", "atlan-tickets", "text-embedding-3-large", 512)
+    return registry
+
+class TestEmbeddingRegistry:
+
+    def test_native_dimension_by_default(self, registry):
+        """Test the dimension defaults to the model's native size"""
+        spec = registry.spec("docs")
+
+        assert spec.dimension == 1536
+        assert spec.truncated is False
+        assert registry.request_params("docs") == {"model": "text-embedding-ada-002"}
+
+    def test_truncated_model_requests_dimensions(self, registry):
+        """Test a shortened text-embedding-3 spec asks the API for the shorter vector"""
+        assert registry.request_params("tickets") == {"model": "text-embedding-3-large", "dimensions": 512}
+
+    def test_prepare_truncates_and_normalizes(self, registry):
+        """Test full-size vectors are cut to the registered dimension and re-normalized"""
+        vector = registry.prepare("tickets", [1.0] * 3072)
+
+        assert len(vector) == 512
+        assert np.linalg.norm(vector) == pytest.approx(1.0)
+
+    def test_validate_rejects_wrong_dimension(self, registry):
+        """Test writes and queries with another model's vector size fail loudly"""
+        registry.validate("docs", [0.0] * 1536)
+
+        with pytest.raises(EmbeddingDimensionError):
+            registry.validate("docs", [0.0] * 3072)
+        with pytest.raises(EmbeddingDimensionError):
+            registry.prepare("docs", [0.0] * 3072)
+
+    def test_truncation_only_for_matryoshka_models(self):
+        """Test only text-embedding-3 models may be registered below their native size"""
+        registry = EmbeddingRegistry()
+
+        with pytest.raises(ValueError):
+            registry.register("docs", "atlan-docs", "text-embedding-ada-002", 512)
+        with pytest.raises(ValueError):
+            registry.register("docs", "atlan-docs", "text-embedding-3-small", 3072)
+
+    def test_unknown_key(self, registry):
+        """Test looking up an unregistered index raises KeyError"""
+        with pytest.raises(KeyError):
+            registry.spec("missing")
@@ -0,0 +1,187 @@
+import pytest
+import sys
+import os
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app import app
+from controllers.ingest_controller import answer_message
+from controllers.rag_controller import QueryResponse
+from services.ingestion_gateway import (
+    EmailAdapter,
+    IngestionGateway,
+    SlackAdapter,
+    WhatsAppAdapter,
+    ingestion_gateway
+)
+from utils.durable_queue import DurableQueue
+from utils.metrics import INGEST_MESSAGES
+
+client = TestClient(app)
+
+def email(number: int) -> dict:
+    return {"message_id": f"EMAIL-{number}", "from": "dana@example.com", "subject": "Snowflake sync", "text": f"Sync {number} is failing"}
+
+class TestDurableQueue:
+
+    def test_messages_survive_reopening(self, tmp_path):
+        """Test a queued message is still there for a new connection, e.g. after a restart"""
+        path = str(tmp_path / "queue.db")
+        DurableQueue(path).put("email", {"id": "EMAIL-1"})
+
+        claimed = DurableQueue(path).claim("email", 10)
+        assert [item["payload"] for item in claimed] == [{"id": "EMAIL-1"}]
+
+    def test_claimed_messages_are_leased(self, tmp_path):
+        """Test a claimed message is not handed out again until its lease runs out, and is gone once acked"""
+        queue = DurableQueue(str(tmp_path / "queue.db"))
+        queue.put_many("email", [{"n": 1}, {"n": 2}])
+
+        first = queue.claim("email", 1, lease_seconds=60)
+        assert [item["payload"]["n"] for item in first] == [1]
+        assert [item["payload"]["n"] for item in queue.claim("email", 10, lease_seconds=0)] == [2]
+        # The second message's lease has already run out, as if its worker had died
+        assert [item["payload"]["n"] for item in queue.claim("email", 10)] == [2]
+
+        queue.ack([first[0]["id"]])
+        assert queue.stats("email")["depth"] == 1
+
+    def test_failed_messages_are_dead_lettered(self, tmp_path):
+        """Test a message is retried until it runs out of attempts, then kept aside"""
+        queue = DurableQueue(str(tmp_path / "queue.db"), max_attempts=2)
+        queue.put("slack", {"n": 1})
+
+        assert queue.retry([queue.claim("slack", 1)[0]["id"]], "timeout") == 0
+        assert queue.retry([queue.claim("slack", 1)[0]["id"]], "timeout") == 1
+        assert queue.claim("slack", 1) == []
+        assert queue.stats("slack") == {"depth": 0, "oldest_age_seconds": 0.0, "dead": 1}
+        assert queue.dead_letters("slack")[0]["error"] == "timeout"
+
+        assert queue.requeue_dead("slack") == 1
+        assert len(queue.claim("slack", 1)) == 1
+
+class TestChannelAdapters:
+
+    def test_slack_thread_is_one_session(self):
+        """Test messages in the same Slack thread share a session"""
+        adapter = SlackAdapter()
+        first = adapter.parse({"event_id": "Ev1", "event": {"text": "How do I set up SSO?", "channel": "C1", "ts": "100.1"}})
+        reply = adapter.parse({"event_id": "Ev2", "event": {"text": "And for Okta?", "channel": "C1", "ts": "100.9", "thread_ts": "100.1"}})
+
+        assert first["session_id"] == reply["session_id"] == "slack-C1-100.1"
+        assert reply["reply_to"] == "C1:100.1"
+
+    def test_payload_without_text_is_rejected(self):
+        """Test a payload with no message text cannot be queued"""
+        with pytest.raises(ValueError):
+            WhatsAppAdapter().parse({"From": "whatsapp:+15550100", "Body": "  "})
+
+class TestIngestionGateway:
+
+    def make_gateway(self, tmp_path, **kwargs) -> IngestionGateway:
+        gateway = IngestionGateway(DurableQueue(str(tmp_path / "queue.db"), max_attempts=2), **kwargs)
+        self.email = gateway.register(EmailAdapter())
+        self.whatsapp = gateway.register(WhatsAppAdapter())
+        self.batches = []
+        self.fail = False
+
+        async def batch(adapter, messages):
+            self.batches.append([message["id"] for message in messages])
+
+        async def answer(adapter, message):
+            if self.fail:
+                raise RuntimeError("OpenAI unavailable")
+            return {"answer": f"Answer to {message['body']}"}
+
+        gateway.set_handlers(batch=batch, message=answer)
+        return gateway
+
+    @pytest.mark.asyncio
+    async def test_email_waits_for_a_full_batch(self, tmp_path):
+        """Test email is classified in batches of batch_size, and a partial batch only after its max wait"""
+        gateway = self.make_gateway(tmp_path, batch_size=3, batch_max_wait_seconds=60)
+        for number in range(4):
+            gateway.submit("email", email(number))
+
+        assert await gateway.process_once("email") == 3
+        assert await gateway.process_once("email") == 0
+        gateway.batch_max_wait_seconds = 0
+        assert await gateway.process_once("email") == 1
+        assert self.batches == [["EMAIL-0", "EMAIL-1", "EMAIL-2"], ["EMAIL-3"]]
+        assert gateway.stats()["email"]["depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_chat_message_is_retried(self, tmp_path):
+        """Test a chat message whose handler fails stays queued and is answered once the handler recovers"""
+        gateway = self.make_gateway(tmp_path)
+        retried = INGEST_MESSAGES.labels(channel="whatsapp", result="retried")
+        before = retried._value.get()
+        gateway.submit("whatsapp", {"MessageSid": "SM1", "From": "whatsapp:+15550100", "Body": "How do I reset my API key?"})
+
+        with patch("services.ingestion_gateway.MAX_RETRY_DELAY_SECONDS", 0):
+            self.fail = True
+            await gateway.process_once("whatsapp")
+            assert retried._value.get() - before == 1
+            assert gateway.stats()["whatsapp"]["depth"] == 1
+
+            self.fail = False
+            await gateway.process_once("whatsapp")
+        assert list(self.whatsapp.sent) == [{"message_id": "SM1", "reply_to": "whatsapp:+15550100", "answer": "Answer to How do I reset my API key?"}]
+
+    @pytest.mark.asyncio
+    async def test_running_gateway_answers_chat_immediately(self, tmp_path):
+        """Test a started gateway answers a chat message without waiting for the poll interval"""
+        gateway = self.make_gateway(tmp_path, poll_seconds=30)
+        gateway.start()
+        try:
+            await asyncio.sleep(0.05)
+            gateway.submit("whatsapp", {"MessageSid": "SM2", "From": "whatsapp:+15550100", "Body": "Is lineage supported for dbt?"})
+            for _ in range(100):
+                if self.whatsapp.sent:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await gateway.stop()
+        assert self.whatsapp.sent[0]["message_id"] == "SM2"
+
+class TestIngestAPI:
+
+    def test_ingest_endpoint_queues_messages(self, tmp_path):
+        """Test the webhook endpoint queues known channels and rejects unknown channels and empty messages"""
+        with patch.object(ingestion_gateway, "queue", DurableQueue(str(tmp_path / "queue.db"))):
+            response = client.post("/api/ingest/email", json=email(1))
+            assert response.status_code == 202
+            assert response.json()["mode"] == "batch"
+            assert client.get("/api/ingest/channels").json()["channels"]["email"]["depth"] == 1
+
+            assert client.post("/api/ingest/fax", json=email(2)).status_code == 404
+            assert client.post("/api/ingest/slack", json={"event": {"text": ""}}).status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_failed_answer_raises_for_retry(self):
+        """Test a pipeline error reaches the gateway instead of being answered with an apology"""
+        message = {"id": "SM3", "body": "How do I reset my API key?", "session_id": "whatsapp:+15550100"}
+        with patch("controllers.rag_controller.classify_ticket", new=AsyncMock(side_effect=ConnectionError("OpenAI unavailable"))):
+            with pytest.raises(ConnectionError):
+                await answer_message(ingestion_gateway.adapter("whatsapp"), message)
+
+    @pytest.mark.asyncio
+    async def test_answer_degraded_by_errors_raises(self):
+        """Test an answer given only because search or generation failed is retried, not sent"""
+        message = {"id": "SM4", "body": "How do I reset my API key?", "session_id": "whatsapp:+15550100"}
+        degraded = QueryResponse(
+            answer="I couldn't find relevant information.", citations=[], classification={}, classification_reasons={},
+            followup_suggestions=[], response_type="rag_response", processing_time=0, session_id=message["session_id"],
+            degraded=[{"stage": "retrieve", "action": "error", "detail": "search failed: timeout", "remaining_ms": 5000}]
+        )
+        with patch("controllers.ingest_controller.answer_query", new=AsyncMock(return_value=degraded)):
+            with pytest.raises(RuntimeError, match="search failed"):
+                await answer_message(ingestion_gateway.adapter("whatsapp"), message)
+
+        answered = degraded.copy(update={"degraded": [{"stage": "generate", "action": "shortened", "detail": "", "remaining_ms": 2000}]})
+        with patch("controllers.ingest_controller.answer_query", new=AsyncMock(return_value=answered)):
+            assert (await answer_message(ingestion_gateway.adapter("whatsapp"), message))["answer"] == answered.answer
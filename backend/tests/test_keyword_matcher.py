@@ -0,0 +1,79 @@
+import pytest
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.keyword_matcher import KeywordMatcher
+
+class TestKeywordMatcher:
+    
+    @pytest.fixture
+    def tech_matcher(self):
+        return KeywordMatcher({
+            'python': ['python', 'py'],
+            'java': ['java'],
+            'javascript': ['javascript', 'js'],
+            'go': ['go', 'golang'],
+            'csharp': ['c#', '.net'],
+            'gcp': ['google cloud', 'google cloud platform']
+        })
+    
+    def test_whole_word_matching(self, tech_matcher):
+        """Test that short keywords do not match inside other words"""
+        assert tech_matcher.first("I'm happy with the copy") is None
+        assert tech_matcher.first("Let's go to Google") == 'go'
+        assert tech_matcher.first("Google Docs and algorithms") is None
+        assert tech_matcher.first("JavaScript examples") == 'javascript'
+    
+    def test_case_insensitive(self, tech_matcher):
+        """Test that matching ignores case without lowercasing the input"""
+        assert tech_matcher.first("How do I install the PYTHON SDK?") == 'python'
+    
+    def test_find_all_in_priority_order(self, tech_matcher):
+        """Test that every hit is returned once, in vocabulary order"""
+        text = "Porting a Go service to Java, then Python, then go again"
+        assert tech_matcher.find_all(text) == ['python', 'java', 'go']
+        assert tech_matcher.first(text) == 'python'
+    
+    def test_symbol_keywords(self, tech_matcher):
+        """Test keywords that start or end with punctuation"""
+        assert tech_matcher.first("Is there a C# client?") == 'csharp'
+        assert tech_matcher.first("We run on .NET 8") == 'csharp'
+    
+    def test_multi_word_keywords(self, tech_matcher):
+        """Test phrases, including overlapping ones for the same label"""
+        assert tech_matcher.find_all("Deploying on Google Cloud Platform") == ['gcp']
+    
+    def test_prefix_keywords(self):
+        """Test that a trailing '*' matches inflected forms"""
+        matcher = KeywordMatcher({'troubleshoot': ['fail*', 'error*'], 'setup': ['install*']})
+        
+        assert matcher.first("The connector keeps failing") == 'troubleshoot'
+        assert matcher.first("Installation guide") == 'setup'
+        assert matcher.first("A failsafe default") == 'troubleshoot'
+        assert matcher.first("Nothing went wrong") is None
+    
+    def test_list_vocabulary_and_empty_inputs(self):
+        """Test plain keyword lists, empty vocabularies and empty text"""
+        matcher = KeywordMatcher(['urgent', 'asap'])
+        
+        assert matcher.matches("Need this ASAP")
+        assert not matcher.matches("")
+        assert matcher.find_all("urgent and asap") == ['urgent', 'asap']
+        assert KeywordMatcher({'general': []}).first("anything") is None
+    
+    def test_overlapping_labels(self):
+        """Test labels whose keywords overlap in the text are all found, wherever they start"""
+        matcher = KeywordMatcher({
+            'bigquery': ['google bigquery'],
+            'gcp': ['google cloud', 'google'],
+            'platform': ['cloud platform'],
+            'cloud': ['cloud']
+        })
+        
+        assert matcher.find_all("Deploying on Google Cloud Platform") == ['gcp', 'platform', 'cloud']
+        assert matcher.find_all("Loading Google BigQuery tables") == ['bigquery', 'gcp']
+        assert matcher.first("Deploying on Google Cloud Platform") == 'gcp'
+        assert KeywordMatcher({'platform': ['cloud platform'], 'gcp': ['google cloud']}).first("Google Cloud Platform") == 'platform'
@@ -0,0 +1,101 @@
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.local_vector_store import LocalVectorStore
+
+def clustered_vectors(count, dimension, seed=0):
+    """Vectors around a few centers, closer to real embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(8, dimension))
+    return centers[rng.integers(0, 8, count)] + 0.5 * rng.normal(size=(count, dimension))
+
+def fill(store, vectors):
+    store.upsert([(f"v{i}", vector.tolist(), {"n": i}) for i, vector in enumerate(vectors)])
+
+class TestLocalVectorStore:
+
+    @pytest.mark.parametrize("quantization", ["none", "int8", "binary"])
+    def test_query_finds_exact_match(self, quantization):
+        """Test a stored vector is its own nearest neighbour under every quantization"""
+        vectors = clustered_vectors(500, 64)
+        store = LocalVectorStore(None, 64, quantization=quantization)
+        fill(store, vectors)
+
+        result = store.query(vector=vectors[123].tolist(), top_k=3)
+
+        assert result["matches"][0]["id"] == "v123"
+        assert result["matches"][0]["score"] == pytest.approx(1.0, abs=1e-5)
+        assert result["matches"][0]["metadata"] == {"n": 123}
+
+    @pytest.mark.parametrize("quantization", ["none", "int8"])
+    def test_metadata_filter(self, quantization):
+        """Test a filtered query returns top_k matches of a rare value, not just those among the overall nearest"""
+        vectors = clustered_vectors(500, 64)
+        store = LocalVectorStore(None, 64, quantization=quantization)
+        store.upsert([(f"v{i}", vector.tolist(), {"topic": "SSO" if i % 100 == 0 else "Connector"}) for i, vector in enumerate(vectors)])
+
+        result = store.query(vector=vectors[123].tolist(), top_k=3, filter={"topic": {"$eq": "SSO"}})
+
+        assert len(result["matches"]) == 3
+        assert all(match["metadata"]["topic"] == "SSO" for match in result["matches"])
+        assert len(store.query(vector=vectors[0].tolist(), top_k=10, filter={"topic": "SSO"})["matches"]) == 5
+
+    def test_upsert_replaces_existing_id(self):
+        """Test upserting an existing id overwrites its vector and metadata"""
+        store = LocalVectorStore(None, 4)
+        store.upsert([("a", [1, 0, 0, 0], {"v": 1})])
+        store.upsert([("a", [0, 1, 0, 0], {"v": 2})])
+
+        assert store.describe_index_stats()["total_vector_count"] == 1
+        match = store.query(vector=[0, 1, 0, 0], top_k=1)["matches"][0]
+        assert match["id"] == "a"
+        assert match["metadata"] == {"v": 2}
+
+    def test_dimension_mismatch_rejected(self):
+        """Test vectors of the wrong size are rejected"""
+        store = LocalVectorStore(None, 4)
+
+        with pytest.raises(ValueError):
+            store.upsert([("a", [1, 0, 0], {})])
+
+    def test_reopen_from_disk(self, tmp_path):
+        """Test vectors and metadata survive reopening, with codes rebuilt from the mmap"""
+        vectors = clustered_vectors(50, 16)
+        store = LocalVectorStore(str(tmp_path / "tickets"), 16, quantization="binary")
+        fill(store, vectors)
+        store.flush()
+
+        reopened = LocalVectorStore(str(tmp_path / "tickets"), 16, quantization="binary")
+
+        assert reopened.describe_index_stats()["total_vector_count"] == 50
+        assert reopened.query(vector=vectors[7].tolist(), top_k=1)["matches"][0]["id"] == "v7"
+        assert reopened.fetch(["v7"])["vectors"]["v7"]["metadata"] == {"n": 7}
+
+    def test_memory_report(self):
+        """Test int8 keeps about a quarter and binary about a thirty-second of float32 RAM"""
+        vectors = clustered_vectors(100, 256)
+        int8_store = LocalVectorStore(None, 256, quantization="int8")
+        binary_store = LocalVectorStore(None, 256, quantization="binary")
+        fill(int8_store, vectors)
+        fill(binary_store, vectors)
+
+        assert int8_store.memory_report()["compression"] > 3.9
+        assert binary_store.memory_report()["compression"] > 25
+
+    @pytest.mark.parametrize("quantization,min_recall", [("int8", 0.95), ("binary", 0.5)])
+    def test_rescoring_improves_recall(self, quantization, min_recall):
+        """Test float32 rescoring recovers recall lost to the quantized codes"""
+        vectors = clustered_vectors(2000, 256)
+        queries = vectors[:20] + 0.3 * np.random.default_rng(1).normal(size=(20, 256))
+        store = LocalVectorStore(None, 256, quantization=quantization, rescore_multiplier=8)
+        fill(store, vectors)
+
+        report = store.recall_report(queries, top_k=10)
+
+        assert report["recall_at_k"] > report["recall_at_k_without_rescoring"] or report["recall_at_k"] == 1.0
+        assert report["recall_at_k"] >= min_recall
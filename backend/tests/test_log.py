@@ -0,0 +1,70 @@
+import json
+import logging
+import pytest
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log import JsonFormatter, SamplingFilter, configure_logging, stop_logging
+
+def make_record(level=logging.DEBUG, msg="value=%s", args=(42,), **extra):
+    record = logging.makeLogRecord({"name": "test", "levelno": level, "levelname": logging.getLevelName(level), "msg": msg, "args": args})
+    record.__dict__.update(extra)
+    return record
+
+class TestLogging:
+    
+    def test_json_formatter(self):
+        """Test records render as one JSON object with extra fields"""
+        entry = json.loads(JsonFormatter().format(make_record(stage="classify")))
+        
+        assert entry["level"] == "DEBUG"
+        assert entry["logger"] == "test"
+        assert entry["message"] == "value=42"
+        assert entry["stage"] == "classify"
+    
+    def test_sampling_drops_debug_only(self):
+        """Test that sampling thins DEBUG records but never drops INFO and above"""
+        dropping = SamplingFilter(0.0)
+        
+        assert not dropping.filter(make_record(logging.DEBUG))
+        assert dropping.filter(make_record(logging.INFO))
+        assert dropping.filter(make_record(logging.ERROR))
+        assert SamplingFilter(1.0).filter(make_record(logging.DEBUG))
+    
+    def test_sampling_rate(self):
+        """Test that roughly the configured fraction of DEBUG records is kept"""
+        sampling = SamplingFilter(0.25)
+        
+        kept = sum(sampling.filter(make_record()) for _ in range(4000))
+        
+        assert 800 < kept < 1200
+    
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_forked_worker_logs_are_written(self, tmp_path):
+        """Test a worker forked after logging was configured still writes its records"""
+        path = tmp_path / "log.txt"
+        with open(path, "w") as stream:
+            try:
+                configure_logging(level="INFO", fmt="text", stream=stream)
+                logging.getLogger("parent").warning("logged by the parent")
+
+                pid = os.fork()
+                if pid == 0:
+                    try:
+                        logging.getLogger("worker").warning("logged by the worker")
+                        stop_logging()
+                        stream.flush()
+                    finally:
+                        os._exit(0)
+                os.waitpid(pid, 0)
+                logging.getLogger("parent").warning("logged after the fork")
+            finally:
+                configure_logging()
+
+        lines = path.read_text()
+        assert "logged by the parent" in lines
+        assert "logged by the worker" in lines
+        assert "logged after the fork" in lines
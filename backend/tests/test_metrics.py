@@ -0,0 +1,67 @@
+import pytest
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prometheus_client import REGISTRY
+from utils.metrics import external_call, record_cache, record_tokens, render_metrics, trace_stage
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+class TestMetrics:
+    
+    def test_trace_stage_observes_latency(self):
+        """Test that a stage is recorded in the latency histogram"""
+        before = sample("copilot_stage_latency_seconds_count", stage="test_stage")
+        
+        with trace_stage("test_stage"):
+            pass
+        
+        assert sample("copilot_stage_latency_seconds_count", stage="test_stage") == before + 1
+    
+    def test_trace_stage_counts_errors(self):
+        """Test that a failing stage is counted as an error, timed, and re-raised"""
+        errors_before = sample("copilot_stage_errors_total", stage="failing_stage")
+        
+        with pytest.raises(ValueError):
+            with trace_stage("failing_stage"):
+                raise ValueError("boom")
+        
+        assert sample("copilot_stage_errors_total", stage="failing_stage") == errors_before + 1
+        assert sample("copilot_stage_latency_seconds_count", stage="failing_stage") >= 1
+    
+    def test_external_call_error_rate(self):
+        """Test that external calls and their failures are counted separately"""
+        calls_before = sample("copilot_external_calls_total", service="openai", stage="test")
+        errors_before = sample("copilot_external_errors_total", service="openai", stage="test")
+        
+        with external_call("openai", "test"):
+            pass
+        with pytest.raises(RuntimeError):
+            with external_call("openai", "test"):
+                raise RuntimeError("rate limited")
+        
+        assert sample("copilot_external_calls_total", service="openai", stage="test") == calls_before + 2
+        assert sample("copilot_external_errors_total", service="openai", stage="test") == errors_before + 1
+    
+    def test_record_tokens(self):
+        """Test token usage is read from OpenAI responses and ignored when absent"""
+        before = sample("copilot_openai_tokens_total", stage="test", kind="completion")
+        
+        total = record_tokens("test", {"usage": {"prompt_tokens": 120, "completion_tokens": 30}})
+        
+        assert total == 150
+        assert sample("copilot_openai_tokens_total", stage="test", kind="completion") == before + 30
+        assert record_tokens("test", {"choices": []}) is None
+    
+    def test_render_metrics(self):
+        """Test the exposition output contains the recorded series"""
+        record_cache("test_cache", True)
+        
+        body, content_type = render_metrics()
+        
+        assert content_type.startswith("text/plain")
+        assert b'copilot_cache_requests_total{cache="test_cache",result="hit"}' in body
@@ -0,0 +1,113 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pinecone_client import PineconeClientFactory, PineconeUnavailableError
+
+@pytest.fixture
+def pinecone_class():
+    """Patch the SDK client class the factory connects with"""
+    with patch("pinecone.Pinecone") as mock_class:
+        yield mock_class
+
+@pytest.fixture
+def factory(pinecone_class):
+    return PineconeClientFactory("test-key", use_grpc="false", max_backoff=30.0)
+
+class TestPineconeClientFactory:
+
+    def test_connects_lazily_and_once(self, factory, pinecone_class):
+        """Test the client is created on first use and then shared"""
+        pinecone_class.assert_not_called()
+
+        assert factory.client() is factory.client()
+        pinecone_class.assert_called_once_with(api_key="test-key", pool_threads=4)
+
+    def test_index_handles_are_cached(self, factory, pinecone_class):
+        """Test each index handle is opened once and reused"""
+        first = factory.index("docs")
+        second = factory.index("docs")
+
+        assert first is second
+        pinecone_class.return_value.Index.assert_called_once_with("docs")
+
+    def test_lazy_index_forwards_calls(self, factory, pinecone_class):
+        """Test the lazy handle forwards method calls to the shared index"""
+        handle = pinecone_class.return_value.Index.return_value
+        handle.query.return_value = {"matches": []}
+
+        lazy = factory.lazy_index("docs")
+        pinecone_class.assert_not_called()
+
+        assert lazy.query(vector=[0.1], top_k=3) == {"matches": []}
+        handle.query.assert_called_once_with(vector=[0.1], top_k=3)
+
+    def test_connection_failure_backs_off(self, factory, pinecone_class):
+        """Test a connection failure drops the client and blocks reconnects until the backoff passes"""
+        handle = pinecone_class.return_value.Index.return_value
+        handle.query.side_effect = ConnectionError("reset by peer")
+        lazy = factory.lazy_index("docs")
+
+        with patch("services.pinecone_client.random.uniform", return_value=10.0):
+            with pytest.raises(ConnectionError):
+                lazy.query(vector=[0.1])
+
+        with pytest.raises(PineconeUnavailableError):
+            lazy.query(vector=[0.1])
+
+        # Once the backoff has passed, the next call reconnects
+        factory._retry_at = 0.0
+        handle.query.side_effect = None
+        lazy.query(vector=[0.1])
+        assert pinecone_class.call_count == 2
+        assert factory._failures == 0
+
+    def test_request_errors_do_not_reconnect(self, factory, pinecone_class):
+        """Test errors that are not connection failures keep the client"""
+        handle = pinecone_class.return_value.Index.return_value
+        handle.upsert.side_effect = ValueError("dimension mismatch")
+        lazy = factory.lazy_index("docs")
+
+        with pytest.raises(ValueError):
+            lazy.upsert(vectors=[])
+
+        lazy.describe_index_stats()
+        pinecone_class.assert_called_once()
+        assert factory._failures == 0
+
+    def test_health_check(self, factory, pinecone_class):
+        """Test the health check pings open indexes and reports failures"""
+        handle = factory.index("docs")
+
+        assert factory.health_check() is True
+        handle.describe_index_stats.assert_called_once()
+
+        handle.describe_index_stats.side_effect = TimeoutError()
+        assert factory.health_check() is False
+        assert factory._client is None
+
+    def test_ensure_index_creates_missing_index(self, factory, pinecone_class):
+        """Test ensure_index creates the index only when it is missing"""
+        client = pinecone_class.return_value
+        client.list_indexes.return_value.names.return_value = []
+
+        factory.ensure_index("docs", dimension=1536)
+        client.create_index.assert_called_once_with(name="docs", dimension=1536, metric="cosine")
+
+        client.list_indexes.return_value.names.return_value = ["docs"]
+        client.describe_index.return_value.dimension = 1536
+        factory.ensure_index("docs", dimension=1536)
+        client.create_index.assert_called_once()
+
+    def test_ensure_index_rejects_dimension_mismatch(self, factory, pinecone_class):
+        """Test an existing index built for another embedding size is rejected"""
+        client = pinecone_class.return_value
+        client.list_indexes.return_value.names.return_value = ["docs"]
+        client.describe_index.return_value.dimension = 3072
+
+        with pytest.raises(ValueError):
+            factory.ensure_index("docs", dimension=1536)
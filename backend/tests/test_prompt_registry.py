@@ -0,0 +1,87 @@
+import pytest
+import sys
+import os
+from dataclasses import replace
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.answer_cache import AnswerCache
+from services.prompt_registry import PromptRegistry, PromptTemplate
+from utils.metrics import PROMPT_TOKENS
+
+TEMPLATE = PromptTemplate(
+    name="test_answer",
+    system="You are a support assistant.",
+    instructions="Answer from the context only.",
+    request="Context: {context}\n\nQuestion: {query}"
+)
+
+class TestPromptTemplate:
+
+    def test_static_prefix_comes_first(self):
+        """Test every call starts with the same system message and ends with the variable request"""
+        first = TEMPLATE.messages(context="SSO docs", query="How do I set up SSO?")
+        second = TEMPLATE.messages(context="SDK docs", query="How do I use the SDK?")
+
+        assert first[0] == second[0] == {"role": "system", "content": "You are a support assistant.\n\nAnswer from the context only."}
+        assert first[-1] == {"role": "user", "content": "Context: SSO docs\n\nQuestion: How do I set up SSO?"}
+
+    def test_variable_content_is_not_interpreted(self):
+        """Test braces in user content are passed through untouched"""
+        messages = TEMPLATE.messages(context="{\"json\": true}", query="What is {query}?")
+        assert messages[-1]["content"] == "Context: {\"json\": true}\n\nQuestion: What is {query}?"
+
+    def test_version_tracks_every_part(self):
+        """Test changing the instructions, model or dependencies changes the version"""
+        assert replace(TEMPLATE, instructions="Be brief.").version != TEMPLATE.version
+        assert replace(TEMPLATE, model="gpt-4o-mini").version != TEMPLATE.version
+        assert replace(TEMPLATE, depends_on=(["Urgent"],)).version != TEMPLATE.version
+        assert replace(TEMPLATE).version == TEMPLATE.version
+
+class TestPromptRegistry:
+
+    def test_conflicting_registration_is_rejected(self):
+        """Test one name cannot hold two different templates"""
+        registry = PromptRegistry()
+        registry.register(TEMPLATE)
+        registry.register(TEMPLATE)
+
+        with pytest.raises(ValueError):
+            registry.register(replace(TEMPLATE, instructions="Be brief."))
+        assert registry.describe()[0]["prefix_tokens"] == TEMPLATE.prefix_tokens
+
+    def test_usage_counts_cached_tokens(self):
+        """Test prompt tokens, and the part served from the prefix cache, are counted per template"""
+        prompt = PROMPT_TOKENS.labels(template="test_answer", kind="prompt")
+        cached = PROMPT_TOKENS.labels(template="test_answer", kind="cached")
+        before = (prompt._value.get(), cached._value.get())
+
+        response = {"usage": {"prompt_tokens": 1500, "completion_tokens": 80, "prompt_tokens_details": {"cached_tokens": 1024}}}
+        assert PromptRegistry.record_usage(TEMPLATE, response) == 1500
+        PromptRegistry.record_usage(TEMPLATE, {"usage": {"prompt_tokens": 300}})
+
+        assert prompt._value.get() - before[0] == 1800
+        assert cached._value.get() - before[1] == 1024
+
+class TestRegisteredPrompts:
+
+    def test_classification_prompts_share_their_prefix(self):
+        """Test the ticket comes after the guidelines, which single and batch prompts share"""
+        from services.classification_service import CLASSIFY_BATCH_PROMPT, CLASSIFY_PROMPT, CLASSIFICATION_GUIDELINES
+
+        messages = CLASSIFY_PROMPT.messages(subject="SSO broken", body="Login fails")
+        assert CLASSIFICATION_GUIDELINES in messages[0]["content"]
+        assert messages[-1]["content"] == "TICKET CONTENT:\nSubject: SSO broken\n\nBody: Login fails"
+
+        shared = os.path.commonprefix([CLASSIFY_PROMPT.prefix, CLASSIFY_BATCH_PROMPT.prefix])
+        assert CLASSIFICATION_GUIDELINES in shared
+
+    def test_answer_cache_keyed_by_prompt_version(self):
+        """Test answers cached under one prompt version are not served under another"""
+        old = AnswerCache(version="v1")
+        new = AnswerCache(backend=old.backend, version="v2")
+        old.set("How do I set up SSO?", "SSO context", "old answer")
+
+        assert old.get("How do I set up SSO?", "SSO context") == "old answer"
+        assert new.get("How do I set up SSO?", "SSO context") is None
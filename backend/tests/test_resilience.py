@@ -0,0 +1,259 @@
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResiliencePolicy,
+    TokenBucket,
+    estimate_tokens,
+    is_transient,
+    retry_after_seconds
+)
+
+class RateLimitError(Exception):
+    """Stands in for the SDK's rate limit error, which is matched by name"""
+
+    def __init__(self, headers=None):
+        super().__init__("rate limited")
+        self.headers = headers or {}
+
+class ServerError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+def make_policy(**kwargs):
+    sleeps = []
+    policy = ResiliencePolicy("test", sleep=sleeps.append, **kwargs)
+    return policy, sleeps
+
+class TestTokenBucket:
+
+    def test_unlimited_bucket_never_waits(self):
+        """Test a limit of 0 disables the bucket"""
+        bucket = TokenBucket("test_unlimited", 0)
+        assert all(bucket.reserve() == 0.0 for _ in range(1000))
+
+    def test_waits_once_burst_is_spent(self):
+        """Test calls beyond the burst are told how long to wait"""
+        bucket = TokenBucket("test_rpm", 60)  # one per second
+
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+        # Reservations queue up behind each other
+        assert bucket.reserve() == pytest.approx(2.0, abs=0.05)
+
+    def test_throttle_and_recover(self):
+        """Test a 429 halves the rate down to a floor and successes restore it gradually"""
+        bucket = TokenBucket("test_adaptive", 600)
+
+        bucket.throttle()
+        assert bucket.rate == pytest.approx(5.0)
+        for _ in range(10):
+            bucket.throttle()
+        assert bucket.rate == pytest.approx(1.0)
+
+        bucket.recover()
+        assert bucket.rate == pytest.approx(1.5)
+        for _ in range(100):
+            bucket.recover()
+        assert bucket.rate == pytest.approx(10.0)
+
+class TestCircuitBreaker:
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the breaker fails fast once the threshold is reached"""
+        breaker = CircuitBreaker("test_open", failure_threshold=3, reset_timeout=30)
+        for _ in range(2):
+            breaker.allow()
+            breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        """Test only consecutive failures count"""
+        breaker = CircuitBreaker("test_reset", failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_one_probe(self):
+        """Test after the reset timeout a single probe decides whether the breaker closes"""
+        breaker = CircuitBreaker("test_half_open", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_probe_reopens(self):
+        """Test a failing probe opens the breaker again"""
+        breaker = CircuitBreaker("test_reopen", failure_threshold=5, reset_timeout=0)
+        for _ in range(5):
+            breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+class TestErrorClassification:
+
+    def test_transient_errors(self):
+        """Test timeouts, connection errors, rate limits and 5xx responses are retried"""
+        assert is_transient(TimeoutError())
+        assert is_transient(ConnectionError())
+        assert is_transient(RateLimitError())
+        assert is_transient(ServerError(503))
+
+    def test_request_errors_are_not_transient(self):
+        """Test rejected requests are not retried"""
+        assert not is_transient(ValueError("bad input"))
+        assert not is_transient(ServerError(400))
+
+    def test_retry_after_header(self):
+        """Test the server's Retry-After hint is read from the error"""
+        assert retry_after_seconds(RateLimitError({"retry-after": "2"})) == 2.0
+        assert retry_after_seconds(RateLimitError()) is None
+        assert retry_after_seconds(ValueError()) is None
+
+    def test_estimate_tokens(self):
+        """Test the token estimate counts prompt characters and the completion budget"""
+        assert estimate_tokens([{"role": "user", "content": "x" * 400}], max_tokens=50) == 150
+        assert estimate_tokens(text="x" * 40) == 10
+
+class TestResiliencePolicy:
+
+    def test_retries_transient_errors(self):
+        """Test transient failures are retried with backoff until the call succeeds"""
+        policy, sleeps = make_policy(max_retries=3, base_delay=0.5)
+        function = MagicMock(side_effect=[TimeoutError(), ConnectionError(), "ok"])
+
+        assert policy.call(function, "arg", key="value") == "ok"
+        assert function.call_count == 3
+        function.assert_called_with("arg", key="value")
+        assert len(sleeps) == 2
+        # Full jitter: each delay is at most the exponential cap
+        assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+
+    def test_gives_up_after_max_retries(self):
+        """Test the last transient error is raised once retries are exhausted"""
+        policy, sleeps = make_policy(max_retries=2)
+        function = MagicMock(side_effect=TimeoutError())
+
+        with pytest.raises(TimeoutError):
+            policy.call(function)
+        assert function.call_count == 3
+        assert len(sleeps) == 2
+
+    def test_request_errors_are_not_retried(self):
+        """Test errors from bad requests are raised at once and do not trip the breaker"""
+        policy, sleeps = make_policy(max_retries=3, failure_threshold=1)
+        function = MagicMock(side_effect=ValueError("bad input"))
+
+        with pytest.raises(ValueError):
+            policy.call(function)
+        assert function.call_count == 1
+        assert sleeps == []
+        assert policy.breaker.state == CircuitBreaker.CLOSED
+
+    def test_rate_limit_honours_retry_after_and_throttles(self):
+        """Test a 429 waits for Retry-After and lowers the request rate"""
+        policy, sleeps = make_policy(requests_per_minute=6000, max_retries=1)
+        function = MagicMock(side_effect=[RateLimitError({"retry-after": "3"}), "ok"])
+
+        assert policy.call(function) == "ok"
+        assert 3.0 in sleeps
+        assert policy.requests.rate < policy.requests.limit
+
+    def test_open_circuit_fails_fast(self):
+        """Test exhausted retries count towards the breaker, which then skips the call"""
+        policy, _ = make_policy(max_retries=0, failure_threshold=2, reset_timeout=60)
+        function = MagicMock(side_effect=ConnectionError())
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                policy.call(function)
+
+        with pytest.raises(CircuitOpenError):
+            policy.call(function)
+        assert function.call_count == 2
+
+    def test_retries_stop_when_circuit_opens(self):
+        """Test a call stops retrying with CircuitOpenError once other callers' failures open the circuit"""
+        opened = []
+
+        def sleep(delay):
+            # Meanwhile, concurrent calls exhaust their retries and trip the breaker
+            policy.breaker.record_failure()
+            opened.append(policy.breaker.state)
+
+        policy = ResiliencePolicy("test", max_retries=5, failure_threshold=1, reset_timeout=60, sleep=sleep)
+        function = MagicMock(side_effect=ConnectionError())
+
+        with pytest.raises(CircuitOpenError) as raised:
+            policy.call(function)
+        assert function.call_count == 1
+        assert opened == [CircuitBreaker.OPEN]
+        assert isinstance(raised.value.__cause__, ConnectionError)
+
+    def test_failed_probe_is_not_retried(self):
+        """Test the half-open probe reopens the circuit on a transient failure instead of retrying"""
+        policy, sleeps = make_policy(max_retries=3, failure_threshold=1, reset_timeout=0)
+        policy.breaker.record_failure()
+        function = MagicMock(side_effect=ConnectionError())
+
+        with pytest.raises(ConnectionError):
+            policy.call(function)
+        assert function.call_count == 1
+        assert sleeps == []
+        assert policy.breaker.state == CircuitBreaker.OPEN
+
+    @pytest.mark.asyncio
+    async def test_acall(self):
+        """Test the async wrapper runs the call in a worker thread"""
+        policy, _ = make_policy()
+        assert await policy.acall(lambda value: value * 2, 21) == 42
+
+class TestFallbacks:
+
+    @pytest.mark.asyncio
+    async def test_classification_falls_back_to_keywords(self):
+        """Test tickets are classified lexically, and not cached, while OpenAI is unavailable"""
+        from services.classification_service import classification_cache, classify_ticket
+
+        with patch("services.classification_service.openai_policy.acall", new=AsyncMock(side_effect=CircuitOpenError("openai circuit is open"))):
+            result = await classify_ticket("Our Snowflake connector is failing, this is blocking production", "Connector down")
+
+        assert result["topic"] == "Connector"
+        assert result["sentiment"] == "Urgent"
+        assert result["priority"] == "P0"
+        assert result["confidence"] < 0.5
+        assert "keyword fallback" in result["topic_reasoning"].lower()
+        assert classification_cache.get("Our Snowflake connector is failing, this is blocking production", "Connector down") is None
+
+    @pytest.mark.asyncio
+    async def test_generation_falls_back_to_extracts(self):
+        """Test the answer quotes the most relevant retrieved passages when generation fails"""
+        from services.atlan_rag_service import atlan_rag_service
+
+        context = "Lineage is captured automatically for dbt.\n\nConfigure SAML SSO in the admin settings.\n\nBilling is monthly."
+        with patch("services.atlan_rag_service.openai_policy.acall", new=AsyncMock(side_effect=TimeoutError())):
+            answer = await atlan_rag_service.generate_response_from_context("How do I configure SAML SSO?", context)
+
+        assert "> Configure SAML SSO in the admin settings." in answer
+        assert answer.index("Lineage") < answer.index("SAML")
@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app import app
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.scheduler import PriorityScheduler, SchedulerFull, request_priority
+
+client = TestClient(app)
+
+class TestPriorityScheduler:
+
+    def test_request_priority(self):
+        """Test Urgent sentiment is scheduled as P0 and unknown priorities as P2"""
+        assert request_priority("P2", "Urgent") == "P0"
+        assert request_priority("P1", "Frustrated") == "P1"
+        assert request_priority(None) == "P2"
+
+    @pytest.mark.asyncio
+    async def test_free_slots_do_not_wait(self):
+        """Test requests run at once while slots are free"""
+        scheduler = PriorityScheduler("test_free", concurrency=2)
+        await scheduler.acquire("P2")
+        await scheduler.acquire("P2")
+
+        assert scheduler.saturated()
+        assert scheduler.queue_depths() == {"P0": 0, "P1": 0, "P2": 0}
+
+    @pytest.mark.asyncio
+    async def test_freed_slots_go_to_most_urgent(self):
+        """Test waiters are served P0 first, then P1, then P2, in arrival order within a priority"""
+        scheduler = PriorityScheduler("test_order", concurrency=1)
+        await scheduler.acquire("P2")
+        order = []
+
+        async def wait(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        tasks = [asyncio.create_task(wait(name, priority)) for name, priority in (("how-to", "P2"), ("bug", "P1"), ("outage", "P0"), ("outage-2", "P0"))]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depths() == {"P0": 2, "P1": 1, "P2": 1}
+
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["outage", "outage-2", "bug", "how-to"]
+        assert scheduler.snapshot()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_full_low_priority_queue_sheds(self):
+        """Test P2 requests are turned away once their queue is full, while P0 still queues"""
+        scheduler = PriorityScheduler("test_shed", concurrency=1, max_queued={"P2": 1})
+        await scheduler.acquire("P0")
+        waiting = asyncio.create_task(scheduler.acquire("P2"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(SchedulerFull):
+            await scheduler.acquire("P2")
+        urgent = asyncio.create_task(scheduler.acquire("P0"))
+        await asyncio.sleep(0)
+        assert scheduler.queue_depths() == {"P0": 1, "P1": 0, "P2": 1}
+
+        scheduler.release()
+        await urgent
+        assert not waiting.done()
+        waiting.cancel()
+
+    @pytest.mark.asyncio
+    async def test_waiting_is_bounded_by_deadline(self):
+        """Test a waiter gives up at the request deadline and leaves the queue"""
+        scheduler = PriorityScheduler("test_deadline", concurrency=1)
+        await scheduler.acquire("P0")
+
+        with deadline_scope(0.05):
+            with pytest.raises(DeadlineExceeded):
+                await scheduler.acquire("P2")
+        assert scheduler.queue_depths()["P2"] == 0
+
+        # The abandoned entry does not swallow the next freed slot
+        later = asyncio.create_task(scheduler.acquire("P1"))
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.wait_for(later, 1)
+
+    @pytest.mark.asyncio
+    async def test_zero_concurrency_disables_scheduling(self):
+        """Test a concurrency of 0 never queues"""
+        scheduler = PriorityScheduler("test_disabled", concurrency=0)
+        for _ in range(100):
+            await scheduler.acquire("P2")
+        assert not scheduler.saturated()
+
+class TestScheduledGeneration:
+
+    @pytest.mark.asyncio
+    async def test_saturated_low_priority_served_from_cache(self):
+        """Test P2 questions reuse a cached answer while generation is saturated, and P0 still generates"""
+        from services.atlan_rag_service import atlan_rag_service
+
+        saturated = PriorityScheduler("test_saturated", concurrency=1)
+        await saturated.acquire("P0")
+        atlan_rag_service.answer_cache.set("How do I set up SSO?", "SSO context", "cached answer")
+
+        with patch("services.atlan_rag_service.generation_scheduler", saturated), \
+             patch.object(atlan_rag_service, "generate_response_from_context", new=AsyncMock(return_value="fresh answer")) as mock_generate:
+            assert await atlan_rag_service._generate_within_deadline("How do I set up SSO?", "SSO context", "P2") == "cached answer"
+            mock_generate.assert_not_called()
+
+            urgent = asyncio.create_task(atlan_rag_service._generate_within_deadline("How do I set up SSO?", "SSO context", "P0"))
+            await asyncio.sleep(0.01)
+            saturated.release()
+            assert await urgent == "fresh answer"
+
+    @pytest.mark.asyncio
+    async def test_shed_low_priority_gets_excerpts(self):
+        """Test a P2 question with no cached answer and a full queue is answered with excerpts"""
+        from services.atlan_rag_service import atlan_rag_service
+
+        full = PriorityScheduler("test_full", concurrency=1, max_queued={"P2": 0})
+        await full.acquire("P0")
+
+        with patch("services.atlan_rag_service.generation_scheduler", full), \
+             patch.object(atlan_rag_service, "generate_response_from_context", new=AsyncMock()) as mock_generate:
+            answer = await atlan_rag_service._generate_within_deadline("How do I add glossary terms?", "Glossary terms are added from the glossary page.", "P2")
+
+        mock_generate.assert_not_called()
+        assert "> Glossary terms are added from the glossary page." in answer
+
+    def test_queues_endpoint(self):
+        """Test queue depths per priority are exposed"""
+        response = client.get("/api/rag/queues")
+
+        assert response.status_code == 200
+        data = response.json()["generate"]
+        assert set(data["waiting"]) == {"P0", "P1", "P2"}
+        assert data["concurrency"] >= 0
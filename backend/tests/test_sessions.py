@@ -0,0 +1,180 @@
+import pytest
+import sys
+import os
+import time
+from unittest.mock import AsyncMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app import app
+from services.session_store import SessionStore, is_followup, previous_sources, reusable_sources, standalone_query
+from utils.state_backend import SQLiteStateBackend
+
+client = TestClient(app)
+
+SOURCES = [{"content": "Authenticate with AtlanClient(api_key=...).", "url": "https://developer.atlan.com/sdk/python", "title": "Python SDK", "relevance_score": 0.9}]
+
+class TestSessionStore:
+
+    def test_anonymous_session_is_not_remembered(self):
+        """Test the shared default session id never accumulates history"""
+        store = SessionStore()
+        assert store.record_turn("default", "How do I set up SSO?", "How do I set up SSO?", "SSO", "answer") is None
+        assert store.get("default") is None
+
+    def test_old_turns_are_summarized(self):
+        """Test turns past max_turns are folded into the summary"""
+        store = SessionStore(max_turns=2)
+        for number in range(4):
+            store.record_turn("abc", f"Question {number}?", f"Question {number}?", "How-to", "answer")
+
+        session = store.get("abc")
+        assert [turn["query"] for turn in session["turns"]] == ["Question 2?", "Question 3?"]
+        assert session["summary"] == "- (How-to) Question 0?\n- (How-to) Question 1?"
+
+    def test_large_session_drops_sources_first(self):
+        """Test a session over its byte cap forgets its passages before its turns"""
+        store = SessionStore(max_bytes=1500)
+        store.record_turn("abc", "How do I use the SDK?", "How do I use the SDK?", "API/SDK", "answer", [dict(SOURCES[0], content="x" * 2000)])
+
+        session = store.get("abc")
+        assert session["sources"] == []
+        assert len(session["turns"]) == 1
+
+    def test_sessions_expire(self):
+        """Test an idle session is forgotten after its TTL"""
+        store = SessionStore(ttl_seconds=0.01)
+        store.record_turn("abc", "How do I set up SSO?", "How do I set up SSO?", "SSO", "answer")
+        time.sleep(0.05)
+        assert store.get("abc") is None
+
+    def test_least_recently_used_session_is_evicted(self):
+        """Test the in-memory store keeps at most max_sessions sessions"""
+        store = SessionStore(max_sessions=2)
+        for session_id in ("a", "b", "c"):
+            store.record_turn(session_id, "How do I set up SSO?", "How do I set up SSO?", "SSO", "answer")
+        assert store.get("a") is None
+        assert store.get("c") is not None
+
+    def test_shared_backend_is_bounded(self, tmp_path):
+        """Test max_sessions also holds when sessions live in a shared backend"""
+        store = SessionStore(max_sessions=2, backend=SQLiteStateBackend(str(tmp_path / "state.db")))
+        for session_id in ("a", "b", "c"):
+            store.record_turn(session_id, "How do I set up SSO?", "How do I set up SSO?", "SSO", "answer")
+            time.sleep(0.01)
+        assert store.get("a") is None
+        assert store.get("b") is not None
+        assert store.get("c") is not None
+
+class TestFollowupRewriting:
+
+    def setup_method(self):
+        self.store = SessionStore()
+        self.session = self.store.record_turn("abc", "How do I authenticate with the Python SDK?", "How do I authenticate with the Python SDK?", "API/SDK", "Use an API key.", SOURCES)
+
+    def test_followup_is_rewritten(self):
+        """Test a follow-up carries the question it refers to"""
+        rewritten = standalone_query("Can you show me a code example for this?", self.session)
+        assert rewritten == "Can you show me a code example for this? (follow-up to: How do I authenticate with the Python SDK?)"
+
+    def test_new_question_is_unchanged(self):
+        """Test a self-contained question, and any question without history, is left as is"""
+        assert not is_followup("How do I configure SAML SSO with Okta?", self.session)
+        assert standalone_query("Can you show me a code example for this?", None) == "Can you show me a code example for this?"
+
+    def test_followup_chain_refers_to_first_question(self):
+        """Test follow-ups of follow-ups keep pointing at the question that started them"""
+        followup = "Can you show me a code example for this?"
+        session = self.store.record_turn("abc", followup, standalone_query(followup, self.session), "API/SDK", "Here is one.")
+        assert standalone_query("And in Java?", session).endswith("(follow-up to: How do I authenticate with the Python SDK?)")
+
+    def test_sources_reused_only_on_same_topic(self):
+        """Test the previous passages are reused for a same-topic follow-up only"""
+        assert reusable_sources("Can you show me a code example for this?", "API/SDK", self.session) == SOURCES
+        assert reusable_sources("Can you show me a code example for this?", "SSO", self.session) is None
+        assert reusable_sources("How do I configure SAML SSO with Okta?", "API/SDK", self.session) is None
+
+    def test_continuation_searches_again(self):
+        """Test a follow-up that continues without referring back is not answered from the previous passages alone"""
+        assert is_followup("And the rate limits?", self.session)
+        assert reusable_sources("And the rate limits?", "API/SDK", self.session) is None
+        assert reusable_sources("What is an example glossary term?", "API/SDK", self.session) is None
+        assert previous_sources("And the rate limits?", "API/SDK", self.session) == SOURCES
+
+    def test_fresh_questions_are_not_followups(self):
+        """Test short or pronoun-containing questions that stand on their own are not rewritten"""
+        for query in ("Is there a way to export lineage?", "SSO login broken", "Python SDK rate limits?", "Why is it failing to sync Snowflake?"):
+            assert not is_followup(query, self.session), query
+
+    def test_leading_references_are_followups(self):
+        """Test queries opening with a reference to the previous answer are follow-ups"""
+        for query in ("What about Java?", "Does it work with Okta?", "That fails on Windows", "it returns 401"):
+            assert is_followup(query, self.session), query
+
+class TestSessionQueries:
+
+    def test_followup_reuses_previous_passages(self):
+        """Test a follow-up query is rewritten and answered from the previous turn's passages"""
+        classification = {"topic": "API/SDK", "sentiment": "Neutral", "priority": "P2", "confidence": 0.9, "topic_reasoning": "SDK usage"}
+        rag_result = {"answer": "Use AtlanClient.", "citations": [], "sources": SOURCES}
+        with patch("controllers.rag_controller.classify_ticket", new=AsyncMock(return_value=classification)) as mock_classify, \
+             patch("controllers.rag_controller.atlan_rag_service.generate_rag_response", new=AsyncMock(return_value=rag_result)) as mock_rag, \
+             patch("controllers.rag_controller.generate_contextual_followup_questions", return_value=[]):
+            client.post("/api/rag/query", json={"query": "How do I authenticate with the Python SDK?", "session_id": "session-followup"})
+            response = client.post("/api/rag/query", json={"query": "Can you show me a code example for this?", "session_id": "session-followup"})
+
+        data = response.json()
+        assert data["rewritten_query"] == "Can you show me a code example for this? (follow-up to: How do I authenticate with the Python SDK?)"
+        # Only retrieval uses the rewritten query; classification stays keyed on the query itself
+        assert mock_classify.await_args.args[0] == "Can you show me a code example for this?"
+        assert mock_rag.await_args_list[0].kwargs["sources"] is None
+        assert mock_rag.await_args_list[1].args[0] == data["rewritten_query"]
+        assert mock_rag.await_args_list[1].kwargs["sources"] == SOURCES
+
+        history = client.get("/api/rag/sessions/session-followup").json()
+        assert [turn["query"] for turn in history["turns"]] == ["How do I authenticate with the Python SDK?", "Can you show me a code example for this?"]
+        client.delete("/api/rag/sessions/session-followup")
+        assert client.get("/api/rag/sessions/session-followup").status_code == 404
+
+    def test_followup_without_topic_keeps_previous_topic(self):
+        """Test a follow-up classified as General on its own stays on the previous turn's topic"""
+        sdk = {"topic": "API/SDK", "sentiment": "Neutral", "priority": "P2", "confidence": 0.9, "topic_reasoning": "SDK usage"}
+        general = {**sdk, "topic": "General", "topic_reasoning": "No subject of its own"}
+        rag_result = {"answer": "Use AtlanClient.", "citations": [], "sources": SOURCES}
+        with patch("controllers.rag_controller.classify_ticket", new=AsyncMock(side_effect=[sdk, general])), \
+             patch("controllers.rag_controller.atlan_rag_service.generate_rag_response", new=AsyncMock(return_value=rag_result)) as mock_rag, \
+             patch("controllers.rag_controller.generate_contextual_followup_questions", return_value=[]):
+            client.post("/api/rag/query", json={"query": "How do I authenticate with the Python SDK?", "session_id": "session-topic"})
+            response = client.post("/api/rag/query", json={"query": "Does it work with Java?", "session_id": "session-topic"})
+
+        assert response.json()["classification"]["topic"] == "API/SDK"
+        assert mock_rag.await_args_list[1].kwargs["sources"] == SOURCES
+        client.delete("/api/rag/sessions/session-topic")
+
+    @pytest.mark.asyncio
+    async def test_reused_sources_skip_search(self):
+        """Test answering from given passages does not search Pinecone"""
+        from services.atlan_rag_service import atlan_rag_service
+
+        with patch.object(atlan_rag_service.crawler, "search_content") as mock_search, \
+             patch.object(atlan_rag_service, "_generate_within_deadline", new=AsyncMock(return_value="Use AtlanClient.")):
+            result = await atlan_rag_service.generate_rag_response("Show me an example", sources=SOURCES)
+
+        mock_search.assert_not_called()
+        assert result["citations"] == [{"doc": "Python SDK", "url": "https://developer.atlan.com/sdk/python"}]
+        assert result["sources"] == SOURCES
+
+    @pytest.mark.asyncio
+    async def test_previous_sources_are_merged_after_search(self):
+        """Test a follow-up that searches again keeps the previous passages after the new ones, without duplicates"""
+        from services.atlan_rag_service import atlan_rag_service
+
+        found = [{"content": "Rate limits are 100 requests per minute.", "url": "https://developer.atlan.com/sdk/limits", "title": "Rate limits", "relevance_score": 0.8}]
+        with patch.object(atlan_rag_service, "_search", new=AsyncMock(return_value=found + SOURCES)) as mock_search, \
+             patch.object(atlan_rag_service, "_generate_within_deadline", new=AsyncMock(return_value="100 per minute.")):
+            result = await atlan_rag_service.generate_rag_response("Python SDK rate limits?", previous_sources=SOURCES)
+
+        mock_search.assert_awaited_once()
+        assert result["sources"] == found + SOURCES
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.singleflight import SingleFlight, normalize_text
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_flight(self):
+        """Test identical concurrent calls run the work once and all get the result"""
+        flight = SingleFlight("test")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"answer": 42}
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+        assert len(calls) == 1
+        assert results == [{"answer": 42}] * 5
+        assert flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_followers_get_copies(self):
+        """Test a caller mutating its result does not affect the others"""
+        flight = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.01)
+            return {"cache_hit": False}
+
+        first, second = await asyncio.gather(flight.do("key", work), flight.do("key", work))
+        first.pop("cache_hit")
+
+        assert second == {"cache_hit": False}
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """Test only identical keys are coalesced"""
+        flight = SingleFlight("test")
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b")))
+
+        assert results == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_and_are_not_kept(self):
+        """Test a failure is raised to all waiting callers and the next call retries"""
+        flight = SingleFlight("test")
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("key", failing), flight.do("key", failing), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+        async def working():
+            return "ok"
+
+        assert await flight.do("key", working) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        """Test the shared work keeps running when the first caller goes away"""
+        flight = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == "done"
+
+    def test_normalize_text(self):
+        """Test case and whitespace differences normalize away"""
+        assert normalize_text("  How do I\n connect  Snowflake? ") == normalize_text("how do i connect snowflake?")
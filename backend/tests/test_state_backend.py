@@ -0,0 +1,188 @@
+import gc
+import os
+import pytest
+import sys
+import time
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.answer_cache import AnswerCache
+from services.ticket_store import TicketStore
+from utils.state_backend import MemoryStateBackend, RedisStateBackend, SQLiteStateBackend, create_state_backend
+
+class FakeRedis:
+    """Stand-in for a Redis server: the handful of commands the backend uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and time.time() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, px=None):
+        self.data[key] = (value.encode("utf-8"), time.time() + px / 1000 if px else None)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        return [key for key in list(self.data) if key.startswith(prefix)]
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, ({}, None))[0].update(mapping)
+
+    def zrem(self, key, *members):
+        scores = self.data.get(key, ({}, None))[0]
+        return sum(scores.pop(member, None) is not None for member in members)
+
+    def zremrangebyscore(self, key, low, high):
+        scores = self.data.get(key, ({}, None))[0]
+        return self.zrem(key, *[member for member, score in list(scores.items()) if score <= high])
+
+    def zcard(self, key):
+        return len(self.data.get(key, ({}, None))[0])
+
+    def zpopmin(self, key, count):
+        scores = self.data.get(key, ({}, None))[0]
+        popped = sorted(scores.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del scores[member]
+        return [(member.encode("utf-8"), score) for member, score in popped]
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStateBackend()
+    if request.param == "sqlite":
+        return SQLiteStateBackend(str(tmp_path / "state.db"))
+    return RedisStateBackend("redis://localhost:6379/0", client=FakeRedis())
+
+class TestStateBackends:
+
+    def test_round_trip(self, backend):
+        """Test JSON values are stored per namespace"""
+        backend.set("sessions", "abc", {"turns": ["How do I set up SSO?"]})
+        backend.set("answers", "abc", "cached answer")
+
+        assert backend.get("sessions", "abc") == {"turns": ["How do I set up SSO?"]}
+        assert backend.get("answers", "abc") == "cached answer"
+        assert backend.get("sessions", "missing") is None
+
+    def test_ttl_expiry(self, backend):
+        """Test entries are gone once their TTL passes"""
+        backend.set("answers", "short", "value", ttl_seconds=0.01)
+        backend.set("answers", "long", "value", ttl_seconds=60)
+        time.sleep(0.05)
+
+        assert backend.get("answers", "short") is None
+        assert backend.get("answers", "long") == "value"
+
+    def test_delete_and_clear(self, backend):
+        """Test single keys and whole namespaces can be removed"""
+        for key in ("a", "b", "c"):
+            backend.set("answers", key, key)
+        backend.set("sessions", "a", "kept")
+
+        backend.delete("answers", "a")
+        assert backend.get("answers", "a") is None
+        assert backend.clear("answers") == 2
+        assert backend.get("answers", "b") is None
+        assert backend.get("sessions", "a") == "kept"
+
+    def test_bounded_namespace_evicts_oldest_writes(self, backend):
+        """Test set_bounded keeps a namespace to max_entries in every backend, evicting the oldest writes"""
+        for key in ("a", "b", "c"):
+            assert backend.set_bounded("sessions", key, key, 60, max_entries=2) == (1 if key == "c" else 0)
+            time.sleep(0.01)
+        backend.set("answers", "a", "other namespace")
+
+        assert backend.get("sessions", "a") is None
+        assert backend.get("sessions", "c") == "c"
+        assert backend.get("answers", "a") == "other namespace"
+        assert backend.clear("sessions") == 2
+
+    def test_memory_backend_is_bounded(self):
+        """Test the in-process backend evicts the least recently used key"""
+        backend = MemoryStateBackend(max_entries=2)
+        backend.set("answers", "a", 1)
+        backend.set("answers", "b", 2)
+        backend.get("answers", "a")
+        backend.set("answers", "c", 3)
+
+        assert backend.get("answers", "b") is None
+        assert backend.get("answers", "a") == 1
+
+    def test_unknown_backend_falls_back_to_memory(self):
+        """Test a misconfigured STATE_BACKEND keeps state in memory"""
+        assert isinstance(create_state_backend("memcached"), MemoryStateBackend)
+
+    def test_redis_without_package_falls_back_to_sqlite(self, tmp_path):
+        """Test STATE_BACKEND=redis without the redis package uses SQLite instead"""
+        with patch.dict(sys.modules, {"redis": None}):
+            backend = create_state_backend("redis", db_path=str(tmp_path / "state.db"))
+        assert isinstance(backend, SQLiteStateBackend)
+
+class TestSharedBetweenWorkers:
+
+    def test_answer_cached_by_one_worker_hits_in_another(self, tmp_path):
+        """Test two processes' caches over one SQLite file share entries"""
+        path = str(tmp_path / "state.db")
+        first = AnswerCache(ttl_seconds=60, backend=SQLiteStateBackend(path))
+        second = AnswerCache(ttl_seconds=60, backend=SQLiteStateBackend(path))
+
+        first.set("How do I set up SSO?", "SSO context", "Configure SAML.")
+        assert second.get("how do I  set up SSO?", "SSO context") == "Configure SAML."
+        assert second.get("How do I set up SSO?", "other context") is None
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_forked_worker_writes_are_visible(self, tmp_path):
+        """Test a worker forked after the backend was used opens its own connection and shares writes"""
+        backend = SQLiteStateBackend(str(tmp_path / "state.db"))
+        backend.set("sessions", "parent", 1)
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                backend.set("sessions", "child", backend.get("sessions", "parent") + 1)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        assert backend.get("sessions", "child") == 2
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_ticket_store_reopens_after_fork(self, tmp_path):
+        """Test the ticket store can be written from a forked worker"""
+        from tests.test_ticket_store import make_ticket
+
+        store = TicketStore(str(tmp_path / "tickets.db"))
+        store.upsert_ticket(make_ticket(1))
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                store.reopen()
+                store.upsert_ticket(make_ticket(2))
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        assert store.get_ticket("TICKET-2") is not None
+
+    def test_preload_freezes_heap(self):
+        """Test preloading moves the loaded app out of the collector's reach"""
+        import serve
+
+        try:
+            app = serve.preload()
+            assert gc.get_freeze_count() > 0
+            assert app.title == "Atlan Customer Support Backend"
+        finally:
+            gc.unfreeze()
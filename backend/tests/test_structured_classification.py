@@ -0,0 +1,117 @@
+import pytest
+import sys
+import os
+import json
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.classification_service import (
+    CLASSIFY_TOOL,
+    classification_cache,
+    classify_ticket,
+    validate_classification
+)
+from utils.metrics import CLASSIFICATION_OUTPUTS
+
+VALID = {
+    "topic": "SSO",
+    "sentiment": "Frustrated",
+    "priority": "P1",
+    "confidence": 0.85,
+    "topic_reasoning": "Okta SAML login",
+    "sentiment_reasoning": "Repeated failures",
+    "priority_reasoning": "Team is blocked"
+}
+
+def tool_response(arguments) -> dict:
+    arguments = arguments if isinstance(arguments, str) else json.dumps(arguments)
+    return {
+        "choices": [{"message": {"role": "assistant", "content": None, "tool_calls": [
+            {"id": "call_1", "type": "function", "function": {"name": "record_classification", "arguments": arguments}}
+        ]}}],
+        "usage": {"prompt_tokens": 1100, "completion_tokens": 60}
+    }
+
+def outputs(result: str) -> float:
+    return CLASSIFICATION_OUTPUTS.labels(stage="classify", result=result)._value.get()
+
+class TestValidateClassification:
+
+    def test_valid_output_is_normalized(self):
+        """Test a valid classification passes and missing reasoning is filled in"""
+        classification, problem = validate_classification({"topic": "SSO", "sentiment": "Neutral", "priority": "P2", "confidence": "0.7"})
+        assert problem == ""
+        assert classification["confidence"] == 0.7
+        assert classification["priority_reasoning"]
+
+    def test_out_of_taxonomy_values_are_reported(self):
+        """Test every invalid field is named in the problem"""
+        classification, problem = validate_classification({**VALID, "topic": "Billing", "priority": "P9", "confidence": 1.5})
+        assert classification is None
+        assert "topic must be one of" in problem
+        assert "'P9'" in problem
+        assert "confidence must be between 0 and 1" in problem
+
+class TestStructuredClassification:
+
+    def setup_method(self):
+        classification_cache.invalidate()
+
+    @pytest.mark.asyncio
+    async def test_classification_is_a_forced_function_call(self):
+        """Test the model is made to answer through the classification tool and its arguments are used"""
+        before = outputs("valid")
+        with patch("services.classification_service.openai.ChatCompletion", new=MagicMock()) as mock_chat:
+            mock_chat.create.return_value = tool_response(VALID)
+            result = await classify_ticket("Okta SAML login fails for everyone", "SSO broken")
+
+        kwargs = mock_chat.create.call_args.kwargs
+        assert kwargs["tools"] == [CLASSIFY_TOOL]
+        assert kwargs["tool_choice"] == {"type": "function", "function": {"name": "record_classification"}}
+        assert result["topic"] == "SSO" and result["priority"] == "P1"
+        assert outputs("valid") - before == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_output_is_repaired(self):
+        """Test an invalid output is retried once with the problem and the previous output, then cached"""
+        before = outputs("repaired")
+        with patch("services.classification_service.openai.ChatCompletion", new=MagicMock()) as mock_chat:
+            mock_chat.create.side_effect = [tool_response({**VALID, "topic": "Login"}), tool_response(VALID)]
+            result = await classify_ticket("SAML assertion rejected by Okta", "SSO error")
+            cached = await classify_ticket("SAML assertion rejected by Okta", "SSO error")
+
+        assert mock_chat.create.call_count == 2
+        repair = mock_chat.create.call_args_list[1].kwargs
+        assert repair["temperature"] == 0.0
+        assert "PROBLEM: topic must be one of" in repair["messages"][1]["content"]
+        assert '"topic": "Login"' in repair["messages"][1]["content"]
+        assert result["topic"] == "SSO"
+        assert cached["cache_hit"] is True
+        assert outputs("repaired") - before == 1
+
+    @pytest.mark.asyncio
+    async def test_unrepairable_output_falls_back_to_keywords(self):
+        """Test an output that stays invalid gives a low-confidence keyword classification that is not cached"""
+        before = outputs("failed")
+        with patch("services.classification_service.openai.ChatCompletion", new=MagicMock()) as mock_chat:
+            mock_chat.create.side_effect = [tool_response("{not json"), tool_response({**VALID, "sentiment": "Angry"})]
+            result = await classify_ticket("SSO login with Okta keeps failing", "Urgent: SSO down")
+
+        assert result["confidence"] < 0.5
+        assert "invalid model output" in result["topic_reasoning"]
+        assert result["cache_hit"] is False
+        assert classification_cache.get("SSO login with Okta keeps failing", "Urgent: SSO down") is None
+        assert outputs("failed") - before == 1
+
+    @pytest.mark.asyncio
+    async def test_text_answers_are_still_accepted(self):
+        """Test a model answering in fenced JSON text instead of a function call is still parsed"""
+        text = {"choices": [{"message": {"content": f"```json\n{json.dumps(VALID)}\n```"}}]}
+        with patch("services.classification_service.openai.ChatCompletion", new=MagicMock()) as mock_chat:
+            mock_chat.create.return_value = text
+            result = await classify_ticket("Okta users cannot sign in", "SSO")
+
+        assert mock_chat.create.call_count == 1
+        assert result["sentiment"] == "Frustrated"
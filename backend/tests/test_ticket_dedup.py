@@ -0,0 +1,163 @@
+import asyncio
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_registry import embedding_registry
+from services.ticket_dedup import TicketDeduplicator
+from services.ticket_store import TicketStore
+from services.vector_outbox import VectorOutbox
+from utils.durable_queue import DurableQueue
+from tests.test_ticket_store import make_ticket
+
+class TestTicketDeduplicator:
+
+    @pytest.fixture
+    def store(self):
+        return TicketStore(":memory:")
+
+    @pytest.fixture
+    def deduplicator(self):
+        return TicketDeduplicator(enabled=True, threshold=0.95, window_hours=72)
+
+    @pytest.mark.asyncio
+    async def test_duplicate_within_batch(self, deduplicator):
+        """Test a ticket matching one earlier in the same import is found without the index"""
+        original = make_ticket(1)
+        with patch("services.ticket_dedup.query_similar", new=AsyncMock()) as mock_query:
+            match = await deduplicator.find_duplicate("TICKET-2", [1.0, 0.01, 0.0], [(original, [1.0, 0.0, 0.0])])
+
+        assert match[0] is original
+        assert match[1] > 0.95
+        mock_query.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_recent_duplicate_in_index(self, deduplicator, store):
+        """Test a close match in the tickets index reuses the stored ticket"""
+        store.upsert_ticket(make_ticket(1, priority="P0"))
+        matches = [{"id": "TICKET-2", "score": 1.0}, {"id": "TICKET-1", "score": 0.97}]
+        with patch("services.ticket_dedup.query_similar", new=AsyncMock(return_value=matches)), \
+             patch("services.ticket_dedup.ticket_store", store):
+            root, similarity = await deduplicator.find_duplicate("TICKET-2", [1.0, 0.0], [])
+
+        # The ticket's own vector (a re-import) is skipped
+        assert root["id"] == "TICKET-1"
+        assert similarity == 0.97
+
+    @pytest.mark.asyncio
+    async def test_old_or_distant_tickets_are_not_duplicates(self, deduplicator, store):
+        """Test matches below the threshold or outside the window are ignored"""
+        old = (datetime.now(timezone.utc) - timedelta(days=10)).isoformat()
+        store.upsert_ticket(make_ticket(1, created_at=old))
+        store.upsert_ticket(make_ticket(2))
+        matches = [{"id": "TICKET-1", "score": 0.99}, {"id": "TICKET-2", "score": 0.9}]
+        with patch("services.ticket_dedup.query_similar", new=AsyncMock(return_value=matches)), \
+             patch("services.ticket_dedup.ticket_store", store):
+            assert await deduplicator.find_duplicate("TICKET-3", [1.0, 0.0], []) is None
+
+    @pytest.mark.asyncio
+    async def test_lookup_failure_falls_back(self, deduplicator):
+        """Test an index error means the ticket is classified normally"""
+        with patch("services.ticket_dedup.query_similar", new=AsyncMock(side_effect=ConnectionError())):
+            assert await deduplicator.find_duplicate("TICKET-1", [1.0, 0.0], []) is None
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        """Test nothing is looked up when deduplication is off"""
+        deduplicator = TicketDeduplicator(enabled=False)
+        with patch("services.ticket_dedup.query_similar", new=AsyncMock()) as mock_query:
+            assert await deduplicator.find_duplicate("TICKET-2", [1.0], [(make_ticket(1), [1.0])]) is None
+        mock_query.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_import_lookups_run_concurrently(self, deduplicator):
+        """Test the index lookups of one import are in flight together"""
+        in_flight, peak = 0, 0
+
+        async def slow_query(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return []
+
+        # Orthogonal embeddings: none is a duplicate of another
+        tickets = [(make_ticket(i), [float(i == j) for j in range(4)]) for i in range(4)]
+        with patch("services.ticket_dedup.query_similar", new=slow_query), \
+             patch("services.ticket_dedup.vector_outbox.pending_vectors", return_value=[]):
+            assert await deduplicator.find_duplicates(tickets) == [None] * 4
+        assert peak == 4
+
+    @pytest.mark.asyncio
+    async def test_import_duplicates_match_earlier_originals(self, deduplicator):
+        """Test a ticket matching one earlier in the import is a duplicate of it, not of the index"""
+        original = make_ticket(1)
+        tickets = [(original, [1.0, 0.0]), (make_ticket(2), [1.0, 0.01]), (make_ticket(3), [0.0, 1.0])]
+        with patch("services.ticket_dedup.query_similar", new=AsyncMock(return_value=[])), \
+             patch("services.ticket_dedup.vector_outbox.pending_vectors", return_value=[]):
+            matches = await deduplicator.find_duplicates(tickets)
+
+        assert matches[0] is None
+        assert matches[1][0] is original
+        assert matches[2] is None
+
+    @pytest.mark.asyncio
+    async def test_ticket_pending_in_outbox_is_found(self, deduplicator, store):
+        """Test a ticket stored by an earlier import but not yet upserted to the index is matched"""
+        store.upsert_ticket(make_ticket(1))
+        outbox = VectorOutbox(DurableQueue(":memory:"))
+        dimension = embedding_registry.spec("tickets").dimension
+        outbox.add("tickets", "TICKET-1", [1.0] + [0.0] * (dimension - 1), {"id": "TICKET-1"})
+        with patch("services.ticket_dedup.query_similar", new=AsyncMock(return_value=[])), \
+             patch("services.ticket_dedup.ticket_store", store), \
+             patch("services.ticket_dedup.vector_outbox", outbox):
+            matches = await deduplicator.find_duplicates([(make_ticket(2), [1.0, 0.01] + [0.0] * (dimension - 2))])
+
+        root, similarity = matches[0]
+        assert root["id"] == "TICKET-1"
+        assert similarity > 0.95
+
+class TestIncidentClusters:
+
+    def test_duplicates_form_a_cluster(self):
+        """Test duplicates join the root's cluster and the cluster takes the highest priority"""
+        store = TicketStore(":memory:")
+        store.upsert_ticket(make_ticket(1, priority="P2"))
+        store.upsert_ticket({**make_ticket(2, priority="P2"), "duplicate_of": "TICKET-1", "similarity": 0.97})
+        store.upsert_ticket({**make_ticket(3, priority="P0"), "duplicate_of": "TICKET-1", "similarity": 0.96})
+
+        incidents = store.get_incidents()
+
+        assert len(incidents) == 1
+        assert incidents[0]["id"] == "INC-TICKET-1"
+        assert incidents[0]["size"] == 3
+        assert incidents[0]["priority"] == "P0"
+        assert incidents[0]["ticket_ids"] == ["TICKET-1", "TICKET-2", "TICKET-3"]
+        assert store.get_ticket("TICKET-1")["cluster_id"] == "INC-TICKET-1"
+        assert store.get_ticket("TICKET-3")["cluster_id"] == "INC-TICKET-1"
+
+    def test_incidents_ordered_by_priority(self):
+        """Test P0 incidents are listed first and can be filtered"""
+        store = TicketStore(":memory:")
+        for root, priority in ((1, "P2"), (10, "P0")):
+            store.upsert_ticket(make_ticket(root, priority=priority))
+            store.upsert_ticket({**make_ticket(root + 1, priority=priority), "duplicate_of": f"TICKET-{root}"})
+
+        assert [incident["priority"] for incident in store.get_incidents()] == ["P0", "P2"]
+        assert [incident["id"] for incident in store.get_incidents(priority="P0")] == ["INC-TICKET-10"]
+
+    def test_reimport_does_not_grow_cluster(self):
+        """Test re-storing a member keeps the cluster size"""
+        store = TicketStore(":memory:")
+        store.upsert_ticket(make_ticket(1))
+        duplicate = {**make_ticket(2), "duplicate_of": "TICKET-1"}
+        store.upsert_ticket(duplicate)
+        store.upsert_ticket(duplicate)
+
+        assert store.get_incidents()[0]["size"] == 2
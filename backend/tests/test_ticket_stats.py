@@ -0,0 +1,94 @@
+import pytest
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ticket_store import TicketStore
+from services.ticket_stats import histogram_percentile, processing_time_bucket
+
+def make_ticket(number, topic="Connector", sentiment="Neutral", priority="P2", confidence=0.8, processing_time=1.0, channel="Email"):
+    return {
+        "id": f"TICKET-{number}",
+        "body": f"Body {number}",
+        "topic": topic,
+        "sentiment": sentiment,
+        "priority": priority,
+        "confidence": confidence,
+        "processing_time": processing_time,
+        "channel": channel
+    }
+
+class TestTicketStats:
+    
+    @pytest.fixture
+    def store(self):
+        return TicketStore(":memory:")
+    
+    def test_empty_store(self, store):
+        """Test stats before any ticket is stored"""
+        stats = store.get_stats()
+        
+        assert stats["total"] == 0
+        assert stats["average_confidence"] == 0.0
+        assert stats["processing_time_percentiles"] == {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        assert len(stats["confidence_histogram"]) == 10
+    
+    def test_counts_and_averages(self, store):
+        """Test breakdowns and averages across topic, sentiment, priority and channel"""
+        store.upsert_ticket(make_ticket(1, topic="SSO", priority="P0", confidence=0.9, processing_time=2.0, channel="Chat"))
+        store.upsert_ticket(make_ticket(2, topic="SSO", priority="P1", confidence=0.7, processing_time=1.0))
+        store.upsert_ticket(make_ticket(3, topic="Connector", sentiment="Urgent", confidence=0.5, processing_time=3.0))
+        
+        stats = store.get_stats()
+        
+        assert stats["total"] == 3
+        assert stats["by_topic"] == {"SSO": 2, "Connector": 1}
+        assert stats["by_sentiment"] == {"Neutral": 2, "Urgent": 1}
+        assert stats["by_priority"] == {"P0": 1, "P1": 1, "P2": 1}
+        assert stats["by_channel"] == {"Chat": 1, "Email": 2}
+        assert stats["average_confidence"] == pytest.approx(0.7)
+        assert stats["average_processing_time"] == pytest.approx(2.0)
+    
+    def test_reclassification_moves_counts(self, store):
+        """Test that re-storing a ticket replaces its old contribution instead of double counting"""
+        store.upsert_ticket(make_ticket(1, topic="SSO", priority="P0", confidence=0.95))
+        store.upsert_ticket(make_ticket(1, topic="Connector", priority="P2", confidence=0.45))
+        
+        stats = store.get_stats()
+        
+        assert stats["total"] == 1
+        assert stats["by_topic"] == {"Connector": 1}
+        assert stats["by_priority"] == {"P2": 1}
+        assert [bucket["count"] for bucket in stats["confidence_histogram"]] == [0, 0, 0, 0, 1, 0, 0, 0, 0, 0]
+    
+    def test_filtered_stats(self, store):
+        """Test that filters narrow the counts and averages"""
+        store.upsert_ticket(make_ticket(1, topic="SSO", priority="P0", confidence=0.9))
+        store.upsert_ticket(make_ticket(2, topic="SSO", priority="P2", confidence=0.5))
+        store.upsert_ticket(make_ticket(3, topic="Connector", priority="P0", confidence=0.1))
+        
+        stats = store.get_stats(topic="SSO")
+        
+        assert stats["total"] == 2
+        assert stats["by_priority"] == {"P0": 1, "P2": 1}
+        assert stats["average_confidence"] == pytest.approx(0.7)
+        assert store.get_stats(topic="SSO", priority="P0")["total"] == 1
+    
+    def test_processing_time_percentiles(self, store):
+        """Test percentile estimates stay within one histogram bucket of the true value"""
+        for number in range(100):
+            store.upsert_ticket(make_ticket(number, processing_time=(number + 1) / 10))
+        
+        percentiles = store.get_stats()["processing_time_percentiles"]
+        
+        assert 5.0 <= percentiles["p50"] <= 5.0 * 1.25
+        assert 9.5 <= percentiles["p95"] <= 9.5 * 1.25
+        assert 9.9 <= percentiles["p99"] <= 9.9 * 1.25
+    
+    def test_percentile_helpers(self):
+        """Test bucket assignment and percentile lookup at the edges"""
+        assert processing_time_bucket(0) == 0
+        assert processing_time_bucket(10 ** 6) == processing_time_bucket(10 ** 7)
+        assert histogram_percentile({}, 50) == 0.0
@@ -0,0 +1,132 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ticket_store import TicketStore
+
+def make_ticket(number, topic="Connector", sentiment="Neutral", priority="P2", confidence=0.8, created_at=None):
+    ticket = {
+        "id": f"TICKET-{number}",
+        "subject": f"Subject {number}",
+        "body": f"Body {number}",
+        "topic": topic,
+        "sentiment": sentiment,
+        "priority": priority,
+        "confidence": confidence,
+        "topic_reasoning": "reason",
+        "sentiment_reasoning": "reason",
+        "priority_reasoning": "reason"
+    }
+    if created_at:
+        ticket["created_at"] = created_at
+    return ticket
+
+class TestTicketStore:
+    
+    @pytest.fixture
+    def store(self):
+        store = TicketStore(":memory:")
+        for number in range(10):
+            store.upsert_ticket(make_ticket(
+                100 + number,
+                topic="SSO" if number % 2 else "Connector",
+                priority=["P0", "P1", "P2"][number % 3],
+                confidence=number / 10,
+                created_at=f"2025-01-{number + 1:02d}T00:00:00+00:00"
+            ))
+        return store
+    
+    def test_cursor_pagination_visits_every_ticket_once(self, store):
+        """Test that following next_cursor walks the whole listing without overlap"""
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = store.list_tickets(limit=3, cursor=cursor)
+            seen.extend(ticket["id"] for ticket in page)
+            if cursor is None:
+                break
+        
+        assert len(seen) == 10
+        assert len(set(seen)) == 10
+        assert seen[0] == "TICKET-109"  # newest first by default
+    
+    def test_filters(self, store):
+        """Test server-side filtering by topic, priority and date"""
+        page, _ = store.list_tickets(topic="SSO", priority="P0")
+        
+        assert [ticket["id"] for ticket in page] == ["TICKET-109", "TICKET-103"]
+        assert store.count_tickets(topic="SSO") == 5
+        assert store.count_tickets(created_after="2025-01-05", created_before="2025-01-08") == 3
+    
+    def test_sorting_with_ties(self, store):
+        """Test sorting by a non-unique column paginates deterministically"""
+        first, cursor = store.list_tickets(limit=4, sort_by="priority", order="asc")
+        second, _ = store.list_tickets(limit=4, cursor=cursor, sort_by="priority", order="asc")
+        
+        priorities = [ticket["priority"] for ticket in first + second]
+        assert priorities == sorted(priorities)
+        assert not {t["id"] for t in first} & {t["id"] for t in second}
+    
+    def test_classification_object_reconstructed(self, store):
+        """Test that listed tickets carry the nested classification object"""
+        ticket = store.get_ticket("TICKET-101")
+        
+        assert ticket["classification"]["topic"] == "SSO"
+        assert ticket["classification"]["priority"] == "P1"
+    
+    def test_reclassification_keeps_created_at(self, store):
+        """Test that upserting an existing ticket updates it in place"""
+        original = store.get_ticket("TICKET-100")
+        store.upsert_ticket(make_ticket(100, topic="Lineage"))
+        
+        updated = store.get_ticket("TICKET-100")
+        assert updated["topic"] == "Lineage"
+        assert updated["created_at"] == original["created_at"]
+        assert store.count_tickets() == 10
+    
+    def test_invalid_arguments(self, store):
+        """Test that bad sort fields and cursors are rejected"""
+        with pytest.raises(ValueError):
+            store.list_tickets(sort_by="subject")
+        with pytest.raises(ValueError):
+            store.list_tickets(cursor="not-a-cursor")
+
+class TestBackfill:
+
+    def test_backfill_keeps_stored_tickets(self):
+        """Test backfilled tickets are added and tickets already stored are left as they are"""
+        store = TicketStore(":memory:")
+        store.upsert_ticket(make_ticket(1, topic="SSO"))
+
+        assert store.backfill([make_ticket(1, topic="Connector"), make_ticket(2)]) == 1
+        assert store.get_ticket("TICKET-1")["topic"] == "SSO"
+        assert store.count_tickets() == 2
+
+    def test_index_metadata_is_listed_page_by_page(self):
+        """Test every vector of an index that can list its ids is read, with its metadata"""
+        from services.local_vector_store import LocalVectorStore
+        from services.vector_db_service import iter_vector_metadata
+
+        index = LocalVectorStore(None, 4)
+        index.upsert([(f"TICKET-{number}", [1.0, number, 0.0, 0.0], make_ticket(number)) for number in range(5)])
+        with patch("services.vector_db_service.tickets_index", index):
+            pages = list(iter_vector_metadata("tickets", batch_size=2))
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert pages[0][0] == ("TICKET-0", make_ticket(0))
+
+    def test_index_without_listing_falls_back_to_query(self):
+        """Test a pod-based index, which cannot list ids, is read through one query"""
+        from services.vector_db_service import iter_vector_metadata
+
+        index = MagicMock()
+        index.list.side_effect = Exception("list is only supported for serverless indexes")
+        index.query.return_value = {"matches": [{"id": "TICKET-1", "metadata": make_ticket(1)}]}
+        with patch("services.vector_db_service.tickets_index", index):
+            pages = list(iter_vector_metadata("tickets"))
+
+        assert pages == [[("TICKET-1", make_ticket(1))]]
@@ -0,0 +1,113 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import sys
+import os
+import time
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app import app
+from services.ticket_store import TicketStore
+from tests.test_ticket_store import make_ticket
+
+client = TestClient(app)
+
+class TestSimilarTickets:
+
+    @pytest.fixture
+    def store(self):
+        store = TicketStore(":memory:")
+        for number, topic in ((1, "Connector"), (2, "SSO"), (3, "Connector")):
+            store.upsert_ticket(make_ticket(number, topic=topic))
+        with patch("controllers.tickets_controller.ticket_store", store):
+            yield store
+
+    def test_similar_by_ticket_id_reuses_embedding(self, store):
+        """Test a known ticket is looked up by its stored vector, without re-embedding"""
+        matches = [{"id": "TICKET-1", "score": 1.0}, {"id": "TICKET-3", "score": 0.91}, {"id": "TICKET-2", "score": 0.42}]
+        with patch("controllers.tickets_controller.fetch_vector", new=AsyncMock(return_value=[0.1, 0.2])) as mock_fetch, \
+             patch("controllers.tickets_controller.query_similar", new=AsyncMock(return_value=matches)), \
+             patch("controllers.tickets_controller.generate_embedding", new=AsyncMock()) as mock_embed:
+            response = client.get("/api/tickets/similar", params={"ticket_id": "TICKET-1", "top_k": 2})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["ticket"]["id"] for item in data["tickets"]] == ["TICKET-3", "TICKET-2"]
+        assert data["tickets"][0]["similarity"] == 0.91
+        assert data["tickets"][0]["ticket"]["classification"]["topic"] == "Connector"
+        mock_fetch.assert_awaited_once_with("tickets", "TICKET-1")
+        mock_embed.assert_not_called()
+
+    def test_similar_by_query_with_topic_filter(self, store):
+        """Test free text is embedded and results can be limited to a topic"""
+        matches = [{"id": "TICKET-2", "score": 0.8}, {"id": "TICKET-1", "score": 0.7}]
+        with patch("controllers.tickets_controller.query_similar", new=AsyncMock(return_value=matches)) as mock_query, \
+             patch("controllers.tickets_controller.generate_embedding", new=AsyncMock(return_value=[0.1, 0.2])) as mock_embed:
+            response = client.get("/api/tickets/similar", params={"query": "Snowflake sync failing", "topic": "Connector"})
+
+        assert [item["ticket"]["id"] for item in response.json()["tickets"]] == ["TICKET-1"]
+        mock_embed.assert_awaited_once_with("Snowflake sync failing")
+        # The vector store filters by topic, so no over-fetching is needed
+        assert mock_query.await_args.kwargs == {"top_k": 6, "filter": {"topic": {"$eq": "Connector"}}}
+
+    def test_ticket_pending_in_outbox_is_embedded(self, store):
+        """Test a stored ticket whose vector has not been upserted yet is embedded from its text"""
+        matches = [{"id": "TICKET-3", "score": 0.9}]
+        with patch("controllers.tickets_controller.fetch_vector", new=AsyncMock(return_value=None)), \
+             patch("controllers.tickets_controller.query_similar", new=AsyncMock(return_value=matches)), \
+             patch("controllers.tickets_controller.generate_embedding", new=AsyncMock(return_value=[0.1, 0.2])) as mock_embed:
+            response = client.get("/api/tickets/similar", params={"ticket_id": "TICKET-1"})
+
+        assert response.status_code == 200
+        assert [item["ticket"]["id"] for item in response.json()["tickets"]] == ["TICKET-3"]
+        mock_embed.assert_awaited_once_with("Body 1")
+
+    def test_unknown_ticket_id(self, store):
+        """Test a ticket that is neither indexed nor stored returns 404"""
+        with patch("controllers.tickets_controller.fetch_vector", new=AsyncMock(return_value=None)):
+            response = client.get("/api/tickets/similar", params={"ticket_id": "TICKET-404"})
+
+        assert response.status_code == 404
+
+    def test_requires_ticket_id_or_query(self):
+        """Test the endpoint needs something to compare against"""
+        assert client.get("/api/tickets/similar").status_code == 400
+
+class TestVectorCallsOffLoop:
+
+    @pytest.mark.asyncio
+    async def test_slow_index_does_not_block_event_loop(self):
+        """Test a slow vector query and fetch leave the event loop free for other requests"""
+        from services import vector_db_service
+
+        def slow_query(**kwargs):
+            time.sleep(0.2)
+            return {"matches": []}
+
+        def slow_fetch(**kwargs):
+            time.sleep(0.2)
+            return {"vectors": {}}
+
+        index = MagicMock()
+        index.query.side_effect = slow_query
+        index.fetch.side_effect = slow_fetch
+        ticks = []
+
+        async def ticker():
+            for _ in range(10):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        with patch.object(vector_db_service, "tickets_index", index), \
+             patch.object(vector_db_service.embedding_registry, "validate"):
+            await asyncio.gather(
+                vector_db_service.query_similar("tickets", [0.1, 0.2]),
+                vector_db_service.fetch_vector("tickets", "TICKET-1"),
+                ticker()
+            )
+
+        assert len(ticks) == 10
+        assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.1
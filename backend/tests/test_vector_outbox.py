@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+import sys
+import os
+import time
+from unittest.mock import AsyncMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_registry import EmbeddingDimensionError, embedding_registry
+from services.vector_outbox import VectorOutbox
+from utils.durable_queue import DurableQueue
+
+DIMENSION = embedding_registry.spec("tickets").dimension
+
+def vector(value: float) -> list:
+    return [value] * DIMENSION
+
+class TestVectorOutbox:
+
+    def make_outbox(self, tmp_path, **kwargs) -> VectorOutbox:
+        return VectorOutbox(DurableQueue(str(tmp_path / "outbox.db"), max_attempts=3), **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_vectors_are_upserted_in_batches(self, tmp_path):
+        """Test queued vectors are written with one upsert call per batch"""
+        outbox = self.make_outbox(tmp_path, batch_size=2)
+        for number in range(3):
+            outbox.add("tickets", f"TICKET-{number}", vector(0.1), {"topic": "SSO"})
+
+        with patch("services.vector_outbox.upsert_vectors", new=AsyncMock()) as mock_upsert:
+            assert await outbox.flush() == 3
+
+        assert [[item[0] for item in call.args[1]] for call in mock_upsert.await_args_list] == [["TICKET-0", "TICKET-1"], ["TICKET-2"]]
+        assert outbox.stats()["tickets"]["depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_upserts_are_kept_and_retried(self, tmp_path):
+        """Test vectors survive a vector store outage, and a restart, and are upserted once it recovers"""
+        outbox = self.make_outbox(tmp_path)
+        outbox.add("tickets", "TICKET-1", vector(0.1), {"topic": "SSO"})
+
+        with patch("services.vector_outbox.upsert_vectors", new=AsyncMock(side_effect=ConnectionError("Pinecone unavailable"))), \
+             patch("services.vector_outbox.MAX_RETRY_DELAY_SECONDS", 0):
+            assert await outbox.flush() == 0
+        assert outbox.stats()["tickets"]["depth"] == 1
+
+        restarted = self.make_outbox(tmp_path)
+        with patch("services.vector_outbox.upsert_vectors", new=AsyncMock()) as mock_upsert:
+            assert await restarted.flush() == 1
+        assert mock_upsert.await_args.args[1][0][0] == "TICKET-1"
+
+    @pytest.mark.asyncio
+    async def test_latest_version_of_a_vector_wins(self, tmp_path):
+        """Test a ticket queued twice before a flush is upserted once, with its latest metadata"""
+        outbox = self.make_outbox(tmp_path)
+        outbox.add("tickets", "TICKET-1", vector(0.1), {"priority": "P2"})
+        outbox.add("tickets", "TICKET-1", vector(0.1), {"priority": "P0"})
+
+        with patch("services.vector_outbox.upsert_vectors", new=AsyncMock()) as mock_upsert:
+            await outbox.flush()
+
+        assert mock_upsert.await_args.args[1] == [("TICKET-1", vector(0.1), {"priority": "P0"})]
+
+    @pytest.mark.asyncio
+    async def test_retried_version_does_not_overwrite_a_newer_one(self, tmp_path):
+        """Test a ticket re-added while its failed upsert waits on a retry delay is upserted with the new version only"""
+        outbox = self.make_outbox(tmp_path)
+        outbox.add("tickets", "TICKET-1", vector(0.1), {"priority": "P2"})
+        with patch("services.vector_outbox.upsert_vectors", new=AsyncMock(side_effect=ConnectionError("Pinecone unavailable"))):
+            assert await outbox.flush() == 0
+
+        outbox.add("tickets", "TICKET-1", vector(0.2), {"priority": "P0"})
+        assert outbox.stats()["tickets"]["depth"] == 1
+        with patch("services.vector_outbox.upsert_vectors", new=AsyncMock()) as mock_upsert, \
+             patch("utils.durable_queue.time.time", return_value=time.time() + 3600):
+            assert await outbox.flush() == 1
+
+        assert [call.args[1] for call in mock_upsert.await_args_list] == [[("TICKET-1", vector(0.2), {"priority": "P0"})]]
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_the_highest_message_id(self, tmp_path):
+        """Test the newest message for a ticket wins even when the claim hands it out first"""
+        outbox = self.make_outbox(tmp_path)
+        claimed = [
+            {"id": 2, "payload": {"id": "TICKET-1", "values": vector(0.2), "metadata": {"priority": "P0"}}, "enqueued_at": time.time(), "attempts": 1},
+            {"id": 1, "payload": {"id": "TICKET-1", "values": vector(0.1), "metadata": {"priority": "P2"}}, "enqueued_at": time.time(), "attempts": 2}
+        ]
+        with patch("services.vector_outbox.upsert_vectors", new=AsyncMock()) as mock_upsert:
+            assert await outbox._upsert("tickets", claimed)
+
+        assert mock_upsert.await_args.args[1] == [("TICKET-1", vector(0.2), {"priority": "P0"})]
+
+    @pytest.mark.asyncio
+    async def test_workers_do_not_upsert_versions_out_of_order(self, tmp_path):
+        """Test a worker cannot upsert a newer version while another worker's upsert of an older one is in flight"""
+        worker_a, worker_b = self.make_outbox(tmp_path), self.make_outbox(tmp_path)
+        worker_a.add("tickets", "TICKET-1", vector(0.1), {"priority": "P2"})
+        started, release = asyncio.Event(), asyncio.Event()
+        written = []
+
+        async def slow_upsert(index_name, vectors):
+            if not started.is_set():
+                started.set()
+                await release.wait()
+            written.append(vectors[0][2]["priority"])
+
+        with patch("services.vector_outbox.upsert_vectors", new=slow_upsert):
+            flushing = asyncio.create_task(worker_a.flush("tickets"))
+            await started.wait()
+            worker_b.add("tickets", "TICKET-1", vector(0.2), {"priority": "P0"})
+            assert await worker_b.flush("tickets") == 0
+            release.set()
+            await flushing
+
+        assert written == ["P2", "P0"]
+        assert worker_b.stats()["tickets"]["depth"] == 0
+
+    def test_lock_expires_with_its_owner(self, tmp_path):
+        """Test a flush lock held by a dead worker can be taken over after its lease"""
+        queue = DurableQueue(str(tmp_path / "outbox.db"))
+        assert queue.acquire("flush:tickets", "worker-a", 60)
+        assert not queue.acquire("flush:tickets", "worker-b", 60)
+        with patch("utils.durable_queue.time.time", return_value=time.time() + 61):
+            assert queue.acquire("flush:tickets", "worker-b", 60)
+        queue.release("flush:tickets", "worker-a")
+        assert not queue.acquire("flush:tickets", "worker-a", 60)
+
+    def test_wrong_dimension_is_rejected_when_queued(self, tmp_path):
+        """Test a vector of the wrong size fails its caller instead of the flusher"""
+        outbox = self.make_outbox(tmp_path)
+        with pytest.raises(EmbeddingDimensionError):
+            outbox.add("tickets", "TICKET-1", [0.1, 0.2], {})
+        assert outbox.stats()["tickets"]["depth"] == 0
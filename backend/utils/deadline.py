@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, List, Optional
+from config.settings import GENERATION_TOKENS_PER_SECOND
+from utils.metrics import record_degradation
+
+logger = logging.getLogger(__name__)
+
+# Time-to-first-token and network overhead assumed before a completion starts streaming
+GENERATION_OVERHEAD_SECONDS = 0.8
+
+class DeadlineExceeded(TimeoutError):
+    """A stage did not finish within the time left in the request's budget"""
+
+class Deadline:
+    """
+    Time budget of one request, shared by every stage that runs for it.
+
+    Stages ask how much time is left and pick a cheaper strategy when it is
+    short, recording each such degradation so the response can report it.
+    The active deadline is held in a context variable, so it follows the
+    request into coalesced tasks and worker threads without being passed
+    through every call.
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.seconds = seconds
+        self._clock = clock
+        self.expires_at = clock() + seconds
+        self.degradations: List[Dict] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def degrade(self, stage: str, action: str, detail: str = ""):
+        """Record that `stage` took a cheaper path (`action`) because time was short"""
+        remaining_ms = round(self.remaining() * 1000)
+        self.degradations.append({"stage": stage, "action": action, "detail": detail, "remaining_ms": remaining_ms})
+        record_degradation(stage, action)
+        logger.info("Deadline: %s degraded to %s with %dms left (%s)", stage, action, remaining_ms, detail)
+
+    async def run(self, awaitable: Awaitable, reserve: float = 0.0):
+        """
+        Await `awaitable` for at most the remaining time minus `reserve`
+        (time held back for later stages); raises DeadlineExceeded otherwise.
+        Work already running in a thread is not interrupted, only abandoned.
+        """
+        timeout = self.remaining() - reserve
+        if timeout <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded("no time left in the request budget")
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"stage exceeded its {timeout:.2f}s budget") from None
+
+    def max_tokens(self, requested: int, reserve: float = 0.0) -> int:
+        """Completion length that can still be generated before the deadline (0 if none)"""
+        seconds = self.remaining() - reserve - GENERATION_OVERHEAD_SECONDS
+        return max(0, min(requested, int(seconds * GENERATION_TOKENS_PER_SECOND)))
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline of the request being served, or None outside a request (no limit)"""
+    return _current.get()
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Make a new Deadline of `seconds` the current one for the enclosed code"""
+    deadline = Deadline(seconds)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+def degrade(stage: str, action: str, detail: str = ""):
+    """Record a degradation on the current deadline, or just count it outside a request"""
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.degrade(stage, action, detail)
+    else:
+        record_degradation(stage, action)
+        logger.info("%s degraded to %s (%s)", stage, action, detail)
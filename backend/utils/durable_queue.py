@@ -0,0 +1,210 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List
+from utils.state_backend import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+class DurableQueue:
+    """
+    At-least-once message queues in one SQLite file, one named queue per
+    producer (e.g. per ingestion channel).
+
+    `put` commits the message before returning, so accepted work survives a
+    restart. `claim` leases the oldest ready messages for `lease_seconds`: a
+    consumer acks them when done, or calls `retry` to make them ready again
+    after a delay. A message whose consumer died reappears when its lease
+    runs out. After `max_attempts` claims a message is dead-lettered: kept,
+    but no longer handed out.
+
+    Claims are atomic across processes (BEGIN IMMEDIATE), so every worker of
+    a preforked server can consume the same queue file. Consumers that must
+    not run concurrently, e.g. to keep per-key order, can share a named lock
+    (`acquire`/`release`) that expires like a lease if its owner dies.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 5):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self._conn = connect_sqlite(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                queue TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                available_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                dead INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_ready ON messages (queue, dead, available_at, id);
+            CREATE TABLE IF NOT EXISTS locks (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def reopen(self):
+        """Open a fresh connection, e.g. in a worker forked from a preloaded parent"""
+        self._lock = threading.Lock()
+        self._open()
+
+    def put(self, queue: str, payload: Any) -> int:
+        return self.put_many(queue, [payload])[0]
+
+    def put_many(self, queue: str, payloads: List[Any]) -> List[int]:
+        """Append messages in one transaction and return their ids"""
+        now = time.time()
+        ids = []
+        with self._lock, self._conn:
+            for payload in payloads:
+                cursor = self._conn.execute(
+                    "INSERT INTO messages (queue, payload, enqueued_at, available_at) VALUES (?, ?, ?, ?)",
+                    (queue, json.dumps(payload), now, now)
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def claim(self, queue: str, limit: int, lease_seconds: float = 300) -> List[Dict]:
+        """
+        Lease up to `limit` of the oldest ready messages. Returns dicts with
+        id, payload, enqueued_at and attempts (including this one).
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                rows = self._conn.execute(
+                    """SELECT id, payload, enqueued_at, attempts FROM messages
+                       WHERE queue = ? AND dead = 0 AND available_at <= ?
+                       ORDER BY available_at, id LIMIT ?""",
+                    (queue, now, limit)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE messages SET available_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        [(now + lease_seconds, row[0]) for row in rows]
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return [
+            {"id": row[0], "payload": json.loads(row[1]), "enqueued_at": row[2], "attempts": row[3] + 1}
+            for row in rows
+        ]
+
+    def ack(self, ids: List[int]):
+        """Remove processed messages"""
+        if not ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM messages WHERE id = ?", [(message_id,) for message_id in ids])
+
+    def retry(self, ids: List[int], error: str = "", delay_seconds: float = 0) -> int:
+        """
+        Make claimed messages ready again after `delay_seconds`, or dead-letter
+        those out of attempts. Returns how many were dead-lettered.
+        """
+        if not ids:
+            return 0
+        available_at = time.time() + delay_seconds
+        placeholders = ",".join("?" * len(ids))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"""UPDATE messages SET available_at = ?, last_error = ?, dead = (attempts >= ?)
+                    WHERE id IN ({placeholders})""",
+                (available_at, error[:500], self.max_attempts, *ids)
+            )
+            dead = self._conn.execute(
+                f"SELECT COUNT(*) FROM messages WHERE dead = 1 AND id IN ({placeholders})", ids
+            ).fetchone()[0]
+        if dead:
+            logger.warning("Dead-lettered %d message(s) after %d attempts: %s", dead, self.max_attempts, error)
+        return dead
+
+    def supersede(self, queue: str, field: str, value: Any, before_id: int) -> int:
+        """
+        Drop messages queued before `before_id` whose payload has the same
+        `field` value, for queues where only the latest message per key
+        matters. Returns how many were dropped; acks and retries of dropped
+        messages still leased by a consumer are no-ops.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM messages WHERE queue = ? AND id < ? AND json_extract(payload, ?) = ?",
+                (queue, before_id, f"$.{field}", value)
+            )
+        return cursor.rowcount
+
+    def acquire(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Take or renew the named lock for `ttl_seconds`; False while another owner holds it"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO locks (name, owner, expires_at) VALUES (?, ?, ?)
+                   ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                   WHERE locks.owner = excluded.owner OR locks.expires_at <= ?""",
+                (name, owner, now + ttl_seconds, now)
+            )
+            holder = self._conn.execute("SELECT owner FROM locks WHERE name = ?", (name,)).fetchone()[0]
+        return holder == owner
+
+    def release(self, name: str, owner: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def peek(self, queue: str, limit: int = 1000) -> List[Dict]:
+        """The newest `limit` waiting messages (ready or leased), without claiming them"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, enqueued_at FROM messages WHERE queue = ? AND dead = 0 ORDER BY id DESC LIMIT ?",
+                (queue, limit)
+            ).fetchall()
+        return [{"id": row[0], "payload": json.loads(row[1]), "enqueued_at": row[2]} for row in rows]
+
+    def stats(self, queue: str) -> Dict:
+        """Messages waiting (ready or leased), the age of the oldest one, and dead letters"""
+        with self._lock:
+            depth, oldest = self._conn.execute(
+                "SELECT COUNT(*), MIN(enqueued_at) FROM messages WHERE queue = ? AND dead = 0", (queue,)
+            ).fetchone()
+            dead = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE queue = ? AND dead = 1", (queue,)
+            ).fetchone()[0]
+        return {
+            "depth": depth,
+            "oldest_age_seconds": round(time.time() - oldest, 3) if oldest is not None else 0.0,
+            "dead": dead
+        }
+
+    def dead_letters(self, queue: str, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, enqueued_at, attempts, last_error FROM messages WHERE queue = ? AND dead = 1 ORDER BY id LIMIT ?",
+                (queue, limit)
+            ).fetchall()
+        return [
+            {"id": row[0], "payload": json.loads(row[1]), "enqueued_at": row[2], "attempts": row[3], "error": row[4]}
+            for row in rows
+        ]
+
+    def requeue_dead(self, queue: str) -> int:
+        """Give dead-lettered messages a fresh set of attempts"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE messages SET dead = 0, attempts = 0, available_at = ? WHERE queue = ? AND dead = 1",
+                (time.time(), queue)
+            )
+        return cursor.rowcount
@@ -0,0 +1,77 @@
+import re
+from typing import Dict, List, Optional, Union
+
+class KeywordMatcher:
+    """
+    Match a keyword vocabulary against text in a single regex pass.
+
+    The vocabulary maps labels to keyword lists (a plain list uses each keyword
+    as its own label). Labels keep the vocabulary's order, which is the priority
+    used by first(). Keywords match case-insensitively on word boundaries, so
+    "py" no longer matches inside "happy" and "go" no longer matches inside
+    "google". A trailing "*" turns a keyword into a prefix match, e.g.
+    "connector*" matches "connector" and "connectors".
+
+    Keywords of different labels may overlap ("google cloud" and "cloud
+    platform"): every label whose keyword occurs is reported, as if each
+    keyword were searched for on its own.
+    """
+
+    def __init__(self, vocabulary: Union[Dict[str, List[str]], List[str]]):
+        if not isinstance(vocabulary, dict):
+            vocabulary = {keyword: [keyword] for keyword in vocabulary}
+        self.labels = list(vocabulary.keys())
+        self._priority = {label: index for index, label in enumerate(self.labels)}
+
+        groups = []
+        self._label_patterns = []
+        for index, (label, keywords) in enumerate(vocabulary.items()):
+            # Longest first so that e.g. "google cloud platform" wins over "google cloud"
+            alternatives = [self._keyword_pattern(keyword) for keyword in sorted(keywords, key=len, reverse=True) if keyword]
+            if alternatives:
+                # Zero-width, so a match does not consume text another label's keyword overlaps
+                groups.append(f"(?=(?P<k{index}>{'|'.join(alternatives)}))")
+                self._label_patterns.append((label, re.compile("|".join(alternatives), re.IGNORECASE)))
+        self._pattern = re.compile("|".join(groups), re.IGNORECASE) if groups else None
+
+    @staticmethod
+    def _keyword_pattern(keyword: str) -> str:
+        is_prefix = keyword.endswith("*")
+        keyword = keyword.rstrip("*")
+        pattern = re.escape(keyword)
+        # Only enforce a boundary where the keyword itself starts/ends with a letter or digit,
+        # so keywords like ".net" or "c#" still match
+        if keyword[0].isalnum():
+            pattern = r"(?<![a-z0-9])" + pattern
+        if is_prefix:
+            pattern += r"[a-z0-9]*"
+        elif keyword[-1].isalnum():
+            pattern += r"(?![a-z0-9])"
+        return pattern
+
+    def find_all(self, text: str) -> List[str]:
+        """Return every label found in the text, in vocabulary priority order"""
+        if not text:
+            return []
+        # One search per label: keywords of two labels can start at the same position,
+        # where a single alternation would only report the first
+        return [label for label, pattern in self._label_patterns if pattern.search(text)]
+
+    def first(self, text: str) -> Optional[str]:
+        """Return the highest-priority label found in the text, or None"""
+        if not text or self._pattern is None:
+            return None
+        # At each position the alternation picks the highest-priority label starting there,
+        # so the best over all positions is the best label overall
+        best = None
+        for match in self._pattern.finditer(text):
+            index = int(match.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return self.labels[best] if best is not None else None
+
+    def matches(self, text: str) -> bool:
+        """Return True if any keyword occurs in the text"""
+        return bool(text) and self._pattern is not None and self._pattern.search(text) is not None
@@ -0,0 +1,103 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import os
+import random
+from config.settings import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_RATE
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including any `extra=` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of DEBUG records so per-item debug output can stay
+    enabled under load. INFO and above always pass.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, sample_rate: float = LOG_SAMPLE_RATE, stream=None):
+    """
+    Route all logging through a queue so request handlers never block on
+    stdout; a background listener thread formats and writes the records.
+    Safe to call more than once. The listener is restarted in forked
+    children (threads do not survive fork), so workers forked from a
+    preloaded parent keep logging.
+    """
+    global _listener
+    stop_logging()
+
+    stream_handler = logging.StreamHandler(stream)
+    if fmt == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Sample before enqueueing so dropped records cost nothing downstream
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging():
+    """Flush queued records and stop the listener thread, e.g. before os._exit in a worker"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _before_fork():
+    # Drain the queue and join the listener, so no lock is held mid-write when the process is copied
+    if _listener is not None:
+        _listener.stop()
+
+def _after_fork_in_parent():
+    if _listener is not None:
+        _listener.start()
+
+def _after_fork_in_child():
+    if _listener is not None:
+        # A fresh queue: the copied one may hold records the parent still writes out
+        log_queue = queue.Queue(-1)
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.handlers.QueueHandler):
+                handler.queue = log_queue
+        _listener.queue = log_queue
+        _listener.start()
+
+atexit.register(stop_logging)
+os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child)
@@ -0,0 +1,257 @@
+import logging
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from config.settings import OTEL_EXPORTER_OTLP_ENDPOINT, OTEL_SERVICE_NAME
+
+logger = logging.getLogger(__name__)
+
+# Stage latencies span cache hits (~1ms) to slow generations (tens of seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+
+STAGE_LATENCY = Histogram(
+    "copilot_stage_latency_seconds",
+    "Latency of each pipeline stage (classify, embed, vector_query, context_build, generate, followups, url_resolve)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "copilot_stage_errors_total",
+    "Pipeline stages that raised an exception",
+    ["stage"]
+)
+TOKENS = Counter(
+    "copilot_openai_tokens_total",
+    "OpenAI tokens used, by stage and kind (prompt/completion)",
+    ["stage", "kind"]
+)
+CACHE_REQUESTS = Counter(
+    "copilot_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"]
+)
+COALESCED_REQUESTS = Counter(
+    "copilot_coalesced_requests_total",
+    "Calls that joined an identical in-flight call instead of repeating it, by stage",
+    ["stage"]
+)
+EXTERNAL_CALLS = Counter(
+    "copilot_external_calls_total",
+    "Calls to external services (openai/pinecone) by stage",
+    ["service", "stage"]
+)
+EXTERNAL_ERRORS = Counter(
+    "copilot_external_errors_total",
+    "Failed calls to external services (openai/pinecone) by stage",
+    ["service", "stage"]
+)
+CIRCUIT_STATE = Gauge(
+    "copilot_circuit_state",
+    "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open)",
+    ["dependency"]
+)
+RETRIES = Counter(
+    "copilot_retries_total",
+    "Retries of transient external call failures",
+    ["dependency"]
+)
+RATE_LIMITED = Counter(
+    "copilot_rate_limited_total",
+    "429 rate-limit responses from external services",
+    ["dependency"]
+)
+RATE_LIMIT = Gauge(
+    "copilot_rate_limit_per_minute",
+    "Current adaptive request/token limit per minute (0 when unlimited)",
+    ["limit"]
+)
+RATE_LIMIT_WAIT = Histogram(
+    "copilot_rate_limit_wait_seconds",
+    "Time calls waited for rate limiter capacity",
+    ["dependency"],
+    buckets=LATENCY_BUCKETS
+)
+DEGRADATIONS = Counter(
+    "copilot_degradations_total",
+    "Stages that took a cheaper path because the request deadline was close",
+    ["stage", "action"]
+)
+QUEUE_DEPTH = Gauge(
+    "copilot_queue_depth",
+    "Requests waiting for a scheduler slot, per priority",
+    ["queue", "priority"]
+)
+QUEUE_WAIT = Histogram(
+    "copilot_queue_wait_seconds",
+    "Time requests waited for a scheduler slot, per priority",
+    ["queue", "priority"],
+    buckets=LATENCY_BUCKETS
+)
+SHED_REQUESTS = Counter(
+    "copilot_shed_requests_total",
+    "Requests turned away because their priority's queue was full",
+    ["queue", "priority"]
+)
+
+PROMPT_TOKENS = Counter(
+    "copilot_prompt_tokens_total",
+    "Prompt tokens sent per prompt template, by kind (prompt, or cached: served from the provider's prefix cache)",
+    ["template", "kind"]
+)
+PROMPT_PREFIX_TOKENS = Gauge(
+    "copilot_prompt_prefix_tokens",
+    "Estimated tokens in each prompt template's static, cacheable prefix",
+    ["template"]
+)
+CLASSIFICATION_OUTPUTS = Counter(
+    "copilot_classification_outputs_total",
+    "Model classification outputs by result (valid, repaired: valid after the repair call, failed: unusable, keyword fallback used)",
+    ["stage", "result"]
+)
+
+# Ingestion lag runs from sub-second (chat) to the batch wait and any backlog (email)
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+INGEST_MESSAGES = Counter(
+    "copilot_ingest_messages_total",
+    "Ingestion gateway messages per channel, by result (received, processed, retried, dead)",
+    ["channel", "result"]
+)
+INGEST_LAG = Histogram(
+    "copilot_ingest_lag_seconds",
+    "Time from a message being received to it being processed, per channel",
+    ["channel"],
+    buckets=LAG_BUCKETS
+)
+INGEST_QUEUE_DEPTH = Gauge(
+    "copilot_ingest_queue_depth",
+    "Messages waiting in each channel's queue",
+    ["channel"]
+)
+INGEST_OLDEST_AGE = Gauge(
+    "copilot_ingest_oldest_age_seconds",
+    "Age of the oldest message waiting in each channel's queue",
+    ["channel"]
+)
+
+VECTOR_OUTBOX_VECTORS = Counter(
+    "copilot_vector_outbox_vectors_total",
+    "Vectors through the upsert outbox per index, by result (queued, superseded, upserted, retried, dead)",
+    ["index", "result"]
+)
+VECTOR_OUTBOX_LAG = Histogram(
+    "copilot_vector_outbox_lag_seconds",
+    "Time from a vector being queued in the outbox to it being upserted",
+    ["index"],
+    buckets=LAG_BUCKETS
+)
+VECTOR_OUTBOX_PENDING = Gauge(
+    "copilot_vector_outbox_pending",
+    "Vectors waiting in the outbox per index",
+    ["index"]
+)
+
+def _setup_tracer():
+    """Return an OpenTelemetry tracer when an OTLP endpoint is configured and the SDK is installed"""
+    if not OTEL_EXPORTER_OTLP_ENDPOINT:
+        return None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk is not installed; tracing disabled")
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=OTEL_EXPORTER_OTLP_ENDPOINT)))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer(OTEL_SERVICE_NAME)
+
+tracer = _setup_tracer()
+
+# Callables receiving (stage, seconds) for every observed stage, e.g. the benchmark harness
+_stage_observers = []
+
+def add_stage_observer(observer):
+    _stage_observers.append(observer)
+
+def remove_stage_observer(observer):
+    _stage_observers.remove(observer)
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage duration in the latency histogram and notify stage observers"""
+    STAGE_LATENCY.labels(stage=stage).observe(seconds)
+    for observer in _stage_observers:
+        observer(stage, seconds)
+
+@contextmanager
+def trace_stage(stage: str, **attributes):
+    """
+    Time a pipeline stage into the stage latency histogram, and open an
+    OpenTelemetry span for it when tracing is enabled. Nested stages become
+    child spans.
+    """
+    span_context = tracer.start_as_current_span(stage, attributes=attributes) if tracer else nullcontext()
+    with span_context as span:
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception:
+            STAGE_ERRORS.labels(stage=stage).inc()
+            raise
+        finally:
+            observe_stage(stage, time.perf_counter() - start)
+
+@contextmanager
+def external_call(service: str, stage: str):
+    """Count a call to an external service, and count it as an error if it raises"""
+    EXTERNAL_CALLS.labels(service=service, stage=stage).inc()
+    try:
+        yield
+    except Exception:
+        EXTERNAL_ERRORS.labels(service=service, stage=stage).inc()
+        raise
+
+def record_tokens(stage: str, response) -> Optional[int]:
+    """Record prompt/completion token usage from an OpenAI response; returns total tokens if reported"""
+    try:
+        usage = response["usage"]
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+    except (AttributeError, KeyError, TypeError):
+        return None
+    if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+        return None
+    TOKENS.labels(stage=stage, kind="prompt").inc(prompt_tokens)
+    TOKENS.labels(stage=stage, kind="completion").inc(completion_tokens)
+    return prompt_tokens + completion_tokens
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+def record_coalesced(stage: str):
+    COALESCED_REQUESTS.labels(stage=stage).inc()
+
+def record_degradation(stage: str, action: str):
+    DEGRADATIONS.labels(stage=stage, action=action).inc()
+
+def record_classification_output(stage: str, result: str, count: int = 1):
+    if count:
+        CLASSIFICATION_OUTPUTS.labels(stage=stage, result=result).inc(count)
+
+def render_metrics():
+    """
+    Return (body, content_type) for the Prometheus /metrics endpoint. With
+    several workers (PROMETHEUS_MULTIPROC_DIR set by serve.py) every worker
+    writes its samples to that directory and this aggregates all of them.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
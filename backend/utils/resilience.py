@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+import urllib3
+from config.settings import (
+    OPENAI_REQUESTS_PER_MINUTE,
+    OPENAI_TOKENS_PER_MINUTE,
+    OPENAI_MAX_RETRIES,
+    PINECONE_REQUESTS_PER_MINUTE,
+    PINECONE_MAX_RETRIES,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    WEB_WORKERS
+)
+from utils.deadline import current_deadline
+from utils.metrics import (
+    CIRCUIT_STATE,
+    RATE_LIMIT,
+    RATE_LIMITED,
+    RATE_LIMIT_WAIT,
+    RETRIES
+)
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying, matched by class name so neither SDK version is required here
+# (openai 0.x and 1.x, Pinecone REST and gRPC)
+TRANSIENT_ERROR_NAMES = {
+    "RateLimitError", "APIError", "Timeout", "APITimeoutError", "APIConnectionError",
+    "ServiceUnavailableError", "InternalServerError", "TryAgain",
+    "ServiceException", "RpcError", "_InactiveRpcError", "PineconeUnavailableError"
+}
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the dependency while its circuit breaker is open"""
+
+def _status_code(error: Exception) -> Optional[int]:
+    for attribute in ("http_status", "status_code", "status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_rate_limit(error: Exception) -> bool:
+    return type(error).__name__ == "RateLimitError" or _status_code(error) == 429
+
+def is_transient(error: Exception) -> bool:
+    """Timeouts, connection failures, rate limits and 5xx responses"""
+    if isinstance(error, (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError)):
+        return True
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        # openai 0.x raises APIError for 4xx responses too; only retry the server-side ones
+        status = _status_code(error)
+        return status is None or status in TRANSIENT_STATUS_CODES
+    return _status_code(error) in TRANSIENT_STATUS_CODES
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The server's Retry-After hint, if the error carries response headers"""
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+def estimate_tokens(messages: Optional[List[Dict]] = None, text: str = "", max_tokens: int = 0) -> int:
+    """Rough token count for rate limiting: ~4 characters per token plus the completion budget"""
+    characters = len(text) + sum(len(message.get("content", "")) for message in messages or [])
+    return characters // 4 + max_tokens
+
+class TokenBucket:
+    """
+    Token bucket that adapts to rate limits: a 429 halves the allowed rate
+    (down to min_fraction of the configured limit) and each success restores
+    5% of it. A per_minute of 0 disables the bucket.
+
+    reserve() never blocks; it books the capacity and returns how long the
+    caller must wait before using it, so waiting happens outside the lock.
+    """
+
+    def __init__(self, name: str, per_minute: float, min_fraction: float = 0.1):
+        self.name = name
+        self.limit = per_minute / 60.0
+        self.rate = self.limit
+        self.min_rate = self.limit * min_fraction
+        # Up to one second of traffic may burst
+        self.capacity = max(self.limit, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        RATE_LIMIT.labels(limit=name).set(per_minute)
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit > 0
+
+    def reserve(self, amount: float = 1.0) -> float:
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def throttle(self):
+        if self.enabled:
+            with self._lock:
+                self.rate = max(self.min_rate, self.rate / 2)
+            RATE_LIMIT.labels(limit=self.name).set(self.rate * 60)
+
+    def recover(self):
+        if self.enabled and self.rate < self.limit:
+            with self._lock:
+                self.rate = min(self.limit, self.rate + self.limit * 0.05)
+            RATE_LIMIT.labels(limit=self.name).set(self.rate * 60)
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, failing calls fast
+    for `reset_timeout` seconds; then lets a single probe call through
+    (half-open) and closes again if it succeeds.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning("Circuit breaker %s: %s -> %s", self.name, self.state, state)
+        self.state = state
+        CIRCUIT_STATE.labels(dependency=self.name).set(self.STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """
+        Raise CircuitOpenError if the call should not be attempted. Returns
+        True if the call is the half-open probe, whose outcome must be recorded.
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._probing):
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            if self.state == self.HALF_OPEN:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+class ResiliencePolicy:
+    """
+    Rate limiting, jittered retries and a circuit breaker for one external
+    dependency, shared by every call site that uses it.
+
+    call() runs the SDK function synchronously (sleeping between retries), so
+    from async code use acall(), which runs it in a worker thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.name = name
+        self.requests = TokenBucket(f"{name}_requests", requests_per_minute)
+        self.tokens = TokenBucket(f"{name}_tokens", tokens_per_minute)
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+
+    def _wait_for_capacity(self, tokens: int):
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens) if tokens else 0.0)
+        if wait > 0:
+            RATE_LIMIT_WAIT.labels(dependency=self.name).observe(wait)
+            self._sleep(wait)
+
+    def call(self, function: Callable, *args, tokens: int = 0, **kwargs):
+        probe = self.breaker.allow()
+        attempt = 0
+        while True:
+            self._wait_for_capacity(tokens)
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    # The dependency answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+                if is_rate_limit(e):
+                    RATE_LIMITED.labels(dependency=self.name).inc()
+                    self.requests.throttle()
+                    self.tokens.throttle()
+                # Full jitter keeps clients that failed together from retrying together
+                delay = retry_after_seconds(e) or random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                # No point retrying once the request being served would time out first;
+                # a failed half-open probe reopens the circuit rather than retrying
+                deadline = current_deadline()
+                if probe or attempt >= self.max_retries or (deadline is not None and delay >= deadline.remaining()):
+                    self.breaker.record_failure()
+                    raise
+                attempt += 1
+                RETRIES.labels(dependency=self.name).inc()
+                logger.info("%s call failed (%s); retry %d/%d in %.2fs", self.name, e, attempt, self.max_retries, delay)
+                self._sleep(delay)
+                # Other callers' failures may have opened the circuit meanwhile
+                try:
+                    probe = self.breaker.allow()
+                except CircuitOpenError as open_error:
+                    raise open_error from e
+                continue
+            self.breaker.record_success()
+            self.requests.recover()
+            self.tokens.recover()
+            return result
+
+    async def acall(self, function: Callable, *args, tokens: int = 0, **kwargs):
+        return await asyncio.to_thread(self.call, function, *args, tokens=tokens, **kwargs)
+
+# Global instances. Account limits are split evenly between worker processes
+openai_policy = ResiliencePolicy(
+    "openai",
+    requests_per_minute=OPENAI_REQUESTS_PER_MINUTE / WEB_WORKERS,
+    tokens_per_minute=OPENAI_TOKENS_PER_MINUTE / WEB_WORKERS,
+    max_retries=OPENAI_MAX_RETRIES,
+    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=CIRCUIT_RESET_SECONDS
+)
+pinecone_policy = ResiliencePolicy(
+    "pinecone",
+    requests_per_minute=PINECONE_REQUESTS_PER_MINUTE / WEB_WORKERS,
+    max_retries=PINECONE_MAX_RETRIES,
+    base_delay=0.2,
+    max_delay=2.0,
+    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=CIRCUIT_RESET_SECONDS
+)
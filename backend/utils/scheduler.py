@@ -0,0 +1,126 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from config.settings import GENERATION_CONCURRENCY, LOW_PRIORITY_MAX_QUEUED
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.metrics import QUEUE_DEPTH, QUEUE_WAIT, SHED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("P0", "P1", "P2")
+
+class SchedulerFull(RuntimeError):
+    """Raised instead of queueing when a priority's queue is at its limit"""
+
+def request_priority(priority: Optional[str], sentiment: Optional[str] = None) -> str:
+    """Scheduling priority of a classified request: Urgent sentiment counts as P0"""
+    if priority == "P0" or sentiment == "Urgent":
+        return "P0"
+    return priority if priority in PRIORITIES else "P2"
+
+class PriorityScheduler:
+    """
+    Admission control for a limited pool of concurrent slots (e.g. OpenAI
+    generation capacity).
+
+    Up to `concurrency` holders run at once. Further requests wait, and a
+    freed slot goes to the most urgent waiter (P0 before P1 before P2,
+    first come first served within a priority), so production-blocking
+    tickets are not stuck behind how-to questions. A priority may have a
+    queue limit, past which requests are rejected with SchedulerFull so the
+    caller can serve them another way. Waiting is bounded by the current
+    request deadline. A concurrency of 0 disables scheduling.
+
+    Not thread-safe: use from the event loop only.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queued: Optional[Dict[str, int]] = None):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queued = max_queued or {}
+        self._active = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._depths = {priority: 0 for priority in PRIORITIES}
+        for priority in PRIORITIES:
+            QUEUE_DEPTH.labels(queue=name, priority=priority).set(0)
+
+    def saturated(self) -> bool:
+        """True if a new request would have to wait"""
+        return self.concurrency > 0 and (self._active >= self.concurrency or any(self._depths.values()))
+
+    def queue_depths(self) -> Dict[str, int]:
+        return dict(self._depths)
+
+    def snapshot(self) -> Dict:
+        return {"concurrency": self.concurrency, "active": self._active, "waiting": self.queue_depths()}
+
+    def _set_depth(self, priority: str, change: int):
+        self._depths[priority] += change
+        QUEUE_DEPTH.labels(queue=self.name, priority=priority).set(self._depths[priority])
+
+    async def acquire(self, priority: str):
+        priority = priority if priority in PRIORITIES else "P2"
+        if self.concurrency <= 0:
+            return
+        if self._active < self.concurrency and not self._waiters:
+            self._active += 1
+            QUEUE_WAIT.labels(queue=self.name, priority=priority).observe(0)
+            return
+
+        limit = self.max_queued.get(priority)
+        if limit is not None and self._depths[priority] >= limit:
+            SHED_REQUESTS.labels(queue=self.name, priority=priority).inc()
+            raise SchedulerFull(f"{self.name} queue for {priority} is full ({limit} waiting)")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.index(priority), next(self._sequence), future, priority))
+        self._set_depth(priority, 1)
+        deadline = current_deadline()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, deadline.remaining() if deadline else None)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                future.cancel()
+                self._set_depth(priority, -1)
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceeded(f"no {self.name} slot freed before the deadline") from None
+            raise
+        finally:
+            QUEUE_WAIT.labels(queue=self.name, priority=priority).observe(time.perf_counter() - start)
+
+    def release(self):
+        if self.concurrency <= 0:
+            return
+        while self._waiters:
+            _, _, future, priority = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            # Hand the slot straight to the most urgent waiter
+            self._set_depth(priority, -1)
+            future.set_result(None)
+            return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: str):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+# Global instance
+generation_scheduler = PriorityScheduler(
+    "generate",
+    GENERATION_CONCURRENCY,
+    max_queued={"P2": LOW_PRIORITY_MAX_QUEUED}
+)
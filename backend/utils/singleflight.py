@@ -0,0 +1,52 @@
+import asyncio
+import copy
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from utils.metrics import record_coalesced
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies of a message share a key"""
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+def _copy(result: Any) -> Any:
+    try:
+        return copy.deepcopy(result)
+    except Exception:
+        # SDK response objects that cannot be copied are shared as they are
+        return result
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of repeating it, and the key
+    is released as soon as it finishes, so nothing is cached beyond the
+    flight itself. Followers get a deep copy of the result, so callers may
+    mutate what they receive. A cancelled caller does not cancel the shared
+    work for the others.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            record_coalesced(self.stage)
+            return _copy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(work())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Every caller may have given up (e.g. at its deadline); don't report the error as unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
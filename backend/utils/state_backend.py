@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from config.settings import STATE_BACKEND, STATE_DB_PATH, STATE_MEMORY_MAX_ENTRIES, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Expired rows are swept from SQLite once every this many writes
+SQLITE_PURGE_INTERVAL = 256
+
+def connect_sqlite(db_path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite connection that several worker processes can share: WAL
+    lets readers proceed while one process writes, and the busy timeout makes
+    concurrent writers wait for the lock instead of failing.
+    """
+    conn = sqlite3.connect(db_path, timeout=10.0, check_same_thread=False)
+    if db_path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+class StateBackend:
+    """
+    Key-value store for caches and session state, partitioned into
+    namespaces. Values are JSON-serializable and may expire after a TTL.
+
+    The memory backend is private to the process. The SQLite and Redis
+    backends are shared by every worker, so a cache entry written by one
+    worker is a hit in the others.
+    """
+
+    shared = False
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    def clear(self, namespace: str) -> int:
+        """Remove every key in a namespace, returning how many were removed"""
+        raise NotImplementedError
+
+    def set_bounded(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float], max_entries: int) -> int:
+        """
+        Set a key, then evict the namespace's least recently written keys past
+        `max_entries`. Returns how many were evicted.
+        """
+        raise NotImplementedError
+
+class MemoryStateBackend(StateBackend):
+    """Per-process LRU, capped at `max_entries` per namespace"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._namespaces: Dict[str, "OrderedDict[str, tuple]"] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            entry = entries.get(key) if entries is not None else None
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and time.time() >= expires_at:
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            entries = self._namespaces.setdefault(namespace, OrderedDict())
+            entries[key] = (value, expires_at)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._namespaces.get(namespace, {}).pop(key, None)
+
+    def clear(self, namespace: str) -> int:
+        with self._lock:
+            return len(self._namespaces.pop(namespace, {}))
+
+    def set_bounded(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float], max_entries: int) -> int:
+        self.set(namespace, key, value, ttl_seconds)
+        evicted = 0
+        with self._lock:
+            entries = self._namespaces.get(namespace, {})
+            while len(entries) > max_entries:
+                entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+class SQLiteStateBackend(StateBackend):
+    """
+    State in a SQLite file on local disk, shared by the workers of one host.
+    Each process opens its own connection, including after a fork.
+    """
+
+    shared = True
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not be used across fork, so a forked worker opens its own
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = connect_sqlite(self.db_path)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS state (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )"""
+            )
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at)
+            )
+            self._writes += 1
+            if self._writes % SQLITE_PURGE_INTERVAL == 0:
+                conn.execute("DELETE FROM state WHERE expires_at <= ?", (time.time(),))
+            conn.commit()
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+            conn.commit()
+
+    def clear(self, namespace: str) -> int:
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute("DELETE FROM state WHERE namespace = ?", (namespace,)).rowcount
+            conn.commit()
+            return removed
+
+    def set_bounded(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float], max_entries: int) -> int:
+        # Keys of a bounded namespace share one TTL, so the soonest to expire were written longest ago
+        self.set(namespace, key, value, ttl_seconds)
+        with self._lock:
+            conn = self._connection()
+            count = conn.execute("SELECT COUNT(*) FROM state WHERE namespace = ?", (namespace,)).fetchone()[0]
+            if count <= max_entries:
+                return 0
+            evicted = conn.execute(
+                """DELETE FROM state WHERE namespace = ? AND key IN (
+                       SELECT key FROM state WHERE namespace = ? ORDER BY expires_at LIMIT ?
+                   )""",
+                (namespace, namespace, count - max_entries)
+            ).rowcount
+            conn.commit()
+            return evicted
+
+class RedisStateBackend(StateBackend):
+    """
+    State in a Redis-compatible server (Redis, Valkey, KeyDB, ...), shared by
+    workers on any host. Keys are `<prefix>:<namespace>:<key>` and expire
+    through the server's own TTLs.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, client=None, prefix: str = "copilot"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def _index_key(self, namespace: str) -> str:
+        # Write times of a bounded namespace's keys; outside the namespace's key pattern
+        return f"{self.prefix}-written:{namespace}"
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raw = self.client.get(self._key(namespace, key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        px = int(ttl_seconds * 1000) if ttl_seconds else None
+        self.client.set(self._key(namespace, key), json.dumps(value), px=px)
+
+    def delete(self, namespace: str, key: str):
+        self.client.delete(self._key(namespace, key))
+        self.client.zrem(self._index_key(namespace), key)
+
+    def clear(self, namespace: str) -> int:
+        self.client.delete(self._index_key(namespace))
+        keys = list(self.client.scan_iter(match=self._key(namespace, "*")))
+        return self.client.delete(*keys) if keys else 0
+
+    def set_bounded(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float], max_entries: int) -> int:
+        now = time.time()
+        index = self._index_key(namespace)
+        self.set(namespace, key, value, ttl_seconds)
+        self.client.zadd(index, {key: now})
+        if ttl_seconds:
+            # Keys the server has already expired
+            self.client.zremrangebyscore(index, "-inf", now - ttl_seconds)
+        excess = self.client.zcard(index) - max_entries
+        if excess <= 0:
+            return 0
+        oldest = [member.decode("utf-8") if isinstance(member, bytes) else member for member, _ in self.client.zpopmin(index, excess)]
+        self.client.delete(*[self._key(namespace, member) for member in oldest])
+        return len(oldest)
+
+def create_state_backend(kind: str, db_path: str = STATE_DB_PATH, redis_url: str = REDIS_URL) -> StateBackend:
+    """Build the backend named by STATE_BACKEND ("memory", "sqlite" or "redis")"""
+    if kind == "sqlite":
+        logger.info("Shared state in SQLite at %s", db_path)
+        return SQLiteStateBackend(db_path)
+    if kind == "redis":
+        try:
+            backend = RedisStateBackend(redis_url)
+            logger.info("Shared state in Redis at %s", redis_url)
+            return backend
+        except ImportError:
+            logger.warning("STATE_BACKEND is redis but the redis package is not installed; using SQLite at %s", db_path)
+            return SQLiteStateBackend(db_path)
+    if kind != "memory":
+        logger.warning("Unknown STATE_BACKEND %r; keeping state in memory", kind)
+    return MemoryStateBackend(STATE_MEMORY_MAX_ENTRIES)
+
+# Global instance
+state_backend = create_state_backend(STATE_BACKEND)
@@ -5,7 +5,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from
 import { Progress } from '@/components/ui/progress';
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '@/components/ui/table';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
-import { PriorityType, SentimentType, TicketData, TopicType } from '@/types/api';
+import { PriorityType, SentimentType, TicketData, TicketStats, TopicType } from '@/types/api';
 import { AlertTriangle, BarChart3, Brain, CheckSquare2, Clock, ExternalLink, Eye, Info, MessageSquare, Filter } from 'lucide-react';
 import { useState, useEffect } from 'react';
 import { apiService } from '@/lib/api';
@@ -197,11 +197,59 @@ function ClassificationDetails({ ticket }: ClassificationDetailsProps) {
   );
 }
 
-function SummaryCards({ tickets }: { tickets: TicketData[] }) {
-  const totalTickets = tickets.length;
-  const highPriorityCount = tickets.filter(t => t.classification.priority === 'P0').length;
-  const averageConfidence = tickets.reduce((sum, t) => sum + t.classification.confidence, 0) / totalTickets;
-  const averageProcessingTime = tickets.reduce((sum, t) => sum + t.processing_time, 0) / totalTickets;
+const PAGE_SIZE = 50;
+const TOPIC_OPTIONS: TopicType[] = ["How-to", "Product", "Connector", "Lineage", "API/SDK", "SSO", "Glossary", "Best practices", "Sensitive data", "General"];
+const SENTIMENT_OPTIONS: SentimentType[] = ["Urgent", "Frustrated", "Positive", "Neutral"];
+const PRIORITY_OPTIONS: PriorityType[] = ["P0", "P1", "P2"];
+
+function toTicketData(ticket: any): TicketData {
+  return {
+    id: ticket.id,
+    timestamp: ticket.created_at || new Date().toISOString(),
+    query: ticket.subject || 'No subject',
+    answer: ticket.body || 'No content available',
+    citations: [],
+    classification: {
+      topic: (ticket.topic || 'General') as TopicType,
+      sentiment: (ticket.sentiment || 'Neutral') as SentimentType,
+      priority: (ticket.priority || 'P2') as PriorityType,
+      confidence: ticket.confidence || 0.8
+    },
+    classification_reasons: {
+      topic: ticket.topic_reasoning || 'Auto-classified from backend data',
+      sentiment: ticket.sentiment_reasoning || 'Neutral classification',
+      priority: ticket.priority_reasoning || 'Standard priority'
+    },
+    processing_time: ticket.processing_time || 1.0,
+    cache_hit: ticket.cache_hit || false,
+    followup_suggestions: [],
+    session_id: 'backend-ticket',
+    response_type: (ticket.response_type || 'rag_response') as 'rag_response' | 'routing_message'
+  };
+}
+
+// Fallback when the stats endpoint is unavailable: summarize whatever tickets are loaded
+function statsFromTickets(tickets: TicketData[]): TicketStats {
+  const total = tickets.length;
+  return {
+    total,
+    by_topic: {},
+    by_sentiment: {},
+    by_priority: { P0: tickets.filter(t => t.classification.priority === 'P0').length },
+    by_channel: {},
+    breakdown: [],
+    average_confidence: total ? tickets.reduce((sum, t) => sum + t.classification.confidence, 0) / total : 0,
+    average_processing_time: total ? tickets.reduce((sum, t) => sum + t.processing_time, 0) / total : 0,
+    confidence_histogram: [],
+    processing_time_percentiles: { p50: 0, p95: 0, p99: 0 }
+  };
+}
+
+function SummaryCards({ stats }: { stats: TicketStats | null }) {
+  const totalTickets = stats?.total ?? 0;
+  const highPriorityCount = stats?.by_priority['P0'] ?? 0;
+  const averageConfidence = stats?.average_confidence ?? 0;
+  const averageProcessingTime = stats?.average_processing_time ?? 0;
 
   return (
     <div className="grid grid-cols-1 md:grid-cols-4 gap-4 mb-6">
@@ -257,18 +305,16 @@ function SummaryCards({ tickets }: { tickets: TicketData[] }) {
 }
 
 function FilterSection({ 
-  tickets, 
   filters, 
   onFilterChange 
 }: { 
-  tickets: TicketData[], 
   filters: { topic: string, sentiment: string, priority: string },
   onFilterChange: (key: string, value: string) => void 
 }) {
-  // Get unique values for filter options
-  const topics = Array.from(new Set(tickets.map(t => t.classification.topic))).sort();
-  const sentiments = Array.from(new Set(tickets.map(t => t.classification.sentiment))).sort();
-  const priorities = Array.from(new Set(tickets.map(t => t.classification.priority))).sort();
+  // Filtering happens server-side, so offer the full taxonomy rather than values on the current page
+  const topics = [...TOPIC_OPTIONS].sort();
+  const sentiments = [...SENTIMENT_OPTIONS].sort();
+  const priorities = [...PRIORITY_OPTIONS];
 
   return (
     <Card className="p-4 mb-6">
@@ -328,81 +374,63 @@ function FilterSection({
 
 export function BulkDashboard() {
   const [tickets, setTickets] = useState<TicketData[]>([]);
-  const [filteredTickets, setFilteredTickets] = useState<TicketData[]>([]);
+  const [stats, setStats] = useState<TicketStats | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState({
     topic: 'all',
     sentiment: 'all',
     priority: 'all'
   });
 
+  const fetchPage = (cursor: string | null) => apiService.getTickets({
+    ...filters,
+    cursor,
+    limit: PAGE_SIZE,
+    // Sort tickets by ID to maintain order
+    sort_by: 'id',
+    order: 'asc'
+  });
+
+  // Reload the first page whenever the filters change
   useEffect(() => {
     const fetchTickets = async () => {
       try {
         setLoading(true);
-        const response = await apiService.getTickets();
-        
-        const transformedTickets: TicketData[] = response.tickets.map((ticket: any) => ({
-          id: ticket.id,
-          timestamp: new Date().toISOString(),
-          query: ticket.subject || 'No subject',
-          answer: ticket.body || 'No content available',
-          citations: [],
-          classification: {
-            topic: (ticket.topic || 'General') as TopicType,
-            sentiment: (ticket.sentiment || 'Neutral') as SentimentType,
-            priority: (ticket.priority || 'P2') as PriorityType,
-            confidence: ticket.confidence || 0.8
-          },
-          classification_reasons: {
-            topic: ticket.topic_reasoning || 'Auto-classified from backend data',
-            sentiment: ticket.sentiment_reasoning || 'Neutral classification',
-            priority: ticket.priority_reasoning || 'Standard priority'
-          },
-          processing_time: ticket.processing_time || 1.0,
-          cache_hit: ticket.cache_hit || false,
-          followup_suggestions: [],
-          session_id: 'backend-ticket',
-          response_type: (ticket.response_type || 'rag_response') as 'rag_response' | 'routing_message'
-        }));
-        
-        // Sort tickets by ID to maintain order
-        transformedTickets.sort((a, b) => {
-          const aNum = parseInt(a.id.replace('TICKET-', ''));
-          const bNum = parseInt(b.id.replace('TICKET-', ''));
-          return aNum - bNum;
-        });
-        
-        setTickets(transformedTickets);
-        setFilteredTickets(transformedTickets);
+        const [response, ticketStats] = await Promise.all([
+          fetchPage(null),
+          apiService.getTicketStats(filters)
+        ]);
+        setTickets(response.tickets.map(toTicketData));
+        setStats(ticketStats);
+        setNextCursor(response.next_cursor ?? null);
       } catch (error) {
         console.error('Failed to fetch tickets:', error);
         setTickets(mockTickets);
-        setFilteredTickets(mockTickets);
+        setStats(statsFromTickets(mockTickets));
+        setNextCursor(null);
       } finally {
         setLoading(false);
       }
     };
 
     fetchTickets();
-  }, []);
-
-  // Apply filters whenever filters or tickets change
-  useEffect(() => {
-    let filtered = tickets;
+  }, [filters]);
 
-    if (filters.topic !== 'all') {
-      filtered = filtered.filter(ticket => ticket.classification.topic === filters.topic);
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const response = await fetchPage(nextCursor);
+      setTickets(prev => [...prev, ...response.tickets.map(toTicketData)]);
+      setNextCursor(response.next_cursor ?? null);
+    } catch (error) {
+      console.error('Failed to fetch more tickets:', error);
+    } finally {
+      setLoadingMore(false);
     }
-    if (filters.sentiment !== 'all') {
-      filtered = filtered.filter(ticket => ticket.classification.sentiment === filters.sentiment);
-    }
-    if (filters.priority !== 'all') {
-      filtered = filtered.filter(ticket => ticket.classification.priority === filters.priority);
-    }
-
-    setFilteredTickets(filtered);
-  }, [filters, tickets]);
+  };
 
   const handleFilterChange = (key: string, value: string) => {
     setFilters(prev => ({
@@ -422,10 +450,9 @@ export function BulkDashboard() {
         </div>
       </div>
 
-      <SummaryCards tickets={filteredTickets} />
+      <SummaryCards stats={stats} />
 
       <FilterSection 
-        tickets={tickets} 
         filters={filters} 
         onFilterChange={handleFilterChange} 
       />
@@ -443,7 +470,7 @@ export function BulkDashboard() {
             </TableRow>
           </TableHeader>
           <TableBody>
-            {filteredTickets.map((ticket) => (
+            {tickets.map((ticket) => (
               <TableRow key={ticket.id} className="hover:bg-muted/50">
                 <TableCell className="font-medium text-xs">{ticket.id}</TableCell>
                 <TableCell className="max-w-80">
@@ -494,6 +521,13 @@ export function BulkDashboard() {
             ))}
           </TableBody>
         </Table>
+        {nextCursor && (
+          <div className="flex justify-center p-4 border-t">
+            <Button variant="outline" size="sm" onClick={handleLoadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </div>
+        )}
       </Card>
     </div>
   );
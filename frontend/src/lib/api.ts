@@ -1,3 +1,5 @@
+import { TicketListParams, TicketStats } from '@/types/api';
+
 // Basic API service for the application
 export const apiService = {
   // Add your API methods here
@@ -51,10 +53,17 @@ export const apiService = {
     }
   },
 
-  // Get tickets endpoint
-  async getTickets() {
+  // Get tickets endpoint (one page at a time, filtered and sorted server-side)
+  async getTickets(params: TicketListParams = {}) {
     try {
-      const response = await fetch(`${this.baseURL}/tickets`);
+      const query = new URLSearchParams();
+      Object.entries(params).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '' && value !== 'all') {
+          query.set(key, String(value));
+        }
+      });
+      const queryString = query.toString();
+      const response = await fetch(`${this.baseURL}/tickets${queryString ? `?${queryString}` : ''}`);
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
@@ -62,5 +71,25 @@ export const apiService = {
     } catch (error) {
       throw new Error(`Failed to fetch tickets: ${error instanceof Error ? error.message : 'Unknown error'}`);
     }
+  },
+
+  // Get precomputed dashboard aggregates (optionally narrowed by topic/sentiment/priority)
+  async getTicketStats(params: Pick<TicketListParams, 'topic' | 'sentiment' | 'priority'> = {}): Promise<TicketStats> {
+    try {
+      const query = new URLSearchParams();
+      Object.entries(params).forEach(([key, value]) => {
+        if (value && value !== 'all') {
+          query.set(key, String(value));
+        }
+      });
+      const queryString = query.toString();
+      const response = await fetch(`${this.baseURL}/api/tickets/stats${queryString ? `?${queryString}` : ''}`);
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      return await response.json();
+    } catch (error) {
+      throw new Error(`Failed to fetch ticket stats: ${error instanceof Error ? error.message : 'Unknown error'}`);
+    }
   }
 };
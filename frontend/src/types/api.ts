@@ -76,3 +76,28 @@ export interface TicketData extends QueryResponse {
   timestamp: string;
   query: string;
 }
+
+export interface TicketListParams {
+  limit?: number;
+  cursor?: string | null;
+  topic?: string;
+  sentiment?: string;
+  priority?: string;
+  created_after?: string;
+  created_before?: string;
+  sort_by?: "created_at" | "priority" | "confidence" | "id";
+  order?: "asc" | "desc";
+}
+
+export interface TicketStats {
+  total: number;
+  by_topic: Record<string, number>;
+  by_sentiment: Record<string, number>;
+  by_priority: Record<string, number>;
+  by_channel: Record<string, number>;
+  breakdown: { topic: string; sentiment: string; priority: string; channel: string; count: number }[];
+  average_confidence: number;
+  average_processing_time: number;
+  confidence_histogram: { range: string; count: number }[];
+  processing_time_percentiles: { p50: number; p95: number; p99: number };
+}